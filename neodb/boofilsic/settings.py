@@ -98,6 +98,10 @@ env = environ.FileAwareEnv(
     NEODB_DOWNLOADER_CACHE_TIMEOUT=(int, 300),
     # Number of retries of downloader, when site is using RetryDownloader
     NEODB_DOWNLOADER_RETRIES=(int, 3),
+    # Directory of the on-disk downloader response cache, empty to disable
+    NEODB_DOWNLOADER_RESPONSE_CACHE_DIR=(str, ""),
+    # Max size of the downloader response cache, in MB
+    NEODB_DOWNLOADER_RESPONSE_CACHE_SIZE=(int, 1024),
     # Number of marks required for an item to be included in discover
     NEODB_MIN_MARKS_FOR_DISCOVER=(int, 1),
     # if True, only show title language with NEODB_PREFERRED_LANGUAGES
@@ -114,6 +118,8 @@ env = environ.FileAwareEnv(
     NEODB_DISABLE_CRON_JOBS=(list, []),
     # search sites
     NEODB_SEARCH_SITES=(list, []),
+    # cache catalog search results for X seconds, 0 to disable
+    NEODB_SEARCH_CACHE_TIMEOUT=(int, 300),
     # federated search peers
     NEODB_SEARCH_PEERS=(list, []),
     # INTEGRATED TAKAHE CONFIGURATION
@@ -327,10 +333,13 @@ DOWNLOADER_CUSTOMSCRAPER_URL = env("NEODB_DOWNLOADER_CUSTOMSCRAPER_URL", default
 DOWNLOADER_REQUEST_TIMEOUT = env("NEODB_DOWNLOADER_REQUEST_TIMEOUT")
 DOWNLOADER_CACHE_TIMEOUT = env("NEODB_DOWNLOADER_CACHE_TIMEOUT")
 DOWNLOADER_RETRIES = env("NEODB_DOWNLOADER_RETRIES")
+DOWNLOADER_RESPONSE_CACHE_DIR = env("NEODB_DOWNLOADER_RESPONSE_CACHE_DIR")
+DOWNLOADER_RESPONSE_CACHE_SIZE = env("NEODB_DOWNLOADER_RESPONSE_CACHE_SIZE")
 
 DISABLE_CRON_JOBS: list[str] = env("NEODB_DISABLE_CRON_JOBS")
 SEARCH_PEERS = env("NEODB_SEARCH_PEERS")
 SEARCH_SITES = env("NEODB_SEARCH_SITES")
+SEARCH_CACHE_TIMEOUT = env("NEODB_SEARCH_CACHE_TIMEOUT")
 
 FANOUT_LIMIT_DAYS = env("NEODB_FANOUT_LIMIT_DAYS")
 # ====== USER CONFIGUTRATION END ======
@@ -1,4 +1,5 @@
 from .downloaders import *
+from .http_clients import HttpClientRegistry, http_clients
 from .scrapers import *
 from .sites import *
 
@@ -22,4 +23,6 @@ __all__ = (  # noqa
     "RESPONSE_NETWORK_ERROR",
     "RESPONSE_INVALID_CONTENT",
     "RESPONSE_CENSORSHIP",
+    "HttpClientRegistry",
+    "http_clients",
 )
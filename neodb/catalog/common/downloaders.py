@@ -8,20 +8,20 @@ from urllib.parse import quote, urlencode, urlparse
 
 import filetype
 import httpx
-import requests
 from django.conf import settings
 from django.core.cache import cache
 from loguru import logger
 from lxml import etree, html
 from PIL import Image
-from requests import Response
-from requests.exceptions import RequestException
 
 from common.models import SiteConfig, register_language_cache_refresh
 from common.sentry import count as sentry_count
 from common.sentry import url_domain
 from common.validators import is_valid_url
 
+from .http_clients import http_clients
+from .response_cache import get_response_cache
+
 RESPONSE_OK = 0  # response is ready for pasring
 RESPONSE_INVALID_CONTENT = -1  # content not valid but no need to retry
 RESPONSE_NETWORK_ERROR = -2  # network error, retry next proxied url
@@ -104,16 +104,14 @@ class MockResponse:
         return {"content-type": "image/jpeg" if ".jpg" in self.url else "text/html"}
 
 
-class DownloaderResponse(Response):
-    url: str
-
+class DownloaderResponse(httpx.Response):
     def html(self):
         return html.fromstring(  # may throw exception unexpectedly due to OS bug, see https://github.com/neodb-social/neodb/issues/5
             self.content.decode("utf-8")
         )
 
     def xml(self):
-        return etree.fromstring(self.content, base_url=self.url)
+        return etree.fromstring(self.content, base_url=str(self.url))
 
 
 class ScraperResponse:
@@ -149,12 +147,8 @@ class ScraperResponse:
         return self._headers
 
 
-class DownloaderResponse2(httpx.Response):
-    def html(self):
-        return html.fromstring(self.content.decode("utf-8"))
-
-    def xml(self):
-        return etree.fromstring(self.content, base_url=str(self.url))
+class DownloaderResponse2(DownloaderResponse):
+    pass
 
 
 # Type alias for all response types returned by downloaders
@@ -195,6 +189,8 @@ class BasicDownloader:
             case _:
                 return "en-US;q=0.3,en;q=0.2"
 
+    follow_redirects = True
+    response_class = DownloaderResponse
     headers = {
         # "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:107.0) Gecko/20100101 Firefox/107.0",
         "User-Agent": "Mozilla/5.0 (iPad; CPU OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1",
@@ -254,16 +250,43 @@ class BasicDownloader:
         else:
             return RESPONSE_INVALID_CONTENT
 
+    def _get(self, url: str) -> httpx.Response:
+        """GET url, revalidating a copy from the response cache if there is one."""
+        kwargs = {"timeout": self.timeout, "follow_redirects": self.follow_redirects}
+        rc = get_response_cache()
+        cached = rc.get(url, self.headers) if rc else None
+        if not cached:
+            resp = http_clients.get(url, headers=self.headers, **kwargs)
+            if rc and resp.status_code == 200:
+                rc.set(url, resp.status_code, resp.headers, resp.content, self.headers)
+            return resp
+        resp = http_clients.get(
+            url, headers={**self.headers, **cached.validators}, **kwargs
+        )
+        if resp.status_code == 304:
+            sentry_count(
+                "catalog.download.revalidated",
+                attributes={"domain": url_domain(url)},
+            )
+            return httpx.Response(
+                cached.status_code,
+                headers=cached.headers,
+                content=cached.content,
+                request=resp.request,
+            )
+        if resp.status_code == 200:
+            rc.set(  # type: ignore
+                url, resp.status_code, resp.headers, resp.content, self.headers
+            )
+        return resp
+
     def _download(
         self, url
     ) -> Tuple[DownloaderResponse | DownloaderResponse2 | MockResponse | None, int]:
         try:
             if not _mock_mode:
-                resp = cast(
-                    DownloaderResponse,
-                    requests.get(url, headers=self.headers, timeout=self.timeout),
-                )
-                resp.__class__ = DownloaderResponse
+                resp = cast(DownloaderResponse, self._get(url))
+                resp.__class__ = self.response_class
                 if settings.DOWNLOADER_SAVEDIR:
                     savedir = Path(settings.DOWNLOADER_SAVEDIR).resolve()
                     target = (savedir / get_mock_file(url)).resolve()
@@ -280,8 +303,7 @@ class BasicDownloader:
                 {"response_type": response_type, "url": url, "exception": None}
             )
             return resp, response_type
-        except RequestException as e:
-            # logger.debug(f"RequestException: {e}")
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
             self.logs.append(
                 {"response_type": RESPONSE_NETWORK_ERROR, "url": url, "exception": e}
             )
@@ -302,43 +324,9 @@ register_language_cache_refresh(BasicDownloader._refresh_accept_language)
 
 
 class BasicDownloader2(BasicDownloader):
-    def _download(self, url):
-        try:
-            if not _mock_mode:
-                resp = cast(
-                    DownloaderResponse2,
-                    httpx.get(url, headers=self.headers, timeout=self.timeout),
-                )
-                resp.__class__ = DownloaderResponse2
-                if settings.DOWNLOADER_SAVEDIR:
-                    savedir = Path(settings.DOWNLOADER_SAVEDIR).resolve()
-                    target = (savedir / get_mock_file(url)).resolve()
-                    if target.is_relative_to(savedir):
-                        try:
-                            with open(target, "w", encoding="utf-8") as fp:
-                                fp.write(resp.text)
-                        except Exception:
-                            logger.warning("Save downloaded data failed.")
-            else:
-                resp = MockResponse(self.url)
-            response_type = self.validate_response(resp)
-            self.logs.append(
-                {"response_type": response_type, "url": url, "exception": None}
-            )
-
-            return resp, response_type
-        except (RequestException, httpx.HTTPError) as e:
-            self.logs.append(
-                {"response_type": RESPONSE_NETWORK_ERROR, "url": url, "exception": e}
-            )
-            return None, RESPONSE_NETWORK_ERROR
-
-    def download(self) -> ResponseType:
-        self._record_download_invocation()
-        resp, self.response_type = self._download(self.url)
-        if self.response_type == RESPONSE_OK and resp:
-            return resp
-        raise DownloadError(self)
+    # unlike BasicDownloader, a redirect is returned as is (and fails validation)
+    follow_redirects = False
+    response_class = DownloaderResponse2
 
 
 class ProxiedDownloader(BasicDownloader):
@@ -541,7 +529,7 @@ class ScrapDownloader(BasicDownloader):
         api_url = f"https://api.scrapfly.io/scrape?{urlencode(params)}"
 
         try:
-            response = requests.get(api_url, timeout=self.timeout)
+            response = http_clients.get(api_url, timeout=self.timeout)
 
             if response.status_code == 200:
                 data = response.json()
@@ -616,7 +604,7 @@ class ScrapDownloader(BasicDownloader):
         headers = {"Authorization": f"Basic {token}"}
 
         try:
-            response = requests.post(
+            response = http_clients.post(
                 api_url, json=payload, headers=headers, timeout=self.timeout
             )
 
@@ -681,7 +669,7 @@ class ScrapDownloader(BasicDownloader):
         api_url = f"https://api.scraperapi.com?{urlencode(params)}"
 
         try:
-            response = requests.get(api_url, timeout=self.timeout)
+            response = http_clients.get(api_url, timeout=self.timeout)
 
             if response.status_code == 200:
                 resp = ScraperResponse(
@@ -745,7 +733,7 @@ class ScrapDownloader(BasicDownloader):
         api_url = f"https://app.scrapingbee.com/api/v1/?{urlencode(params)}"
 
         try:
-            response = requests.get(api_url, timeout=self.timeout)
+            response = http_clients.get(api_url, timeout=self.timeout)
 
             if response.status_code == 200:
                 resp = ScraperResponse(
@@ -823,7 +811,7 @@ class ScrapDownloader(BasicDownloader):
             return None, RESPONSE_NETWORK_ERROR
 
         try:
-            response = requests.get(api_url, timeout=self.timeout)
+            response = http_clients.get(api_url, timeout=self.timeout)
 
             if response.status_code == 200:
                 resp = ScraperResponse(
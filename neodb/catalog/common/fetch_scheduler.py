@@ -0,0 +1,149 @@
+"""Concurrent fetching of linked resources, paced per host.
+
+Crawling an album's tracks or a show's seasons used to fetch one linked
+resource after another inside a single rq job, each paying its full upstream
+latency. ``FetchScheduler`` runs a batch of fetch jobs on a thread pool
+instead: jobs are grouped by host and each host gets as many lanes as its
+``RedisRateLimiter`` budget allows (or ``site_concurrency`` when the site has
+no limiter), so hosts are fetched in parallel without any of them being hit
+faster than before. The downloaders still acquire their limiter slots; the
+lanes only keep threads from piling up behind one.
+
+Jobs for a url already being fetched elsewhere (holding its fetch lock, see
+``catalog.search.utils.get_fetch_lock``) wait for that fetch to land before
+running, so the same resource is not downloaded twice concurrently.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from loguru import logger
+
+_in_worker = threading.local()
+
+
+@dataclass
+class FetchJob:
+    fn: Callable[[], Any]
+    """ does the fetch and returns its result; None means nothing was fetched """
+    host: str = ""
+    """ jobs of the same host share its lanes """
+    concurrency: int = 0
+    """ lanes for the host, 0 for the scheduler default """
+    url: str | None = None
+    """ url for the fetch lock, None to skip locking """
+    is_ready: Callable[[], bool] | None = None
+    """ whether a fetch of url by someone else has landed """
+
+
+class FetchScheduler:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        site_concurrency: int = 4,
+        lock_wait: float = 30.0,
+        poll_interval: float = 0.5,
+    ):
+        """
+        max_workers: threads for the whole batch.
+        site_concurrency: lanes for a host without a rate limiter.
+        lock_wait: seconds to wait for a fetch in flight elsewhere, after
+            which the job runs anyway.
+        """
+        self.max_workers = max_workers
+        self.site_concurrency = site_concurrency
+        self.lock_wait = lock_wait
+        self.poll_interval = poll_interval
+
+    def run(self, jobs: list[FetchJob]) -> list[Any]:
+        """Run jobs and return their results in order, once all are done.
+
+        Jobs run sequentially in the calling thread when it is inside a
+        transaction (other threads would not see its uncommitted rows) or is
+        itself a scheduler worker, e.g. for parents fetched by a linked
+        resource.
+        """
+        results: list[Any] = [None] * len(jobs)
+        if (
+            len(jobs) < 2
+            or connection.in_atomic_block
+            or getattr(_in_worker, "active", False)
+        ):
+            for n, job in enumerate(jobs):
+                results[n] = self._run_job(job)
+            return results
+        lanes: dict[str, deque[int]] = {}
+        for n, job in enumerate(jobs):
+            lanes.setdefault(job.host, deque()).append(n)
+        workers = []
+        for host, queue in lanes.items():
+            limit = jobs[queue[0]].concurrency or self.site_concurrency
+            workers += [queue] * min(limit, len(queue))
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(workers)),
+            thread_name_prefix="fetch",
+        ) as executor:
+            for f in [executor.submit(self._lane, q, jobs, results) for q in workers]:
+                f.result()
+        return results
+
+    def _lane(self, queue: deque[int], jobs: list[FetchJob], results: list) -> None:
+        _in_worker.active = True
+        try:
+            while True:
+                try:
+                    n = queue.popleft()
+                except IndexError:
+                    return
+                results[n] = self._run_job(jobs[n])
+        finally:
+            _in_worker.active = False
+            connections.close_all()
+
+    def _run_job(self, job: FetchJob) -> Any:
+        locked = self._lock(job)
+        result = None
+        try:
+            result = job.fn()
+        except Exception as e:
+            logger.error(f"fetch job failed for {job.url or job.host}: {e}")
+        finally:
+            if locked:
+                self._release(job.url, result is not None)
+        return result
+
+    def _lock(self, job: FetchJob) -> bool:
+        """Claim the fetch lock of job.url, or wait for its holder's fetch."""
+        if not job.url:
+            return False
+        from catalog.search.utils import FETCH_URL_LOCK_TTL
+
+        key = f"_fetch_lock:{job.url}"
+        ttl = 1 if settings.DEBUG else FETCH_URL_LOCK_TTL
+        if cache.add(key, 1, timeout=ttl):
+            return True
+        if job.is_ready:
+            deadline = time.monotonic() + self.lock_wait
+            while not job.is_ready() and time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+        return False
+
+    @staticmethod
+    def _release(url: str | None, fetched: bool) -> None:
+        from catalog.search.utils import mark_fetch_completed
+
+        if fetched:
+            mark_fetch_completed(url)
+        else:
+            # let the next attempt retry right away
+            cache.delete(f"_fetch_lock:{url}")
+
+
+fetch_scheduler = FetchScheduler()
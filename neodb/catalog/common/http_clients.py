@@ -0,0 +1,127 @@
+"""Process-wide pooled HTTP clients for catalog downloads.
+
+Downloaders used to call ``requests.get()`` / ``httpx.get()`` per download,
+so every fetch from hosts hit thousands of times a day (TMDB, Google Books,
+bgm.tv, ...) paid for a fresh TCP and TLS handshake. ``HttpClientRegistry``
+keeps one ``httpx.Client`` per origin instead, with keep-alive, per-host
+connection limits and HTTP/2 when the ``h2`` package is installed.
+
+Clients are dropped (not closed) when the registry is used from a forked
+process, since gunicorn workers and rq work-horses must not share sockets
+with their parent.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+
+class HttpClientRegistry:
+    def __init__(
+        self,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 30,
+        max_hosts: int = 100,
+    ):
+        """
+        max_connections: connections per host, busy or idle.
+        max_keepalive_connections: idle connections kept open per host.
+        max_hosts: clients kept at once; the least recently used is closed.
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._clients: OrderedDict[str, httpx.Client] = OrderedDict()
+        self._requests: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        u = urlsplit(url)
+        return f"{u.scheme}://{u.netloc}".lower()
+
+    def get_client(self, url: str) -> httpx.Client:
+        origin = self._origin(url)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            client = self._clients.get(origin)
+            if client:
+                self._clients.move_to_end(origin)
+                return client
+            client = httpx.Client(limits=self.limits, http2=HTTP2_AVAILABLE)
+            self._clients[origin] = client
+            while len(self._clients) > self.max_hosts:
+                _, evicted = self._clients.popitem(last=False)
+                evicted.close()
+            return client
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request with the pooled client for url's origin.
+
+        kwargs are passed to ``httpx.Client.request()``; the response body is
+        read before returning, so the connection goes back to the pool.
+        """
+        origin = self._origin(url)
+        client = self.get_client(url)
+        self._requests[origin] = self._requests.get(origin, 0) + 1
+        try:
+            return client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self._errors[origin] = self._errors.get(origin, 0) + 1
+            raise
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Requests, errors and open/idle connections per origin in this process."""
+        r = {}
+        with self._lock:
+            clients = list(self._clients.items())
+        for origin, client in clients:
+            # httpx does not expose pool state publicly; read what httpcore has
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            r[origin] = {
+                "requests": self._requests.get(origin, 0),
+                "errors": self._errors.get(origin, 0),
+                "connections": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+            }
+        return r
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values()) if self._pid == os.getpid() else []
+            self._reset()
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"error closing http client: {e}")
+
+
+http_clients = HttpClientRegistry()
@@ -88,6 +88,11 @@ class RedisRateLimiter:
         self._script_lock = threading.Lock()
         self._script: "Script | None" = None
 
+    @property
+    def rate(self) -> float:
+        """Requests per second."""
+        return 1.0 / self.interval
+
     def _load_script(self) -> "Script | None":
         with self._script_lock:
             if self._script is not None:
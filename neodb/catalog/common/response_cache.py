@@ -0,0 +1,269 @@
+"""Persistent cache of downloaded responses, revalidated with conditional GETs.
+
+Responses that carry an ``ETag`` or ``Last-Modified`` validator are kept on
+disk, keyed by normalized URL; the next download of that URL sends
+``If-None-Match`` / ``If-Modified-Since`` and, on ``304 Not Modified``, is
+served from the stored copy. Refetching an unchanged TMDB, Spotify or IGDB
+resource then costs an empty 304 instead of the full payload, and against
+the site's quota where the API does not count 304s.
+
+Entries are keyed by normalized URL plus the request headers a server
+may vary the content by (``_KEYED_HEADERS``); a response varying by any
+other header is not stored.
+
+Bodies are content-addressed (stored once per sha256, shared by URLs with
+identical content) next to a SQLite index of entries, with triggers keeping
+the total size of entries up to date; when it goes over the limit, the
+least recently used entries are evicted. The cache is shared by all
+processes using the same directory, and any error in it is treated as a
+miss, never as a download failure.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from loguru import logger
+
+# headers describing the transfer rather than the content; bodies are stored
+# decoded, so encoding and length must not be replayed either
+_SKIPPED_HEADERS = {
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "content-encoding",
+    "content-length",
+    "set-cookie",
+    "date",
+    "age",
+}
+
+
+# request headers responses commonly vary by; part of the cache key
+_KEYED_HEADERS = ("accept", "accept-language", "authorization")
+# varying by these needs no key: bodies are stored decoded
+_UNKEYED_VARY_HEADERS = {"accept-encoding"}
+
+
+def normalize_url(url: str) -> str:
+    u = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(u.query, keep_blank_values=True)))
+    return urlunsplit((u.scheme.lower(), u.netloc.lower(), u.path or "/", query, ""))
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers to revalidate this response."""
+        h = {}
+        if self.headers.get("etag"):
+            h["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            h["If-Modified-Since"] = self.headers["last-modified"]
+        return h
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, body TEXT NOT NULL, status INTEGER NOT NULL, "
+                "headers TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)"
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO totals "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries "
+                "BEGIN UPDATE totals SET size = size + new.size; END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_update "
+                "AFTER UPDATE OF size ON entries "
+                "BEGIN UPDATE totals SET size = size + new.size - old.size; END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries "
+                "BEGIN UPDATE totals SET size = size - old.size; END"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path / "index.sqlite3", timeout=5)
+
+    @staticmethod
+    def _key(url: str, request_headers=None) -> str:
+        h = {k.lower(): v for k, v in (request_headers or {}).items()}
+        varied = [f"{k}: {h[k]}" for k in _KEYED_HEADERS if h.get(k)]
+        return hashlib.sha256(
+            "\n".join([normalize_url(url)] + varied).encode()
+        ).hexdigest()
+
+    def _body_path(self, digest: str) -> Path:
+        return self.path / digest[:2] / digest
+
+    def get(self, url: str, request_headers=None) -> CachedResponse | None:
+        key = self._key(url, request_headers)
+        try:
+            with closing(self._connect()) as db, db:
+                row = db.execute(
+                    "SELECT body, status, headers FROM entries WHERE key=?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                content = self._body_path(row[0]).read_bytes()
+                db.execute(
+                    "UPDATE entries SET accessed=? WHERE key=?", (time.time(), key)
+                )
+            return CachedResponse(row[1], json.loads(row[2]), content)
+        except FileNotFoundError:
+            # body removed by a concurrent eviction
+            pass
+        except Exception as e:
+            logger.warning(f"response cache: unable to read {url}: {e}")
+        return None
+
+    def set(
+        self,
+        url: str,
+        status_code: int,
+        headers,
+        content: bytes,
+        request_headers=None,
+    ) -> bool:
+        """Store a response if it has a validator to revalidate it with."""
+        h = {
+            k.lower(): v
+            for k, v in headers.items()
+            if k.lower() not in _SKIPPED_HEADERS
+        }
+        if not (h.get("etag") or h.get("last-modified")):
+            return False
+        if "no-store" in h.get("cache-control", "").lower():
+            return False
+        if len(content) > self.max_bytes // 10:
+            return False
+        vary = {v.strip().lower() for v in h.get("vary", "").split(",") if v.strip()}
+        if vary - _UNKEYED_VARY_HEADERS - set(_KEYED_HEADERS):
+            # varies by something else (or "*"), which the key can't tell apart
+            return False
+        digest = hashlib.sha256(content).hexdigest()
+        try:
+            body = self._body_path(digest)
+            if not body.exists():
+                body.parent.mkdir(exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=body.parent)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, body)
+            with closing(self._connect()) as db, db:
+                # an upsert rather than INSERT OR REPLACE, whose implicit
+                # delete would not fire the trigger keeping the total size
+                db.execute(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET body=excluded.body, "
+                    "status=excluded.status, headers=excluded.headers, "
+                    "size=excluded.size, accessed=excluded.accessed",
+                    (
+                        self._key(url, request_headers),
+                        digest,
+                        status_code,
+                        json.dumps(h),
+                        len(content),
+                        time.time(),
+                    ),
+                )
+            self.evict()
+            return True
+        except Exception as e:
+            logger.warning(f"response cache: unable to store {url}: {e}")
+            return False
+
+    def delete(self, url: str, request_headers=None) -> None:
+        with closing(self._connect()) as db, db:
+            self._delete_keys(db, [self._key(url, request_headers)])
+
+    def _delete_keys(self, db: sqlite3.Connection, keys: list[str]) -> None:
+        bodies = set()
+        for key in keys:
+            row = db.execute("SELECT body FROM entries WHERE key=?", (key,)).fetchone()
+            if row:
+                bodies.add(row[0])
+            db.execute("DELETE FROM entries WHERE key=?", (key,))
+        for digest in bodies:
+            # a body may still be shared by another url with the same content
+            if not db.execute(
+                "SELECT 1 FROM entries WHERE body=? LIMIT 1", (digest,)
+            ).fetchone():
+                self._body_path(digest).unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """Total size of stored bodies (shared bodies are counted per entry)."""
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT size FROM totals").fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under 90% of max size."""
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        target = total - self.max_bytes * 9 // 10
+        keys = []
+        freed = 0
+        with closing(self._connect()) as db, db:
+            for key, size in db.execute(
+                "SELECT key, size FROM entries ORDER BY accessed"
+            ).fetchall():
+                if freed >= target:
+                    break
+                keys.append(key)
+                freed += size
+            self._delete_keys(db, keys)
+        return len(keys)
+
+
+_cache: ResponseCache | None = None
+_cache_config: tuple[str, int] | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """The cache configured by NEODB_DOWNLOADER_RESPONSE_CACHE_DIR, if any."""
+    global _cache, _cache_config
+    path = settings.DOWNLOADER_RESPONSE_CACHE_DIR
+    if not path:
+        return None
+    config = (path, settings.DOWNLOADER_RESPONSE_CACHE_SIZE * 1024 * 1024)
+    if _cache_config != config:
+        _cache_config = config
+        try:
+            _cache = ResponseCache(*config)
+        except Exception as e:
+            logger.error(f"response cache: unable to open {path}: {e}")
+            _cache = None
+    return _cache
@@ -10,11 +10,13 @@ ResourceContent persists as an ExternalResource which may link to an Item
 import json
 import re
 from dataclasses import dataclass, field
+from functools import partial
 from hashlib import md5
-from typing import Type, TypeVar
+from typing import TYPE_CHECKING, Iterable, Type, TypeVar
 
 import django_rq
-import requests
+import httpx
+from django.conf import settings
 from django.core.cache import cache
 from django.db import IntegrityError, transaction
 from loguru import logger
@@ -27,6 +29,11 @@ from common.validators import is_valid_url
 
 from ..models import ExternalResource, IdType, Item, SiteName
 from .downloaders import DownloadError
+from .fetch_scheduler import FetchJob, fetch_scheduler
+from .http_clients import http_clients
+
+if TYPE_CHECKING:
+    from .rate_limit import RedisRateLimiter
 
 
 @dataclass
@@ -103,6 +110,12 @@ class AbstractSite:
     def clear_cache(self):
         self.resource = None
 
+    @classmethod
+    def get_rate_limiter(cls) -> "RedisRateLimiter | None":
+        """Limiter paced by this site's downloader, if any; it also caps
+        how many of its linked resources are fetched at once."""
+        return None
+
     def get_resource(self) -> ExternalResource:
         if not self.resource:
             self.resource = ExternalResource.objects.filter(url=self.url).first()
@@ -261,8 +274,8 @@ class SiteManager:
         if not is_valid_url(url):
             return url
         try:
-            u = requests.head(url, allow_redirects=True, timeout=2).url
-        except requests.RequestException:
+            u = str(http_clients.head(url, follow_redirects=True, timeout=2).url)
+        except httpx.HTTPError, httpx.InvalidURL:
             logger.warning(f"HEAD timeout: {url}")
             u = url
         cache.set(k, u if u != url else "", 3600)
@@ -321,6 +334,63 @@ class SiteManager:
         cls = SiteManager.registry[id_type]
         return cls(id_value=id_value)
 
+    @staticmethod
+    def resolve_many(urls: Iterable[str]) -> dict[str, Item]:
+        """Map urls to items already in catalog, with a few queries and no requests.
+
+        Local item urls are looked up by uid; others are normalized by their
+        site to ``(id_type, id_value)`` and resolved together with
+        ``Item.get_by_lookup_ids_bulk()``. Redirections are not followed, so
+        urls missing from the result may still be resolved by fetching them.
+        """
+        site_url = settings.SITE_INFO["site_url"] + "/"
+        local: dict[str, object] = {}
+        lookups: dict[str, tuple[str, str]] = {}
+        unknown: list[str] = []
+        for url in uniq(list(urls)):
+            if url.startswith("/") or url.startswith(site_url):
+                try:
+                    local[url] = Item.get_uid_by_url(url)
+                except Exception:
+                    pass
+                continue
+            # fallback classes (e.g. other NeoDB instances) are only detected
+            # by fetching the url, so those are matched by resource url instead
+            cls = SiteManager.get_class_by_url(url)
+            id_value = cls.url_to_id(url) if cls else None
+            if cls and id_value:
+                lookups[url] = (cls.ID_TYPE, id_value)
+            else:
+                unknown.append(url)
+        r = {}
+        if unknown:
+            pks = dict(
+                ExternalResource.objects.filter(
+                    url__in=unknown, item_id__isnull=False, scraped_time__isnull=False
+                )
+                .exclude(metadata={})
+                .values_list("url", "item_id")
+            )
+            items = Item.get_final_items_by_pk(pks.values())
+            for url, pk in pks.items():
+                if pk in items:
+                    r[url] = items[pk]
+        if local:
+            pks = dict(
+                Item.objects.filter(uid__in=local.values()).values_list("uid", "pk")
+            )
+            items = Item.get_final_items_by_pk(pks.values())
+            for url, uid in local.items():
+                item = items.get(pks.get(uid))  # type: ignore
+                if item:
+                    r[url] = item
+        if lookups:
+            items = Item.get_by_lookup_ids_bulk(lookups.values())
+            for url, key in lookups.items():
+                if key in items:
+                    r[url] = items[key]
+        return r
+
     @staticmethod
     def get_all_sites():
         return SiteManager.registry.values()
@@ -438,182 +508,235 @@ class SiteManager:
 
     @classmethod
     def fetch_linked_resources(cls, resource, linked_resources, link_type):
-        processed = False
+        """Fetch linked resources concurrently, then link them to resource.
+
+        Fetches go through ``fetch_scheduler``, in parallel across hosts and
+        within each host's rate limit; linking the results to ``resource``
+        happens afterwards in this thread, in the order of linked_resources.
+        """
+        links = []
+        jobs = []
         for linked_resource in linked_resources:
-            linked_site = None
+            site_cls = None
+            url = None
             if "url" in linked_resource:
-                linked_site = SiteManager.get_site_by_url(linked_resource["url"])
+                url = linked_resource["url"]
+                site_cls = SiteManager.get_class_by_url(url)
+                if site_cls:
+                    url = site_cls(url).url or url
             elif (
                 "id_type" in linked_resource
                 and linked_resource.get("id_value")
                 and linked_resource.get("id_type") in SiteManager.registry
             ):
-                linked_site = SiteManager.get_site_by_id(
-                    linked_resource["id_type"], linked_resource["id_value"]
-                )
+                site_cls = SiteManager.registry[linked_resource["id_type"]]
+                url = site_cls(id_value=linked_resource["id_value"]).url
             else:
                 continue
-            # For People CHILD links, try to reuse an existing People that is
-            # already credited on this parent item before hitting the network.
-            # Keeps cross-source duplicates (same director named across TMDB
-            # and Douban) from splitting into two People rows.
+            limiter = site_cls.get_rate_limiter() if site_cls else None
+            links.append(linked_resource)
+            jobs.append(
+                FetchJob(
+                    partial(
+                        cls._fetch_linked_resource, resource, linked_resource, link_type
+                    ),
+                    host=limiter.key if limiter else url_domain(url),
+                    concurrency=max(1, int(limiter.rate)) if limiter else 0,
+                    url=url,
+                    is_ready=partial(cls._is_resource_ready, url),
+                )
+            )
+        processed = False
+        for linked_resource, fetched in zip(links, fetch_scheduler.run(jobs)):
+            if fetched:
+                processed |= cls._link_fetched_resource(
+                    resource, linked_resource, link_type, fetched
+                )
+        if resource.item and processed:
+            resource.item.save()
+
+    @staticmethod
+    def _is_resource_ready(url: str | None) -> bool:
+        return ExternalResource.objects.filter(
+            url=url, scraped_time__isnull=False
+        ).exists()
+
+    @classmethod
+    def _fetch_linked_resource(
+        cls, resource, linked_resource, link_type
+    ) -> ExternalResource | None:
+        linked_site = None
+        if "url" in linked_resource:
+            linked_site = SiteManager.get_site_by_url(linked_resource["url"])
+        else:
+            linked_site = SiteManager.get_site_by_id(
+                linked_resource["id_type"], linked_resource["id_value"]
+            )
+        # For People CHILD links, try to reuse an existing People that is
+        # already credited on this parent item before hitting the network.
+        # Keeps cross-source duplicates (same director named across TMDB
+        # and Douban) from splitting into two People rows.
+        if (
+            linked_site
+            and link_type == ExternalResource.LinkType.CHILD
+            and resource.item is not None
+            and linked_resource.get("model") == "People"
+        ):
+            # URL-only links (Douban author/musician) resolve id_type/
+            # id_value via the site object after HEAD redirect.
+            id_type = linked_resource.get("id_type") or linked_site.ID_TYPE
+            id_value = linked_resource.get("id_value") or linked_site.id_value
             if (
-                linked_site
-                and link_type == ExternalResource.LinkType.CHILD
-                and resource.item is not None
-                and linked_resource.get("model") == "People"
+                id_type
+                and id_value
+                and not ExternalResource.objects.filter(
+                    id_type=id_type, id_value=id_value
+                ).exists()
             ):
-                # URL-only links (Douban author/musician) resolve id_type/
-                # id_value via the site object after HEAD redirect.
-                id_type = linked_resource.get("id_type") or linked_site.ID_TYPE
-                id_value = linked_resource.get("id_value") or linked_site.id_value
-                if (
-                    id_type
-                    and id_value
-                    and not ExternalResource.objects.filter(
-                        id_type=id_type, id_value=id_value
-                    ).exists()
-                ):
-                    sibling = cls._find_sibling_person(
-                        {**linked_resource, "id_type": id_type}, resource.item
-                    )
-                    if sibling is not None:
-                        try:
-                            content = linked_site.scrape()
-                        except Exception as e:
-                            logger.warning(
-                                f"sibling-dedup scrape failed for "
-                                f"{id_type}:{id_value}: {e}"
-                            )
-                            # Don't leave a placeholder -- next run re-dedupes.
-                            continue
-                        try:
-                            with transaction.atomic():
-                                new_res = ExternalResource.objects.create(
-                                    id_type=id_type,
-                                    id_value=id_value,
-                                    url=linked_site.url,
-                                    item=sibling,
-                                )
-                        except IntegrityError:
-                            # Another worker created a resource for the same
-                            # url or (id_type, id_value) between our checks
-                            # and the insert. Skip; the existing row already
-                            # represents this person.
-                            logger.warning(
-                                f"sibling-dedup race for "
-                                f"{id_type}:{id_value} url={linked_site.url}"
+                sibling = cls._find_sibling_person(
+                    {**linked_resource, "id_type": id_type}, resource.item
+                )
+                if sibling is not None:
+                    try:
+                        content = linked_site.scrape()
+                    except Exception as e:
+                        logger.warning(
+                            f"sibling-dedup scrape failed for {id_type}:{id_value}: {e}"
+                        )
+                        # Don't leave a placeholder -- next run re-dedupes.
+                        return None
+                    try:
+                        with transaction.atomic():
+                            new_res = ExternalResource.objects.create(
+                                id_type=id_type,
+                                id_value=id_value,
+                                url=linked_site.url,
+                                item=sibling,
                             )
-                            continue
-                        new_res.update_content(content)
-                        logger.info(
-                            f"reused sibling person {sibling} for "
-                            f"{id_type}:{id_value} on {resource.item}"
+                    except IntegrityError:
+                        # Another worker created a resource for the same
+                        # url or (id_type, id_value) between our checks
+                        # and the insert. Skip; the existing row already
+                        # represents this person.
+                        logger.warning(
+                            f"sibling-dedup race for "
+                            f"{id_type}:{id_value} url={linked_site.url}"
                         )
-                        # update_content only writes new_res.metadata; the
-                        # sibling's own localized_name (and bio, etc.) stay
-                        # stale. Merge from new_res so any names brought in
-                        # by this source land on the sibling -- mirroring
-                        # the get_item() path's behavior when an existing
-                        # item is matched. Without this merge, credits on
-                        # the requester item whose names match a new
-                        # localized_name would be missed below.
-                        sibling.merge_data_from_external_resource(new_res)
-                        cls._link_requester_credits(resource.item, sibling)
-                        continue
-            if linked_site:
-                try:
-                    fetched = linked_site.get_resource_ready(
-                        auto_link=False,
-                        preloaded_content=linked_resource.get("content"),
+                        return None
+                    new_res.update_content(content)
+                    logger.info(
+                        f"reused sibling person {sibling} for "
+                        f"{id_type}:{id_value} on {resource.item}"
                     )
-                except Exception as e:
-                    # DownloadError = expected third-party failure -> warn (no
-                    # Sentry issue); anything else is a real error.
-                    is_download = isinstance(e, DownloadError)
-                    log = logger.warning if is_download else logger.error
-                    log(
-                        f"error fetching from {linked_site.ID_TYPE}",
-                        extra={
-                            "resource": resource,
-                            "linked_resource": linked_resource,
-                            "linked_site": linked_site,
-                            "exception": e,
-                        },
-                    )
-                    # Warnings aren't Sentry issues; metric keeps them trackable.
-                    sentry_count(
-                        "catalog.linked_resource.failure",
-                        attributes={
-                            "site": str(linked_site.ID_TYPE),
-                            "reason": "download" if is_download else "error",
-                        },
+                    # update_content only writes new_res.metadata; the
+                    # sibling's own localized_name (and bio, etc.) stay
+                    # stale. Merge from new_res so any names brought in
+                    # by this source land on the sibling -- mirroring
+                    # the get_item() path's behavior when an existing
+                    # item is matched. Without this merge, credits on
+                    # the requester item whose names match a new
+                    # localized_name would be missed below.
+                    sibling.merge_data_from_external_resource(new_res)
+                    cls._link_requester_credits(resource.item, sibling)
+                    return None
+        if not linked_site:
+            # No registered site for this link (e.g. a Douban author);
+            # expected, so warn rather than error.
+            logger.warning(
+                "unable to get site for linked resource",
+                extra={
+                    "resource": resource,
+                    "linked_resource": linked_resource,
+                },
+            )
+            # Track as a metric so the volume stays visible.
+            sentry_count(
+                "catalog.linked_resource.failure",
+                attributes={
+                    "site": linked_resource.get("id_type")
+                    or url_domain(linked_resource.get("url")),
+                    "reason": "no_site",
+                },
+            )
+            return None
+        try:
+            fetched = linked_site.get_resource_ready(
+                auto_link=False,
+                preloaded_content=linked_resource.get("content"),
+            )
+        except Exception as e:
+            # DownloadError = expected third-party failure -> warn (no
+            # Sentry issue); anything else is a real error.
+            is_download = isinstance(e, DownloadError)
+            log = logger.warning if is_download else logger.error
+            log(
+                f"error fetching from {linked_site.ID_TYPE}",
+                extra={
+                    "resource": resource,
+                    "linked_resource": linked_resource,
+                    "linked_site": linked_site,
+                    "exception": e,
+                },
+            )
+            # Warnings aren't Sentry issues; metric keeps them trackable.
+            sentry_count(
+                "catalog.linked_resource.failure",
+                attributes={
+                    "site": str(linked_site.ID_TYPE),
+                    "reason": "download" if is_download else "error",
+                },
+            )
+            return None
+        logger.debug(f"fetched {resource}'s {link_type}: {fetched}")
+        return fetched
+
+    @classmethod
+    def _link_fetched_resource(
+        cls, resource, linked_resource, link_type, fetched
+    ) -> bool:
+        processed = False
+        match link_type:
+            case ExternalResource.LinkType.PARENT:
+                processed |= resource.process_fetched_resource(
+                    fetched, ExternalResource.LinkType.PARENT
+                )
+                if (
+                    fetched.process_fetched_resource(
+                        resource, ExternalResource.LinkType.CHILD
                     )
-                    continue
-                logger.debug(f"fetched {resource}'s {link_type}: {fetched}")
-                if fetched:
-                    match link_type:
-                        case ExternalResource.LinkType.PARENT:
-                            processed |= resource.process_fetched_resource(
-                                fetched, ExternalResource.LinkType.PARENT
-                            )
-                            if (
-                                fetched.process_fetched_resource(
-                                    resource, ExternalResource.LinkType.CHILD
-                                )
-                                and fetched.item
-                            ):
-                                fetched.item.save()
-                        case ExternalResource.LinkType.CHILD:
-                            processed |= resource.process_fetched_resource(
-                                fetched, ExternalResource.LinkType.CHILD
-                            )
-                            if (
-                                fetched.process_fetched_resource(
-                                    resource, ExternalResource.LinkType.PARENT
-                                )
-                                and fetched.item
-                            ):
-                                fetched.item.save()
-                            # For People CHILDren, link the requester item's
-                            # matching unlinked credit by (item, name). This
-                            # uses the explicit requester->requested chain
-                            # the worker already has in scope, instead of
-                            # the previous global name sweep which could
-                            # falsely glue distinct people sharing a name.
-                            if (
-                                linked_resource.get("model") == "People"
-                                and resource.item is not None
-                                and fetched.item is not None
-                            ):
-                                cls._link_requester_credits(resource.item, fetched.item)
-                        case ExternalResource.LinkType.PREMATCHED:
-                            processed |= resource.process_fetched_resource(
-                                fetched, ExternalResource.LinkType.PREMATCHED
-                            )
-                        case _:
-                            logger.error(f"unknown link type {link_type}")
-            else:
-                # No registered site for this link (e.g. a Douban author);
-                # expected, so warn rather than error.
-                logger.warning(
-                    "unable to get site for linked resource",
-                    extra={
-                        "resource": resource,
-                        "linked_resource": linked_resource,
-                    },
+                    and fetched.item
+                ):
+                    fetched.item.save()
+            case ExternalResource.LinkType.CHILD:
+                processed |= resource.process_fetched_resource(
+                    fetched, ExternalResource.LinkType.CHILD
                 )
-                # Track as a metric so the volume stays visible.
-                sentry_count(
-                    "catalog.linked_resource.failure",
-                    attributes={
-                        "site": linked_resource.get("id_type")
-                        or url_domain(linked_resource.get("url")),
-                        "reason": "no_site",
-                    },
+                if (
+                    fetched.process_fetched_resource(
+                        resource, ExternalResource.LinkType.PARENT
+                    )
+                    and fetched.item
+                ):
+                    fetched.item.save()
+                # For People CHILDren, link the requester item's
+                # matching unlinked credit by (item, name). This
+                # uses the explicit requester->requested chain
+                # the worker already has in scope, instead of
+                # the previous global name sweep which could
+                # falsely glue distinct people sharing a name.
+                if (
+                    linked_resource.get("model") == "People"
+                    and resource.item is not None
+                    and fetched.item is not None
+                ):
+                    cls._link_requester_credits(resource.item, fetched.item)
+            case ExternalResource.LinkType.PREMATCHED:
+                processed |= resource.process_fetched_resource(
+                    fetched, ExternalResource.LinkType.PREMATCHED
                 )
-        if resource.item and processed:
-            resource.item.save()
+            case _:
+                logger.error(f"unknown link type {link_type}")
+        return processed
 
     @staticmethod
     def fetch_related_resources_task(requester_resource_pk):
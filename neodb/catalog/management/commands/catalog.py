@@ -30,6 +30,7 @@ from catalog.models import (
 )
 from catalog.search import CatalogIndex, CatalogQueryParser, PeopleIndex
 from catalog.search.external import ExternalSources
+from catalog.search.reindex import CatalogReindexer
 from catalog.sites.fedi import FediverseInstance
 from common.management.base import SiteCommand
 from common.models import detect_language, uniq
@@ -55,6 +56,8 @@ idx-destroy:      delete index
 idx-alt:          update index schema
 idx-delete:       delete docs in index
 idx-rebuild:      rebuild docs in index
+idx-reindex:      rebuild catalog docs with a streaming, parallel pipeline
+                  (use --workers, --batch-size, --start or --resume)
 idx-get:          dump one doc (use --query for URL)
 idx-catchup:      update index for items edited in last X hours (use --hour)
 """
@@ -82,6 +85,7 @@ class Command(SiteCommand):
                 "idx-alt",
                 "idx-destroy",
                 "idx-rebuild",
+                "idx-reindex",
                 "idx-delete",
                 "idx-get",
                 "idx-catchup",
@@ -161,6 +165,17 @@ class Command(SiteCommand):
             default="INFO",
             help="Set logging level (default: INFO)",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Number of doc-building processes for idx-reindex (0: in-process)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Resume idx-reindex from the last saved checkpoint",
+        )
         parser.add_argument(
             "--hour",
             type=int,
@@ -530,6 +545,39 @@ class Command(SiteCommand):
                     logger.error(f"Error updating index for item {item.pk}: {e}")
                 pbar.update(1)
 
+    def idx_reindex(self, workers, batch_size, start, resume, limit):
+        """Rebuild catalog docs via CatalogReindexer, reporting docs/sec"""
+        reindexer = CatalogReindexer(
+            workers=workers,
+            batch_size=batch_size,
+            start=start,
+            resume=resume,
+            limit=limit,
+        )
+        self.stdout.write(
+            f"Reindexing from pk {reindexer.start} with {workers} workers, "
+            f"{batch_size} items per batch"
+        )
+        with tqdm(unit="item") as pbar:
+
+            def progress(stats):
+                pbar.update(stats.items_seen - pbar.n)
+                pbar.set_postfix(
+                    docs=stats.docs_indexed,
+                    rate=f"{stats.docs_per_second:.0f}/s",
+                    failed=stats.failed_ranges,
+                )
+
+            reindexer.on_progress = progress
+            stats = reindexer.run()
+        if stats.failed_ranges:
+            self.stdout.write(self.style.WARNING(str(stats)))
+            self.stdout.write(
+                f"checkpoint kept at pk {reindexer.get_checkpoint()}, rerun with --resume"
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(str(stats)))
+
     # Item-side IdTypes whose scrapers emit People entries in related_resources.
     # Listed explicitly because the command rejects anything outside this set.
     BACKFILL_PEOPLE_SOURCES = {
@@ -970,6 +1018,10 @@ class Command(SiteCommand):
                 try:
                     r = index.check()
                     self.stdout.write(str(r))
+                    for q in [index.update_queue, PeopleIndex.update_queue]:
+                        self.stdout.write(
+                            f"{q.name} update queue: depth {q.depth()}, lag {q.lag()}"
+                        )
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(str(e)))
 
@@ -1023,6 +1075,15 @@ class Command(SiteCommand):
                     self.style.SUCCESS(f"indexed {pc} of {pt} people docs.")
                 )
 
+            case "idx-reindex":
+                self.idx_reindex(
+                    workers=options["workers"],
+                    batch_size=int(batch_size),
+                    start=start,
+                    resume=options["resume"],
+                    limit=limit,
+                )
+
             case "idx-get":
                 item = Item.get_by_url(query)
                 if not item:
@@ -7,6 +7,7 @@ from .utils import (
     get_fetch_lock,
     mark_fetch_completed,
     query_index,
+    query_index_with_people,
     record_search_failure,
 )
 
@@ -18,6 +19,7 @@ __all__ = [
     "PeopleQueryParser",
     "PeopleSearchResult",
     "query_index",
+    "query_index_with_people",
     "get_actor_fetch_lock",
     "get_fetch_lock",
     "mark_fetch_completed",
@@ -1,7 +1,12 @@
 import asyncio
+import time
+from asyncio import FIRST_COMPLETED
+from functools import partial
+from typing import Awaitable, Callable, Iterator
 from urllib.parse import quote_plus
 
 from django.core.cache import cache
+from loguru import logger
 
 from catalog.models import ItemCategory, SiteName
 
@@ -52,54 +57,170 @@ class ExternalSearchResultItem:
 
 
 class ExternalSources:
+    """Fan out a search to external sites and NeoDB peers.
+
+    Each source runs as its own task under a per-source timeout, and the whole
+    search is bounded by a global deadline; results are yielded as each source
+    answers, so a slow source neither delays nor discards the others. Answers
+    are cached per source and query, and sources still pending at the deadline
+    are simply left out (and retried by the next search).
+    """
+
+    deadline = 4.0
+    site_timeout = 3.0
+    cache_timeout = 300
+
+    @staticmethod
+    def _cache_key(query: str, category: str, visible_categories) -> str:
+        match category:
+            case "all":
+                return f"search_{','.join(visible_categories)}_{query}"
+            case "movietv":
+                return f"search_movie,tv_{query}"
+            case _:
+                return f"search_{category}_{query}"
+
     @classmethod
-    def search(
+    def get_sources(
+        cls,
+        query: str,
+        page: int,
+        category: str,
+        page_size: int,
+        disabled_sources: list[str],
+    ) -> list[tuple[str, Callable[[], Awaitable[list[ExternalSearchResultItem]]]]]:
+        """Return (source name, search coroutine factory) for enabled sources."""
+        from catalog.common import SiteManager
+        from catalog.sites import FediverseInstance
+
+        ds = set(disabled_sources)
+        sources = [
+            (host, factory)
+            for host, factory in FediverseInstance.search_sources(
+                query, page, category, page_size
+            )
+            if host not in ds
+        ]
+        for site in SiteManager.get_sites_for_search():
+            if site.SITE_NAME.value in ds:
+                continue
+            sources.append(
+                (
+                    site.__name__,
+                    partial(site.search_task, query, page, category, page_size),
+                )
+            )
+        return sources
+
+    @classmethod
+    async def _search_source(cls, name: str, factory) -> list[ExternalSearchResultItem]:
+        from .utils import record_search_failure
+
+        try:
+            return await asyncio.wait_for(factory(), timeout=cls.site_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"external search {name} timed out")
+            record_search_failure(name, "timeout")
+            raise
+
+    @classmethod
+    def search_iter(
         cls,
         query: str,
         page: int = 1,
         category: str | None = None,
         visible_categories: list[ItemCategory] = [],
         disabled_sources: list[str] = [],
-    ) -> list[ExternalSearchResultItem]:
-        from catalog.common import SiteManager
-        from catalog.sites import FediverseInstance
-
-        if not query or page < 1 or page > 10 or not query or len(query) > 100:
-            return []
+    ) -> Iterator[tuple[str, list[ExternalSearchResultItem]]]:
+        """Yield (source name, results) in the order sources answer."""
+        if not query or page < 1 or page > 10 or len(query) > 100:
+            return
         if category in ["", None]:
             category = "all"
         page_size = 5 if category == "all" else 10
-        match category:
-            case "all":
-                cache_key = f"search_{','.join(visible_categories)}_{query}"
-            case "movietv":
-                cache_key = f"search_movie,tv_{query}"
-            case _:
-                cache_key = f"search_{category}_{query}"
-        results = cache.get("ext_" + cache_key, None)
-        if results is None:
-            tasks = FediverseInstance.search_tasks(query, page, category, page_size)
-            for site in SiteManager.get_sites_for_search():
-                tasks.append(site.search_task(query, page, category, page_size))
-            # loop = asyncio.get_event_loop()
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = []
-            for r in loop.run_until_complete(asyncio.gather(*tasks)):
-                results.extend(r)
-            cache.set("ext_" + cache_key, results, 300)
-        dedupe_urls = cache.get(cache_key, [])
-        results = [i for i in results if i.source_url not in dedupe_urls]
-        if disabled_sources:
-            ds = set(disabled_sources)
-            results = [
+        cache_key = cls._cache_key(query, category, visible_categories)
+        dedupe_urls = set(cache.get(cache_key, []))
+        ds = set(disabled_sources)
+
+        def _filter(results):
+            return [
                 r
                 for r in results
-                if (
+                if r.source_url not in dedupe_urls
+                and (
                     r.source_site.value
                     if isinstance(r.source_site, SiteName)
                     else r.source_site
                 )
                 not in ds
             ]
+
+        sources = cls.get_sources(query, page, category, page_size, disabled_sources)
+        keys = {name: f"ext_{name}_{page}_{cache_key}" for name, _ in sources}
+        cached = cache.get_many(list(keys.values()))
+        pending_sources = []
+        for name, factory in sources:
+            if keys[name] in cached:
+                yield name, _filter(cached[keys[name]])
+            else:
+                pending_sources.append((name, factory))
+        if not pending_sources:
+            return
+        loop = asyncio.new_event_loop()
+        tasks = {
+            loop.create_task(cls._search_source(name, factory)): name
+            for name, factory in pending_sources
+        }
+        pending = set(tasks)
+        end = time.monotonic() + cls.deadline
+        try:
+            while pending:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(
+                        pending, timeout=remaining, return_when=FIRST_COMPLETED
+                    )
+                )
+                for task in done:
+                    name = tasks[task]
+                    if task.cancelled() or task.exception():
+                        if task.exception() and not isinstance(
+                            task.exception(), asyncio.TimeoutError
+                        ):
+                            logger.warning(
+                                f"external search {name} error",
+                                extra={"exception": task.exception()},
+                            )
+                        continue
+                    results = task.result()
+                    cache.set(keys[name], results, cls.cache_timeout)
+                    yield name, _filter(results)
+            for task in pending:
+                logger.warning(f"external search {tasks[task]} missed the deadline")
+        finally:
+            # also reached when a streaming client goes away mid-search
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True)
+                )
+            loop.close()
+
+    @classmethod
+    def search(
+        cls,
+        query: str,
+        page: int = 1,
+        category: str | None = None,
+        visible_categories: list[ItemCategory] = [],
+        disabled_sources: list[str] = [],
+    ) -> list[ExternalSearchResultItem]:
+        results = []
+        for _, r in cls.search_iter(
+            query, page, category, visible_categories, disabled_sources
+        ):
+            results.extend(r)
         return results
@@ -1,33 +1,19 @@
 import re
-from datetime import timedelta
 from functools import cached_property, reduce
-from typing import TYPE_CHECKING, Iterable, cast
+from typing import TYPE_CHECKING, Iterable
 
-import django_rq
-from django_redis import get_redis_connection
 from loguru import logger
-from rq.job import Job
 
 from common.models.misc import int_
-from common.search import Index, QueryParser, SearchResult
+from common.search import Index, IndexUpdateQueue, QueryParser, SearchResult
 
 if TYPE_CHECKING:
     from catalog.models import Item
-
-_PENDING_INDEX_KEY = "pending_catalog_index_ids"
-_PENDING_INDEX_QUEUE = "import"
-_PENDING_INDEX_JOB_ID = "pending_catalog_index_flush"
+    from common.search.queue import IndexUpdatePriority
 
 
 def _update_catalog_index_task():
-    conn = get_redis_connection("default")
-    item_ids = cast(list[bytes], conn.spop(_PENDING_INDEX_KEY, 1000))
-    updated = 0
-    index = CatalogIndex.instance()
-    while item_ids:
-        index.replace_items([int(i) for i in item_ids])
-        updated += len(item_ids)
-        item_ids = cast(list[bytes], conn.spop(_PENDING_INDEX_KEY, 1000))
+    updated = CatalogIndex.update_queue.flush()
     logger.info(f"Catalog index updated for {updated} items")
 
 
@@ -240,9 +226,18 @@ class CatalogIndex(Index):
         ]
     }
     search_result_class = CatalogSearchResult
+    update_queue = IndexUpdateQueue(
+        "catalog",
+        handler=lambda ids: CatalogIndex.instance().replace_items(ids),
+        task=_update_catalog_index_task,
+    )
 
     @classmethod
     def items_to_docs(cls, items: "Iterable[Item]") -> list[dict]:
+        from catalog.models import Item
+
+        items = list(items)
+        Item.prefetch_indexable(items)
         docs = [i.to_indexable_doc() for i in items]
         return [d for d in docs if d]
 
@@ -255,12 +250,10 @@ class CatalogIndex(Index):
     def replace_items(self, item_ids):
         from catalog.models import Item
 
-        items = Item.objects.filter(pk__in=item_ids)
-        docs = [
-            i.to_indexable_doc()
-            for i in items
-            if not i.is_deleted and not i.merged_to_item_id
-        ]
+        items = list(Item.objects.filter(pk__in=item_ids))
+        docs = self.items_to_docs(
+            i for i in items if not i.is_deleted and not i.merged_to_item_id
+        )
         if docs:
             self.replace_docs(docs)
         if len(docs) < len(item_ids):
@@ -278,25 +271,10 @@ class CatalogIndex(Index):
             self.replace_docs([doc])
 
     @classmethod
-    def enqueue_replace_items(cls, item_ids: list[int]):
-        if not item_ids:
-            return
-        try:
-            get_redis_connection("default").sadd(_PENDING_INDEX_KEY, *item_ids)
-            job = Job.fetch(
-                id=_PENDING_INDEX_JOB_ID,
-                connection=django_rq.get_connection(_PENDING_INDEX_QUEUE),
-            )
-            if job.get_status() in ["queued", "scheduled"]:
-                job.cancel()
-        except Exception:
-            pass
-        # using rq's built-in scheduler here, it can be switched to other similar implementations
-        django_rq.get_queue(_PENDING_INDEX_QUEUE).enqueue_in(
-            timedelta(seconds=2),
-            _update_catalog_index_task,
-            job_id=_PENDING_INDEX_JOB_ID,
-        )
+    def enqueue_replace_items(
+        cls, item_ids: list[int], priority: "IndexUpdatePriority | None" = None
+    ):
+        cls.update_queue.enqueue(item_ids, priority)
 
     def delete_item(self, item: "Item"):
         if item.pk:
@@ -1,33 +1,18 @@
-from datetime import timedelta
 from functools import cached_property
-from typing import TYPE_CHECKING, Iterable, cast
+from typing import TYPE_CHECKING, Iterable
 
-import django_rq
 from django.db.models import Count
-from django_redis import get_redis_connection
 from loguru import logger
-from rq.job import Job
 
-from common.search import Index, QueryParser, SearchResult
+from common.search import Index, IndexUpdateQueue, QueryParser, SearchResult
 
 if TYPE_CHECKING:
     from catalog.models import People
-
-
-_PENDING_PEOPLE_INDEX_KEY = "pending_people_index_ids"
-_PENDING_PEOPLE_INDEX_QUEUE = "import"
-_PENDING_PEOPLE_INDEX_JOB_ID = "pending_people_index_flush"
+    from common.search.queue import IndexUpdatePriority
 
 
 def _update_people_index_task():
-    conn = get_redis_connection("default")
-    item_ids = cast(list[bytes], conn.spop(_PENDING_PEOPLE_INDEX_KEY, 1000))
-    updated = 0
-    index = PeopleIndex.instance()
-    while item_ids:
-        index.replace_people([int(i) for i in item_ids])
-        updated += len(item_ids)
-        item_ids = cast(list[bytes], conn.spop(_PENDING_PEOPLE_INDEX_KEY, 1000))
+    updated = PeopleIndex.update_queue.flush()
     logger.info(f"People index updated for {updated} items")
 
 
@@ -152,6 +137,11 @@ class PeopleIndex(Index):
         ]
     }
     search_result_class = PeopleSearchResult
+    update_queue = IndexUpdateQueue(
+        "people",
+        handler=lambda ids: PeopleIndex.instance().replace_people(ids),
+        task=_update_people_index_task,
+    )
 
     @classmethod
     def people_to_docs(cls, people: "Iterable[People]") -> list[dict]:
@@ -244,24 +234,10 @@ class PeopleIndex(Index):
             self.delete_docs("item_id", person.pk)
 
     @classmethod
-    def enqueue_replace_people(cls, item_ids: list[int]):
-        if not item_ids:
-            return
-        try:
-            get_redis_connection("default").sadd(_PENDING_PEOPLE_INDEX_KEY, *item_ids)
-            job = Job.fetch(
-                id=_PENDING_PEOPLE_INDEX_JOB_ID,
-                connection=django_rq.get_connection(_PENDING_PEOPLE_INDEX_QUEUE),
-            )
-            if job.get_status() in ["queued", "scheduled"]:
-                job.cancel()
-        except Exception:
-            pass
-        django_rq.get_queue(_PENDING_PEOPLE_INDEX_QUEUE).enqueue_in(
-            timedelta(seconds=2),
-            _update_people_index_task,
-            job_id=_PENDING_PEOPLE_INDEX_JOB_ID,
-        )
+    def enqueue_replace_people(
+        cls, item_ids: list[int], priority: "IndexUpdatePriority | None" = None
+    ):
+        cls.update_queue.enqueue(item_ids, priority)
 
     def search(self, query) -> PeopleSearchResult:
         return super().search(query)  # type: ignore
@@ -0,0 +1,264 @@
+"""Streaming bulk reindex for the catalog collection.
+
+``idx-rebuild`` walks the catalog with a ``Paginator`` and builds docs one
+query-heavy item at a time before each import, so a full rebuild of a large
+catalog takes hours. ``CatalogReindexer`` instead:
+
+- streams primary-key ranges with keyset pagination (no OFFSET scans),
+- builds docs for each range in a process pool, with credits, parent items,
+  public tags and mark counts batch-prefetched (``Item.prefetch_indexable``),
+- imports finished ranges to Typesense on a separate thread, so building the
+  next ranges overlaps with the JSONL import of the previous ones,
+- records a checkpoint (the first pk not yet fully indexed) in Redis after
+  each contiguous run of completed ranges, so an interrupted run can resume.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from django_redis import get_redis_connection
+from loguru import logger
+
+from .index import CatalogIndex
+
+_CHECKPOINT_KEY = "catalog_reindex_checkpoint"
+
+
+def _worker_init():
+    # Workers are spawned (not forked), so they must not share the parent's
+    # database sockets; set up Django afresh in each process.
+    import django
+
+    django.setup()
+
+    from common.models.site_config import SiteConfig
+
+    SiteConfig.ensure_loaded()
+
+
+def _indexable_queryset():
+    from django.contrib.contenttypes.models import ContentType
+
+    from catalog.models import Item, People
+
+    people_ct_id = ContentType.objects.get_for_model(People).id
+    return Item.objects.filter(
+        is_deleted=False, merged_to_item_id__isnull=True
+    ).exclude(polymorphic_ctype_id=people_ct_id)
+
+
+def build_docs_for_range(first_pk: int, last_pk: int) -> list[dict]:
+    """Build index docs for every indexable item with pk in [first_pk, last_pk]."""
+    items = list(
+        _indexable_queryset().filter(pk__gte=first_pk, pk__lte=last_pk).order_by("pk")
+    )
+    return CatalogIndex.items_to_docs(items)
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted calls immediately; used when no worker pool is wanted."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        f = Future()
+        try:
+            f.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            f.set_exception(e)
+        return f
+
+
+@dataclass
+class ReindexStats:
+    ranges: int = 0
+    items_seen: int = 0
+    docs_built: int = 0
+    docs_indexed: int = 0
+    failed_ranges: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.docs_indexed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"indexed {self.docs_indexed} of {self.docs_built} docs from "
+            f"{self.items_seen} items in {self.ranges} ranges, "
+            f"{self.failed_ranges} failed, {self.elapsed:.1f}s "
+            f"({self.docs_per_second:.1f} docs/s)"
+        )
+
+
+class CatalogReindexer:
+    def __init__(
+        self,
+        workers: int = 0,
+        batch_size: int = 1000,
+        start: int | None = None,
+        resume: bool = False,
+        limit: int | None = None,
+        on_progress: Callable[[ReindexStats], None] | None = None,
+    ):
+        """
+        workers: number of doc-building processes; 0 builds in this process.
+        batch_size: items per pk range (one build task and one import call).
+        start: first pk to index; overrides any saved checkpoint.
+        resume: start from the checkpoint saved by a previous run.
+        limit: stop after this many items.
+        """
+        self.workers = max(0, workers)
+        self.batch_size = max(1, batch_size)
+        self.limit = limit
+        self.on_progress = on_progress
+        if start is not None:
+            self.start = start
+        elif resume:
+            self.start = self.get_checkpoint() or 0
+        else:
+            self.start = 0
+        self.index = CatalogIndex.instance()
+        self.stats = ReindexStats()
+
+    @staticmethod
+    def get_checkpoint() -> int | None:
+        v = get_redis_connection("default").get(_CHECKPOINT_KEY)
+        return int(v) if v else None
+
+    @staticmethod
+    def save_checkpoint(pk: int):
+        get_redis_connection("default").set(_CHECKPOINT_KEY, pk)
+
+    @staticmethod
+    def clear_checkpoint():
+        get_redis_connection("default").delete(_CHECKPOINT_KEY)
+
+    def iter_ranges(self) -> Iterator[tuple[int, int, int]]:
+        """Yield (first_pk, last_pk, count) ranges of up to batch_size items.
+
+        Only pks are read here (an index-only keyset scan), so the parent
+        stays cheap while workers load the full rows.
+        """
+        qs = _indexable_queryset().order_by("pk").values_list("pk", flat=True)
+        cursor = self.start
+        remaining = self.limit
+        while remaining is None or remaining > 0:
+            size = (
+                self.batch_size
+                if remaining is None
+                else min(remaining, self.batch_size)
+            )
+            pks = list(qs.filter(pk__gte=cursor)[:size])
+            if not pks:
+                return
+            yield pks[0], pks[-1], len(pks)
+            cursor = pks[-1] + 1
+            if remaining is not None:
+                remaining -= len(pks)
+
+    def _make_builder(self) -> Executor:
+        if not self.workers:
+            return _InlineExecutor()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+        )
+
+    def _make_importer(self) -> Executor:
+        if not self.workers:
+            return _InlineExecutor()
+        return ThreadPoolExecutor(max_workers=2, thread_name_prefix="reindex-import")
+
+    def run(self) -> ReindexStats:
+        started = time.monotonic()
+        # ranges in submission order, flagged once their import has finished;
+        # the checkpoint only advances past a contiguous finished prefix, so a
+        # failed range is retried when the run is resumed.
+        order: list[tuple[int, int]] = []
+        finished: dict[int, bool] = {}
+        builds: dict[Future, tuple[int, int]] = {}
+        imports: dict[Future, tuple[int, int, int]] = {}
+        max_inflight = max(2, self.workers * 2)
+        ranges = self.iter_ranges()
+        exhausted = False
+        builder = self._make_builder()
+        importer = self._make_importer()
+        try:
+            while True:
+                while not exhausted and len(builds) + len(imports) < max_inflight:
+                    r = next(ranges, None)
+                    if r is None:
+                        exhausted = True
+                        break
+                    first_pk, last_pk, count = r
+                    self.stats.ranges += 1
+                    self.stats.items_seen += count
+                    order.append((first_pk, last_pk))
+                    finished[first_pk] = False
+                    f = builder.submit(build_docs_for_range, first_pk, last_pk)
+                    builds[f] = (first_pk, last_pk)
+                if not builds and not imports:
+                    break
+                done, _ = wait(
+                    list(builds) + list(imports), return_when=FIRST_COMPLETED
+                )
+                for f in done:
+                    if f in builds:
+                        first_pk, last_pk = builds.pop(f)
+                        try:
+                            docs = f.result()
+                        except Exception as e:
+                            logger.error(
+                                f"reindex: failed to build docs for {first_pk}-{last_pk}: {e}"
+                            )
+                            self.stats.failed_ranges += 1
+                            continue
+                        self.stats.docs_built += len(docs)
+                        f = importer.submit(self.index.replace_docs, docs)
+                        imports[f] = (first_pk, last_pk, len(docs))
+                    else:
+                        first_pk, last_pk, built = imports.pop(f)
+                        try:
+                            indexed = f.result()
+                        except Exception as e:
+                            logger.error(
+                                f"reindex: failed to import docs for {first_pk}-{last_pk}: {e}"
+                            )
+                            indexed = 0
+                        self.stats.docs_indexed += indexed
+                        if built and not indexed:
+                            # replace_docs logs and swallows transport errors
+                            self.stats.failed_ranges += 1
+                        else:
+                            finished[first_pk] = True
+                self._advance_checkpoint(order, finished)
+                self.stats.elapsed = time.monotonic() - started
+                if self.on_progress:
+                    self.on_progress(self.stats)
+        finally:
+            builder.shutdown(wait=True, cancel_futures=True)
+            importer.shutdown(wait=True)
+        self.stats.elapsed = time.monotonic() - started
+        if exhausted and not self.stats.failed_ranges:
+            self.clear_checkpoint()
+        return self.stats
+
+    def _advance_checkpoint(
+        self, order: list[tuple[int, int]], finished: dict[int, bool]
+    ):
+        last = None
+        while order and finished.get(order[0][0]):
+            first_pk, last = order.pop(0)
+            del finished[first_pk]
+        if last is not None:
+            self.save_checkpoint(last + 1)
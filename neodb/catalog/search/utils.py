@@ -1,9 +1,13 @@
 import hashlib
+import json
+import time
+from typing import TYPE_CHECKING, Iterable, cast
 
 import django_rq
 from auditlog.context import set_actor
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import prefetch_related_objects
 from loguru import logger
 from rq.job import Job
@@ -13,13 +17,87 @@ from catalog.common import (
     DownloadError,
     SiteManager,
 )
+from common.search import Index, QueryParser, SearchResult
 from common.sentry import count as sentry_count
 from common.sentry import url_domain
 from takahe.search import search_by_ap_url
 from users.models import User
 
 from ..models import Edition, Item, TVSeason
-from .index import CatalogIndex, CatalogQueryParser
+from .index import CatalogIndex, CatalogQueryParser, CatalogSearchResult
+from .people_index import PeopleIndex, PeopleQueryParser, PeopleSearchResult
+
+if TYPE_CHECKING:
+    from ..models import People
+
+
+# Two-tier search cache, keyed by the normalized Typesense params of a
+# CatalogQueryParser. Tier 1 holds the raw search response (hit ids, indexed
+# tags, facets); hits are re-hydrated from the DB, which already drops deleted
+# items and resolves merges. Tier 2 holds the hydrated, deduplicated card
+# list and is only served while the version of every item in it is unchanged,
+# so a save, merge or delete of any listed item invalidates it.
+_SEARCH_RESPONSE_KEY = "search_r:{}"
+_SEARCH_CARDS_KEY = "search_c:{}"
+_ITEM_VERSION_KEY = "item_ver:{}"
+
+
+def bump_item_versions(item_ids: Iterable[int]) -> None:
+    """Invalidate cached search results containing any of these items.
+
+    The version is a fresh timestamp rather than an incremented integer: a
+    counter that was evicted and restarted could repeat a value a cached
+    entry was stored with. It is written once the transaction commits, so a
+    search in between can't cache the old rows under the new version; and
+    it outlives any entry cached before it, after which an expired version
+    no longer matters.
+    """
+    timeout = settings.SEARCH_CACHE_TIMEOUT
+    if not timeout:
+        return
+    keys = [_ITEM_VERSION_KEY.format(pk) for pk in item_ids]
+
+    def _bump():
+        v = time.time_ns()
+        cache.set_many(dict.fromkeys(keys, v), timeout * 2)
+
+    transaction.on_commit(_bump)
+
+
+def _get_item_versions(item_ids: Iterable[int]) -> dict[int, int | None]:
+    ids = list(item_ids)
+    versions = cache.get_many([_ITEM_VERSION_KEY.format(pk) for pk in ids])
+    return {pk: versions.get(_ITEM_VERSION_KEY.format(pk)) for pk in ids}
+
+
+def _search_cache_key(q: CatalogQueryParser) -> str:
+    params = json.dumps(q.to_search_params(), sort_keys=True, default=str)
+    return hashlib.md5(params.encode()).hexdigest()
+
+
+def _search(
+    q: CatalogQueryParser,
+    cache_key: str,
+    extra_searches: list[tuple[Index, QueryParser]] | None = None,
+) -> tuple[CatalogSearchResult, list[SearchResult]]:
+    """Search the catalog, sending any extra searches in the same request."""
+    index = CatalogIndex.instance()
+    extra_searches = extra_searches or []
+    timeout = settings.SEARCH_CACHE_TIMEOUT
+    response = cache.get(_SEARCH_RESPONSE_KEY.format(cache_key)) if timeout else None
+    if response is not None:
+        return CatalogSearchResult(index, response), Index.multi_search(extra_searches)
+    results = Index.multi_search([(index, q)] + extra_searches)
+    r = cast(CatalogSearchResult, results[0])
+    if timeout and not r.error:
+        cache.set(_SEARCH_RESPONSE_KEY.format(cache_key), r.response, timeout)
+    return r, results[1:]
+
+
+def _people_found(results: list[SearchResult]) -> list["People"]:
+    if results and not results[0].error:
+        return cast(PeopleSearchResult, results[0]).items
+    return []
 
 
 def query_index(
@@ -30,13 +108,40 @@ def query_index(
     exclude_categories=None,
     per_page: int = 0,
 ):
+    items, pages, total, facets, q, _ = query_index_with_people(
+        keywords,
+        categories,
+        page,
+        prepare_external,
+        exclude_categories,
+        per_page,
+    )
+    return items, pages, total, facets, q
+
+
+def query_index_with_people(
+    keywords,
+    categories=None,
+    page=1,
+    prepare_external=True,
+    exclude_categories=None,
+    per_page: int = 0,
+    people_page_size: int = 0,
+) -> tuple[list[Item], int, int, dict, str, list["People"]]:
+    """query_index(), plus up to people_page_size matching people.
+
+    Both collections are queried in one Typesense round-trip; people are only
+    searched for plain keywords, as catalog filters like tag: or year: have no
+    meaning there. People found are cached along with the catalog cards, so a
+    page served from that cache sends no search at all.
+    """
     if (
         page < 1
         or page > 99
         or (isinstance(keywords, str) and len(keywords) < 2)
         or len(keywords) > 100
     ):
-        return [], 0, 0, {}, keywords
+        return [], 0, 0, {}, keywords, []
     args = {}
     if categories:
         args["filter_categories"] = categories
@@ -46,9 +151,60 @@ def query_index(
         args["page_size"] = per_page
     q = CatalogQueryParser(keywords, page, **args)
     if not q:
-        return [], 0, 0, {}, keywords
-    index = CatalogIndex.instance()
-    r = index.search(q)
+        return [], 0, 0, {}, keywords, []
+    extra_searches: list[tuple[Index, QueryParser]] = []
+    if people_page_size and not q.parsed_fields:
+        pq = PeopleQueryParser(keywords, page_size=people_page_size)
+        if pq:
+            extra_searches.append((PeopleIndex.instance(), pq))
+    timeout = settings.SEARCH_CACHE_TIMEOUT
+    cache_key = _search_cache_key(q)
+    cached = cache.get(_SEARCH_CARDS_KEY.format(cache_key)) if timeout else None
+    if cached and _get_item_versions(cached["versions"]) == cached["versions"]:
+        items, pages, total, facets, urls = cached["result"]
+        if "people" in cached or not extra_searches:
+            people = cached.get("people", [])
+        else:
+            people = _people_found(Index.multi_search(extra_searches))
+    else:
+        r, extra_results = _search(q, cache_key, extra_searches)
+        # snapshot versions before loading rows, so an edit racing with this
+        # request invalidates the entry instead of being masked by it
+        versions = _get_item_versions(
+            int(hit["document"]["id"]) for hit in r.response.get("hits", [])
+        )
+        items, urls = _hydrate_search_result(r)
+        extra = [i.pk for i in items if i.pk not in versions]
+        extra += [
+            d.pk
+            for i in items
+            for d in getattr(i, "dupe_to", [])
+            if d.pk not in versions
+        ]
+        people = _people_found(extra_results)
+        extra += [p.pk for p in people]
+        versions.update(_get_item_versions(extra))
+        pages, total, facets = r.pages, r.total, r.facet_by_category
+        if timeout and not r.error:
+            entry = {
+                "versions": versions,
+                "result": (items, pages, total, facets, urls),
+            }
+            if extra_results and not extra_results[0].error:
+                entry["people"] = people
+            cache.set(_SEARCH_CARDS_KEY.format(cache_key), entry, timeout)
+
+    if prepare_external:
+        # store site url to avoid dups in external search
+        cache_key = f"search_{','.join(categories or [])}_{keywords}"
+        urls = list(set(cache.get(cache_key, []) + urls))
+        cache.set(cache_key, urls, timeout=300)
+
+    return items, pages, total, facets, q.q, people
+
+
+def _hydrate_search_result(r: CatalogSearchResult) -> tuple[list[Item], list[str]]:
+    """Load result items, folding duplicated editions and seasons into dupe_to."""
     keys = {}
     items = []
     urls = []
@@ -103,14 +259,7 @@ def query_index(
             shows_attached.add(show.pk)
     if shows_attached:
         items = [i for i in items if i.pk not in shows_attached]
-
-    if prepare_external:
-        # store site url to avoid dups in external search
-        cache_key = f"search_{','.join(categories or [])}_{keywords}"
-        urls = list(set(cache.get(cache_key, []) + urls))
-        cache.set(cache_key, urls, timeout=300)
-
-    return items, r.pages, r.total, r.facet_by_category, q.q
+    return items, urls
 
 
 # Hold a url briefly when its fetch is enqueued, then extend to the long TTL
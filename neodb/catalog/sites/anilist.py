@@ -17,10 +17,8 @@ from pathlib import Path
 from typing import Any, cast
 
 import httpx
-import requests
 from django.conf import settings
 from loguru import logger
-from requests.exceptions import RequestException
 
 from catalog.common import *
 from catalog.common.downloaders import DownloaderResponse, get_mock_file
@@ -91,7 +89,7 @@ class AniListDownloader(RetryDownloader):
         try:
             resp = cast(
                 DownloaderResponse,
-                requests.post(
+                http_clients.post(
                     _API_URL,
                     json=self._payload,
                     headers=self.headers,
@@ -113,7 +111,7 @@ class AniListDownloader(RetryDownloader):
                 {"response_type": response_type, "url": url, "exception": None}
             )
             return resp, response_type
-        except RequestException as e:
+        except httpx.HTTPError as e:
             self.logs.append(
                 {"response_type": RESPONSE_NETWORK_ERROR, "url": url, "exception": e}
             )
@@ -301,6 +299,10 @@ class AniList(AbstractSite):
     MAL_ID_TYPE: IdType
     SEARCH_CATEGORIES: set[str] = set()
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return anilist_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://anilist.co/{cls.URL_PATH}/{id_value}"
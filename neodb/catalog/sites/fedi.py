@@ -1,4 +1,5 @@
 import re
+from functools import partial
 from urllib.parse import quote_plus, urlparse
 
 import httpx
@@ -253,9 +254,13 @@ class FediverseInstance(AbstractSite):
         return Takahe.get_neodb_peers()
 
     @classmethod
-    def search_tasks(
+    def search_sources(
         cls, q: str, page: int = 1, category: str | None = None, page_size=5
     ):
+        """(host, search coroutine factory) for each peer to search."""
         peers = cls.get_peers_for_search()
         c = category if category != "movietv" else "movie,tv"
-        return [cls.peer_search_task(host, q, page, c, page_size) for host in peers]
+        return [
+            (host, partial(cls.peer_search_task, host, q, page, c, page_size))
+            for host in peers
+        ]
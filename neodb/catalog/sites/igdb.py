@@ -106,6 +106,10 @@ class IGDB(AbstractSite):
     WIKI_PROPERTY_ID = "P5794"
     DEFAULT_MODEL = Game
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return igdb_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return "https://www.igdb.com/games/" + id_value
@@ -324,6 +328,10 @@ class IGDB_Company(AbstractSite):
     WIKI_PROPERTY_ID = "P9650"
     DEFAULT_MODEL = People
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return igdb_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return "https://www.igdb.com/companies/" + id_value
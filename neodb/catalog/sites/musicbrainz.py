@@ -189,6 +189,10 @@ class MusicBrainzReleaseGroup(AbstractSite):
     WIKI_PROPERTY_ID = "P436"  # MusicBrainz release group ID
     DEFAULT_MODEL = Album
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return musicbrainz_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://musicbrainz.org/release-group/{id_value}"
@@ -378,6 +382,10 @@ class MusicBrainzRelease(AbstractSite):
     WIKI_PROPERTY_ID = "P5813"  # MusicBrainz release ID
     DEFAULT_MODEL = Album
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return musicbrainz_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://musicbrainz.org/release/{id_value}"
@@ -737,6 +745,10 @@ class MusicBrainzArtist(AbstractSite):
     WIKI_PROPERTY_ID = "P434"  # MusicBrainz artist ID
     DEFAULT_MODEL = People
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return musicbrainz_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://musicbrainz.org/artist/{id_value}"
@@ -127,6 +127,10 @@ class OpenLibrary(AbstractSite):
     WIKI_PROPERTY_ID = "P648"
     DEFAULT_MODEL = Edition
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return openlibrary_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://openlibrary.org/books/{id_value}"
@@ -352,6 +356,10 @@ class OpenLibrary_Work(AbstractSite):
         r"https://www\.openlibrary\.org/works/([^/\?]+W)",
     ]
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return openlibrary_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://openlibrary.org/works/{id_value}"
@@ -489,6 +497,10 @@ class OpenLibrary_Author(AbstractSite):
         r"https://www\.openlibrary\.org/authors/(OL\d+A)",
     ]
 
+    @classmethod
+    def get_rate_limiter(cls):
+        return openlibrary_limiter()
+
     @classmethod
     def id_to_url(cls, id_value):
         return f"https://openlibrary.org/authors/{id_value}"
@@ -3,7 +3,7 @@ from django.views.generic import RedirectView
 
 from .models import *
 from .views import *
-from .views_debug import scraper_debug_api, scraper_debug_page
+from .views_debug import http_pool_stats, scraper_debug_api, scraper_debug_page
 
 app_name = "catalog"
 
@@ -283,6 +283,11 @@ urlpatterns = [
     ),
     path("search/", RedirectView.as_view(url="/search", query_string=True)),
     path("search/external", external_search, name="external_search"),
+    path(
+        "search/external/stream",
+        external_search_stream,
+        name="external_search_stream",
+    ),
     path("fetch_refresh/<str:job_id>", fetch_refresh, name="fetch_refresh"),
     path("refetch", refetch, name="refetch"),
     path("unlink", unlink, name="unlink"),
@@ -300,4 +305,5 @@ urlpatterns = [
     # Debug views: DEBUG=True allows anyone, otherwise requires superuser
     path("debug/scraper/", scraper_debug_page, name="debug_scraper"),
     path("debug/scraper/api/", scraper_debug_api, name="debug_scrape_api"),
+    path("debug/http-pool/", http_pool_stats, name="debug_http_pool"),
 ]
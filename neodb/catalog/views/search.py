@@ -6,7 +6,9 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import BadRequest, PermissionDenied
 from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.translation import gettext as _
@@ -39,9 +41,11 @@ from ..search import (
     PeopleQueryParser,
     enqueue_fetch,
     get_fetch_lock,
-    query_index,
+    query_index_with_people,
 )
 
+PEOPLE_IN_SEARCH_RESULTS = 3
+
 
 def default_visible_categories() -> list[ItemCategory]:
     return [
@@ -260,8 +264,15 @@ def search(request):
         else None
     )
     per_page = get_page_size_from_request(request)
-    items, num_pages, __, by_cat, q = query_index(
-        keywords, categories, p, exclude_categories=excl, per_page=per_page
+    # people matches are shown above the first page of an unfiltered search,
+    # and fetched in the same index request as the catalog results
+    items, num_pages, __, by_cat, q, people = query_index_with_people(
+        keywords,
+        categories,
+        p,
+        exclude_categories=excl,
+        per_page=per_page,
+        people_page_size=PEOPLE_IN_SEARCH_RESULTS if category is None and p == 1 else 0,
     )
     # Include duplicates attached as `dupe_to`: the template renders them
     # via a nested {% include '_list_item.html' %} loop, so they need the
@@ -289,6 +300,7 @@ def search(request):
             "hide_category": hide_category,
             "by_category": by_cat,
             "q": q,
+            "people": people,
         },
     )
 
@@ -331,18 +343,25 @@ def people_search(request):
     )
 
 
-@login_required
-def external_search(request):
+def _external_search_args(request):
     category = request.GET.get("c", default="all").strip().lower()
     keywords = request.GET.get("q", default="").strip()
     page_number = int_(request.GET.get("page"), 1)
     disabled = request.user.preference.disabled_search_sources or []
+    return keywords, page_number, category, visible_categories(request), disabled
+
+
+@login_required
+def external_search(request):
+    keywords, page_number, category, categories, disabled = _external_search_args(
+        request
+    )
     items = (
         ExternalSources.search(
             keywords,
             page_number,
             category,
-            visible_categories(request),
+            categories,
             disabled_sources=disabled,
         )
         if keywords
@@ -351,6 +370,53 @@ def external_search(request):
     return render(request, "external_search_results.html", {"external_items": items})
 
 
+def _sse_event(event: str, html: str) -> str:
+    data = "".join(f"data: {line}\n" for line in html.splitlines() or [""])
+    return f"event: {event}\n{data}\n"
+
+
+@login_required
+def external_search_stream(request):
+    """Server-sent events with external search results, one per answering site."""
+    keywords, page_number, category, categories, disabled = _external_search_args(
+        request
+    )
+    results = (
+        ExternalSources.search_iter(
+            keywords,
+            page_number,
+            category,
+            categories,
+            disabled_sources=disabled,
+        )
+        if keywords
+        else iter(())
+    )
+
+    def events():
+        found = False
+        for __, items in results:
+            if not items:
+                continue
+            found = True
+            yield _sse_event(
+                "result",
+                render_to_string(
+                    "_external_search_items.html", {"external_items": items}, request
+                ),
+            )
+        yield _sse_event(
+            "done",
+            render_to_string("_external_search_done.html", {"found": found}, request),
+        )
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # keep nginx from buffering the stream until the last site answers
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @login_required
 @require_http_methods(["POST"])
 def refetch(request):
@@ -19,6 +19,7 @@ from .common import (
     RetryDownloader,
     ScrapDownloader,
     SiteManager,
+    http_clients,
 )
 
 
@@ -53,6 +54,13 @@ def scraper_debug_page(request):
     return render(request, "scraper_debug.html")
 
 
+def http_pool_stats(request):
+    """Downloader connection pool stats of the worker serving this request."""
+    if not _check_access(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(http_clients.stats())
+
+
 @require_http_methods(["POST"])
 def scraper_debug_api(request):
     """API endpoint to run scraper and return results."""
@@ -1,3 +1,10 @@
 from .index import Index, QueryParser, SearchResult
+from .queue import IndexUpdateQueue, bulk_index_updates
 
-__all__ = ["Index", "QueryParser", "SearchResult"]
+__all__ = [
+    "Index",
+    "QueryParser",
+    "SearchResult",
+    "IndexUpdateQueue",
+    "bulk_index_updates",
+]
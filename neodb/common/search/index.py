@@ -465,3 +465,50 @@ class Index:
         elif settings.DEBUG:
             logger.debug(f"Typesense: search result {sr}")
         return sr
+
+    @staticmethod
+    def multi_search(
+        searches: "list[tuple[Index, QueryParser]]",
+    ) -> list[SearchResult]:
+        """Run searches against one or more indexes in a single request.
+
+        Results are returned in the order of ``searches``, each typed by its
+        index's ``search_result_class``. If the combined request fails as a
+        whole, every search is retried on its own, so a page degrades to the
+        sequential round-trips rather than losing all of its results.
+        """
+        if len(searches) <= 1:
+            return [index.search(q) for index, q in searches]
+        params = []
+        for index, q in searches:
+            p = q.to_search_params()
+            p["collection"] = index.read_collection.name
+            params.append(p)
+        if settings.DEBUG:
+            logger.debug(f"Typesense: multi_search {params}")
+        first = searches[0][0]
+        try:
+            r = first._read_client.multi_search.perform(
+                cast(MultiSearchRequestSchema, {"searches": params})
+            )
+        except TYPESENSE_ERRORS as e:
+            logger.warning(f"Typesense: multi_search error {e}, searching one by one")
+            first._record_error("multi_search")
+            return [index.search(q) for index, q in searches]
+        results = r.get("results") if isinstance(r, dict) else None
+        if (
+            not isinstance(results, list)
+            or len(results) != len(searches)
+            or not all(isinstance(x, dict) for x in results)
+        ):
+            logger.error(f"Typesense: multi_search invalid response {r}")
+            first._record_error("multi_search", "invalid_response")
+            return [index.search(q) for index, q in searches]
+        srs = []
+        for (index, _), result in zip(searches, results):
+            sr = index.search_result_class(index, result)
+            if sr.error:
+                logger.error(f"Typesense: search {index.name} error {sr.error}")
+                index._record_error("search", "result_error")
+            srs.append(sr)
+        return srs
@@ -0,0 +1,188 @@
+"""Coalescing, priority-aware queue of pending index updates.
+
+Each index keeps two Redis sorted sets of pending ids, a ``high`` lane for
+interactive edits and a ``low`` lane for bulk work (imports, migrations,
+merges). The score is the time an id was first queued, so duplicates
+coalesce (``ZADD NX``) while keeping the original enqueue time, which is
+what flush lag is measured from.
+
+A flush job is scheduled once per lane, ``delay`` seconds after the first
+pending id, guarded by a short-lived Redis flag instead of cancelling and
+re-enqueueing a fixed job on every call; a steady stream of updates
+therefore can no longer postpone the flush indefinitely, and every id is
+flushed within ``max_latency`` as long as a worker is available. The job
+drains the high lane before each batch of the low lane, so bulk backfills
+never starve user edits. A batch the handler fails on is put back, and
+another flush is scheduled with exponential backoff.
+
+Code paths that perform bulk writes run inside ``bulk_index_updates()``,
+which routes every update queued within it to the low lane.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Callable, Iterable, Literal, cast
+
+import django_rq
+from django_redis import get_redis_connection
+from loguru import logger
+
+from common.sentry import distribution as sentry_distribution
+from common.sentry import gauge as sentry_gauge
+
+IndexUpdatePriority = Literal["high", "low"]
+
+_priority: ContextVar[IndexUpdatePriority] = ContextVar(
+    "index_update_priority", default="high"
+)
+
+
+@contextmanager
+def bulk_index_updates():
+    """Queue index updates made within this block on the low-priority lane."""
+    token = _priority.set("low")
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class IndexUpdateQueue:
+    lanes: tuple[IndexUpdatePriority, ...] = ("high", "low")
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[list[int]], None],
+        task: Callable[[], None],
+        rq_queue: str = "import",
+        batch_size: int = 1000,
+        delays: dict[IndexUpdatePriority, int] | None = None,
+        max_latency: int = 60,
+        max_retry_delay: int = 600,
+    ):
+        """
+        name: index name, used in redis keys and metrics.
+        handler: applies updates for a batch of ids.
+        task: module-level function enqueued in rq to call ``flush()``.
+        delays: seconds between the first pending id in a lane and its flush.
+        max_latency: seconds before a lost flush job may be scheduled again.
+        max_retry_delay: cap of the backoff between retries of a failed flush.
+        """
+        self.name = name
+        self.handler = handler
+        self.task = task
+        self.rq_queue = rq_queue
+        self.batch_size = batch_size
+        self.delays = delays or {"high": 2, "low": 30}
+        self.max_latency = max_latency
+        self.max_retry_delay = max_retry_delay
+
+    def _key(self, lane: IndexUpdatePriority) -> str:
+        return f"index_queue:{self.name}:{lane}"
+
+    def _scheduled_key(self, lane: IndexUpdatePriority) -> str:
+        return f"index_queue:{self.name}:{lane}:scheduled"
+
+    def _failures_key(self) -> str:
+        return f"index_queue:{self.name}:failures"
+
+    def enqueue(
+        self, ids: Iterable[int], priority: IndexUpdatePriority | None = None
+    ) -> None:
+        ids = list(ids)
+        if not ids:
+            return
+        lane = priority or _priority.get()
+        now = time.time()
+        try:
+            conn = get_redis_connection("default")
+            conn.zadd(self._key(lane), {str(i): now for i in ids}, nx=True)
+            if not conn.set(self._scheduled_key(lane), 1, nx=True, ex=self.max_latency):
+                return
+        except Exception as e:
+            logger.error(f"index queue {self.name}: unable to enqueue {e}")
+            return
+        django_rq.get_queue(self.rq_queue).enqueue_in(
+            timedelta(seconds=self.delays[lane]), self.task
+        )
+
+    def _pop(self, conn, lane: IndexUpdatePriority) -> list[tuple[bytes, float]]:
+        return cast(
+            list[tuple[bytes, float]], conn.zpopmin(self._key(lane), self.batch_size)
+        )
+
+    def flush(self) -> int:
+        """Apply all pending updates, high lane first; return the number of ids."""
+        conn = get_redis_connection("default")
+        # let updates queued from now on schedule another flush; anything
+        # queued before this point is drained by the loop below
+        conn.delete(*[self._scheduled_key(lane) for lane in self.lanes])
+        flushed = 0
+        while True:
+            lane: IndexUpdatePriority = "high"
+            popped = self._pop(conn, lane)
+            if not popped:
+                lane = "low"
+                popped = self._pop(conn, lane)
+            if not popped:
+                break
+            ids = [int(i) for i, _ in popped]
+            if lane == "high":
+                # an id already updated from the high lane needs no low pass
+                conn.zrem(self._key("low"), *[i for i, _ in popped])
+            oldest = min(score for _, score in popped)
+            try:
+                self.handler(ids)
+            except Exception as e:
+                # put the batch back with its original scores and retry it
+                conn.zadd(self._key(lane), {i: s for i, s in popped}, nx=True)
+                logger.error(f"index queue {self.name}: flush failed {e}")
+                self._schedule_retry(conn, lane)
+                raise
+            sentry_distribution(
+                "search.index_queue.lag",
+                time.time() - oldest,
+                attributes={"index": self.name, "lane": lane},
+            )
+            flushed += len(ids)
+        conn.delete(self._failures_key())
+        self.report_depth()
+        return flushed
+
+    def _schedule_retry(self, conn, lane: IndexUpdatePriority) -> None:
+        """Schedule another flush after a failed one, backing off exponentially
+        with consecutive failures, so requeued ids don't wait for an unrelated
+        enqueue."""
+        failures = conn.incr(self._failures_key())
+        delay = min(self.delays[lane] * 2**failures, self.max_retry_delay)
+        conn.expire(self._failures_key(), self.max_retry_delay * 2)
+        # hold off enqueue() from scheduling its own flush meanwhile
+        conn.set(self._scheduled_key(lane), 1, ex=delay + self.max_latency)
+        django_rq.get_queue(self.rq_queue).enqueue_in(
+            timedelta(seconds=delay), self.task
+        )
+
+    def depth(self) -> dict[IndexUpdatePriority, int]:
+        conn = get_redis_connection("default")
+        return {lane: conn.zcard(self._key(lane)) for lane in self.lanes}
+
+    def lag(self) -> dict[IndexUpdatePriority, float]:
+        """Seconds the oldest pending id in each lane has been waiting."""
+        conn = get_redis_connection("default")
+        now = time.time()
+        r: dict[IndexUpdatePriority, float] = {}
+        for lane in self.lanes:
+            oldest = conn.zrange(self._key(lane), 0, 0, withscores=True)
+            r[lane] = now - oldest[0][1] if oldest else 0.0
+        return r
+
+    def report_depth(self) -> None:
+        for lane, depth in self.depth().items():
+            sentry_gauge(
+                "search.index_queue.depth",
+                depth,
+                attributes={"index": self.name, "lane": lane},
+            )
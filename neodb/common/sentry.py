@@ -18,12 +18,12 @@ def _clean_attributes(attributes: MetricAttributes | None) -> dict[str, Any]:
     return {key: value for key, value in attributes.items() if value is not None}
 
 
-def count(
+def _emit(
+    kind: str,
     key: str,
-    value: int | float = 1,
-    attributes: MetricAttributes | None = None,
+    value: int | float,
+    attributes: MetricAttributes | None,
 ) -> None:
-    """Emit a Sentry counter metric when Sentry is configured."""
     try:
         import sentry_sdk
     except ImportError:
@@ -34,16 +34,43 @@ def count(
         return
 
     metrics = getattr(sentry_sdk, "metrics", None)
-    metrics_count = getattr(metrics, "count", None)
-    if not callable(metrics_count):
+    emit = getattr(metrics, kind, None)
+    if not callable(emit):
         return
 
     try:
-        metrics_count(key, value, attributes=_clean_attributes(attributes))
+        emit(key, value, attributes=_clean_attributes(attributes))
     except Exception:
         return
 
 
+def count(
+    key: str,
+    value: int | float = 1,
+    attributes: MetricAttributes | None = None,
+) -> None:
+    """Emit a Sentry counter metric when Sentry is configured."""
+    _emit("count", key, value, attributes)
+
+
+def gauge(
+    key: str,
+    value: int | float,
+    attributes: MetricAttributes | None = None,
+) -> None:
+    """Emit a Sentry gauge metric (e.g. a queue depth) when Sentry is configured."""
+    _emit("gauge", key, value, attributes)
+
+
+def distribution(
+    key: str,
+    value: int | float,
+    attributes: MetricAttributes | None = None,
+) -> None:
+    """Emit a Sentry distribution metric (e.g. a latency) when Sentry is configured."""
+    _emit("distribution", key, value, attributes)
+
+
 def record_activity(action: str, source: str) -> None:
     """Emit a `user.activity` counter for a user-initiated action.
 
@@ -7,3 +7,6 @@ class JournalConfig(AppConfig):
 
     def ready(self):
         from . import apis  # noqa
+
+        # register cron jobs; not via journal.jobs, which journal.models imports
+        from journal.jobs.index_sync import JournalIndexSync  # noqa
@@ -1,17 +1,26 @@
+import io
 import json
 import os
 import shutil
 import tempfile
 import uuid
-from typing import Any
+import zipfile
+from datetime import datetime
+from functools import partial
+from itertools import batched
+from typing import IO, Any, Iterable, Iterator
+from urllib.parse import urlparse
 
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db.models import QuerySet, prefetch_related_objects
 from django.db.models.fields.files import ImageFieldFile
 from django.utils import timezone
 from loguru import logger
 
 from catalog.common import ProxiedImageDownloader
+from catalog.common.fetch_scheduler import FetchJob, FetchScheduler
+from catalog.models import Item
 from common.utils import GenerateDateUUIDMediaFilePath
 from journal.models import (
     Article,
@@ -25,8 +34,11 @@ from journal.models import (
     ShelfMemberProgress,
     Tag,
     TagMember,
+    Tombstone,
+    prefetch_latest_posts,
 )
 from journal.models.renderers import RE_MD_IMAGE, normalize_image_src
+from journal.models.shelf import ShelfLogEntryPost
 from takahe.models import Post
 from users.models import Task
 
@@ -39,6 +51,22 @@ _CONTENT_CLASSES = (Rating, Comment, Review, Note)
 
 
 class NdjsonExporter(Task):
+    """Export a user's journal as a ZIP of NDJSON files plus attachments.
+
+    Rows are read in keyset-paginated chunks with what their ``ap_object``
+    reads (owner, items, shelves, posts) prefetched per chunk, and the ZIP
+    is written as we go: attachments are streamed straight into it, remote
+    images for a chunk are downloaded together on a ``FetchScheduler``, and
+    only journal.ndjson is spooled to a temporary file until the archive is
+    closed. Memory use depends on the chunk size, not on the archive size.
+
+    With ``since`` (an ISO timestamp) in metadata, only the changes after it
+    are exported: rows edited since then, read through their
+    ``(owner, edited_time)`` indexes, and a ``Tombstone`` record for each
+    row deleted since then. The header carries ``since`` too, so that
+    ``NdjsonImporter`` applies such an archive on top of an earlier one.
+    """
+
     class Meta:
         app_label = "journal"  # workaround bug in TypedModel
 
@@ -46,7 +74,12 @@ class NdjsonExporter(Task):
     DefaultMetadata = {
         "file": None,
         "total": 0,
+        "since": None,
     }
+    # rows read (and items written to catalog.ndjson) per query
+    chunk_size = 500
+    # threads downloading remote images
+    image_workers = 8
 
     @property
     def filename(self) -> str:
@@ -54,8 +87,9 @@ class NdjsonExporter(Task):
         return f"neodb_{self.user.username}_{d}_ndjson"
 
     def ref(self, item) -> str:
-        if item not in self.ref_items:
-            self.ref_items.append(item)
+        # a dict keeps the first-seen order of the items, like a list did,
+        # without a linear scan per reference
+        self.ref_items.setdefault(item.pk, None)
         return item.absolute_url
 
     def get_header(self):
@@ -66,21 +100,112 @@ class NdjsonExporter(Task):
             "actor": self.user.identity.actor_uri,
             "request_time": self.created_time.isoformat(),
             "created_time": timezone.now().isoformat(),
+            "since": self.since.isoformat() if self.since else None,
         }
 
+    # --- reading ----------------------------------------------------------
+
+    def _chunks(self, qs: QuerySet) -> Iterator[list]:
+        """Rows of ``qs`` in pk order, ``chunk_size`` at a time.
+
+        Keyset pagination: each chunk starts after the last pk of the
+        previous one, so late chunks cost the same as early ones.
+        """
+        qs = qs.order_by("pk")
+        chunk = list(qs[: self.chunk_size])
+        while chunk:
+            yield chunk
+            chunk = list(qs.filter(pk__gt=chunk[-1].pk)[: self.chunk_size])
+
+    def _owned(self, cls) -> QuerySet:
+        """The user's ``cls`` rows, or those edited since ``since``."""
+        qs = cls.objects.filter(owner=self.user.identity)
+        if self.since:
+            qs = qs.filter(edited_time__gt=self.since)
+        return qs
+
+    def _owned_chunks(self, qs: QuerySet, *related: str) -> Iterator[list]:
+        """Chunks of the user's rows in ``qs``, with owner and item attached.
+
+        Every row belongs to the exporting user, so the owner (and its
+        takahe identity, read by ``ap_object``) is shared rather than
+        loaded once per row; items are fetched once per chunk, as their
+        concrete classes.
+        """
+        owner = self.user.identity
+        if related:
+            qs = qs.select_related(*related)
+        for chunk in self._chunks(qs):
+            item_ids = {r.item_id for r in chunk if getattr(r, "item_id", None)}
+            items = {i.pk: i for i in Item.objects.filter(pk__in=item_ids)}
+            for r in chunk:
+                r.owner = owner
+                item = items.get(getattr(r, "item_id", None))
+                if item:
+                    r.item = item
+            yield chunk
+
     # --- bundling helpers -------------------------------------------------
     #
     # Every helper returns an archive-relative path ("attachments/xxx.png")
     # so the importer can restore the file and repoint the record at it.
 
-    def _bundle_path(self, filename: str) -> tuple[str, str]:
-        """Absolute destination and archive-relative path for ``filename``,
-        uniquified so two sources with the same basename can't clobber."""
-        dest = os.path.join(self.attachment_path, filename)
-        if os.path.exists(dest):
-            filename = f"{uuid.uuid4()}-{filename}"
-            dest = os.path.join(self.attachment_path, filename)
-        return dest, f"attachments/{filename}"
+    def _bundle_path(self, filename: str) -> str:
+        """Archive-relative path for ``filename``, uniquified so two sources
+        with the same basename can't clobber."""
+        path = f"attachments/{filename}"
+        if path in self.bundled_paths:
+            path = f"attachments/{uuid.uuid4()}-{filename}"
+        self.bundled_paths.add(path)
+        return path
+
+    def _bundle_file(self, src: IO[bytes], filename: str) -> str:
+        """Stream an open file into the archive; returns its path there."""
+        path = self._bundle_path(filename)
+        with self.archive.open(path, "w") as dst:
+            shutil.copyfileobj(src, dst)
+        return path
+
+    @staticmethod
+    def _download_image(url: str) -> tuple[bytes, str] | None:
+        try:
+            raw_img, ext = ProxiedImageDownloader.download_image(url, "")
+        except Exception:
+            logger.debug(f"error downloading {url}")
+            return None
+        return (raw_img, ext) if raw_img else None
+
+    def _fetch_images(self, urls: Iterable[str]) -> None:
+        """Download the remote images among ``urls`` not bundled yet.
+
+        They are fetched together, on per-host lanes of a ``FetchScheduler``,
+        then written to the archive from this thread (a ZipFile takes one
+        writer at a time). ``_save_image`` picks the results up from
+        ``bundled_images``.
+        """
+        pending: list[tuple[str, str]] = []
+        for url in dict.fromkeys(urls):
+            if url in self.bundled_images:
+                continue
+            normalized = normalize_image_src(url) or url
+            if normalized.startswith("http") and not normalized.startswith(
+                settings.MEDIA_URL
+            ):
+                pending.append((url, normalized))
+        if not pending:
+            return
+        jobs = [
+            FetchJob(partial(self._download_image, n), host=urlparse(n).netloc)
+            for _, n in pending
+        ]
+        for (url, _), image in zip(pending, self.image_scheduler.run(jobs)):
+            path = None
+            if image:
+                raw_img, ext = image
+                path = self._bundle_path(f"{uuid.uuid4()}.{ext or 'jpg'}")
+                self.archive.writestr(path, raw_img)
+            # cache misses too, so a broken URL is only attempted once per export
+            self.bundled_images[url] = path or ""
 
     def _save_image(self, url: str) -> str | None:
         """Copy (local) or download (remote) an image into the bundle.
@@ -90,38 +215,32 @@ class NdjsonExporter(Task):
         an absolute URL on our own site (how import_note records restored
         attachments) is recognised as local: pulling our own files back over
         HTTP is wasteful, and is_valid_url blocks it outright when the site
-        or media host is internal.
+        or media host is internal. Remote images are normally fetched ahead,
+        a chunk at a time, by ``_fetch_images``.
         """
-        cached = self.bundled_images.get(url)
-        if cached is not None:
-            return cached or None
-        path = None
-        normalized = normalize_image_src(url) or url
-        if normalized.startswith(settings.MEDIA_URL):
-            rel_path = normalized[len(settings.MEDIA_URL) :]
-            basename = os.path.basename(rel_path)
-            if basename:
-                dest, path = self._bundle_path(basename)
-                try:
-                    with default_storage.open(rel_path, "rb") as src:
-                        with open(dest, "wb") as dst:
-                            shutil.copyfileobj(src, dst)
-                except Exception:
-                    logger.error(f"error copying {url} to {self.attachment_path}")
-                    path = None
-        elif normalized.startswith("http"):
-            try:
-                raw_img, ext = ProxiedImageDownloader.download_image(normalized, "")
-                if raw_img:
-                    dest, path = self._bundle_path(f"{uuid.uuid4()}.{ext or 'jpg'}")
-                    with open(dest, "wb") as binary_file:
-                        binary_file.write(raw_img)
-            except Exception:
-                logger.debug(f"error downloading {url}")
+        if url not in self.bundled_images:
+            normalized = normalize_image_src(url) or url
+            if normalized.startswith(settings.MEDIA_URL):
                 path = None
-        # cache misses too, so a broken URL is only attempted once per export
-        self.bundled_images[url] = path or ""
-        return path
+                rel_path = normalized[len(settings.MEDIA_URL) :]
+                basename = os.path.basename(rel_path)
+                if basename:
+                    try:
+                        with default_storage.open(rel_path, "rb") as src:
+                            path = self._bundle_file(src, basename)
+                    except Exception:
+                        logger.error(f"error copying {url} to the export bundle")
+                self.bundled_images[url] = path or ""
+            elif normalized.startswith("http"):
+                self._fetch_images([url])
+        return self.bundled_images.get(url) or None
+
+    @staticmethod
+    def _body_image_urls(body: str) -> list[str]:
+        # RE_MD_IMAGE is the renderer's own pattern; the previous local one
+        # only matched an empty alt text, silently skipping ``![alt](url)``
+        urls = (m.group(2).strip() for m in RE_MD_IMAGE.finditer(body or ""))
+        return list(dict.fromkeys(u for u in urls if u))
 
     def _bundle_body_images(self, body: str) -> list[dict[str, str]]:
         """Bundle every inline markdown image in ``body``.
@@ -131,14 +250,7 @@ class NdjsonExporter(Task):
         body, without which local images 404 on the destination server.
         """
         images: list[dict[str, str]] = []
-        seen: set[str] = set()
-        # RE_MD_IMAGE is the renderer's own pattern; the previous local one
-        # only matched an empty alt text, silently skipping ``![alt](url)``
-        for m in RE_MD_IMAGE.finditer(body or ""):
-            src = m.group(2).strip()
-            if not src or src in seen:
-                continue
-            seen.add(src)
+        for src in self._body_image_urls(body):
             path = self._save_image(src)
             if path:
                 images.append({"src": src, "file": path})
@@ -155,17 +267,15 @@ class NdjsonExporter(Task):
         basename = os.path.basename(str(cover))
         if not basename:
             return None
-        dest, path = self._bundle_path(basename)
         try:
             with cover.open("rb") as src:
-                with open(dest, "wb") as dst:
-                    shutil.copyfileobj(src, dst)
+                return self._bundle_file(src, basename)
         except Exception as e:
             logger.error(
-                f"error copying cover {basename} to {dest}", extra={"exception": e}
+                f"error copying cover {basename} to the export bundle",
+                extra={"exception": e},
             )
             return None
-        return path
 
     def _bundle_post_attachments(self, post: Post) -> list[dict[str, str]]:
         attachments = []
@@ -173,20 +283,25 @@ class NdjsonExporter(Task):
             basename = os.path.basename(a.file.name or "")
             if not basename:
                 continue
-            dest, path = self._bundle_path(basename)
             try:
                 with a.file.open("rb") as src:
-                    with open(dest, "wb") as dst:
-                        shutil.copyfileobj(src, dst)
+                    path = self._bundle_file(src, basename)
             except Exception as e:
                 logger.error(
-                    f"error copying attachment {basename} to {dest}",
+                    f"error copying attachment {basename} to the export bundle",
                     extra={"exception": e},
                 )
                 continue
             attachments.append({"file": path, "mimetype": a.mimetype})
         return attachments
 
+    @staticmethod
+    def _note_uses_own_attachments(note: Note) -> bool:
+        post = note.latest_post
+        return not post or not any(
+            os.path.basename(a.file.name or "") for a in post.attachments.all()
+        )
+
     def _bundle_note_attachments(self, note: Note) -> list[dict[str, str]]:
         """Attachment records for a Note.
 
@@ -211,24 +326,29 @@ class NdjsonExporter(Task):
             attachments.append(entry)
         return attachments
 
-    def run(self):
-        self.ref_items = []
-        self.bundled_images: dict[str, str] = {}
-        user = self.user
-        temp_dir = tempfile.mkdtemp()
-        temp_folder_path = os.path.join(temp_dir, self.filename)
-        os.makedirs(temp_folder_path)
-        self.attachment_path = os.path.join(temp_folder_path, "attachments")
-        os.makedirs(self.attachment_path, exist_ok=True)
-
-        journal_file = os.path.join(temp_folder_path, "journal.ndjson")
-        total = 0
-        with open(journal_file, "w") as f:
-            f.write(json.dumps(self.get_header()) + "\n")
-
-            for cls in _CONTENT_CLASSES:
-                for p in cls.objects.filter(owner=user.identity):
-                    total += 1
+    # --- writing ----------------------------------------------------------
+
+    def _write(self, f: IO[bytes], o: dict[str, Any]) -> None:
+        self.total += 1
+        f.write((json.dumps(o, default=str) + "\n").encode())
+
+    def _write_contents(self, f: IO[bytes]) -> None:
+        for cls in _CONTENT_CLASSES:
+            for chunk in self._owned_chunks(self._owned(cls)):
+                if cls is Note:
+                    prefetch_latest_posts(chunk)
+                    self._fetch_images(
+                        a.get("url")
+                        for p in chunk
+                        if self._note_uses_own_attachments(p)
+                        for a in p.attachments or []
+                        if a.get("url")
+                    )
+                elif cls is Review:
+                    self._fetch_images(
+                        u for p in chunk for u in self._body_image_urls(p.body)
+                    )
+                for p in chunk:
                     self.ref(p.item)
                     o: dict[str, Any] = {
                         "type": p.__class__.__name__,
@@ -244,14 +364,18 @@ class NdjsonExporter(Task):
                         attachments = self._bundle_note_attachments(p)
                         if attachments:
                             o["attachments"] = attachments
-                    f.write(json.dumps(o, default=str) + "\n")
-
-            # Articles are item-less so they don't fall under
-            # _CONTENT_CLASSES. Serialized via the same
-            # {type, content, visibility, metadata} envelope the importer
-            # expects, plus the bundled body images and featured image.
-            for art in Article.objects.filter(owner=user.identity):
-                total += 1
+                    self._write(f, o)
+
+    def _write_articles(self, f: IO[bytes]) -> None:
+        # Articles are item-less so they don't fall under
+        # _CONTENT_CLASSES. Serialized via the same
+        # {type, content, visibility, metadata} envelope the importer
+        # expects, plus the bundled body images and featured image.
+        for chunk in self._owned_chunks(self._owned(Article)):
+            self._fetch_images(
+                u for art in chunk for u in self._body_image_urls(art.body)
+            )
+            for art in chunk:
                 o = {
                     "type": "Article",
                     "content": art.ap_object,
@@ -262,10 +386,12 @@ class NdjsonExporter(Task):
                 images = self._bundle_body_images(art.body)
                 if images:
                     o["images"] = images
-                f.write(json.dumps(o, default=str) + "\n")
+                self._write(f, o)
 
-            for c in Collection.objects.filter(owner=user.identity):
-                total += 1
+    def _write_collections(self, f: IO[bytes]) -> None:
+        for chunk in self._owned_chunks(self._owned(Collection)):
+            self._fetch_images(u for c in chunk for u in self._body_image_urls(c.brief))
+            for c in chunk:
                 o = {
                     "type": "Collection",
                     "content": c.ap_object,
@@ -283,20 +409,20 @@ class NdjsonExporter(Task):
                 images = self._bundle_body_images(c.brief)
                 if images:
                     o["images"] = images
-                f.write(json.dumps(o, default=str) + "\n")
+                self._write(f, o)
 
-            for t in Tag.objects.filter(owner=user.identity):
-                total += 1
+    def _write_tags(self, f: IO[bytes]) -> None:
+        for chunk in self._chunks(self._owned(Tag)):
+            for t in chunk:
                 o = {
                     "type": "Tag",
                     "name": t.title,
                     "visibility": t.visibility,
                     "pinned": t.pinned,
                 }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            for t in TagMember.objects.filter(owner=user.identity):
-                total += 1
+                self._write(f, o)
+        for chunk in self._owned_chunks(self._owned(TagMember), "parent"):
+            for t in chunk:
                 self.ref(t.item)
                 o = {
                     "type": "TagMember",
@@ -304,16 +430,17 @@ class NdjsonExporter(Task):
                     "visibility": t.visibility,
                     "metadata": t.metadata,
                 }
-                f.write(json.dumps(o, default=str) + "\n")
+                self._write(f, o)
 
+    def _write_marks(self, f: IO[bytes]) -> None:
+        for chunk in self._owned_chunks(self._owned(ShelfMember), "parent"):
             progress_by_member = {
                 p.shelf_member_id: p
                 for p in ShelfMemberProgress.objects.filter(
-                    shelf_member__owner=user.identity
+                    shelf_member_id__in=[m.pk for m in chunk]
                 )
             }
-            for m in ShelfMember.objects.filter(owner=user.identity):
-                total += 1
+            for m in chunk:
                 # a mark whose item has no comment/rating/log would otherwise
                 # never reach catalog.ndjson, and fail to import
                 self.ref(m.item)
@@ -335,10 +462,15 @@ class NdjsonExporter(Task):
                     if progress and progress.progress_value
                     else None
                 )
-                f.write(json.dumps(o, default=str) + "\n")
-
-            for log in ShelfLogEntry.objects.filter(owner=user.identity):
-                total += 1
+                self._write(f, o)
+
+        for chunk in self._owned_chunks(self._owned(ShelfLogEntry)):
+            post_ids: dict[int, list[int]] = {}
+            for log_id, post_id in ShelfLogEntryPost.objects.filter(
+                log_entry_id__in=[log.pk for log in chunk]
+            ).values_list("log_entry_id", "post_id"):
+                post_ids.setdefault(log_id, []).append(post_id)
+            for log in chunk:
                 o = {
                     "type": "ShelfLog",
                     "item": self.ref(log.item),
@@ -346,58 +478,126 @@ class NdjsonExporter(Task):
                     # jsondata fields (comment_text, rating_grade, progress_*)
                     # live in metadata; without it the history reimports blank
                     "metadata": log.metadata,
-                    "posts": list(log.all_post_ids()),
+                    "posts": post_ids.get(log.pk, []),
                     "timestamp": log.timestamp,
                 }
-                f.write(json.dumps(o, default=str) + "\n")
-
-            posts = Post.objects.filter(author_id=user.identity.pk).exclude(
-                type_data__has_key="object"
-            )
-            for p in posts:
-                total += 1
+                self._write(f, o)
+
+    def _write_posts(self, f: IO[bytes]) -> None:
+        posts = (
+            Post.objects.filter(author_id=self.user.identity.pk)
+            .exclude(type_data__has_key="object")
+            .select_related("author__domain", "application")
+            .prefetch_related("attachments", "mentions", "emojis")
+        )
+        if self.since:
+            posts = posts.filter(updated__gt=self.since)
+        for chunk in self._chunks(posts):
+            for p in chunk:
                 o = {"type": "post", "post": p.to_mastodon_json()}
                 attachments = self._bundle_post_attachments(p)
                 if attachments:
                     o["attachments"] = attachments
-                f.write(json.dumps(o, default=str) + "\n")
-
-        catalog_file = os.path.join(temp_folder_path, "catalog.ndjson")
-        with open(catalog_file, "w") as f:
-            f.write(json.dumps(self.get_header()) + "\n")
-            for item in self.ref_items:
-                f.write(json.dumps(item.ap_object, default=str) + "\n")
-
-        # Export actor.ndjson with Takahe identity data
-        actor_file = os.path.join(temp_folder_path, "actor.ndjson")
-        with open(actor_file, "w") as f:
-            f.write(json.dumps(self.get_header()) + "\n")
-            takahe_identity = self.user.identity.takahe_identity
-            identity_data = {
-                "type": "Identity",
-                "username": takahe_identity.username,
-                "domain": takahe_identity.domain_id,
-                "actor_uri": takahe_identity.actor_uri,
-                "name": takahe_identity.name,
-                "summary": takahe_identity.summary,
-                "metadata": takahe_identity.metadata,
-                "private_key": takahe_identity.private_key,
-                "public_key": takahe_identity.public_key,
-                "public_key_id": takahe_identity.public_key_id,
-            }
-            f.write(json.dumps(identity_data, default=str) + "\n")
+                self._write(f, o)
 
+    def _write_tombstones(self, f: IO[bytes]) -> None:
+        if not self.since:
+            return
+        tombstones = Tombstone.objects.filter(
+            owner=self.user.identity, deleted_time__gt=self.since
+        )
+        for chunk in self._owned_chunks(tombstones):
+            for t in chunk:
+                o = {
+                    "type": "Tombstone",
+                    "formerType": t.type,
+                    "item": self.ref(t.item) if t.item_id else None,
+                    "key": t.key,
+                    "deleted": t.deleted_time,
+                }
+                self._write(f, o)
+
+    def _write_catalog(self, f: IO[str]) -> None:
+        f.write(json.dumps(self.get_header()) + "\n")
+        for pks in batched(self.ref_items, self.chunk_size):
+            items = list(Item.objects.filter(pk__in=pks))
+            # everything ItemSchema reads, so ap_object doesn't query per item
+            Item.prefetch_parent_items(items)
+            Item.prefetch_edition_works(items)
+            prefetch_related_objects(
+                items, Item.external_resources_prefetch(), Item.credits_prefetch()
+            )
+            by_pk = {i.pk: i for i in items}
+            for pk in pks:
+                if pk in by_pk:
+                    f.write(json.dumps(by_pk[pk].ap_object, default=str) + "\n")
+
+    def _write_actor(self, f: IO[str]) -> None:
+        # Takahe identity data
+        f.write(json.dumps(self.get_header()) + "\n")
+        takahe_identity = self.user.identity.takahe_identity
+        identity_data = {
+            "type": "Identity",
+            "username": takahe_identity.username,
+            "domain": takahe_identity.domain_id,
+            "actor_uri": takahe_identity.actor_uri,
+            "name": takahe_identity.name,
+            "summary": takahe_identity.summary,
+            "metadata": takahe_identity.metadata,
+            "private_key": takahe_identity.private_key,
+            "public_key": takahe_identity.public_key,
+            "public_key_id": takahe_identity.public_key_id,
+        }
+        f.write(json.dumps(identity_data, default=str) + "\n")
+
+    def run(self):
+        since = self.metadata.get("since")
+        self.since = datetime.fromisoformat(since) if since else None
+        if self.since and timezone.is_naive(self.since):
+            self.since = timezone.make_aware(self.since)
+        self.ref_items: dict[int, None] = {}
+        self.bundled_images: dict[str, str] = {}
+        self.bundled_paths: set[str] = set()
+        self.image_scheduler = FetchScheduler(max_workers=self.image_workers)
+        self.total = 0
         filename = GenerateDateUUIDMediaFilePath(
             "f.zip", settings.MEDIA_ROOT + "/" + settings.EXPORT_FILE_PATH_ROOT
         )
-        if not os.path.exists(os.path.dirname(filename)):
-            os.makedirs(os.path.dirname(filename))
-        shutil.make_archive(filename[:-4], "zip", temp_folder_path)
-        # the staging copy holds every attachment we just bundled; drop it
-        # so exports don't accumulate in the system temp dir
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        try:
+            with (
+                zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as self.archive,
+                tempfile.TemporaryFile() as journal,
+            ):
+                self.archive.mkdir("attachments")
+                # Attachments go into the archive while the journal is being
+                # written, and a ZipFile only takes one open entry at a time, so
+                # the journal is spooled to disk and added last.
+                journal.write((json.dumps(self.get_header()) + "\n").encode())
+                self._write_contents(journal)
+                self._write_articles(journal)
+                self._write_collections(journal)
+                self._write_tags(journal)
+                self._write_marks(journal)
+                self._write_posts(journal)
+                self._write_tombstones(journal)
+                journal.seek(0)
+                with self.archive.open("journal.ndjson", "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(journal, dst)
+                for name, write in (
+                    ("catalog.ndjson", self._write_catalog),
+                    ("actor.ndjson", self._write_actor),
+                ):
+                    with io.TextIOWrapper(
+                        self.archive.open(name, "w", force_zip64=True), encoding="utf-8"
+                    ) as f:
+                        write(f)
+        except Exception:
+            # don't leave a truncated archive behind
+            os.unlink(filename)
+            raise
 
         self.metadata["file"] = filename
-        self.metadata["total"] = total
-        self.message = f"{total} records exported."
+        self.metadata["total"] = self.total
+        self.message = f"{self.total} records exported."
         self.save()
@@ -1,5 +1,7 @@
 import datetime
-from typing import Dict, List, Literal, Optional
+import math
+import time
+from typing import Dict, Iterable, List, Literal, Optional
 
 from django.conf import settings
 from django.utils.dateparse import parse_datetime
@@ -7,7 +9,8 @@ from loguru import logger
 
 from catalog.common.sites import SiteManager
 from catalog.models import Edition, IdType, Item, SiteName
-from journal.models import ShelfType
+from common.search import bulk_index_updates
+from journal.models import ShelfType, deferred_daily_activity, deferred_item_stats
 from users.models import Task
 
 _PREFERRED_SITES = [
@@ -38,9 +41,16 @@ class BaseImporter(Task):
         "visibility": 0,
     }
 
+    # seconds between two saves of the progress to the task row
+    PROGRESS_SAVE_INTERVAL = 1.0
+
     def progress(self, result: ImportResult) -> None:
         """Update import progress.
 
+        Saved at most once per PROGRESS_SAVE_INTERVAL (and once the last
+        record is done) rather than after every record, which cost an
+        UPDATE of the task row per imported line.
+
         Args:
             result: The import result ('imported', 'skipped', or 'failed')
         """
@@ -59,11 +69,46 @@ class BaseImporter(Task):
             f"{self.metadata['skipped']} skipped, "
             f"{self.metadata['failed']} failed"
         )
-        self.save(update_fields=["metadata", "message"])
+        now = time.monotonic()
+        if (
+            self.metadata["processed"] == self.metadata["total"]
+            or now - getattr(self, "_progress_saved_at", -math.inf)
+            >= self.PROGRESS_SAVE_INTERVAL
+        ):
+            self._progress_saved_at = now
+            self.save(update_fields=["metadata", "message"])
+
+    def _run(self) -> bool:
+        # imports save marks in bulk; queue the index updates they trigger on
+        # the low-priority lane so interactive edits are not held up behind
+        # them, and refresh stats of each imported item (and daily activity
+        # of each day imported) once at the end
+        with bulk_index_updates(), deferred_item_stats(), deferred_daily_activity():
+            return super()._run()
 
     def run(self) -> None:
         raise NotImplementedError
 
+    PRELOAD_CHUNK_SIZE = 500
+
+    def preload_items(self, links: Iterable[str]) -> None:
+        """Resolve links of the next rows in bulk before importing them.
+
+        ``get_item_by_info_and_links()`` uses these items first and only
+        resolves links one by one (and fetches them) when none matched.
+        """
+        self._preloaded_items = SiteManager.resolve_many(links)
+
+    @staticmethod
+    def _link_order(link: str) -> int:
+        site_url = settings.SITE_INFO["site_url"] + "/"
+        if link.startswith("/") or link.startswith(site_url):
+            return -1
+        cls = SiteManager.get_class_by_url(link)
+        if cls and cls.SITE_NAME in _PREFERRED_SITES:
+            return _PREFERRED_SITES.index(cls.SITE_NAME)
+        return 99
+
     def get_item_by_info_and_links(
         self, title: str, info_str: str, links: list[str]
     ) -> Optional[Item]:
@@ -77,6 +122,12 @@ class BaseImporter(Task):
         Returns:
             Item if found, None otherwise
         """
+        preloaded = getattr(self, "_preloaded_items", None)
+        if preloaded:
+            for link in sorted(links, key=self._link_order):
+                if link in preloaded:
+                    return preloaded[link]
+
         site_url = settings.SITE_INFO["site_url"] + "/"
         # look for local items first
         for link in links:
@@ -2,6 +2,7 @@ import csv
 import os
 import tempfile
 import zipfile
+from itertools import batched
 from typing import Dict
 
 from django.utils import timezone
@@ -213,9 +214,13 @@ class CsvImporter(BaseImporter):
         logger.debug(f"Processing {file_path}")
         with open(file_path, "r") as csvfile:
             reader = csv.DictReader(csvfile)
-            for row in reader:
-                result = import_function(row)
-                self.progress(result)
+            for rows in batched(reader, self.PRELOAD_CHUNK_SIZE):
+                self.preload_items(
+                    link for row in rows for link in (row.get("links") or "").split()
+                )
+                for row in rows:
+                    result = import_function(row)
+                    self.progress(result)
 
     def run(self) -> None:
         """Run the CSV import."""
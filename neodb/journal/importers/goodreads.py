@@ -1,5 +1,6 @@
 import csv
 from datetime import datetime
+from itertools import batched
 
 from django.utils import timezone
 from django.utils.timezone import make_aware
@@ -54,8 +55,47 @@ class GoodreadsImporter(Task):
             return s[2:-1]
         return s
 
+    PRELOAD_CHUNK_SIZE = 500
+
+    @classmethod
+    def _lookup_ids(
+        cls, book_id: str, isbn13_raw: str, isbn_raw: str
+    ) -> list[tuple[str, str]]:
+        """Lookup ids of a row, in the order they are tried."""
+        ids = [(IdType.Goodreads, book_id)]
+        isbn13 = cls._strip_isbn(isbn13_raw)
+        if isbn13:
+            ids.append((IdType.ISBN, isbn13))
+        isbn = cls._strip_isbn(isbn_raw)
+        if isbn:
+            id_type, id_value = detect_isbn_asin(isbn)
+            if id_type and id_value:
+                ids.append((id_type, id_value))
+        return ids
+
     @classmethod
-    def find_item(cls, book_id: str, isbn13_raw: str, isbn_raw: str):
+    def preload_items(cls, rows) -> dict[tuple[str, str], Item]:
+        """Resolve lookup ids of many rows at once, for ``find_item()``."""
+        return Item.get_by_lookup_ids_bulk(
+            i
+            for row in rows
+            for i in cls._lookup_ids(row["Book Id"], row["ISBN13"], row["ISBN"])
+        )
+
+    @classmethod
+    def find_item(
+        cls,
+        book_id: str,
+        isbn13_raw: str,
+        isbn_raw: str,
+        known: dict[tuple[str, str], Item] | None = None,
+    ):
+        # Step 0: ids resolved in bulk by preload_items()
+        if known:
+            for i in cls._lookup_ids(book_id, isbn13_raw, isbn_raw):
+                if i in known:
+                    return known[i]
+
         # Step 1: DB lookup by Goodreads ID (no network call)
         site = SiteManager.get_site_by_id(IdType.Goodreads, book_id)
         if site:
@@ -119,90 +159,96 @@ class GoodreadsImporter(Task):
         visibility = self.metadata["visibility"]
         with open(filename, encoding="utf-8-sig") as f:
             reader = csv.DictReader(f)
-            for row in reader:
-                shelf_type = SHELF_MAP.get(row["Exclusive Shelf"])
-                if shelf_type is None:
-                    self.progress(0)
-                    continue
-
-                book_id = row["Book Id"]
-                item = self.find_item(book_id, row["ISBN13"], row["ISBN"])
-                if not item:
-                    logger.warning(f"Could not find item for Goodreads book {book_id}")
-                    self.progress(-1, book_id)
-                    continue
-
-                try:
-                    # may be float-formatted (e.g. "5.0") if re-saved by a spreadsheet app
-                    rating_raw = int(float(row["My Rating"] or 0))
-                except ValueError:
-                    rating_raw = 0
-                rating = rating_raw * 2 if rating_raw else None
-
-                review_html = row.get("My Review", "").strip()
-                comment: str | None = None
-                long_review: str | None = None
-                if review_html:
-                    has_html = "<" in review_html
-                    review_text = md(review_html) if has_html else review_html
-                    if not has_html and len(review_text) < 360:
-                        comment = review_text
-                    else:
-                        long_review = review_text
+            for rows in batched(reader, self.PRELOAD_CHUNK_SIZE):
+                known = self.preload_items(rows)
+                for row in rows:
+                    shelf_type = SHELF_MAP.get(row["Exclusive Shelf"])
+                    if shelf_type is None:
+                        self.progress(0)
+                        continue
 
-                if shelf_type == ShelfType.COMPLETE and row.get("Date Read"):
-                    date_str = row["Date Read"]
-                else:
-                    date_str = row.get("Date Added", "")
+                    book_id = row["Book Id"]
+                    item = self.find_item(book_id, row["ISBN13"], row["ISBN"], known)
+                    if not item:
+                        logger.warning(
+                            f"Could not find item for Goodreads book {book_id}"
+                        )
+                        self.progress(-1, book_id)
+                        continue
 
-                dt = None
-                if date_str:
                     try:
-                        dt = make_aware(
-                            datetime.strptime(date_str, "%Y/%m/%d").replace(hour=22)
-                        )
+                        # may be float-formatted (e.g. "5.0") if re-saved by a spreadsheet app
+                        rating_raw = int(float(row["My Rating"] or 0))
                     except ValueError:
-                        pass
-
-                mark = Mark(self.user.identity, item)
-                is_downgrade = (
-                    mark.shelf_type == ShelfType.COMPLETE
-                    and shelf_type != ShelfType.COMPLETE
-                ) or (
-                    mark.shelf_type in [ShelfType.PROGRESS, ShelfType.DROPPED]
-                    and shelf_type == ShelfType.WISHLIST
-                )
-                if is_downgrade:
-                    self.progress(0)
-                    continue
-                if mark.shelf_type == shelf_type:
-                    existing_review = Review.objects.filter(
-                        owner=self.user.identity, item=item
-                    ).first()
-                    review_body = existing_review.body if existing_review else None
-                    if comment == mark.comment_text and long_review == review_body:
+                        rating_raw = 0
+                    rating = rating_raw * 2 if rating_raw else None
+
+                    review_html = row.get("My Review", "").strip()
+                    comment: str | None = None
+                    long_review: str | None = None
+                    if review_html:
+                        has_html = "<" in review_html
+                        review_text = md(review_html) if has_html else review_html
+                        if not has_html and len(review_text) < 360:
+                            comment = review_text
+                        else:
+                            long_review = review_text
+
+                    if shelf_type == ShelfType.COMPLETE and row.get("Date Read"):
+                        date_str = row["Date Read"]
+                    else:
+                        date_str = row.get("Date Added", "")
+
+                    dt = None
+                    if date_str:
+                        try:
+                            dt = make_aware(
+                                datetime.strptime(date_str, "%Y/%m/%d").replace(hour=22)
+                            )
+                        except ValueError:
+                            pass
+
+                    mark = Mark(self.user.identity, item)
+                    is_downgrade = (
+                        mark.shelf_type == ShelfType.COMPLETE
+                        and shelf_type != ShelfType.COMPLETE
+                    ) or (
+                        mark.shelf_type in [ShelfType.PROGRESS, ShelfType.DROPPED]
+                        and shelf_type == ShelfType.WISHLIST
+                    )
+                    if is_downgrade:
                         self.progress(0)
                         continue
-
-                mark.update(
-                    shelf_type,
-                    comment,
-                    rating,
-                    visibility=visibility,
-                    created_time=dt or timezone.now(),
-                )
-                if long_review:
-                    item_title = item.title or row["Title"]
-                    title = _("a review of {item_title}").format(item_title=item_title)
-                    Review.update_item_review(
-                        item,
-                        self.user.identity,
-                        title,
-                        long_review,
-                        visibility,
-                        dt or timezone.now(),
+                    if mark.shelf_type == shelf_type:
+                        existing_review = Review.objects.filter(
+                            owner=self.user.identity, item=item
+                        ).first()
+                        review_body = existing_review.body if existing_review else None
+                        if comment == mark.comment_text and long_review == review_body:
+                            self.progress(0)
+                            continue
+
+                    mark.update(
+                        shelf_type,
+                        comment,
+                        rating,
+                        visibility=visibility,
+                        created_time=dt or timezone.now(),
                     )
-                self.progress(1)
+                    if long_review:
+                        item_title = item.title or row["Title"]
+                        title = _("a review of {item_title}").format(
+                            item_title=item_title
+                        )
+                        Review.update_item_review(
+                            item,
+                            self.user.identity,
+                            title,
+                            long_review,
+                            visibility,
+                            dt or timezone.now(),
+                        )
+                    self.progress(1)
 
         self.metadata["total"] = self.metadata["processed"]
         self.message = f"{self.metadata['imported']} imported, {self.metadata['skipped']} skipped, {self.metadata['failed']} failed"
@@ -0,0 +1,402 @@
+"""Reconcile journal index docs of identities with the database.
+
+Diffing an identity exports all of its doc ids from the index, which is
+what makes a pass over a whole instance slow. Each identity reconciled
+gets a ``JournalIndexState`` instead: a digest of its indexable rows in
+the database and the number of docs it had in the index. Later passes
+read doc counts with batched searches, compute digests with a few grouped
+queries for identities with rows added, edited or deleted since, and only
+diff identities where either has changed.
+
+Used by ``journal idx-sync`` and by ``JournalIndexSync``, which runs this
+for local identities every few minutes.
+"""
+
+import math
+import time
+from datetime import timedelta
+from itertools import batched
+from typing import Iterator
+
+from django.conf import settings
+from django.db.models import (
+    CharField,
+    Exists,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+from loguru import logger
+
+from common.models import BaseJob, JobManager
+from journal.models import (
+    Article,
+    Collection,
+    Comment,
+    JournalIndexState,
+    Note,
+    Piece,
+    Review,
+    ShelfMember,
+    Tombstone,
+)
+from journal.search import JournalIndex
+from takahe.models import Post
+from users.models import APIdentity
+
+_DELETED_POST_STATES = ["deleted", "deleted_fanned_out"]
+
+# Piece classes whose to_indexable_doc() may produce a doc of its own; the
+# others (Rating, Tag, TagMember, Shelf, CollectionMember, FeaturedCollection,
+# Debris) always return {} and are never indexed individually.
+INDEXABLE_PIECE_CLASSES: list[type[Piece]] = [
+    ShelfMember,
+    Comment,
+    Review,
+    Collection,
+    Note,
+    Article,
+]
+
+# mirror APIdentity.is_active
+ACTIVE_IDENTITY_Q = Q(user__isnull=False, user__is_active=True) | Q(
+    user__isnull=True, deleted__isnull=True
+)
+
+_SYNC_DELETE_CHUNK = 200
+
+# identities to compute digests for in one go
+_DIGEST_CHUNK = 500
+
+# typesense accepts up to 50 searches in one multi_search by default
+_COUNT_CHUNK = 50
+
+# JournalIndexSync diffs every local identity at least this often
+_FULL_SYNC_PERIOD = timedelta(days=1)
+
+
+class _HashText(Func):
+    function = "hashtext"
+    output_field = IntegerField()
+
+
+def _hash_sum(*fields: str) -> Sum:
+    parts = []
+    for f in fields:
+        parts += [Cast(f, output_field=CharField()), Value(":")]
+    if len(parts) > 2:
+        return Sum(_HashText(Concat(*parts[:-1], output_field=CharField())))
+    return Sum(_HashText(parts[0]))
+
+
+def owner_digests(owner_ids: list[int], remote: bool = False) -> dict[int, int]:
+    """Digest of the indexable rows of each identity.
+
+    A sum of hashes of id and edit time, so it changes with any piece
+    added, deleted or edited (which may relink it to another post), and
+    for local identities with any post added or deleted.
+    """
+    digests = dict.fromkeys(owner_ids, 0)
+    for cls in INDEXABLE_PIECE_CLASSES:
+        rows = (
+            cls.objects.filter(owner_id__in=owner_ids, local=not remote)
+            .values("owner_id")
+            .annotate(h=_hash_sum("pk", "edited_time"))
+            .order_by()
+            .values_list("owner_id", "h")
+        )
+        for owner_id, h in rows:
+            digests[owner_id] += h or 0
+    if not remote:
+        rows = (
+            Post.objects.filter(local=True, author_id__in=owner_ids)
+            .exclude(state__in=_DELETED_POST_STATES)
+            .values("author_id")
+            .annotate(h=_hash_sum("pk"))
+            .order_by()
+            .values_list("author_id", "h")
+        )
+        for owner_id, h in rows:
+            digests[owner_id] += h or 0
+    return digests
+
+
+def edited_owners(owner_ids: list[int]) -> set[int]:
+    """Local identities never reconciled, or with indexable rows added,
+    edited or deleted since last reconciled.
+
+    Relies on edit times and tombstones, so rows written in bulk or with
+    an edit time of their own (imports, remote pieces) may go unnoticed.
+    """
+    since = OuterRef("synced_time")
+    owner = OuterRef("owner_id")
+    edits = Exists(Tombstone.objects.filter(owner_id=owner, deleted_time__gt=since))
+    for cls in INDEXABLE_PIECE_CLASSES:
+        edits |= Exists(
+            cls.objects.filter(owner_id=owner, local=True, edited_time__gt=since)
+        )
+    synced = dict(
+        JournalIndexState.objects.filter(owner_id__in=owner_ids)
+        .exclude(edits)
+        .values_list("owner_id", "synced_time")
+    )
+    if synced:
+        # posts are in the takahe database, so compare times here
+        oldest = min(synced.values())
+        posts = (
+            Post.objects.filter(local=True, author_id__in=list(synced))
+            .filter(Q(updated__gt=oldest) | Q(state_changed__gt=oldest))
+            .values_list("author_id", "updated", "state_changed")
+        )
+        for author_id, updated, state_changed in posts:
+            if author_id in synced and max(updated, state_changed) > synced[author_id]:
+                del synced[author_id]
+    return set(owner_ids) - synced.keys()
+
+
+def expected_index_docs(
+    identity_id: int, remote: bool = False
+) -> dict[str, tuple[str, int]]:
+    """Doc ids an active identity should have in the index.
+
+    Local identities get a doc per live local post plus one per piece
+    not covered by such a post; for remote identities only pieces are
+    indexed.
+
+    Returns a map of doc id -> (kind, pk), mirroring how
+    JournalIndex.post_to_doc() / piece_to_doc() assign doc ids: a
+    piece doc is keyed by its latest linked post id even if that post
+    is gone from db. Kind is "post" or "piece".
+    """
+    expected: dict[str, tuple[str, int]] = {}
+    if not remote:
+        live_posts = (
+            Post.objects.filter(local=True, author_id=identity_id)
+            .exclude(state__in=_DELETED_POST_STATES)
+            .values_list("pk", flat=True)
+        )
+        for post_id in live_posts:
+            expected[str(post_id)] = ("post", post_id)
+    piece_ids: set[int] = set()
+    # piece_id -> (piece_post_pk, post_id) of the latest linked post
+    latest_pps: dict[int, tuple[int, int]] = {}
+    for cls in INDEXABLE_PIECE_CLASSES:
+        pieces = cls.objects.filter(owner_id=identity_id, local=not remote)
+        if cls is Comment:
+            # comment with a sibling mark is indexed within its ShelfMember doc
+            pieces = pieces.exclude(
+                item_id__in=ShelfMember.objects.filter(owner_id=identity_id)
+                .values("item_id")
+                .order_by()
+            )
+        # left join keeps pieces without any post
+        rows = pieces.values_list("pk", "post_relations__pk", "post_relations__post_id")
+        for piece_id, pp_pk, post_id in rows:
+            piece_ids.add(piece_id)
+            if pp_pk is not None and (
+                piece_id not in latest_pps or pp_pk > latest_pps[piece_id][0]
+            ):
+                latest_pps[piece_id] = (pp_pk, post_id)
+    for piece_id in piece_ids:
+        post_id = latest_pps[piece_id][1] if piece_id in latest_pps else None
+        if post_id is None:
+            expected["p" + str(piece_id)] = ("piece", piece_id)
+        else:
+            # first writer wins: for local, the live post's own entry
+            # (inserted above) covers the piece; for remote, this
+            # arbitrates pieces sharing one post
+            expected.setdefault(str(post_id), ("piece", piece_id))
+    return expected
+
+
+class JournalIndexReconciler:
+    def __init__(
+        self,
+        index: JournalIndex,
+        remote: bool = False,
+        dry_run: bool = False,
+        full: bool = False,
+        batch_size: int = 1000,
+        full_ids: set[int] | None = None,
+    ):
+        self.index = index
+        self.remote = remote
+        self.dry_run = dry_run
+        self.full = full
+        self.batch_size = batch_size
+        # diffed even if they look in sync, to catch what digests and doc
+        # counts cannot tell, e.g. a lost doc replaced by a stale one
+        self.full_ids = full_ids or set()
+        self.skipped = 0
+        self.digests: dict[int, int] = {}
+        self.synced_time = timezone.now()
+
+    def changed_owners(self, owner_ids: list[int]) -> list[int]:
+        """Identities which may be out of sync: those never reconciled or
+        in ``full_ids``, or whose digest or doc count in the index is not as
+        recorded. Identities without a digest computed are taken as having
+        the one recorded."""
+        if self.full:
+            return owner_ids
+        states = {
+            s.pk: s
+            for s in JournalIndexState.objects.filter(owner_id__in=owner_ids)
+            if s.pk not in self.full_ids
+            and s.digest == self.digests.get(s.pk, s.digest)
+        }
+        in_sync: set[int] = set()
+        for chunk in batched(sorted(states), _COUNT_CHUNK):
+            counts = self.index.get_doc_counts_by_owner(list(chunk))
+            if counts is None:
+                # diff them instead
+                continue
+            in_sync.update(i for i, c in counts.items() if c == states[i].doc_count)
+        return [i for i in owner_ids if i not in in_sync]
+
+    def sync_identity(self, identity_id: int) -> tuple[int, int] | None:
+        """Add missing docs and delete stale docs for one active identity.
+
+        Docs already in the index are left as is (no deep comparison). In
+        particular, a piece doc may keep claiming a post that was pruned
+        or hard-deleted; only queries filtering on post_id (local
+        timeline search) see the dangling reference, and it is healed by
+        a refetch (relink_post_id, remote pieces only), an edit of the
+        piece, or idx-rebuild. Rewriting those docs here instead would
+        never converge: the classification depends only on db state,
+        which a rewrite does not change.
+        Returns (added, deleted), or None on index error.
+        """
+        expected = expected_index_docs(identity_id, self.remote)
+        indexed = self.index.get_doc_ids_by_owner(identity_id)
+        if indexed is None:
+            return None
+        extra = indexed - expected.keys()
+        missing = expected.keys() - indexed
+        if self.dry_run:
+            return len(missing), len(extra)
+        deleted = 0
+        for chunk in batched(extra, _SYNC_DELETE_CHUNK):
+            deleted += self.index.delete_docs("id", chunk)
+        added = 0
+        post_ids = [expected[i][1] for i in missing if expected[i][0] == "post"]
+        for chunk in batched(post_ids, self.batch_size):
+            posts = Post.objects.filter(pk__in=chunk)
+            added += self.index.replace_docs(self.index.posts_to_docs(posts))
+        piece_ids = [expected[i][1] for i in missing if expected[i][0] != "post"]
+        for chunk in batched(piece_ids, self.batch_size):
+            pieces = Piece.objects.filter(pk__in=chunk)
+            added += self.index.replace_docs(self.index.pieces_to_docs(pieces))
+        if added == len(missing) and deleted == len(extra):
+            # otherwise leave it to be diffed again next time
+            digest = self.digests.get(identity_id)
+            if digest is None:
+                digest = owner_digests([identity_id], self.remote)[identity_id]
+            JournalIndexState.objects.update_or_create(
+                owner_id=identity_id,
+                defaults={
+                    "doc_count": len(expected),
+                    "digest": digest,
+                    "synced_time": self.synced_time,
+                },
+            )
+        return added, deleted
+
+    def reconcile(
+        self, owner_ids: list[int]
+    ) -> Iterator[tuple[int, tuple[int, int] | None]]:
+        """Sync identities which may be out of sync, yielding (identity id,
+        result of sync_identity()) for each; (0, 0) for those skipped."""
+        for chunk in batched(owner_ids, _DIGEST_CHUNK):
+            ids = list(chunk)
+            # taken before diffing, so an edit made meanwhile gets the
+            # identity diffed again next time
+            self.synced_time = timezone.now()
+            if self.full or self.remote:
+                digest_ids = ids
+            else:
+                digest_ids = sorted(edited_owners(ids) | (self.full_ids & set(ids)))
+            self.digests = owner_digests(digest_ids, self.remote)
+            changed = set(self.changed_owners(ids))
+            for identity_id in ids:
+                if identity_id in changed:
+                    yield identity_id, self.sync_identity(identity_id)
+                else:
+                    self.skipped += 1
+                    yield identity_id, (0, 0)
+
+    def purge(self, owner_ids: list[int]) -> int:
+        """Delete all docs of deactivated identities."""
+        purged = 0
+        for chunk in batched(owner_ids, 100):
+            purged += self.index.delete_by_owner(chunk)
+            JournalIndexState.objects.filter(owner_id__in=chunk).delete()
+        return purged
+
+
+@JobManager.register
+class JournalIndexSync(BaseJob):
+    """Fix journal index drift of local identities.
+
+    Runs ``JournalIndexReconciler`` over active local identities, so only
+    those whose journal or doc count changed are diffed, and purges docs
+    of identities deactivated since they were last reconciled. A pass stops
+    short of the next run; that one skips the identities reconciled so far
+    quickly and carries on with the rest.
+
+    Each run also diffs the identities reconciled longest ago, enough of
+    them for every one to be diffed within ``_FULL_SYNC_PERIOD``.
+    """
+
+    @classmethod
+    def get_interval(cls) -> timedelta:
+        return timedelta(minutes=10)
+
+    def run(self):
+        if not settings.SEARCH_BACKEND:
+            return
+        deadline = time.monotonic() + self.get_interval().total_seconds() * 0.8
+        identities = APIdentity.objects.filter(local=True)
+        active_ids = list(
+            identities.filter(ACTIVE_IDENTITY_Q)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        rotation = math.ceil(len(active_ids) * self.get_interval() / _FULL_SYNC_PERIOD)
+        full_ids = set(
+            JournalIndexState.objects.filter(
+                owner__in=identities.filter(ACTIVE_IDENTITY_Q)
+            )
+            .order_by("synced_time")
+            .values_list("owner_id", flat=True)[:rotation]
+        )
+        reconciler = JournalIndexReconciler(JournalIndex.instance(), full_ids=full_ids)
+        added = deleted = errors = synced = 0
+        for _, r in reconciler.reconcile(active_ids):
+            if r is None:
+                errors += 1
+            else:
+                added += r[0]
+                deleted += r[1]
+            synced += 1
+            if time.monotonic() > deadline:
+                logger.warning(
+                    f"Journal index sync stopped after {synced} of "
+                    f"{len(active_ids)} identities"
+                )
+                break
+        inactive_ids = list(
+            JournalIndexState.objects.filter(owner__local=True)
+            .exclude(owner__in=identities.filter(ACTIVE_IDENTITY_Q))
+            .values_list("owner_id", flat=True)
+        )
+        purged = reconciler.purge(inactive_ids)
+        logger.info(
+            f"Journal index sync: {synced - reconciler.skipped} identities diffed, "
+            f"{added} docs added, {deleted} docs deleted, {purged} docs purged, "
+            f"{errors} errors"
+        )
@@ -1,8 +1,19 @@
+from itertools import batched
+
 from django.db.models import OuterRef, Subquery
 from loguru import logger
 
 from catalog.models import Edition, item_content_types
-from journal.models import Note, ShelfMember, ShelfMemberProgress, ShelfType
+from journal.models import (
+    ItemStats,
+    JournalDailyActivity,
+    Note,
+    Rating,
+    ShelfMember,
+    ShelfMemberProgress,
+    ShelfType,
+)
+from users.models import APIdentity
 
 
 def backfill_member_progress_from_notes_20260720(batch_size: int = 1000) -> int:
@@ -65,3 +76,30 @@ def backfill_member_progress_from_notes_20260720(batch_size: int = 1000) -> int:
         f"Backfilled current reading progress for up to {candidates} shelf members"
     )
     return candidates
+
+
+def backfill_daily_activity_20261018(batch_size: int = 1000) -> int:
+    """Compute daily activity rows of every identity from its journal."""
+    owner_ids = APIdentity.objects.order_by("pk").values_list("pk", flat=True)
+    rows = 0
+    for start in range(0, owner_ids.count(), batch_size):
+        rows += JournalDailyActivity.rebuild(owner_ids[start : start + batch_size])
+    logger.info(f"Backfilled {rows} daily activity rows")
+    return rows
+
+
+def backfill_item_stats_20261018(batch_size: int = 1000) -> int:
+    """Compute stats rows of every item with ratings or marks."""
+    items = 0
+    for cls in (ShelfMember, Rating):
+        item_ids = (
+            cls.objects.filter(item__stats__isnull=True)
+            .values_list("item_id", flat=True)
+            .distinct()
+            .order_by("item_id")
+        )
+        for ids in batched(item_ids.iterator(), batch_size):
+            ItemStats.refresh_by_ids(ids)
+            items += len(ids)
+    logger.info(f"Backfilled stats of {items} items")
+    return items
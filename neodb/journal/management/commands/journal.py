@@ -10,11 +10,17 @@ from tqdm import tqdm
 from catalog.models import Item
 from common.management.base import SiteCommand
 from journal.exporters.ndjson import NdjsonExporter
+from journal.jobs.index_sync import (
+    ACTIVE_IDENTITY_Q,
+    INDEXABLE_PIECE_CLASSES,
+    JournalIndexReconciler,
+)
 from journal.models import (
-    Article,
     Collection,
     Comment,
     Content,
+    ItemStats,
+    JournalDailyActivity,
     Note,
     Piece,
     Review,
@@ -31,7 +37,7 @@ _CONFIRM = "confirm deleting collection? [Y/N] "
 _HELP_TEXT = """
 intergrity:     check and fix remaining journal for merged and deleted items
 purge:          delete invalid data (visibility=99)
-export:         run export task
+export:         run export task (use --since to export changes after a time)
 search:         search docs in index
 idx-info:       show index information
 idx-init:       check and create index if not exists
@@ -41,27 +47,14 @@ idx-delete:     delete docs in index
 idx-rebuild:    rebuild docs in index
 idx-catchup:    update index for journal items edited in last X hours (use --hour)
 idx-sync:       add missing docs and delete stale docs for each local
-                identity, purge docs of deactivated identities (use
-                --dry-run to preview, --remote to sync remote pieces and
-                identities instead)
+                identity changed since last synced, purge docs of
+                deactivated identities (use --full to check all, --dry-run
+                to preview, --remote to sync remote pieces and identities
+                instead)
+stats-rebuild:  recompute rating and mark count aggregates of all items
+activity-rebuild: recompute daily activity of identities (use --owner to limit)
 """
 
-_DELETED_POST_STATES = ["deleted", "deleted_fanned_out"]
-
-# Piece classes whose to_indexable_doc() may produce a doc of its own; the
-# others (Rating, Tag, TagMember, Shelf, CollectionMember, FeaturedCollection,
-# Debris) always return {} and are never indexed individually.
-_INDEXABLE_PIECE_CLASSES: list[type[Piece]] = [
-    ShelfMember,
-    Comment,
-    Review,
-    Collection,
-    Note,
-    Article,
-]
-
-_SYNC_DELETE_CHUNK = 200
-
 # stays well under postgres's 65535 query-parameter limit
 _SYNC_OWNER_CHUNK = 10000
 
@@ -90,6 +83,8 @@ class Command(SiteCommand):
                 "search",
                 "idx-catchup",
                 "idx-sync",
+                "stats-rebuild",
+                "activity-rebuild",
             ],
             help=_HELP_TEXT,
         )
@@ -144,6 +139,15 @@ class Command(SiteCommand):
             action="store_true",
             help="report what idx-sync would change without writing to index",
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="diff every identity in idx-sync, not only those changed",
+        )
+        parser.add_argument(
+            "--since",
+            help="ISO time to export journal changes after (used with export)",
+        )
 
     def integrity(self):
         self.stdout.write("Checking deleted items with remaining journals...")
@@ -158,10 +162,29 @@ class Command(SiteCommand):
                 if self.fix:
                     update_journal_for_merged_item(i.url)
 
-    def export(self, owner_ids):
+    def stats_rebuild(self):
+        item_ids = Item.objects.filter(
+            is_deleted=False, merged_to_item__isnull=True
+        ).values_list("pk", flat=True)
+        with tqdm(total=item_ids.count()) as pbar:
+            for ids in batched(item_ids.order_by("pk").iterator(), self.batch_size):
+                ItemStats.refresh(Item.objects.filter(pk__in=ids))
+                pbar.update(len(ids))
+
+    def activity_rebuild(self, owner_ids):
+        if not owner_ids:
+            owner_ids = APIdentity.objects.order_by("pk").values_list("pk", flat=True)
+        rows = 0
+        with tqdm(total=len(owner_ids)) as pbar:
+            for ids in batched(owner_ids, self.batch_size):
+                rows += JournalDailyActivity.rebuild(ids)
+                pbar.update(len(ids))
+        self.stdout.write(f"{rows} daily activity rows.")
+
+    def export(self, owner_ids, since=None):
         users = User.objects.filter(identity__in=owner_ids)
         for user in users:
-            task = NdjsonExporter.create(user=user)
+            task = NdjsonExporter.create(user=user, since=since)
             self.stdout.write(f"exporting for {user} (task {task.pk})...")
             ok = task._run()
             if ok:
@@ -197,106 +220,18 @@ class Command(SiteCommand):
                         )
                     pbar.update(1)
 
-    def expected_index_docs(
-        self, identity_id: int, remote: bool = False
-    ) -> dict[str, tuple[str, int]]:
-        """Doc ids an active identity should have in the index.
-
-        Local identities get a doc per live local post plus one per piece
-        not covered by such a post; for remote identities only pieces are
-        indexed.
-
-        Returns a map of doc id -> (kind, pk), mirroring how
-        JournalIndex.post_to_doc() / piece_to_doc() assign doc ids: a
-        piece doc is keyed by its latest linked post id even if that post
-        is gone from db. Kind is "post" or "piece".
-        """
-        expected: dict[str, tuple[str, int]] = {}
-        if not remote:
-            live_posts = (
-                Post.objects.filter(local=True, author_id=identity_id)
-                .exclude(state__in=_DELETED_POST_STATES)
-                .values_list("pk", flat=True)
-            )
-            for post_id in live_posts:
-                expected[str(post_id)] = ("post", post_id)
-        piece_ids: set[int] = set()
-        # piece_id -> (piece_post_pk, post_id) of the latest linked post
-        latest_pps: dict[int, tuple[int, int]] = {}
-        for cls in _INDEXABLE_PIECE_CLASSES:
-            pieces = cls.objects.filter(owner_id=identity_id, local=not remote)
-            if cls is Comment:
-                # comment with a sibling mark is indexed within its ShelfMember doc
-                pieces = pieces.exclude(
-                    item_id__in=ShelfMember.objects.filter(owner_id=identity_id)
-                    .values("item_id")
-                    .order_by()
-                )
-            # left join keeps pieces without any post
-            rows = pieces.values_list(
-                "pk", "post_relations__pk", "post_relations__post_id"
-            )
-            for piece_id, pp_pk, post_id in rows:
-                piece_ids.add(piece_id)
-                if pp_pk is not None and (
-                    piece_id not in latest_pps or pp_pk > latest_pps[piece_id][0]
-                ):
-                    latest_pps[piece_id] = (pp_pk, post_id)
-        for piece_id in piece_ids:
-            post_id = latest_pps[piece_id][1] if piece_id in latest_pps else None
-            if post_id is None:
-                expected["p" + str(piece_id)] = ("piece", piece_id)
-            else:
-                # first writer wins: for local, the live post's own entry
-                # (inserted above) covers the piece; for remote, this
-                # arbitrates pieces sharing one post
-                expected.setdefault(str(post_id), ("piece", piece_id))
-        return expected
-
-    def sync_identity_index(
-        self, index: JournalIndex, identity_id: int, remote: bool = False
-    ) -> tuple[int, int] | None:
-        """Add missing docs and delete stale docs for one active identity.
-
-        Docs already in the index are left as is (no deep comparison). In
-        particular, a piece doc may keep claiming a post that was pruned
-        or hard-deleted; only queries filtering on post_id (local
-        timeline search) see the dangling reference, and it is healed by
-        a refetch (relink_post_id, remote pieces only), an edit of the
-        piece, or idx-rebuild. Rewriting those docs here instead would
-        never converge: the classification depends only on db state,
-        which a rewrite does not change.
-        Returns (added, deleted), or None on index error.
-        """
-        expected = self.expected_index_docs(identity_id, remote)
-        indexed = index.get_doc_ids_by_owner(identity_id)
-        if indexed is None:
-            return None
-        extra = indexed - expected.keys()
-        missing = expected.keys() - indexed
-        if self.dry_run:
-            return len(missing), len(extra)
-        deleted = 0
-        for chunk in batched(extra, _SYNC_DELETE_CHUNK):
-            deleted += index.delete_docs("id", chunk)
-        added = 0
-        post_ids = [expected[i][1] for i in missing if expected[i][0] == "post"]
-        for chunk in batched(post_ids, self.batch_size):
-            posts = Post.objects.filter(pk__in=chunk)
-            added += index.replace_docs(index.posts_to_docs(posts))
-        piece_ids = [expected[i][1] for i in missing if expected[i][0] != "post"]
-        for chunk in batched(piece_ids, self.batch_size):
-            pieces = Piece.objects.filter(pk__in=chunk)
-            added += index.replace_docs(index.pieces_to_docs(pieces))
-        return added, deleted
-
-    def idx_sync(self, index: JournalIndex, owners: list[int], remote: bool = False):
+    def idx_sync(
+        self,
+        index: JournalIndex,
+        owners: list[int],
+        remote: bool = False,
+        full: bool = False,
+    ):
         identities = APIdentity.objects.filter(local=not remote)
         if owners:
             identities = identities.filter(pk__in=owners)
-        # mirror APIdentity.is_active
-        active_q = Q(user__isnull=False, user__is_active=True) | Q(
-            user__isnull=True, deleted__isnull=True
+        reconciler = JournalIndexReconciler(
+            index, remote, self.dry_run, full, self.batch_size
         )
         indexed_owner_ids: set[int] | None = None
         if remote:
@@ -305,7 +240,7 @@ class Command(SiteCommand):
             # outlive their pieces); enumerating every known remote
             # identity instead would be pointlessly slow
             candidate_ids: set[int] = set()
-            for cls in _INDEXABLE_PIECE_CLASSES:
+            for cls in INDEXABLE_PIECE_CLASSES:
                 candidate_ids.update(
                     cls.objects.filter(local=False)
                     .values_list("owner_id", flat=True)
@@ -324,24 +259,31 @@ class Command(SiteCommand):
             active_ids = []
             for chunk in batched(sorted(candidate_ids), _SYNC_OWNER_CHUNK):
                 active_ids.extend(
-                    identities.filter(active_q, pk__in=chunk).values_list(
+                    identities.filter(ACTIVE_IDENTITY_Q, pk__in=chunk).values_list(
                         "pk", flat=True
                     )
                 )
             active_ids.sort()
         else:
             active_ids = list(
-                identities.filter(active_q).order_by("pk").values_list("pk", flat=True)
+                identities.filter(ACTIVE_IDENTITY_Q)
+                .order_by("pk")
+                .values_list("pk", flat=True)
             )
         inactive_ids = list(
-            identities.exclude(active_q).order_by("pk").values_list("pk", flat=True)
+            identities.exclude(ACTIVE_IDENTITY_Q)
+            .order_by("pk")
+            .values_list("pk", flat=True)
         )
         if indexed_owner_ids is not None:
             # purging owners holding no docs would be a no-op; skip them
             inactive_ids = [i for i in inactive_ids if i in indexed_owner_ids]
         added = deleted = errors = 0
-        for identity_id in tqdm(active_ids, desc="Syncing active identities"):
-            r = self.sync_identity_index(index, identity_id, remote)
+        for identity_id, r in tqdm(
+            reconciler.reconcile(active_ids),
+            total=len(active_ids),
+            desc="Syncing active identities",
+        ):
             if r is None:
                 errors += 1
                 continue
@@ -359,12 +301,12 @@ class Command(SiteCommand):
                 else:
                     purged += len(ids)
         else:
-            for chunk in batched(inactive_ids, 100):
-                purged += index.delete_by_owner(chunk)
+            purged = reconciler.purge(inactive_ids)
         w = "would be " if self.dry_run else ""
         self.stdout.write(
             self.style.SUCCESS(
-                f"idx-sync complete: {len(active_ids)} active identities, "
+                f"idx-sync complete: {len(active_ids)} active identities "
+                f"({reconciler.skipped} unchanged), "
                 f"{added} docs {w}added, {deleted} docs {w}deleted; "
                 f"{len(inactive_ids)} deactivated identities, {purged} docs {w}purged."
             )
@@ -422,7 +364,7 @@ class Command(SiteCommand):
                 self.stdout.write(self.style.SUCCESS("Done."))
 
             case "export":
-                self.export(owners)
+                self.export(owners, kwargs.get("since"))
 
             case "idx-destroy":
                 if yes or input(_CONFIRM).upper().startswith("Y"):
@@ -441,6 +383,10 @@ class Command(SiteCommand):
                 try:
                     r = index.check()
                     self.stdout.write(str(r))
+                    q = index.update_queue
+                    self.stdout.write(
+                        f"{q.name} update queue: depth {q.depth()}, lag {q.lag()}"
+                    )
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(str(e)))
 
@@ -540,7 +486,15 @@ class Command(SiteCommand):
                 self.idx_catchup(hour)
 
             case "idx-sync":
-                self.idx_sync(index, owners, remote)
+                self.idx_sync(index, owners, remote, kwargs.get("full", False))
+
+            case "stats-rebuild":
+                self.stats_rebuild()
+                self.stdout.write(self.style.SUCCESS("Done."))
+
+            case "activity-rebuild":
+                self.activity_rebuild(owners)
+                self.stdout.write(self.style.SUCCESS("Done."))
 
             case _:
                 self.stdout.write(self.style.ERROR("action not found."))
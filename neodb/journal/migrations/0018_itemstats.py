@@ -0,0 +1,41 @@
+# Generated by Django 5.2.16 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from catalog.common.migrations import enqueue_migration_job
+
+
+def queue_backfill(apps: object, schema_editor: object) -> None:
+    enqueue_migration_job("journal.jobs.migrations:backfill_item_stats_20261018")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalog", "0027_backfill_credits_from_relations"),
+        ("journal", "0017_article_cover"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemStats",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="catalog.item",
+                    ),
+                ),
+                ("grades", models.JSONField(default=list)),
+                ("rating_count", models.PositiveIntegerField(default=0)),
+                ("rating_total", models.PositiveIntegerField(default=0)),
+                ("mark_count", models.PositiveIntegerField(default=0)),
+                ("edited_time", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(queue_backfill, migrations.RunPython.noop),
+    ]
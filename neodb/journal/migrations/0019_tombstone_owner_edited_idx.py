@@ -0,0 +1,95 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def _index_op(model: str) -> AddIndexConcurrently:
+    return AddIndexConcurrently(
+        model_name=model,
+        index=models.Index(
+            fields=["owner", "edited_time"], name=f"{model}_owner_edited_idx"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    """Track deletions and index edits for incremental exports.
+
+    - ``Tombstone`` records journal pieces and shelf log entries deleted by
+      their local owner, so an export of the changes since some time can
+      carry the deletions.
+    - Every model an NDJSON export reads gets an index on
+      ``(owner, edited_time)``, so such an export reads only the rows
+      edited since then instead of scanning the user's whole journal.
+
+    The indexes are built with ``CREATE INDEX CONCURRENTLY``, which requires
+    running outside of a transaction (``atomic = False``); creating the new,
+    empty table is safe in that mode too.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("catalog", "0027_backfill_credits_from_relations"),
+        ("users", "0016_preference_bluesky_publish_records"),
+        ("journal", "0018_itemstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("type", models.CharField(max_length=50)),
+                ("key", models.JSONField(default=dict)),
+                (
+                    "deleted_time",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "item",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="catalog.item",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="users.apidentity",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "deleted_time"],
+                        name="tombstone_owner_deleted_idx",
+                    )
+                ],
+            },
+        ),
+        _index_op("rating"),
+        _index_op("comment"),
+        _index_op("review"),
+        _index_op("note"),
+        _index_op("article"),
+        _index_op("collection"),
+        _index_op("tag"),
+        _index_op("tagmember"),
+        _index_op("shelfmember"),
+        _index_op("shelflogentry"),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from catalog.common.migrations import enqueue_migration_job
+
+
+def queue_backfill(apps: object, schema_editor: object) -> None:
+    enqueue_migration_job("journal.jobs.migrations:backfill_daily_activity_20261018")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_preference_bluesky_publish_records"),
+        ("journal", "0019_tombstone_owner_edited_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JournalDailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("category", models.CharField(max_length=30)),
+                (
+                    "visibility",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Public"),
+                            (1, "Followers Only"),
+                            (2, "Mentioned Only"),
+                        ],
+                        default=0,
+                    ),
+                ),
+                ("completed", models.PositiveIntegerField(default=0)),
+                ("commented", models.PositiveIntegerField(default=0)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="users.apidentity",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("owner", "date", "category", "visibility"),
+                        name="unique_journal_daily_activity",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(queue_backfill, migrations.RunPython.noop),
+    ]
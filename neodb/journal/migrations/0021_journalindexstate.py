@@ -0,0 +1,34 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_preference_bluesky_publish_records"),
+        ("journal", "0020_journaldailyactivity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JournalIndexState",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="users.apidentity",
+                    ),
+                ),
+                ("doc_count", models.PositiveIntegerField(default=0)),
+                ("digest", models.BigIntegerField(default=0)),
+                (
+                    "synced_time",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
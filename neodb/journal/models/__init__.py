@@ -1,3 +1,4 @@
+from .activity import JournalDailyActivity, deferred_daily_activity
 from .article import Article
 from .collection import UNMARKED, Collection, CollectionMember, FeaturedCollection
 from .comment import Comment
@@ -15,6 +16,7 @@ from .common import (
     q_piece_visible_to_user,
 )
 from .crosspost import CrosspostRetry
+from .index_state import JournalIndexState
 from .like import Like
 from .mark import Mark
 from .mixins import UserOwnedObjectMixin
@@ -30,7 +32,9 @@ from .shelf import (
     ShelfMember,
     ShelfType,
 )
+from .stats import ItemStats, deferred_item_stats
 from .tag import Tag, TagManager, TagMember
+from .tombstone import Tombstone
 from .utils import (
     cleanup_deleted_post,
     journal_exists_for_item,
@@ -48,6 +52,9 @@ __all__ = [
     "FeaturedCollection",
     "Comment",
     "CrosspostRetry",
+    "ItemStats",
+    "JournalDailyActivity",
+    "JournalIndexState",
     "Piece",
     "PieceInteraction",
     "PiecePost",
@@ -74,8 +81,11 @@ __all__ = [
     "Tag",
     "TagManager",
     "TagMember",
+    "Tombstone",
     "UNMARKED",
     "cleanup_deleted_post",
+    "deferred_daily_activity",
+    "deferred_item_stats",
     "journal_exists_for_item",
     "remove_data_by_identity",
     "reset_journal_visibility_for_user",
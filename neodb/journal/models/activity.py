@@ -0,0 +1,264 @@
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable
+
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from loguru import logger
+
+from catalog.models import Item, PodcastEpisode, TVEpisode, item_content_types
+from users.models import APIdentity
+
+from .comment import Comment
+from .common import VisibilityType
+from .shelf import ShelfMember, ShelfType
+
+# categories shown on the calendar, the others count as "other"
+_CALENDAR_CATEGORIES = [
+    "book",
+    "movie",
+    "tv",
+    "music",
+    "game",
+    "podcast",
+    "performance",
+]
+# items a comment on marks progress on the calendar
+_EPISODE_CLASSES = (TVEpisode, PodcastEpisode)
+
+_deferred: ContextVar[set[tuple[int, datetime.date]] | None] = ContextVar(
+    "journal_activity_deferred", default=None
+)
+
+
+@contextmanager
+def deferred_daily_activity():
+    """Refresh activity of days touched within this block once, when it exits."""
+    if _deferred.get() is not None:
+        yield
+        return
+    pending: set[tuple[int, datetime.date]] = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        days: dict[int, set[datetime.date]] = {}
+        for owner_id, day in pending:
+            days.setdefault(owner_id, set()).add(day)
+        for owner_id, dates in days.items():
+            JournalDailyActivity.refresh(owner_id, dates)
+
+
+class JournalDailyActivity(models.Model):
+    """Completed marks and episode comments of a user per day.
+
+    One row per owner, date, item category and visibility, which the profile
+    calendar and Wrapped read instead of aggregating the journal. Dates are
+    in the site's time zone (``TIME_ZONE``) rather than the viewer's, so that
+    each mark counts on one day whoever wrote or reads it.
+    Each ``ShelfMember`` or ``Comment`` save or delete recomputes the rows
+    of the days it was and is on. ``journal activity-rebuild`` recomputes
+    all rows, e.g. after bulk updates which skip model signals.
+    """
+
+    owner = models.ForeignKey(APIdentity, on_delete=models.CASCADE, related_name="+")
+    date = models.DateField()
+    category = models.CharField(max_length=30)
+    visibility = models.PositiveSmallIntegerField(
+        choices=VisibilityType.choices, default=0
+    )
+    completed = models.PositiveIntegerField(default=0)
+    """ marks on the complete shelf """
+    commented = models.PositiveIntegerField(default=0)
+    """ comments on tv or podcast episodes """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "date", "category", "visibility"],
+                name="unique_journal_daily_activity",
+            ),
+        ]
+
+    @classmethod
+    def _aggregate(cls, q: Q) -> list["JournalDailyActivity"]:
+        """Rows for the marks and comments matching ``q``."""
+        categories = {
+            ct: cls_.category.value if getattr(cls_, "category", None) else "other"
+            for cls_, ct in item_content_types().items()
+        }
+        episode_types = [item_content_types()[c] for c in _EPISODE_CLASSES]
+        rows: dict[tuple, JournalDailyActivity] = {}
+        for qs, field in (
+            (
+                ShelfMember.objects.filter(q, parent__shelf_type=ShelfType.COMPLETE),
+                "completed",
+            ),
+            (
+                Comment.objects.filter(q, item__polymorphic_ctype_id__in=episode_types),
+                "commented",
+            ),
+        ):
+            for row in (
+                qs.values(
+                    "owner_id",
+                    "visibility",
+                    "item__polymorphic_ctype_id",
+                    day=TruncDate("created_time", tzinfo=_site_timezone()),
+                )
+                .annotate(count=Count("id"))
+                .order_by()
+            ):
+                key = (
+                    row["owner_id"],
+                    row["day"],
+                    categories.get(row["item__polymorphic_ctype_id"], "other"),
+                    row["visibility"],
+                )
+                if key not in rows:
+                    rows[key] = cls(
+                        owner_id=key[0], date=key[1], category=key[2], visibility=key[3]
+                    )
+                setattr(rows[key], field, getattr(rows[key], field) + row["count"])
+        return list(rows.values())
+
+    @classmethod
+    def refresh(cls, owner_id: int, dates: Iterable[datetime.date]) -> None:
+        """Recompute the rows of a user for some days."""
+        dates = sorted(set(dates))
+        if not dates:
+            return
+        tz = _site_timezone()
+        span = Q()
+        for d in dates:
+            start = datetime.datetime.combine(d, datetime.time.min, tzinfo=tz)
+            end = start + datetime.timedelta(days=1)
+            span |= Q(created_time__gte=start, created_time__lt=end)
+        rows = cls._aggregate(Q(owner_id=owner_id) & span)
+        with transaction.atomic():
+            cls.objects.filter(owner_id=owner_id, date__in=dates).delete()
+            cls.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["owner", "date", "category", "visibility"],
+                update_fields=["completed", "commented"],
+            )
+
+    @classmethod
+    def rebuild(cls, owner_ids: Iterable[int]) -> int:
+        """Recompute all rows of some users; returns how many there are."""
+        owner_ids = list(owner_ids)
+        rows = cls._aggregate(Q(owner_id__in=owner_ids))
+        with transaction.atomic():
+            cls.objects.filter(owner_id__in=owner_ids).delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    @classmethod
+    def day_changed(cls, owner_id: int, dates: Iterable[datetime.date]) -> None:
+        pending = _deferred.get()
+        if pending is not None:
+            pending.update((owner_id, d) for d in dates)
+        else:
+            cls.refresh(owner_id, dates)
+
+    @classmethod
+    def get_calendar_data(
+        cls, owner_id: int, max_visibility: int
+    ) -> dict[str, dict[str, list[str]]]:
+        """Categories with activity by day over the last year, keyed by
+        YYYY-MM-DD."""
+        since = timezone.localdate(timezone=_site_timezone()) - datetime.timedelta(
+            days=366
+        )
+        calendar_data: dict[str, dict[str, list[str]]] = {}
+        for day, category in (
+            cls.objects.filter(
+                owner_id=owner_id, date__gte=since, visibility__lte=max_visibility
+            )
+            .values_list("date", "category")
+            .distinct()
+            .order_by("date", "category")
+        ):
+            typ = category if category in _CALENDAR_CATEGORIES else "other"
+            items = calendar_data.setdefault(day.isoformat(), {"items": []})["items"]
+            if typ not in items:
+                items.append(typ)
+        return calendar_data
+
+    @classmethod
+    def get_completed_by_month(
+        cls, owner_id: int, year: int
+    ) -> list[tuple[int, str, int]]:
+        """``(month, category, count)`` of marks completed in a year."""
+        return list(
+            cls.objects.filter(owner_id=owner_id, date__year=year, completed__gt=0)
+            .annotate(month=ExtractMonth("date"))
+            .values("month", "category")
+            .annotate(total=Sum("completed"))
+            .order_by("month")
+            .values_list("month", "category", "total")
+        )
+
+
+def _site_timezone() -> datetime.tzinfo:
+    return timezone.get_default_timezone()
+
+
+def _site_date(t: datetime.datetime | None) -> datetime.date | None:
+    return timezone.localdate(t, _site_timezone()) if t else None
+
+
+def _counted_day(instance) -> datetime.date | None:
+    """The day a mark or comment counts towards, if it does."""
+    if isinstance(instance, ShelfMember):
+        if instance.parent.shelf_type != ShelfType.COMPLETE:
+            return None
+    elif not isinstance(instance.item, _EPISODE_CLASSES):
+        return None
+    return _site_date(instance.created_time)
+
+
+@receiver(pre_save, sender=ShelfMember)
+@receiver(pre_save, sender=Comment)
+def _journal_activity_saving(sender, instance, **kwargs):
+    # the day it counted towards so far, which it leaves if it is moved
+    instance._activity_day_before = None
+    if not instance.pk:
+        return
+    if sender is Comment and not isinstance(instance.item, _EPISODE_CLASSES):
+        return
+    qs = sender.objects.filter(pk=instance.pk)
+    if sender is ShelfMember:
+        qs = qs.filter(parent__shelf_type=ShelfType.COMPLETE)
+    instance._activity_day_before = _site_date(
+        qs.values_list("created_time", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=ShelfMember)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=ShelfMember)
+@receiver(post_delete, sender=Comment)
+def _journal_activity_changed(sender, instance, origin=None, **kwargs):
+    model = getattr(origin, "model", None)
+    if isinstance(origin, (Item, APIdentity)) or (
+        isinstance(model, type) and issubclass(model, (Item, APIdentity))
+    ):
+        # the item or owner itself is being deleted, along with the rows
+        return
+    try:
+        dates = {
+            _counted_day(instance),
+            getattr(instance, "_activity_day_before", None),
+        } - {None}
+        if dates:
+            JournalDailyActivity.day_changed(instance.owner_id, dates)
+    except Exception as e:
+        logger.error(f"unable to refresh journal activity for {instance}: {e}")
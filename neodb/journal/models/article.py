@@ -126,6 +126,9 @@ class Article(Piece):
         indexes = [
             models.Index(fields=["owner", "created_time"]),
             models.Index(fields=["remote_id"], name="article_remote_id_idx"),
+            models.Index(
+                fields=["owner", "edited_time"], name="article_owner_edited_idx"
+            ),
         ]
 
     def __str__(self):
@@ -118,6 +118,9 @@ class Collection(List):
     class Meta:
         indexes = [
             models.Index(fields=["remote_id"], name="collection_remote_id_idx"),
+            models.Index(
+                fields=["owner", "edited_time"], name="collection_owner_edited_idx"
+            ),
         ]
 
     def __str__(self):
@@ -24,6 +24,9 @@ class Comment(Content):
     class Meta:
         indexes = [
             models.Index(fields=["remote_id"], name="comment_remote_id_idx"),
+            models.Index(
+                fields=["owner", "edited_time"], name="comment_owner_edited_idx"
+            ),
         ]
 
     @property
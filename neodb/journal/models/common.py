@@ -208,8 +208,12 @@ class Piece(PolymorphicModel, UserOwnedObjectMixin):
 
     def delete(self, *args, **kwargs):
         if self.local:
+            from .tombstone import Tombstone
+
             self.delete_from_timeline()
             self.delete_crossposts()
+            # lets an incremental export carry the deletion
+            Tombstone.record(self)
         self.delete_index()
         return super().delete(*args, **kwargs)
 
@@ -1105,7 +1109,10 @@ class Piece(PolymorphicModel, UserOwnedObjectMixin):
             self.link_post_id(post.pk)
         return post
 
-    def update_index(self):
+    def update_index(self, later: bool = False):
+        if later:
+            JournalIndex.enqueue_replace_pieces([self.pk])
+            return
         index = JournalIndex.instance()
         doc = index.piece_to_doc(self)
         if doc:
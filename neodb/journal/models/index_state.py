@@ -0,0 +1,25 @@
+from django.db import models
+from django.utils import timezone
+
+from users.models import APIdentity
+
+
+class JournalIndexState(models.Model):
+    """What the journal index held for an identity when last reconciled.
+
+    ``digest`` sums a hash of id and edit time over the indexable pieces
+    (and live local posts) of the identity, ``doc_count`` is how many docs
+    the index had for it right after. An identity whose digest and doc
+    count in the index both still match is in sync, so ``idx-sync`` and
+    ``JournalIndexSync`` skip exporting and diffing its docs.
+
+    ``synced_time`` is when the digest was taken; rows edited after it are
+    what marks the identity for a new digest.
+    """
+
+    owner = models.OneToOneField(
+        APIdentity, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    doc_count = models.PositiveIntegerField(default=0)
+    digest = models.BigIntegerField(default=0)
+    synced_time = models.DateTimeField(default=timezone.now)
@@ -31,6 +31,7 @@ from .shelf import (
     ShelfMember,
     ShelfType,
 )
+from .tombstone import Tombstone
 
 
 class Mark:
@@ -602,21 +603,25 @@ class Mark:
         self.update(None, tags=None if keep_tags else [])
 
     def delete_log(self, log_id: int):
-        ShelfLogEntry.objects.filter(
-            owner=self.owner, item=self.item, id=log_id
-        ).delete()
+        logs = ShelfLogEntry.objects.filter(owner=self.owner, item=self.item, id=log_id)
+        Tombstone.record_logs(logs)
+        logs.delete()
 
     def delete_all_logs(self):
+        Tombstone.record_logs(self.logs)
         self.logs.delete()
 
     @staticmethod
     def get_mark_count_for_item(item: Item) -> int:
-        if item.get_type() in ["Podcast", "TVSeason"]:
-            return (
-                ShelfMember.objects.filter(item_id__in=item.child_item_ids + [item.pk])
-                .values("owner_id")
-                .distinct()
-                .count()
-            )
-        else:
-            return ShelfMember.objects.filter(item=item).count()
+        from .stats import ItemStats
+
+        return ItemStats.get_for_item(item).mark_count
+
+    @staticmethod
+    def get_mark_counts_for_items(items: Iterable[Item]) -> dict[int, int]:
+        """Batch version of ``get_mark_count_for_item``."""
+        from .stats import ItemStats
+
+        return {
+            pk: stats.mark_count for pk, stats in ItemStats.get_for_items(items).items()
+        }
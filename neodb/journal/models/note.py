@@ -83,6 +83,7 @@ class Note(Content):
         indexes = [
             models.Index(fields=["owner", "item", "created_time"]),
             models.Index(fields=["remote_id"], name="note_remote_id_idx"),
+            models.Index(fields=["owner", "edited_time"], name="note_owner_edited_idx"),
         ]
 
     @property
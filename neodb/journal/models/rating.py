@@ -3,11 +3,8 @@ from typing import Any, Iterable, Sequence
 
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import Avg, Count
 
 from catalog.models import Item, Performance, TVShow
-from catalog.models.performance import PerformanceProduction
-from catalog.models.tv import TVSeason
 from takahe.utils import Takahe
 from users.models import APIdentity
 
@@ -52,12 +49,46 @@ class Rating(Content):
         unique_together = [["owner", "item"]]
         indexes = [
             models.Index(fields=["remote_id"], name="rating_remote_id_idx"),
+            models.Index(
+                fields=["owner", "edited_time"], name="rating_owner_edited_idx"
+            ),
         ]
 
     grade = models.PositiveSmallIntegerField(
         default=0, validators=[MaxValueValidator(10), MinValueValidator(1)], null=True
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values, **kwargs: Any):
+        instance = super().from_db(db, field_names, values, **kwargs)
+        if "item_id" in field_names and "grade" in field_names:
+            instance.previous_rating = (instance.item_id, instance.grade)
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .stats import ItemStats
+
+        adding = self._state.adding
+        previous = None if adding else self.__dict__.get("previous_rating")
+        super().save(*args, **kwargs)
+        current = (self.item_id, self.grade)
+        if previous is None and not adding:
+            # loaded without the fields to tell what changed
+            ItemStats.item_changed(self.item_id)
+        elif previous != current:
+            if previous:
+                ItemStats.rating_changed(*previous, -1)
+            ItemStats.rating_changed(*current, 1)
+        self.previous_rating = current
+
+    def delete(self, *args, **kwargs):
+        from .stats import ItemStats
+
+        previous = self.__dict__.get("previous_rating", (self.item_id, self.grade))
+        r = super().delete(*args, **kwargs)
+        ItemStats.rating_changed(*previous, -1)
+        return r
+
     @property
     def ap_object(self):
         return {
@@ -86,7 +117,9 @@ class Rating(Content):
             return p
         value = obj.get("value", 0) if obj else 0
         if not value:
-            cls.objects.filter(owner=owner, item=item).delete()
+            # one by one, for Piece.delete() to leave tombstones
+            for rating in cls.objects.filter(owner=owner, item=item):
+                rating.delete()
             return
         best = obj.get("best", 5)
         worst = obj.get("worst", 1)
@@ -114,155 +147,30 @@ class Rating(Content):
 
     @classmethod
     def get_info_for_item(cls, item: Item) -> dict:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.values("grade").annotate(count=Count("grade"))
-        grades = [0] * 11
-        votes = 0
-        total = 0
-        for s in stat:
-            if s["grade"] and s["grade"] > 0 and s["grade"] < 11:
-                grades[s["grade"]] = s["count"]
-                total += s["count"] * s["grade"]
-                votes += s["count"]
-        if votes < MIN_RATING_COUNT:
-            return {"average": None, "count": votes, "distribution": [0] * 5}
-        else:
-            return {
-                "average": round(total / votes, 1),
-                "count": votes,
-                "distribution": _calculate_distribution(grades, votes),
-            }
+        from .stats import ItemStats
+
+        return ItemStats.get_for_item(item).rating_info
 
     @classmethod
     def get_info_for_items(cls, items: Iterable[Item]) -> dict[int, dict]:
-        # Extract IDs and build mapping for parent items
-        item_ids = [item.pk for item in items]
-        item_to_parent = {}
-        all_item_ids = set(item_ids)
-
-        # Batch-fetch child IDs for parent item types (TVShow, Performance)
-        # to avoid per-item queries from item.child_item_ids
-        tvshow_ids: list[int] = []
-        perf_ids: list[int] = []
-        for i in items:
-            if isinstance(i, TVShow):
-                tvshow_ids.append(i.pk)
-            elif isinstance(i, Performance):
-                perf_ids.append(i.pk)
-        child_id_map: dict[int, list[int]] = {}
-        if tvshow_ids:
-            for show_id, season_id in (
-                TVSeason.objects.filter(
-                    show_id__in=tvshow_ids,
-                    is_deleted=False,
-                    merged_to_item=None,
-                )
-                .values_list("show_id", "pk")
-                .iterator()
-            ):
-                child_id_map.setdefault(show_id, []).append(season_id)
-        if perf_ids:
-            for show_id, prod_id in (
-                PerformanceProduction.objects.filter(
-                    show_id__in=perf_ids,
-                    is_deleted=False,
-                    merged_to_item=None,
-                )
-                .values_list("show_id", "pk")
-                .iterator()
-            ):
-                child_id_map.setdefault(show_id, []).append(prod_id)
-        for item in items:
-            if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-                for child_id in child_id_map.get(item.pk, []):
-                    item_to_parent[child_id] = item.pk
-                    all_item_ids.add(child_id)
-            if item.pk not in item_to_parent:
-                item_to_parent[item.pk] = item.pk
-
-        # Get all ratings in a single query
-        stat = (
-            Rating.objects.filter(grade__isnull=False, item_id__in=all_item_ids)
-            .values("item_id", "grade")
-            .annotate(count=Count("grade"))
-        )
+        from .stats import ItemStats
 
-        # Initialize counters
-        grades = {item_id: [0] * 11 for item_id in item_ids}
-        votes = {item_id: 0 for item_id in item_ids}
-        total = {item_id: 0 for item_id in item_ids}
-
-        # Process the ratings
-        for s in stat:
-            if s["grade"] and 0 < s["grade"] < 11:
-                parent_id = item_to_parent.get(s["item_id"])
-                if parent_id in grades:
-                    grades[parent_id][s["grade"]] += s["count"]
-                    total[parent_id] += s["count"] * s["grade"]
-                    votes[parent_id] += s["count"]
-                if parent_id != s["item_id"] and s["item_id"] in grades:
-                    grades[s["item_id"]][s["grade"]] += s["count"]
-                    total[s["item_id"]] += s["count"] * s["grade"]
-                    votes[s["item_id"]] += s["count"]
-        # Format results
-        result = {}
-        for item_id in item_ids:
-            count = votes[item_id]
-            if count < MIN_RATING_COUNT:
-                result[item_id] = {
-                    "average": None,
-                    "count": count,
-                    "distribution": [0] * 5,
-                }
-            else:
-                result[item_id] = {
-                    "average": round(total[item_id] / count, 1),
-                    "count": count,
-                    "distribution": _calculate_distribution(grades[item_id], count),
-                }
-
-        return result
+        return {
+            pk: stats.rating_info
+            for pk, stats in ItemStats.get_for_items(items).items()
+        }
 
     @staticmethod
     def get_rating_for_item(item: Item) -> float | None:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.aggregate(average=Avg("grade"), count=Count("item"))
-        return round(stat["average"], 1) if stat["count"] >= MIN_RATING_COUNT else None
+        return Rating.get_info_for_item(item)["average"]
 
     @staticmethod
     def get_rating_count_for_item(item: Item) -> int:
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.aggregate(count=Count("item"))
-        return stat["count"]
+        return Rating.get_info_for_item(item)["count"]
 
     @staticmethod
     def get_rating_distribution_for_item(item: Item):
-        stat = Rating.objects.filter(grade__isnull=False)
-        if item.__class__ in RATING_INCLUDES_CHILD_ITEMS:
-            stat = stat.filter(item_id__in=item.child_item_ids + [item.pk])
-        else:
-            stat = stat.filter(item=item)
-        stat = stat.values("grade").annotate(count=Count("grade")).order_by("grade")
-        g = [0] * 11
-        t = 0
-        for s in stat:
-            g[s["grade"]] = s["count"]
-            t += s["count"]
-        if t < MIN_RATING_COUNT:
-            return [0] * 5
-        return _calculate_distribution(g, t)
+        return Rating.get_info_for_item(item)["distribution"]
 
     @classmethod
     def attach_to_items(cls, items: Sequence[Item]) -> Sequence[Item]:
@@ -282,7 +190,9 @@ class Rating(Content):
         if rating_grade and (rating_grade < 1 or rating_grade > 10):
             raise ValueError(f"Invalid rating grade: {rating_grade}")
         if not rating_grade:
-            Rating.objects.filter(owner=owner, item=item).delete()
+            # one by one, for Piece.delete() to leave tombstones
+            for rating in Rating.objects.filter(owner=owner, item=item):
+                rating.delete()
         else:
             d: dict[str, Any] = {"grade": rating_grade, "visibility": visibility}
             if created_time:
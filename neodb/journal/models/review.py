@@ -46,6 +46,9 @@ class Review(Content):
     class Meta:
         indexes = [
             models.Index(fields=["remote_id"], name="review_remote_id_idx"),
+            models.Index(
+                fields=["owner", "edited_time"], name="review_owner_edited_idx"
+            ),
         ]
 
     @property
@@ -3,7 +3,7 @@ from functools import cached_property
 from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
-from django.db import connection, models
+from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from loguru import logger
@@ -369,6 +369,9 @@ class ShelfMember(ListMember):
         unique_together = [["owner", "item"]]
         indexes = [
             models.Index(fields=["parent_id", "visibility", "created_time"]),
+            models.Index(
+                fields=["owner", "edited_time"], name="shelfmember_owner_edited_idx"
+            ),
         ]
 
     @property
@@ -528,14 +531,40 @@ class ShelfMember(ListMember):
             "content": content,
         }
 
+    @classmethod
+    def from_db(cls, db, field_names, values, **kwargs: Any):
+        instance = super().from_db(db, field_names, values, **kwargs)
+        if "item_id" in field_names:
+            instance.previous_item_id = instance.item_id
+        return instance
+
     def save(self, *args, **kwargs):
+        from .stats import ItemStats
+
         try:
             del self._shelf_type  # type:ignore
             del self._rating_grade  # type:ignore
             del self._comment_text  # type:ignore
         except AttributeError:
             pass
-        return super().save(*args, **kwargs)
+        adding = self._state.adding
+        previous_item_id = self.__dict__.get("previous_item_id")
+        r = super().save(*args, **kwargs)
+        if adding:
+            ItemStats.mark_changed(self.item_id, self.owner_id, 1)
+        elif previous_item_id != self.item_id:
+            # moved to another item, e.g. by a merge
+            ItemStats.items_changed([previous_item_id, self.item_id])
+        self.previous_item_id = self.item_id
+        return r
+
+    def delete(self, *args, **kwargs):
+        from .stats import ItemStats
+
+        item_id = self.__dict__.get("previous_item_id", self.item_id)
+        r = super().delete(*args, **kwargs)
+        ItemStats.mark_changed(item_id, self.owner_id, -1)
+        return r
 
     @cached_property
     def sibling_comment(self) -> "Comment | None":
@@ -789,6 +818,7 @@ class Shelf(List):
         from catalog.search.utils import enqueue_fetch
         from common.validators import is_valid_url
         from journal.models.itemlist import AP_PAGE_SIZE
+        from journal.models.stats import ItemStats
 
         if not isinstance(item_objs, list):
             return 0
@@ -866,6 +896,9 @@ class Shelf(List):
                 # index docs explicitly
                 ShelfMember.objects.filter(pk__in=stale_ids).delete()
                 JournalIndex.instance().delete_by_piece(stale_ids)
+                ItemStats.items_changed(
+                    item_id for item_id in existing_members if item_id not in kept
+                )
         return pending
 
 
@@ -895,6 +928,11 @@ class ShelfLogEntry(models.Model):
                 name="unique_shelf_log_entry",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["owner", "edited_time"], name="shelflogentry_owner_edited_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"LOG:{self.owner}:{self.shelf_type}:{self.item.uuid}:{self.timestamp}"
@@ -1089,47 +1127,6 @@ class ShelfManager:
         return stats
 
     def get_calendar_data(self, max_visiblity: int):
-        shelf_id = self.get_shelf(ShelfType.COMPLETE).pk
-        timezone_offset = timezone.localtime(timezone.now()).strftime("%z")
-        timezone_offset = timezone_offset[: len(timezone_offset) - 2]
-        calendar_data = {}
-        queries = [
-            (
-                "SELECT to_char(DATE(journal_shelfmember.created_time::timestamp AT TIME ZONE %s), 'YYYY-MM-DD') AS dat, django_content_type.model typ, COUNT(1) count FROM journal_shelfmember, catalog_item, django_content_type WHERE journal_shelfmember.item_id = catalog_item.id AND django_content_type.id = catalog_item.polymorphic_ctype_id AND parent_id = %s AND journal_shelfmember.created_time >= NOW() - INTERVAL '366 days' AND journal_shelfmember.visibility <= %s GROUP BY item_id, dat, typ;",
-                [timezone_offset, shelf_id, int(max_visiblity)],
-            ),
-            (
-                "SELECT to_char(DATE(journal_comment.created_time::timestamp AT TIME ZONE %s), 'YYYY-MM-DD') AS dat, django_content_type.model typ, COUNT(1) count FROM journal_comment, catalog_item, django_content_type WHERE journal_comment.owner_id = %s AND journal_comment.item_id = catalog_item.id AND django_content_type.id = catalog_item.polymorphic_ctype_id AND journal_comment.created_time >= NOW() - INTERVAL '366 days' AND journal_comment.visibility <= %s AND django_content_type.model in ('tvepisode', 'podcastepisode') GROUP BY item_id, dat, typ;",
-                [timezone_offset, self.owner.id, int(max_visiblity)],
-            ),
-        ]
-        for sql, params in queries:
-            with connection.cursor() as cursor:
-                cursor.execute(sql, params)
-                data = cursor.fetchall()
-                for line in data:
-                    date = line[0]
-                    typ = line[1]
-                    if date not in calendar_data:
-                        calendar_data[date] = {"items": []}
-                    if typ[:2] == "tv":
-                        typ = "tv"
-                    elif typ[:7] == "podcast":
-                        typ = "podcast"
-                    elif typ == "album":
-                        typ = "music"
-                    elif typ == "edition":
-                        typ = "book"
-                    elif typ not in [
-                        "book",
-                        "movie",
-                        "tv",
-                        "music",
-                        "game",
-                        "podcast",
-                        "performance",
-                    ]:
-                        typ = "other"
-                    if typ not in calendar_data[date]["items"]:
-                        calendar_data[date]["items"].append(typ)
-        return calendar_data
+        from .activity import JournalDailyActivity
+
+        return JournalDailyActivity.get_calendar_data(self.owner.pk, max_visiblity)
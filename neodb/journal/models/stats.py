@@ -0,0 +1,339 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import batched
+from typing import TYPE_CHECKING, Iterable
+
+from django.db import models, transaction
+from django.db.models import Count, Expression, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from catalog.models import (
+    Item,
+    Performance,
+    PerformanceProduction,
+    Podcast,
+    PodcastEpisode,
+    TVEpisode,
+    TVSeason,
+    TVShow,
+)
+
+from .rating import (
+    MIN_RATING_COUNT,
+    RATING_INCLUDES_CHILD_ITEMS,
+    Rating,
+    _calculate_distribution,
+)
+from .shelf import ShelfMember
+
+# items whose mark count is the number of users marking them or any child
+MARK_COUNT_INCLUDES_CHILD_ITEMS = [Podcast, TVSeason]
+# parent model -> (child model, parent id field on child)
+_CHILD_ITEMS: dict[type[Item], tuple[type[Item], str]] = {
+    TVShow: (TVSeason, "show_id"),
+    Performance: (PerformanceProduction, "show_id"),
+    TVSeason: (TVEpisode, "season_id"),
+    Podcast: (PodcastEpisode, "program_id"),
+}
+# child model -> (parent model, parent id field on child)
+_PARENT_ITEMS: dict[type[Item], tuple[type[Item], str]] = {
+    child: (parent, field) for parent, (child, field) in _CHILD_ITEMS.items()
+}
+
+# items recomputed in one go, each locking its row until done
+_REFRESH_CHUNK = 500
+
+_deferred: ContextVar[set[int] | None] = ContextVar("item_stats_deferred", default=None)
+
+
+@contextmanager
+def deferred_item_stats():
+    """Refresh stats of items touched within this block once, when it exits."""
+    if _deferred.get() is not None:
+        yield
+        return
+    pending: set[int] = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        for ids in batched(sorted(pending), _REFRESH_CHUNK):
+            ItemStats.refresh_by_ids(ids)
+
+
+class _AddToGrade(Expression):
+    """``grades`` with ``delta`` added to the count of ``grade``."""
+
+    output_field = models.JSONField()
+
+    def __init__(self, grade: int, delta: int):
+        super().__init__()
+        self.grade = grade
+        self.delta = delta
+
+    def as_sql(self, compiler, connection):
+        grades = connection.ops.quote_name("grades")
+        return (
+            f"jsonb_set({grades}, %s::text[], to_jsonb(GREATEST("
+            f"COALESCE(({grades}->>%s::int)::int, 0) + %s::int, 0)))",
+            [f"{{{self.grade}}}", self.grade, self.delta],
+        )
+
+
+class ItemStats(models.Model):
+    """Rating and mark aggregates of an item, maintained as journal changes.
+
+    Saving or deleting a ``Rating`` or ``ShelfMember`` adjusts the counters of
+    its item, and of the parent when the parent aggregates its children, with
+    a single UPDATE each; a row is only computed in full when it does not exist
+    yet. Reads never write: items without a row read as having no ratings or
+    marks until ``backfill_item_stats`` or a journal change creates it.
+    Queryset updates and deletes bypass the model methods, so code doing them
+    passes the items to ``items_changed()``; ``journal stats-rebuild``
+    recomputes all rows.
+    """
+
+    if TYPE_CHECKING:
+        item_id: int
+
+    item = models.OneToOneField(
+        Item, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    grades = models.JSONField(default=list)
+    """ number of ratings by grade, index 0 unused """
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    mark_count = models.PositiveIntegerField(default=0)
+    edited_time = models.DateTimeField(auto_now=True)
+
+    @property
+    def rating_info(self) -> dict:
+        if self.rating_count < MIN_RATING_COUNT:
+            return {
+                "average": None,
+                "count": self.rating_count,
+                "distribution": [0] * 5,
+            }
+        return {
+            "average": round(self.rating_total / self.rating_count, 1),
+            "count": self.rating_count,
+            "distribution": _calculate_distribution(self.grades, self.rating_count),
+        }
+
+    @classmethod
+    def get_for_items(cls, items: Iterable[Item]) -> dict[int, "ItemStats"]:
+        ids = [i.pk for i in items if i.pk]
+        stats = {s.item_id: s for s in cls.objects.filter(item_id__in=ids)}
+        for pk in ids:
+            if pk not in stats:
+                stats[pk] = cls(item_id=pk)
+        return stats
+
+    @classmethod
+    def get_for_item(cls, item: Item) -> "ItemStats":
+        return cls.get_for_items([item])[item.pk]
+
+    @classmethod
+    def refresh_by_ids(cls, item_ids: Iterable[int]) -> None:
+        """Recompute stats for items and for parents aggregating them."""
+        items = list(Item.objects.filter(pk__in=set(item_ids)))
+        parent_ids = set()
+        for i in items:
+            parent = _PARENT_ITEMS.get(i.__class__)
+            parent_id = getattr(i, parent[1]) if parent else None
+            if parent_id:
+                parent_ids.add(parent_id)
+        parent_ids -= {i.pk for i in items}
+        if parent_ids:
+            items += list(Item.objects.filter(pk__in=parent_ids))
+        cls.refresh(items)
+
+    @classmethod
+    def refresh(cls, items: Iterable[Item]) -> dict[int, "ItemStats"]:
+        """Recompute and save stats for items with a fixed number of queries."""
+        items = sorted(items, key=lambda i: i.pk)
+        with transaction.atomic():
+            # lock rows in a stable order before reading what they aggregate
+            cls.objects.bulk_create(
+                [cls(item_id=i.pk) for i in items], ignore_conflicts=True
+            )
+            list(
+                cls.objects.select_for_update()
+                .filter(item_id__in=[i.pk for i in items])
+                .order_by("item_id")
+                .values_list("item_id", flat=True)
+            )
+            return cls._refresh(items)
+
+    @classmethod
+    def _refresh(cls, items: list[Item]) -> dict[int, "ItemStats"]:
+        children: dict[int, list[int]] = {}
+        for parent_cls, (child_cls, field) in _CHILD_ITEMS.items():
+            ids = [i.pk for i in items if i.__class__ == parent_cls]
+            if not ids:
+                continue
+            for parent_id, child_id in child_cls.objects.filter(
+                **{f"{field}__in": ids}, is_deleted=False, merged_to_item=None
+            ).values_list(field, "pk"):
+                children.setdefault(parent_id, []).append(child_id)
+
+        rating_scope: dict[int, list[int]] = {}
+        mark_scope: dict[int, list[int]] = {}
+        for i in items:
+            rating_scope[i.pk] = [i.pk]
+            mark_scope[i.pk] = [i.pk]
+            if i.__class__ in RATING_INCLUDES_CHILD_ITEMS:
+                rating_scope[i.pk] += children.get(i.pk, [])
+            if i.__class__ in MARK_COUNT_INCLUDES_CHILD_ITEMS:
+                mark_scope[i.pk] += children.get(i.pk, [])
+
+        grades: dict[int, list[int]] = {}
+        for row in (
+            Rating.objects.filter(
+                grade__isnull=False,
+                item_id__in={j for ids in rating_scope.values() for j in ids},
+            )
+            .values("item_id", "grade")
+            .annotate(count=Count("id"))
+            .order_by()
+        ):
+            if 0 < row["grade"] < 11:
+                g = grades.setdefault(row["item_id"], [0] * 11)
+                g[row["grade"]] += row["count"]
+
+        marks: dict[int, int] = {}
+        plain_ids = [pk for pk, ids in mark_scope.items() if len(ids) == 1]
+        if plain_ids:
+            for row in (
+                ShelfMember.objects.filter(item_id__in=plain_ids)
+                .values("item_id")
+                .annotate(count=Count("id"))
+                .order_by()
+            ):
+                marks[row["item_id"]] = row["count"]
+        child_of = {
+            j: pk for pk, ids in mark_scope.items() if len(ids) > 1 for j in ids
+        }
+        if child_of:
+            owners: dict[int, set[int]] = {}
+            for item_id, owner_id in (
+                ShelfMember.objects.filter(item_id__in=child_of.keys())
+                .values_list("item_id", "owner_id")
+                .distinct()
+            ):
+                owners.setdefault(child_of[item_id], set()).add(owner_id)
+            for pk, o in owners.items():
+                marks[pk] = len(o)
+
+        rows = []
+        for pk in rating_scope:
+            g = [0] * 11
+            for j in rating_scope[pk]:
+                for grade, count in enumerate(grades.get(j, [])):
+                    g[grade] += count
+            rows.append(
+                cls(
+                    item_id=pk,
+                    grades=g,
+                    rating_count=sum(g),
+                    rating_total=sum(grade * count for grade, count in enumerate(g)),
+                    mark_count=marks.get(pk, 0),
+                )
+            )
+        cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["item"],
+            update_fields=[
+                "grades",
+                "rating_count",
+                "rating_total",
+                "mark_count",
+                "edited_time",
+            ],
+        )
+        return {s.item_id: s for s in rows}
+
+    @classmethod
+    def items_changed(cls, item_ids: Iterable[int]) -> None:
+        """Recompute stats of items changed by queryset updates or deletes."""
+        item_ids = {i for i in item_ids if i}
+        if not item_ids:
+            return
+        pending = _deferred.get()
+        if pending is not None:
+            pending.update(item_ids)
+        else:
+            cls.refresh_by_ids(item_ids)
+
+    @classmethod
+    def item_changed(cls, item_id: int | None) -> None:
+        cls.items_changed([item_id] if item_id else [])
+
+    @staticmethod
+    def _aggregating(item_id: int, parent_classes: list[type[Item]]) -> list[Item]:
+        """The item, and its parent if that is one of ``parent_classes``."""
+        item = Item.objects.filter(pk=item_id).first()
+        if not item:
+            return []
+        items = [item]
+        parent = _PARENT_ITEMS.get(item.__class__)
+        if (
+            parent
+            and parent[0] in parent_classes
+            and not item.is_deleted
+            and not item.merged_to_item_id
+        ):
+            parent_item = parent[0].objects.filter(pk=getattr(item, parent[1])).first()
+            if parent_item:
+                items.append(parent_item)
+        return items
+
+    @classmethod
+    def _update(cls, item: Item, **counters) -> None:
+        if not cls.objects.filter(item_id=item.pk).update(
+            **counters, edited_time=timezone.now()
+        ):
+            # counted from scratch, including the change being applied
+            cls.refresh([item])
+
+    @classmethod
+    def rating_changed(cls, item_id: int, grade: int | None, delta: int) -> None:
+        """Count a rating of ``grade`` in (delta 1) or out (delta -1)."""
+        if not grade or not 0 < grade < 11:
+            return
+        pending = _deferred.get()
+        if pending is not None:
+            pending.add(item_id)
+            return
+        for item in cls._aggregating(item_id, RATING_INCLUDES_CHILD_ITEMS):
+            cls._update(
+                item,
+                grades=_AddToGrade(grade, delta),
+                rating_count=Greatest(F("rating_count") + delta, 0),
+                rating_total=Greatest(F("rating_total") + grade * delta, 0),
+            )
+
+    @classmethod
+    def mark_changed(cls, item_id: int, owner_id: int, delta: int) -> None:
+        """Count a mark by ``owner_id`` in (delta 1) or out (delta -1)."""
+        pending = _deferred.get()
+        if pending is not None:
+            pending.add(item_id)
+            return
+        for item in cls._aggregating(item_id, MARK_COUNT_INCLUDES_CHILD_ITEMS):
+            if item.__class__ in MARK_COUNT_INCLUDES_CHILD_ITEMS:
+                # distinct users: only their first mark in scope counts, and
+                # only their last one uncounts
+                child_cls, field = _CHILD_ITEMS[item.__class__]
+                children = child_cls.objects.filter(
+                    **{field: item.pk}, is_deleted=False, merged_to_item=None
+                ).values("pk")
+                marks = ShelfMember.objects.filter(
+                    Q(item_id=item.pk) | Q(item_id__in=children), owner_id=owner_id
+                ).count()
+                if marks != (1 if delta > 0 else 0):
+                    continue
+            cls._update(item, mark_count=Greatest(F("mark_count") + delta, 0))
@@ -1,7 +1,7 @@
 import re
 from datetime import timedelta
 from functools import cached_property
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from django.core.cache import cache
 from django.core.validators import RegexValidator
@@ -27,6 +27,11 @@ class TagMember(ListMember):
 
     class Meta:
         unique_together = [["parent", "item"]]
+        indexes = [
+            models.Index(
+                fields=["owner", "edited_time"], name="tagmember_owner_edited_idx"
+            ),
+        ]
 
     @cached_property
     def title(self):
@@ -62,7 +67,10 @@ class Tag(List):
 
     class Meta:
         unique_together = [["owner", "title"]]
-        indexes = [models.Index(fields=["owner", "pinned"])]
+        indexes = [
+            models.Index(fields=["owner", "pinned"]),
+            models.Index(fields=["owner", "edited_time"], name="tag_owner_edited_idx"),
+        ]
 
     @staticmethod
     def cleanup_title(title, replace=True):
@@ -120,6 +128,38 @@ class TagManager:
         )
         return tag_titles
 
+    @staticmethod
+    def indexable_tags_for_items(item_ids: "Iterable[int]") -> dict[int, list[str]]:
+        """Batch version of ``indexable_tags_for_item`` for bulk reindexing.
+
+        One grouped query over ``TagMember`` instead of one per item; the
+        result for each item matches ``indexable_tags_for_item``.
+        """
+        ids = list(item_ids)
+        if not ids:
+            return {}
+        rows = (
+            TagMember.objects.filter(item_id__in=ids, parent__visibility=0)
+            .values("item_id", "parent__title")
+            .annotate(frequency=Count("parent__owner_id"))
+            .order_by("item_id", "-frequency")
+        )
+        top: dict[int, list[str]] = {i: [] for i in ids}
+        for row in rows:
+            titles = top[row["item_id"]]
+            if len(titles) < 20:
+                titles.append(row["parent__title"])
+        return {
+            item_id: sorted(
+                [
+                    t
+                    for t in set(Tag.deep_cleanup_title(title) for title in titles)
+                    if t and t != "_"
+                ]
+            )
+            for item_id, titles in top.items()
+        }
+
     @staticmethod
     def tag_item_for_owner(
         owner: APIdentity,
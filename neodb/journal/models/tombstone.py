@@ -0,0 +1,93 @@
+from typing import TYPE_CHECKING, Any, Iterable
+
+from django.db import models
+from django.utils import timezone
+
+from catalog.models import Item
+from users.models import APIdentity
+
+from .article import Article
+from .collection import Collection
+from .comment import Comment
+from .common import Piece
+from .note import Note
+from .rating import Rating
+from .review import Review
+from .shelf import ShelfLogEntry, ShelfMember
+from .tag import Tag, TagMember
+
+
+class Tombstone(models.Model):
+    """A journal record deleted by its local owner.
+
+    Pieces are deleted outright, so without these an export of the changes
+    since some time (``NdjsonExporter`` with ``since``) could not tell the
+    importer which records of an earlier archive are gone. ``type`` is the
+    record type in the export and ``key`` what the importer finds the row by,
+    besides owner and item: pieces are matched by natural key, as their ids
+    differ on every server they are imported to.
+
+    Recorded by ``Piece.delete()`` and ``Mark.delete_log()``; rows deleted
+    along with others (members of a deleted tag) or in bulk (all journal
+    data of a removed identity) are not.
+    """
+
+    if TYPE_CHECKING:
+        item_id: int | None
+
+    owner = models.ForeignKey(APIdentity, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey(
+        Item, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    type = models.CharField(max_length=50)
+    key = models.JSONField(default=dict)
+    deleted_time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "deleted_time"], name="tombstone_owner_deleted_idx"
+            ),
+        ]
+
+    @staticmethod
+    def key_for_piece(piece: Piece) -> dict[str, Any] | None:
+        """Natural key of an exported piece, or None for other classes."""
+        if isinstance(piece, (Rating, Comment, ShelfMember)):
+            return {}
+        if isinstance(piece, (Review, Tag)):
+            return {"title": piece.title}
+        if isinstance(piece, (Note, Article, Collection)):
+            return {"published": piece.created_time.isoformat()}
+        if isinstance(piece, TagMember):
+            return {"tag": piece.parent.title}
+        return None
+
+    @classmethod
+    def record(cls, piece: Piece) -> "Tombstone | None":
+        key = cls.key_for_piece(piece)
+        if key is None:
+            return None
+        return cls.objects.create(
+            owner_id=piece.owner_id,  # type: ignore[attr-defined]
+            item_id=getattr(piece, "item_id", None),
+            type=piece.__class__.__name__,
+            key=key,
+        )
+
+    @classmethod
+    def record_logs(cls, logs: Iterable[ShelfLogEntry]) -> None:
+        cls.objects.bulk_create(
+            [
+                cls(
+                    owner_id=log.owner_id,
+                    item_id=log.item_id,
+                    type="ShelfLog",
+                    key={
+                        "status": log.shelf_type,
+                        "timestamp": log.timestamp.isoformat(),
+                    },
+                )
+                for log in logs
+            ]
+        )
@@ -4,6 +4,7 @@ from django.db.utils import IntegrityError
 from loguru import logger
 
 from catalog.models import Item
+from common.search import bulk_index_updates
 from journal.search import JournalIndex
 from users.models import APIdentity, User
 
@@ -11,12 +12,15 @@ from .article import Article
 from .collection import Collection, CollectionMember, FeaturedCollection
 from .comment import Comment
 from .common import Content, Debris, Piece
+from .index_state import JournalIndexState
 from .itemlist import ListMember
 from .note import Note
 from .rating import Rating
 from .review import Review
 from .shelf import ShelfLogEntry, ShelfMember
+from .stats import ItemStats, deferred_item_stats
 from .tag import Tag, TagMember
+from .tombstone import Tombstone
 
 
 def cleanup_deleted_post(post_pk: int) -> None:
@@ -57,10 +61,17 @@ def reset_journal_visibility_for_user(owner: APIdentity, visibility: int):
 
 
 def remove_data_by_identity(owner: APIdentity):
-    ShelfMember.objects.filter(owner=owner).delete()
+    # queryset deletes skip the stats updates of Rating and ShelfMember, so
+    # refresh their items once at the end
+    with deferred_item_stats():
+        for cls in (ShelfMember, Rating):
+            ItemStats.items_changed(
+                cls.objects.filter(owner=owner).values_list("item_id", flat=True)
+            )
+        ShelfMember.objects.filter(owner=owner).delete()
+        Rating.objects.filter(owner=owner).delete()
     ShelfLogEntry.objects.filter(owner=owner).delete()
     Comment.objects.filter(owner=owner).delete()
-    Rating.objects.filter(owner=owner).delete()
     Review.objects.filter(owner=owner).delete()
     TagMember.objects.filter(owner=owner).delete()
     Tag.objects.filter(owner=owner).delete()
@@ -69,8 +80,10 @@ def remove_data_by_identity(owner: APIdentity):
     Collection.objects.filter(owner=owner).delete()
     FeaturedCollection.objects.filter(owner=owner).delete()
     Article.objects.filter(owner=owner).delete()
+    Tombstone.objects.filter(owner=owner).delete()
     index = JournalIndex.instance()
     index.delete_by_owner(owner.pk)
+    JournalIndexState.objects.filter(owner=owner).delete()
     logger.info(f"removed journal data by {owner}")
 
 
@@ -91,32 +104,37 @@ def update_journal_for_merged_item(
         logger.error("update_journal_for_merged_item: unable to find merged_to_item")
         return
     delete_q = []
-    for cls in (
-        list(Content.__subclasses__())
-        + list(ListMember.__subclasses__())
-        + [ShelfLogEntry]
-    ):
-        for p in cls.objects.filter(item=legacy_item):
-            with transaction.atomic():
-                try:
-                    p.item = new_item
-                    p.save(update_fields=["item_id"])
-                    if isinstance(p, (Content, ListMember)):
-                        p.update_index()
-                except IntegrityError:
-                    if delete_duplicated:
-                        logger.warning(
-                            f"deleted piece {p.pk} when merging {cls.__name__}: {legacy_item_uuid} -> {new_item.uuid}"
-                        )
-                        delete_q.append(p)
-                    else:
-                        logger.warning(
-                            f"skip piece {p.pk} when merging {cls.__name__}: {legacy_item_uuid} -> {new_item.uuid}"
-                        )
-    for p in delete_q:
-        if isinstance(p, (Content, ListMember)):
-            Debris.create_from_piece(p)
-        p.delete()
+    # merges may move thousands of pieces; keep their index updates (and the
+    # item reindexing their saves trigger) off the interactive lane, and
+    # refresh stats of both items once at the end
+    with bulk_index_updates(), deferred_item_stats():
+        ItemStats.item_changed(legacy_item.pk)
+        for cls in (
+            list(Content.__subclasses__())
+            + list(ListMember.__subclasses__())
+            + [ShelfLogEntry]
+        ):
+            for p in cls.objects.filter(item=legacy_item):
+                with transaction.atomic():
+                    try:
+                        p.item = new_item
+                        p.save(update_fields=["item_id"])
+                        if isinstance(p, (Content, ListMember)):
+                            p.update_index(later=True)
+                    except IntegrityError:
+                        if delete_duplicated:
+                            logger.warning(
+                                f"deleted piece {p.pk} when merging {cls.__name__}: {legacy_item_uuid} -> {new_item.uuid}"
+                            )
+                            delete_q.append(p)
+                        else:
+                            logger.warning(
+                                f"skip piece {p.pk} when merging {cls.__name__}: {legacy_item_uuid} -> {new_item.uuid}"
+                            )
+        for p in delete_q:
+            if isinstance(p, (Content, ListMember)):
+                Debris.create_from_piece(p)
+            p.delete()
 
 
 def journal_exists_for_item(item: Item) -> bool:
@@ -11,7 +11,7 @@ from loguru import logger
 
 from catalog.models import Item, item_categories
 from common.models import int_, uniq
-from common.search import Index, QueryParser, SearchResult
+from common.search import Index, IndexUpdateQueue, QueryParser, SearchResult
 from common.search.index import TYPESENSE_ERRORS
 from takahe.models import Identity as TakaheIdentity
 from takahe.models import Post
@@ -19,6 +19,7 @@ from takahe.utils import Takahe
 from users.models.apidentity import APIdentity
 
 if TYPE_CHECKING:
+    from common.search.queue import IndexUpdatePriority
     from journal.models import Piece
 
 # NB: ``journal.models.common`` and ``journal.models.collection`` import
@@ -28,6 +29,11 @@ if TYPE_CHECKING:
 # circular-import workarounds, not laziness.
 
 
+def _update_journal_index_task():
+    updated = JournalIndex.update_queue.flush()
+    logger.info(f"Journal index updated for {updated} pieces")
+
+
 def _get_item_ids(doc):
     from journal.models import Collection  # circular; see header
 
@@ -393,6 +399,11 @@ class JournalIndex(Index):
         ]
     }
     search_result_class = JournalSearchResult
+    update_queue = IndexUpdateQueue(
+        "journal",
+        handler=lambda ids: JournalIndex.instance().replace_piece_ids(ids),
+        task=_update_journal_index_task,
+    )
 
     @classmethod
     def piece_to_doc(cls, piece: "Piece") -> dict:
@@ -518,6 +529,38 @@ class JournalIndex(Index):
             logger.error(f"Typesense: error {e}")
             return None
 
+    def get_doc_counts_by_owner(self, owner_ids: list[int]) -> dict[int, int] | None:
+        """Return number of docs owned by each identity, or None on error.
+
+        One search per owner, sent together; owner_ids should not exceed
+        typesense's limit of searches per request (50 by default).
+        """
+        if not owner_ids:
+            return {}
+        searches = [
+            {"q": "*", "filter_by": f"owner_id:{owner_id}", "per_page": 0}
+            for owner_id in owner_ids
+        ]
+        try:
+            r = self._write_client.multi_search.perform(
+                {"searches": searches},  # type:ignore
+                {"collection": self.write_collection.name},  # type:ignore
+            )
+        except TYPESENSE_ERRORS as e:
+            logger.error(f"Typesense: error {e}")
+            return None
+        results = r.get("results") if isinstance(r, dict) else None
+        if not isinstance(results, list) or len(results) != len(owner_ids):
+            logger.error(f"Typesense: doc counts invalid response {r}")
+            return None
+        counts = {}
+        for owner_id, result in zip(owner_ids, results):
+            if "found" not in result:
+                logger.error(f"Typesense: doc counts error {result.get('error')}")
+                return None
+            counts[owner_id] = result["found"]
+        return counts
+
     def delete_by_owner(self, owner_ids):
         return self.delete_docs("owner_id", owner_ids)
 
@@ -541,6 +584,19 @@ class JournalIndex(Index):
         self.delete_by_piece(pids)
         self.insert_docs(self.pieces_to_docs(pieces))
 
+    def replace_piece_ids(self, piece_ids: list[int]):
+        from journal.models import Piece  # circular; see header
+
+        pieces = list(Piece.objects.filter(pk__in=piece_ids))
+        self.delete_by_piece(piece_ids)
+        self.insert_docs(self.pieces_to_docs(pieces))
+
+    @classmethod
+    def enqueue_replace_pieces(
+        cls, piece_ids: list[int], priority: "IndexUpdatePriority | None" = None
+    ):
+        cls.update_queue.enqueue(piece_ids, priority)
+
     def search(
         self,
         query,
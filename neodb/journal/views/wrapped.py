@@ -6,7 +6,7 @@ from typing import Any
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, F
+from django.db.models import Count
 from django.db.models.functions import ExtractMonth
 from django.http import HttpRequest, HttpResponseRedirect
 from django.http.response import HttpResponse
@@ -17,13 +17,12 @@ from loguru import logger
 
 from catalog.models import (
     AvailableItemCategory,
-    ItemCategory,
     PodcastEpisode,
     item_content_types,
 )
 from common.sentry import count as sentry_count
 from common.utils import int_
-from journal.models import Comment, ShelfType
+from journal.models import Comment, JournalDailyActivity
 from journal.models.common import VisibilityType
 from mastodon.models.bluesky import EmbedObj
 from takahe.utils import Takahe
@@ -45,11 +44,6 @@ _type_emoji = {
 }
 
 
-def _type_to_emoji():
-    cts = item_content_types()
-    return {v: _type_emoji.get(k.__name__.lower(), k.__name__) for k, v in cts.items()}
-
-
 class WrappedView(LoginRequiredMixin, TemplateView):
     template_name = "wrapped.html"
 
@@ -62,14 +56,14 @@ class WrappedView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context["identity"] = target
         context["year"] = year
+        # completed marks come from the daily rollup; podcasts also count
+        # the programs whose episodes were commented on, which a count per
+        # day can't tell apart
+        by_month = JournalDailyActivity.get_completed_by_month(target.pk, year)
         cnt = {}
         cats = []
-        _item_types = _type_to_emoji()
         for cat in AvailableItemCategory:
-            queryset = target.shelf_manager.get_latest_members(
-                ShelfType.COMPLETE, ItemCategory(cat)
-            ).filter(created_time__year=year)
-            cnt[cat] = queryset.count()
+            cnt[cat] = sum(total for _, c, total in by_month if c == cat.value)
             if cat.value == "podcast":
                 pc = (
                     Comment.objects.filter(
@@ -84,19 +78,10 @@ class WrappedView(LoginRequiredMixin, TemplateView):
             if cnt[cat] > 0:
                 cats.append(f"{_type_emoji[cat.value]}x{cnt[cat]}")
         context["by_cat"] = "  ".join(cats)
-        all = list(
-            target.shelf_manager.get_latest_members(ShelfType.COMPLETE)
-            .filter(created_time__year=year)
-            .annotate(month=ExtractMonth("created_time"))
-            .annotate(cat=F("item__polymorphic_ctype_id"))
-            .values("month", "cat")
-            .annotate(total=Count("month"))
-            .order_by("month")
-            .values_list("month", "cat", "total")
-        )
         data = [{"Month": calendar.month_abbr[m]} for m in range(1, 13)]
-        for m, ct, cnt in all:
-            data[m - 1][_item_types[ct]] = data[m - 1].get(_item_types[ct], 0) + cnt
+        for m, category, total in by_month:
+            label = _type_emoji.get(category, category)
+            data[m - 1][label] = data[m - 1].get(label, 0) + total
         podcast_by_month = list(
             Comment.objects.filter(
                 owner=target,
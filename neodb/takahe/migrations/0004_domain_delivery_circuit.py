@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("takahe", "0003_previewcard_post_preview_card"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_failures",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_paused_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_probes_failed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
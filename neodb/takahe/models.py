@@ -319,6 +319,13 @@ class Domain(models.Model):
     # Free-form notes field for admins
     notes = models.TextField(blank=True, null=True)
 
+    # Delivery circuit breaker: consecutive deliveries that could not connect,
+    # until when deliveries are held back once there were too many, and how
+    # many probes have failed since
+    delivery_failures = models.PositiveIntegerField(default=0)
+    delivery_paused_until = models.DateTimeField(blank=True, null=True)
+    delivery_probes_failed = models.PositiveIntegerField(default=0)
+
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
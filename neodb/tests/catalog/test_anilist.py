@@ -1,11 +1,21 @@
 import json
+from unittest.mock import patch
 
+import httpx
 import pytest
 
-from catalog.common import ParseError, SiteManager, use_local_response
+from catalog.common import (
+    DownloadError,
+    ParseError,
+    SiteManager,
+    http_clients,
+    use_local_response,
+)
 from catalog.models import Edition, IdType, Movie, TVSeason
 from catalog.sites.anilist import (
+    _API_URL,
     AniListAnime,
+    AniListDownloader,
     AniListManga,
     _base_role,
     _localized,
@@ -84,6 +94,32 @@ class TestAuthorRoles:
         assert _staff_names(media, lambda r: r in _AUTHOR_ROLES) == ["Real Author"]
 
 
+@pytest.mark.django_db(databases="__all__")
+class TestAniListDownloader:
+    def test_posts_through_pooled_client(self, settings, tmp_path):
+        settings.DOWNLOADER_SAVEDIR = str(tmp_path)
+        body = {"data": {"Media": {"id": 1}}}
+        resp = httpx.Response(200, json=body, request=httpx.Request("POST", _API_URL))
+        with (
+            patch("catalog.sites.anilist.anilist_limiter"),
+            patch.object(http_clients, "post", return_value=resp) as post,
+        ):
+            r = AniListDownloader("anilist:media:1", {"query": "q"}).download()
+        assert post.call_args.kwargs["json"] == {"query": "q"}
+        assert r.json() == body
+        assert str(r.url) == _API_URL
+        assert json.loads(next(tmp_path.iterdir()).read_text()) == body
+
+    def test_network_error(self):
+        with (
+            patch("catalog.sites.anilist.anilist_limiter"),
+            patch.object(http_clients, "post", side_effect=httpx.ConnectError("down")),
+            patch("catalog.common.downloaders.time.sleep"),
+            pytest.raises(DownloadError),
+        ):
+            AniListDownloader("anilist:media:1", {"query": "q"}).download()
+
+
 @pytest.mark.django_db(databases="__all__")
 class TestAniListAnime:
     def test_parse(self):
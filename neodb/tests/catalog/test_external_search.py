@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from catalog.models import ItemCategory, SiteName
+from catalog.search import ExternalSearchResultItem, ExternalSources
+
+
+def _item(site, n):
+    return ExternalSearchResultItem(
+        ItemCategory.Book, site, f"https://{site}/{n}", f"{site} {n}", "", "", ""
+    )
+
+
+def _source(name, delay, calls):
+    async def search():
+        calls.append(name)
+        await asyncio.sleep(delay)
+        return [_item(name, 1)]
+
+    return name, search
+
+
+class TestExternalSearchStreaming:
+    @pytest.fixture(autouse=True)
+    def setup_sources(self):
+        self.calls = []
+        self.sources = [
+            _source("slow.example", 10, self.calls),
+            _source("fast.example", 0, self.calls),
+        ]
+        cache.delete_many(
+            [f"ext_{name}_1_search_book_streamed" for name, _ in self.sources]
+        )
+        with (
+            patch.object(ExternalSources, "get_sources", return_value=self.sources),
+            patch.object(ExternalSources, "deadline", 0.5),
+            patch.object(ExternalSources, "site_timeout", 0.3),
+        ):
+            yield
+
+    def test_results_streamed_as_sites_answer(self):
+        results = list(ExternalSources.search_iter("streamed", 1, "book"))
+        # the slow site times out without holding back the fast one
+        assert [name for name, _ in results] == ["fast.example"]
+        assert results[0][1][0].source_url == "https://fast.example/1"
+
+    def test_answers_cached_per_site(self):
+        ExternalSources.search("streamed", 1, "book")
+        self.calls.clear()
+        results = ExternalSources.search("streamed", 1, "book")
+        assert [r.source_url for r in results] == ["https://fast.example/1"]
+        # only the site that missed the deadline is asked again
+        assert self.calls == ["slow.example"]
+
+    def test_disabled_source_filtered(self):
+        results = ExternalSources.search(
+            "streamed", 1, "book", disabled_sources=[SiteName.Goodreads.value]
+        )
+        assert len(results) == 1
+        results = ExternalSources.search(
+            "streamed", 1, "book", disabled_sources=["fast.example"]
+        )
+        assert results == []
@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest.mock import patch
+
+from catalog.common.fetch_scheduler import FetchJob, FetchScheduler
+
+
+class FakeCache:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def add(self, key, value, timeout=None):
+        if key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class Recorder:
+    """Fetch function recording how many jobs of each host run at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+
+    def job(self, host, value):
+        def fn():
+            with self.lock:
+                self.running[host] = self.running.get(host, 0) + 1
+                self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+            time.sleep(0.05)
+            with self.lock:
+                self.running[host] -= 1
+            return value
+
+        return FetchJob(fn, host=host, concurrency=2 if host == "slow" else 0)
+
+
+def test_lanes_per_host():
+    r = Recorder()
+    jobs = [r.job("slow", i) for i in range(6)] + [r.job("fast", i) for i in range(4)]
+    results = FetchScheduler(max_workers=8, site_concurrency=4).run(jobs)
+    assert results == list(range(6)) + list(range(4))
+    assert r.peak["slow"] == 2
+    assert r.peak["fast"] == 4
+
+
+def test_failed_job():
+    def fail():
+        raise ValueError("boom")
+
+    jobs = [FetchJob(fail, host="a"), FetchJob(lambda: 1, host="a")]
+    assert FetchScheduler().run(jobs) == [None, 1]
+
+
+def test_wait_for_fetch_in_flight():
+    url = "https://example.org/1"
+    checks = []
+
+    def is_ready():
+        checks.append(1)
+        return len(checks) > 2
+
+    fake = FakeCache({f"_fetch_lock:{url}": 1})
+    with patch("catalog.common.fetch_scheduler.cache", fake):
+        s = FetchScheduler(lock_wait=5, poll_interval=0.01)
+        assert s.run([FetchJob(lambda: None, url=url, is_ready=is_ready)]) == [None]
+    assert len(checks) == 3
+    # the lock belongs to the other fetch and is left alone
+    assert f"_fetch_lock:{url}" in fake.values
+
+
+def test_release_lock_on_failure():
+    url = "https://example.org/2"
+    fake = FakeCache()
+    with patch("catalog.common.fetch_scheduler.cache", fake):
+        FetchScheduler().run([FetchJob(lambda: None, url=url)])
+    assert not fake.values
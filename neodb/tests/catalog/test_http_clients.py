@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from catalog.common import HttpClientRegistry
+
+
+class TestHttpClientRegistry:
+    def test_one_client_per_origin(self):
+        reg = HttpClientRegistry()
+        c = reg.get_client("https://api.themoviedb.org/3/movie/1")
+        assert reg.get_client("https://API.themoviedb.org/3/tv/2") is c
+        assert reg.get_client("http://api.themoviedb.org/3/movie/1") is not c
+        reg.close()
+
+    def test_forked_process_gets_new_clients(self):
+        reg = HttpClientRegistry()
+        c = reg.get_client("https://bgm.tv/subject/1")
+        with patch("catalog.common.http_clients.os.getpid", return_value=-1):
+            assert reg.get_client("https://bgm.tv/subject/1") is not c
+
+    def test_least_recently_used_host_evicted(self):
+        reg = HttpClientRegistry(max_hosts=2)
+        a = reg.get_client("https://a.example/")
+        reg.get_client("https://b.example/")
+        reg.get_client("https://a.example/")
+        reg.get_client("https://c.example/")
+        assert list(reg.stats()) == ["https://a.example", "https://c.example"]
+        assert reg.get_client("https://a.example/") is a
+        reg.close()
+
+    def test_request_stats(self):
+        seen = []
+
+        def handler(request: httpx.Request):
+            seen.append(request.headers)
+            if request.url.path == "/down":
+                raise httpx.ConnectError("down", request=request)
+            return httpx.Response(200, text="ok")
+
+        reg = HttpClientRegistry()
+        reg._clients["https://books.example"] = httpx.Client(
+            transport=httpx.MockTransport(handler)
+        )
+        r = reg.get(
+            "https://books.example/v1",
+            headers={"Accept": "text/html"},
+        )
+        assert r.text == "ok"
+        assert seen[0]["accept"] == "text/html"
+        with pytest.raises(httpx.ConnectError):
+            reg.get("https://books.example/down")
+        stats = reg.stats()["https://books.example"]
+        assert stats["requests"] == 2
+        assert stats["errors"] == 1
+        reg.close()
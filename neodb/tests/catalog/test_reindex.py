@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Edition, Item, Movie
+from catalog.search.index import CatalogIndex
+from catalog.search.reindex import CatalogReindexer, build_docs_for_range
+from journal.models import Tag, TagManager
+from users.models import User
+
+
+@pytest.mark.django_db(databases="__all__")
+class TestCatalogReindexer:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.owner = User.register(email="reindex@example.com", username="reindex")
+        self.items = [Edition.objects.create(title=f"Book {i}") for i in range(5)]
+        self.movie = Movie.objects.create(title="Movie")
+        self.deleted = Edition.objects.create(title="Deleted", is_deleted=True)
+        tag = Tag.objects.create(owner=self.owner.identity, title="Fav", visibility=0)
+        tag.append_item(self.items[0])
+        self.checkpoint = {}
+        redis = MagicMock()
+        redis.get.side_effect = lambda k: self.checkpoint.get(k)
+        redis.set.side_effect = lambda k, v: self.checkpoint.__setitem__(k, v)
+        redis.delete.side_effect = lambda k: self.checkpoint.pop(k, None)
+        with patch("catalog.search.reindex.get_redis_connection", return_value=redis):
+            yield
+
+    def test_prefetched_docs_match_single_item_docs(self):
+        expected = {
+            str(i.pk): Item.objects.get(pk=i.pk).to_indexable_doc()
+            for i in self.items + [self.movie]
+        }
+        docs = build_docs_for_range(self.items[0].pk, self.movie.pk)
+        assert {d["id"]: d for d in docs} == expected
+
+    def test_tags_for_items_match_single_item(self):
+        ids = [i.pk for i in self.items]
+        batch = TagManager.indexable_tags_for_items(ids)
+        for i in self.items:
+            assert batch[i.pk] == TagManager.indexable_tags_for_item(i)
+
+    def test_prefetch_indexable_bounds_queries(self):
+        items = list(Item.objects.filter(pk__in=[i.pk for i in self.items]))
+        Item.prefetch_indexable(items)
+        with CaptureQueriesContext(connection) as ctx:
+            for i in items:
+                i.to_indexable_doc()
+        assert len(ctx.captured_queries) == 0
+
+    def test_run_in_batches(self):
+        with patch.object(CatalogIndex, "replace_docs", side_effect=len) as replace:
+            stats = CatalogReindexer(batch_size=2).run()
+        assert replace.call_count == 3
+        assert stats.items_seen == 6
+        assert stats.docs_indexed == 6
+        assert stats.failed_ranges == 0
+        assert "catalog_reindex_checkpoint" not in self.checkpoint
+
+    def test_resume_from_checkpoint(self):
+        with patch.object(CatalogIndex, "replace_docs", side_effect=[2, 0, 2]):
+            stats = CatalogReindexer(batch_size=2).run()
+        assert stats.failed_ranges == 1
+        # the checkpoint stops at the failed range
+        assert CatalogReindexer.get_checkpoint() == self.items[1].pk + 1
+        with patch.object(CatalogIndex, "replace_docs", side_effect=len) as replace:
+            stats = CatalogReindexer(batch_size=2, resume=True).run()
+        assert stats.items_seen == 4
+        assert replace.call_count == 2
+        assert CatalogReindexer.get_checkpoint() is None
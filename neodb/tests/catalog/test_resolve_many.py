@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.common import SiteManager
+from catalog.models import Edition, ExternalResource, IdType, Item
+
+
+def _resource(item, id_type, id_value, url, scraped=True):
+    return ExternalResource.objects.create(
+        item=item,
+        id_type=id_type,
+        id_value=id_value,
+        url=url,
+        scraped_time=timezone.now() if scraped else None,
+        metadata={"title": str(item)} if scraped else {},
+    )
+
+
+@pytest.mark.django_db(databases="__all__")
+class TestResolveMany:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.book1 = Edition.objects.create(title="Hyperion")
+        self.book2 = Edition.objects.create(title="Dune")
+        self.book3 = Edition.objects.create(title="Solaris")
+        _resource(
+            self.book1,
+            IdType.Goodreads,
+            "77566",
+            "https://www.goodreads.com/book/show/77566",
+        )
+        _resource(
+            self.book2,
+            IdType.Goodreads,
+            "44767",
+            "https://www.goodreads.com/book/show/44767",
+        )
+        _resource(
+            self.book3,
+            IdType.Goodreads,
+            "95558",
+            "https://www.goodreads.com/book/show/95558",
+            scraped=False,
+        )
+
+    def test_lookup_ids_bulk(self):
+        r = Item.get_by_lookup_ids_bulk(
+            [
+                (IdType.Goodreads, "77566"),
+                (IdType.Goodreads, "44767"),
+                (IdType.Goodreads, "95558"),
+                (IdType.ISBN, "9780441172719"),
+            ]
+        )
+        assert r == {
+            (IdType.Goodreads, "77566"): self.book1,
+            (IdType.Goodreads, "44767"): self.book2,
+        }
+
+    def test_merged_and_deleted(self):
+        self.book2.merge_to(self.book3)
+        self.book1.is_deleted = True
+        self.book1.save()
+        r = Item.get_by_lookup_ids_bulk(
+            [(IdType.Goodreads, "77566"), (IdType.Goodreads, "44767")]
+        )
+        assert r == {(IdType.Goodreads, "44767"): self.book3}
+
+    def test_resolve_many(self):
+        urls = [
+            "https://www.goodreads.com/book/show/77566-hyperion",
+            "https://www.goodreads.com/book/show/44767",
+            "https://www.goodreads.com/book/show/95558",
+            self.book3.url,
+            "https://unknown.example/book/1",
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            r = SiteManager.resolve_many(urls)
+        # a query or two per kind of url, not per url
+        assert len(ctx.captured_queries) <= 10
+        assert r == {
+            urls[0]: self.book1,
+            urls[1]: self.book2,
+            self.book3.url: self.book3,
+        }
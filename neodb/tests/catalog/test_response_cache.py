@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+import httpx
+
+from catalog.common import BasicDownloader
+from catalog.common.response_cache import ResponseCache, normalize_url
+
+
+class TestResponseCache:
+    def test_normalize_url(self):
+        assert normalize_url("HTTPS://Api.Example.com?b=2&a=1#x") == (
+            "https://api.example.com/?a=1&b=2"
+        )
+
+    def test_store_requires_validator(self, tmp_path):
+        rc = ResponseCache(str(tmp_path), 1024 * 1024)
+        assert not rc.set("https://a.example/1", 200, {}, b"body")
+        assert rc.set("https://a.example/1", 200, {"ETag": '"v1"'}, b"body")
+        cached = rc.get("https://a.example/1")
+        assert cached and cached.content == b"body"
+        assert cached.validators == {"If-None-Match": '"v1"'}
+
+    def test_lru_eviction(self, tmp_path):
+        rc = ResponseCache(str(tmp_path), 200)
+        headers = {"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        for i in range(1, 6):
+            rc.set(f"https://a.example/{i}", 200, headers, bytes([i]) * 10)
+        assert rc.get("https://a.example/1")
+        for i in range(6, 22):
+            rc.set(f"https://a.example/{i}", 200, headers, bytes([i]) * 10)
+        assert rc.size() <= 200
+        assert rc.get("https://a.example/1")
+        assert rc.get("https://a.example/2") is None
+        assert rc.get("https://a.example/21")
+
+    def test_shared_body_kept(self, tmp_path):
+        rc = ResponseCache(str(tmp_path), 1024 * 1024)
+        rc.set("https://a.example/1", 200, {"ETag": "a"}, b"same")
+        rc.set("https://b.example/1", 200, {"ETag": "b"}, b"same")
+        assert len(list(tmp_path.glob("*/*"))) == 1
+        rc.delete("https://a.example/1")
+        cached = rc.get("https://b.example/1")
+        assert cached and cached.content == b"same"
+
+    def test_keyed_by_request_headers(self, tmp_path):
+        rc = ResponseCache(str(tmp_path), 1024 * 1024)
+        url = "https://a.example/1"
+        headers = {"ETag": "a", "Vary": "Accept-Language"}
+        rc.set(url, 200, headers, b"en", {"Accept-Language": "en"})
+        rc.set(url, 200, headers, b"fr", {"accept-language": "fr"})
+        en = rc.get(url, {"Accept-Language": "en"})
+        assert en and en.content == b"en"
+        fr = rc.get(url, {"Accept-Language": "fr"})
+        assert fr and fr.content == b"fr"
+        assert rc.get(url) is None
+        # a response varying by a header not in the key is not stored
+        assert not rc.set(url, 200, {"ETag": "a", "Vary": "Cookie"}, b"x")
+        assert not rc.set(url, 200, {"ETag": "a", "Vary": "*"}, b"x")
+
+    def test_size_is_kept_up_to_date(self, tmp_path):
+        rc = ResponseCache(str(tmp_path), 1024 * 1024)
+        rc.set("https://a.example/1", 200, {"ETag": "a"}, b"12345")
+        rc.set("https://a.example/2", 200, {"ETag": "a"}, b"123")
+        assert rc.size() == 8
+        rc.set("https://a.example/1", 200, {"ETag": "b"}, b"1")
+        assert rc.size() == 4
+        rc.delete("https://a.example/2")
+        assert rc.size() == 1
+        # reopened, the total is carried over rather than recounted
+        assert ResponseCache(str(tmp_path), 1024 * 1024).size() == 1
+
+
+class TestConditionalDownload:
+    def test_not_modified_served_from_cache(self, tmp_path, settings):
+        settings.DOWNLOADER_RESPONSE_CACHE_DIR = str(tmp_path)
+        sent = []
+
+        def fake_get(url, headers, **kwargs):
+            sent.append(headers)
+            request = httpx.Request("GET", url)
+            if headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, request=request)
+            return httpx.Response(
+                200,
+                headers={"ETag": '"v1"', "Content-Type": "application/json"},
+                content=b'{"id": 1}',
+                request=request,
+            )
+
+        url = "https://api.example.com/movie/1"
+        with patch("catalog.common.downloaders.http_clients.get", fake_get):
+            assert BasicDownloader(url).download().json() == {"id": 1}
+            resp = BasicDownloader(url).download()
+        assert resp.json() == {"id": 1}
+        assert resp.headers["content-type"] == "application/json"
+        assert "If-None-Match" not in sent[0]
+        assert sent[1]["If-None-Match"] == '"v1"'
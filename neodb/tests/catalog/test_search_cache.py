@@ -0,0 +1,125 @@
+from typing import Any, cast
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Edition, People, PeopleType
+from catalog.search.index import CatalogIndex, CatalogQueryParser, CatalogSearchResult
+from catalog.search.people_index import PeopleIndex, PeopleSearchResult
+from catalog.search.utils import (
+    _ITEM_VERSION_KEY,
+    _SEARCH_CARDS_KEY,
+    _SEARCH_RESPONSE_KEY,
+    _search_cache_key,
+    query_index,
+    query_index_with_people,
+)
+from common.search import Index
+
+
+@pytest.mark.django_db(databases="__all__")
+class TestSearchResultCache:
+    @pytest.fixture(autouse=True)
+    def setup_data(self, settings):
+        settings.SEARCH_CACHE_TIMEOUT = 300
+        self.book1 = Edition.objects.create(title="Cached Book 1")
+        self.book2 = Edition.objects.create(title="Cached Book 2")
+        key = _search_cache_key(CatalogQueryParser("Cached"))
+        cache.delete_many(
+            [_SEARCH_CARDS_KEY.format(key), _SEARCH_RESPONSE_KEY.format(key)]
+        )
+        response = {
+            "hits": [
+                {"document": {"id": str(b.pk), "tag": []}}
+                for b in [self.book1, self.book2]
+            ],
+            "found": 2,
+            "page": 1,
+            "request_params": {"per_page": 20, "q": "Cached"},
+        }
+        with patch.object(CatalogIndex, "instance") as mock_instance:
+            self.index = MagicMock(spec=CatalogIndex)
+            mock_instance.return_value = self.index
+            self.index.search.return_value = CatalogSearchResult(
+                self.index, cast(Any, response)
+            )
+            yield
+        cache.delete_many(
+            [_SEARCH_CARDS_KEY.format(key), _SEARCH_RESPONSE_KEY.format(key)]
+        )
+
+    def _search(self):
+        items, _, _, _, _ = query_index("Cached", prepare_external=False)
+        return [i.pk for i in items]
+
+    def test_cards_served_from_cache(self):
+        assert self._search() == [self.book1.pk, self.book2.pk]
+        with CaptureQueriesContext(connection) as ctx:
+            assert self._search() == [self.book1.pk, self.book2.pk]
+        assert ctx.captured_queries == []
+        assert self.index.search.call_count == 1
+
+    def test_people_cached_with_cards(self):
+        person = People.objects.create(
+            title="Cached Person", people_type=PeopleType.PERSON
+        )
+        people = PeopleSearchResult(
+            PeopleIndex(),
+            cast(
+                Any,
+                {
+                    "hits": [{"document": {"id": str(person.pk)}}],
+                    "found": 1,
+                    "page": 1,
+                    "request_params": {"per_page": 3},
+                },
+            ),
+        )
+        catalog = self.index.search.return_value
+        with patch.object(Index, "multi_search", return_value=[catalog, people]) as ms:
+            for _ in range(2):
+                items, _, _, _, _, found = query_index_with_people(
+                    "Cached", prepare_external=False, people_page_size=3
+                )
+                assert [i.pk for i in items] == [self.book1.pk, self.book2.pk]
+                assert [p.pk for p in found] == [person.pk]
+        # catalog and people sent together once, then both served from cache
+        assert ms.call_count == 1
+        assert len(ms.call_args.args[0]) == 2
+
+    def test_item_save_invalidates_cards(self, django_capture_on_commit_callbacks):
+        self._search()
+        self.book1.localized_title = [{"lang": "en", "text": "Renamed"}]
+        with django_capture_on_commit_callbacks(execute=True):
+            self.book1.save()
+        with CaptureQueriesContext(connection) as ctx:
+            items, _, _, _, _ = query_index("Cached", prepare_external=False)
+        # cards are rebuilt from the cached hits, without a new index search
+        assert ctx.captured_queries
+        assert self.index.search.call_count == 1
+        assert items[0].display_title == "Renamed"
+
+    def test_merged_and_deleted_items_never_served(
+        self, django_capture_on_commit_callbacks
+    ):
+        self._search()
+        with django_capture_on_commit_callbacks(execute=True):
+            self.book1.merge_to(self.book2)
+        assert self.book1.pk not in self._search()
+        with django_capture_on_commit_callbacks(execute=True):
+            self.book2.delete()
+        assert self._search() == []
+
+    def test_version_bumped_on_commit(self, django_capture_on_commit_callbacks):
+        key = _ITEM_VERSION_KEY.format(self.book1.pk)
+        cache.delete(key)
+        with django_capture_on_commit_callbacks() as callbacks:
+            self.book1.save()
+            assert cache.get(key) is None
+        for callback in callbacks:
+            callback()
+        assert cache.get(key) is not None
+        assert 0 < cache.ttl(key) <= 600
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import pytest
+from django_redis import get_redis_connection
+
+from common.search import IndexUpdateQueue, bulk_index_updates
+
+
+def _noop_task():
+    pass
+
+
+class TestIndexUpdateQueue:
+    @pytest.fixture(autouse=True)
+    def setup_queue(self):
+        self.flushed: list[list[int]] = []
+        self.queue = IndexUpdateQueue(
+            "test", handler=self.flushed.append, task=_noop_task, batch_size=2
+        )
+        conn = get_redis_connection("default")
+        keys = (
+            [self.queue._key(lane) for lane in self.queue.lanes]
+            + [self.queue._scheduled_key(lane) for lane in self.queue.lanes]
+            + [self.queue._failures_key()]
+        )
+        conn.delete(*keys)
+        with patch("common.search.queue.django_rq.get_queue") as get_queue:
+            self.rq_queue = get_queue.return_value
+            yield
+        conn.delete(*keys)
+
+    def test_dedup_and_single_schedule(self):
+        self.queue.enqueue([1, 2])
+        self.queue.enqueue([2, 3])
+        assert self.queue.depth() == {"high": 3, "low": 0}
+        # the pending flush is kept, not cancelled and pushed back
+        assert self.rq_queue.enqueue_in.call_count == 1
+
+    def test_high_lane_flushes_first(self):
+        with bulk_index_updates():
+            self.queue.enqueue([10, 11, 12])
+        self.queue.enqueue([1, 11])
+        assert self.rq_queue.enqueue_in.call_count == 2
+        assert self.queue.flush() == 4
+        assert self.flushed[0] == [1, 11]
+        # 11 was already updated from the high lane
+        assert sorted(sum(self.flushed[1:], [])) == [10, 12]
+        assert self.queue.depth() == {"high": 0, "low": 0}
+
+    def test_flush_reschedules_after_drain(self):
+        self.queue.enqueue([1])
+        self.queue.flush()
+        self.queue.enqueue([2])
+        assert self.rq_queue.enqueue_in.call_count == 2
+
+    def test_failed_batch_is_requeued(self):
+        def fail(ids):
+            raise ValueError("index down")
+
+        self.queue.handler = fail
+        self.queue.enqueue([1, 2], priority="low")
+        with pytest.raises(ValueError):
+            self.queue.flush()
+        assert self.queue.depth() == {"high": 0, "low": 2}
+        assert self.queue.lag()["low"] >= 0
+
+    def test_failed_flush_is_retried_with_backoff(self):
+        def fail(ids):
+            raise ValueError("index down")
+
+        self.queue.handler = fail
+        self.queue.enqueue([1])
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                self.queue.flush()
+        delays = [
+            c.args[0].total_seconds() for c in self.rq_queue.enqueue_in.call_args_list
+        ]
+        assert delays == [2, 4, 8]
+        # a retry is pending, so enqueueing doesn't schedule another flush
+        self.queue.enqueue([2])
+        assert self.rq_queue.enqueue_in.call_count == 3
+        self.queue.handler = self.flushed.append
+        assert self.queue.flush() == 2
+        assert not get_redis_connection("default").exists(self.queue._failures_key())
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from catalog.search import (
+    CatalogIndex,
+    CatalogQueryParser,
+    CatalogSearchResult,
+    PeopleIndex,
+    PeopleQueryParser,
+    PeopleSearchResult,
+)
+from common.search import Index
+
+
+def _response(ids):
+    return {
+        "hits": [{"document": {"id": str(i)}} for i in ids],
+        "found": len(ids),
+        "page": 1,
+        "request_params": {"per_page": 20},
+    }
+
+
+class TestMultiSearch:
+    @pytest.fixture(autouse=True)
+    def setup_indexes(self):
+        self.catalog = CatalogIndex()
+        self.people = PeopleIndex()
+        self.client = MagicMock()
+        for index in [self.catalog, self.people]:
+            index._read_client = self.client
+            index.__dict__["read_collection"] = SimpleNamespace(name=index.name)
+        self.searches = [
+            (self.catalog, CatalogQueryParser("tolkien")),
+            (self.people, PeopleQueryParser("tolkien", page_size=3)),
+        ]
+
+    def test_one_request_typed_results(self):
+        self.client.multi_search.perform.return_value = {
+            "results": [_response([1, 2]), _response([3])]
+        }
+        catalog, people = Index.multi_search(self.searches)
+        assert self.client.multi_search.perform.call_count == 1
+        sent = self.client.multi_search.perform.call_args.args[0]["searches"]
+        assert [s["collection"] for s in sent] == ["catalog", "people"]
+        assert sent[1]["per_page"] == 3
+        assert isinstance(catalog, CatalogSearchResult)
+        assert isinstance(people, PeopleSearchResult)
+        assert catalog.total == 2 and people.total == 1
+
+    def test_fallback_to_sequential(self):
+        self.client.multi_search.perform.side_effect = httpx.ConnectError("down")
+        with (
+            patch.object(CatalogIndex, "search") as catalog_search,
+            patch.object(PeopleIndex, "search") as people_search,
+        ):
+            results = Index.multi_search(self.searches)
+        catalog_search.assert_called_once_with(self.searches[0][1])
+        people_search.assert_called_once_with(self.searches[1][1])
+        assert results == [catalog_search.return_value, people_search.return_value]
+
+    def test_partial_error_is_not_retried(self):
+        self.client.multi_search.perform.return_value = {
+            "results": [_response([1]), {"error": "bad filter", "code": 400}]
+        }
+        with patch.object(PeopleIndex, "search") as people_search:
+            catalog, people = Index.multi_search(self.searches)
+        people_search.assert_not_called()
+        assert not catalog.error
+        assert people.error == "bad filter"
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.models import Edition, Movie, TVEpisode, TVSeason, TVShow
+from journal.models import (
+    Comment,
+    JournalDailyActivity,
+    Mark,
+    ShelfType,
+    deferred_daily_activity,
+)
+from users.models import User
+
+
+@pytest.mark.django_db(databases="__all__")
+class TestJournalDailyActivity:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.user = User.register(email="activity@example.com", username="activity")
+        self.owner = self.user.identity
+        self.book = Edition.objects.create(title="Hyperion")
+        self.movie = Movie.objects.create(title="Inception")
+        season = TVSeason.objects.create(
+            localized_title=[{"lang": "en", "text": "Season 1"}],
+            show=TVShow.objects.create(
+                localized_title=[{"lang": "en", "text": "Show"}]
+            ),
+            season_number=1,
+        )
+        self.episode = TVEpisode.objects.create(
+            localized_title=[{"lang": "en", "text": "Episode 1"}],
+            season=season,
+            episode_number=1,
+        )
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+
+    def rows(self):
+        return sorted(
+            JournalDailyActivity.objects.filter(owner=self.owner).values_list(
+                "date", "category", "visibility", "completed", "commented"
+            )
+        )
+
+    def test_updated_on_write(self):
+        earlier = self.now - timedelta(days=3)
+        Mark(self.owner, self.book).update(ShelfType.COMPLETE, created_time=earlier)
+        Mark(self.owner, self.movie).update(ShelfType.WISHLIST)
+        Comment.objects.create(
+            owner=self.owner, item=self.episode, text="watched", visibility=1
+        )
+        assert self.rows() == [
+            (timezone.localdate(earlier), "book", 0, 1, 0),
+            (self.today, "tv", 1, 0, 1),
+        ]
+
+        # moved to another day, and to the complete shelf
+        Mark(self.owner, self.book).update(ShelfType.COMPLETE, created_time=self.now)
+        Mark(self.owner, self.movie).update(ShelfType.COMPLETE, created_time=self.now)
+        assert self.rows() == [
+            (self.today, "book", 0, 1, 0),
+            (self.today, "movie", 0, 1, 0),
+            (self.today, "tv", 1, 0, 1),
+        ]
+
+        Mark(self.owner, self.movie).delete()
+        Comment.objects.filter(owner=self.owner).first().delete()
+        assert self.rows() == [(self.today, "book", 0, 1, 0)]
+
+    def test_days_in_site_timezone(self):
+        # a time on different dates in Los Angeles and Tokyo
+        t = (self.now - timedelta(days=1)).replace(
+            hour=20, minute=0, second=0, microsecond=0
+        )
+        with timezone.override("America/Los_Angeles"):
+            Mark(self.owner, self.book).update(ShelfType.COMPLETE, created_time=t)
+        with timezone.override("Asia/Tokyo"):
+            Mark(self.owner, self.movie).update(ShelfType.COMPLETE, created_time=t)
+        day = timezone.localdate(t, timezone.get_default_timezone())
+        rows = [(day, "book", 0, 1, 0), (day, "movie", 0, 1, 0)]
+        assert self.rows() == rows
+        with timezone.override("America/Los_Angeles"):
+            Mark(self.owner, self.movie).delete()
+            assert self.rows() == rows[:1]
+            JournalDailyActivity.rebuild([self.owner.pk])
+        assert self.rows() == rows[:1]
+
+    def test_rebuild_matches_incremental(self):
+        Mark(self.owner, self.book).update(ShelfType.COMPLETE)
+        Mark(self.owner, self.movie).update(ShelfType.COMPLETE, visibility=2)
+        Comment.objects.create(
+            owner=self.owner, item=self.episode, text="watched", visibility=0
+        )
+        rows = self.rows()
+        JournalDailyActivity.objects.filter(owner=self.owner).delete()
+        assert JournalDailyActivity.rebuild([self.owner.pk]) == len(rows)
+        assert self.rows() == rows
+
+    def test_deferred(self):
+        with deferred_daily_activity():
+            for days in range(3):
+                Mark(self.owner, self.book).update(
+                    ShelfType.COMPLETE, created_time=self.now - timedelta(days=days)
+                )
+            assert not self.rows()
+        assert self.rows() == [
+            (timezone.localdate(self.now - timedelta(days=2)), "book", 0, 1, 0)
+        ]
+
+    def test_calendar_read_is_constant(self):
+        Mark(self.owner, self.book).update(ShelfType.COMPLETE, visibility=0)
+        Mark(self.owner, self.movie).update(ShelfType.COMPLETE, visibility=1)
+        with CaptureQueriesContext(connection) as ctx:
+            data = JournalDailyActivity.get_calendar_data(self.owner.pk, 0)
+        assert len(ctx.captured_queries) == 1
+        assert data == {self.today.isoformat(): {"items": ["book"]}}
+        by_month = JournalDailyActivity.get_completed_by_month(
+            self.owner.pk, self.today.year
+        )
+        assert sorted(by_month) == [
+            (self.today.month, "book", 1),
+            (self.today.month, "movie", 1),
+        ]
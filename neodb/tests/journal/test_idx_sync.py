@@ -1,3 +1,4 @@
+from datetime import timedelta
 from io import StringIO
 
 import pytest
@@ -8,13 +9,21 @@ from django.urls import reverse
 from django.utils import timezone
 
 from catalog.models import Edition
-from journal.models import Collection, Comment, Mark, Review, ShelfType
+from journal.jobs.index_sync import ACTIVE_IDENTITY_Q, JournalIndexSync
+from journal.models import (
+    Collection,
+    Comment,
+    JournalIndexState,
+    Mark,
+    Review,
+    ShelfType,
+)
 from journal.search import JournalIndex, JournalQueryParser
 from takahe.ap_handlers import post_deleted
 from takahe.models import Domain, Post
 from takahe.models import Identity as TakaheIdentity
 from takahe.utils import Takahe
-from users.models import User
+from users.models import APIdentity, User
 
 
 @pytest.mark.django_db(databases="__all__")
@@ -100,9 +109,9 @@ class TestIdxSync:
     def test_local_pruned_post_doc_left_alone(self):
         # the mark post dies without the post_deleted callback; the doc
         # keeps claiming the dead post_id (accepted drift, see
-        # sync_identity_index docstring). Soft-delete here so the
-        # _DELETED_POST_STATES branch is covered; the remote twin covers
-        # the row-gone branch
+        # JournalIndexReconciler.sync_identity docstring). Soft-delete here
+        # so the _DELETED_POST_STATES branch is covered; the remote twin
+        # covers the row-gone branch
         mark = Mark(self.identity1, self.book1)
         assert mark.shelfmember is not None
         post_id = mark.shelfmember.latest_post_id
@@ -142,6 +151,67 @@ class TestIdxSync:
         assert self.doc_ids(self.identity1.pk)
         assert self.doc_ids(self.identity2.pk) == set()
 
+    def test_skip_unchanged(self):
+        active = APIdentity.objects.filter(ACTIVE_IDENTITY_Q, local=True).count()
+        self.run_sync()
+        state = JournalIndexState.objects.get(owner=self.identity1)
+        assert state.doc_count == len(self.doc_ids(self.identity1.pk))
+        output = self.run_sync()
+        assert f"{active} active identities ({active} unchanged)" in output
+        output = self.run_sync("--full")
+        assert "(0 unchanged)" in output
+
+    def test_diff_changed(self):
+        self.run_sync()
+        before = self.doc_ids(self.identity1.pk)
+        # docs lost from index change the doc count
+        self.index.delete_by_owner([self.identity1.pk])
+        self.run_sync()
+        assert self.doc_ids(self.identity1.pk) == before
+        # a stale doc in place of a live one keeps the count, which goes
+        # unnoticed until the journal of the owner changes
+        removed = sorted(before)[0]
+        self.index.delete_docs("id", [removed])
+        assert self.index.insert_docs(self.stale_docs(self.identity1.pk)[:1]) == 1
+        self.run_sync()
+        ids = self.doc_ids(self.identity1.pk)
+        assert "99999999" in ids and removed not in ids
+        Mark(self.identity1, self.book2).update(ShelfType.WISHLIST)
+        self.run_sync()
+        ids = self.doc_ids(self.identity1.pk)
+        assert "99999999" not in ids and removed in ids
+
+    def test_job(self, settings):
+        settings.SEARCH_BACKEND = "TYPESENSE"
+        assert self.index.insert_docs(self.stale_docs(self.identity1.pk)) == 2
+        JournalIndexSync().run()
+        assert "99999999" not in self.doc_ids(self.identity1.pk)
+        assert JournalIndexState.objects.filter(owner=self.identity2).exists()
+        self.user2.is_active = False
+        self.user2.save()
+        JournalIndexSync().run()
+        assert self.doc_ids(self.identity2.pk) == set()
+        assert not JournalIndexState.objects.filter(owner=self.identity2).exists()
+
+    def test_job_diffs_oldest(self, settings):
+        settings.SEARCH_BACKEND = "TYPESENSE"
+        JournalIndexSync().run()
+        before = self.doc_ids(self.identity1.pk)
+        removed = sorted(before)[0]
+        self.index.delete_docs("id", [removed])
+        assert self.index.insert_docs(self.stale_docs(self.identity1.pk)[:1]) == 1
+        # the swap goes unnoticed until identity1 is the one synced longest ago
+        JournalIndexState.objects.exclude(owner=self.identity1).update(
+            synced_time=timezone.now() - timedelta(days=2)
+        )
+        JournalIndexSync().run()
+        assert "99999999" in self.doc_ids(self.identity1.pk)
+        JournalIndexState.objects.filter(owner=self.identity1).update(
+            synced_time=timezone.now() - timedelta(days=3)
+        )
+        JournalIndexSync().run()
+        assert self.doc_ids(self.identity1.pk) == before
+
 
 @pytest.mark.django_db(databases="__all__")
 class TestShelfChangeOrphanedPost:
@@ -420,9 +490,9 @@ class TestIdxSyncRemote:
         post_pk = self.post.pk
         assert self.doc_ids(self.owner.pk) == {str(post_pk)}
         # takahe pruned the post; the doc keeps claiming its post_id
-        # (accepted drift, see sync_identity_index docstring; the count
-        # probe below filters on post_id, which no item query does in
-        # production). A refetch or idx-rebuild heals the doc; sync must
+        # (accepted drift, see JournalIndexReconciler.sync_identity
+        # docstring; the count probe below filters on post_id, which no
+        # item query does in production). A refetch or idx-rebuild heals the doc; sync must
         # not rewrite it, as that can never converge
         self.post.delete()
         assert self._item_review_posts_count() == (1, 0)
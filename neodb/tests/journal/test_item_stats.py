@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Edition, TVEpisode, TVSeason, TVShow
+from journal.jobs.migrations import backfill_item_stats_20261018
+from journal.models import (
+    ItemStats,
+    Mark,
+    Rating,
+    ShelfType,
+    deferred_item_stats,
+    update_journal_for_merged_item,
+)
+from users.models import User
+
+
+@pytest.mark.django_db(databases="__all__")
+class TestItemStats:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.users = [
+            User.register(email=f"stats{i}@example.com", username=f"stats{i}")
+            for i in range(6)
+        ]
+        self.book = Edition.objects.create(title="Hyperion")
+        self.tvshow = TVShow.objects.create(
+            localized_title=[{"lang": "en", "text": "Show"}]
+        )
+        self.tvseason = TVSeason.objects.create(
+            localized_title=[{"lang": "en", "text": "Season 1"}],
+            show=self.tvshow,
+            season_number=1,
+        )
+        self.tvepisode = TVEpisode.objects.create(
+            localized_title=[{"lang": "en", "text": "Episode 1"}],
+            season=self.tvseason,
+            episode_number=1,
+        )
+
+    def test_updated_on_write(self):
+        for i, user in enumerate(self.users[:5]):
+            Mark(user.identity, self.book).update(ShelfType.COMPLETE, None, 6 + i)
+        stats = ItemStats.objects.get(item=self.book)
+        assert stats.mark_count == 5
+        assert stats.rating_count == 5
+        assert stats.rating_info["average"] == 8.0
+        Mark(self.users[0].identity, self.book).delete()
+        stats.refresh_from_db()
+        assert stats.mark_count == 4
+        assert stats.rating_count == 4
+        assert stats.rating_info["average"] is None
+
+    def test_counters_adjusted(self):
+        for user in self.users[:5]:
+            Mark(user.identity, self.book).update(ShelfType.COMPLETE, None, 6)
+        Mark(self.users[0].identity, self.book).update(ShelfType.COMPLETE, None, 10)
+        stats = ItemStats.objects.get(item=self.book)
+        assert stats.grades[6] == 4
+        assert stats.grades[10] == 1
+        assert stats.rating_total == 34
+        Rating.update_item_rating(self.book, self.users[1].identity, None)
+        Mark(self.users[2].identity, self.book).update(ShelfType.WISHLIST)
+        stats.refresh_from_db()
+        assert stats.grades[6] == 2
+        assert stats.rating_count == 3
+        assert stats.mark_count == 5
+        Mark(self.users[0].identity, self.tvepisode).update(ShelfType.COMPLETE)
+        Mark(self.users[0].identity, self.tvseason).update(ShelfType.COMPLETE)
+        assert ItemStats.objects.get(item=self.tvseason).mark_count == 1
+        Mark(self.users[0].identity, self.tvepisode).delete()
+        assert ItemStats.objects.get(item=self.tvseason).mark_count == 1
+        Mark(self.users[0].identity, self.tvseason).delete()
+        assert ItemStats.objects.get(item=self.tvseason).mark_count == 0
+
+    def test_read_does_not_write(self):
+        Mark(self.users[0].identity, self.book).update(ShelfType.COMPLETE, None, 8)
+        ItemStats.objects.all().delete()
+        assert Mark.get_mark_count_for_item(self.book) == 0
+        assert not ItemStats.objects.exists()
+        assert backfill_item_stats_20261018() == 1
+        assert Mark.get_mark_count_for_item(self.book) == 1
+        assert Rating.get_rating_count_for_item(self.book) == 1
+
+    def test_read_is_constant(self):
+        for user in self.users:
+            Rating.update_item_rating(self.book, user.identity, 8)
+        with CaptureQueriesContext(connection) as ctx:
+            info = Rating.get_info_for_item(self.book)
+        assert len(ctx.captured_queries) == 1
+        assert info["count"] == 6
+
+    def test_children_aggregated(self):
+        for user in self.users[:5]:
+            Rating.update_item_rating(self.tvseason, user.identity, 10)
+        Mark(self.users[0].identity, self.tvseason).update(ShelfType.PROGRESS)
+        Mark(self.users[0].identity, self.tvepisode).update(ShelfType.COMPLETE)
+        Mark(self.users[1].identity, self.tvepisode).update(ShelfType.COMPLETE)
+        assert Rating.get_info_for_item(self.tvshow)["average"] == 10.0
+        assert Mark.get_mark_count_for_item(self.tvseason) == 2
+        assert Mark.get_mark_count_for_item(self.tvepisode) == 2
+
+    def test_deferred_and_merged(self):
+        book2 = Edition.objects.create(title="Hyperion (reprint)")
+        with deferred_item_stats():
+            for user in self.users[:3]:
+                Mark(user.identity, book2).update(ShelfType.WISHLIST)
+            assert not ItemStats.objects.filter(item=book2).exists()
+        assert ItemStats.objects.get(item=book2).mark_count == 3
+        Mark(self.users[0].identity, self.book).update(ShelfType.COMPLETE)
+        book2.merge_to(self.book)
+        update_journal_for_merged_item(book2.url, delete_duplicated=True)
+        assert ItemStats.objects.get(item=self.book).mark_count == 3
+        assert ItemStats.objects.get(item=book2).mark_count == 0
@@ -3,6 +3,7 @@ import os
 import zipfile
 from io import BytesIO
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 import pytest
 from django.conf import settings
@@ -10,6 +11,7 @@ from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from loguru import logger
 from PIL import Image
@@ -1247,3 +1249,237 @@ class TestNdjsonExportImport:
             == "imported"
         )
         assert Collection.objects.get(owner=owner, title="No Timestamp").created_time
+
+    def test_ndjson_export_in_chunks(self):
+        """Keyset chunks export every row once, whatever the chunk size."""
+        items = [self.book1, self.book2, self.movie1, self.movie2, self.tvshow]
+        for n, item in enumerate(items):
+            Mark(self.user1.identity, item).update(
+                ShelfType.COMPLETE, f"comment {n}", n + 1, visibility=0
+            )
+
+        def export(chunk_size):
+            exporter = NdjsonExporter.create(user=self.user1)
+            exporter.chunk_size = chunk_size
+            exporter.run()
+            with zipfile.ZipFile(exporter.metadata["file"]) as zf:
+                journal = zf.read("journal.ndjson").decode().splitlines()[1:]
+                catalog = zf.read("catalog.ndjson").decode().splitlines()[1:]
+            records = sorted(
+                (r["type"], r.get("content", {}).get("id", ""))
+                for r in map(json.loads, journal)
+            )
+            return exporter.metadata["total"], records, catalog
+
+        total, records, catalog = export(2)
+        assert (total, records, catalog) == export(500)
+        assert len(records) == total
+        assert [r[0] for r in records].count("ShelfMember") == len(items)
+        assert len(catalog) == len(items)
+
+    def test_ndjson_fetches_remote_images_once(self):
+        """Remote review images are downloaded once each and bundled."""
+        Review.update_item_review(
+            self.book1,
+            self.user1.identity,
+            "Pictures",
+            "![a](https://img.example.org/1.png) ![b](https://img.example.net/2.png)",
+            visibility=0,
+        )
+        Review.update_item_review(
+            self.book2,
+            self.user1.identity,
+            "Same picture",
+            "![again](https://img.example.org/1.png) ![gone](https://img.example.org/404.png)",
+            visibility=0,
+        )
+
+        def download(url, page_url, headers=None):
+            return (None, None) if "404" in url else (b"\x89PNG", "png")
+
+        with patch(
+            "journal.exporters.ndjson.ProxiedImageDownloader.download_image",
+            side_effect=download,
+        ) as mocked:
+            exporter = NdjsonExporter.create(user=self.user1)
+            exporter.run()
+        assert mocked.call_count == 3
+        with zipfile.ZipFile(exporter.metadata["file"]) as zf:
+            names = zf.namelist()
+            journal = zf.read("journal.ndjson").decode()
+        reviews = [
+            r
+            for r in (json.loads(line) for line in journal.splitlines()[1:])
+            if r["type"] == "Review"
+        ]
+        files = {i["src"]: i["file"] for r in reviews for i in r.get("images", [])}
+        assert set(files) == {
+            "https://img.example.org/1.png",
+            "https://img.example.net/2.png",
+        }
+        assert all(f in names for f in files.values())
+
+    def test_ndjson_shelf_logs_bulk_upsert(self):
+        """The chunked upsert of shelf logs matches import_shelf_log."""
+        importer = NdjsonImporter.create(user=self.user2, file="x.zip", visibility=0)
+        importer.items = {
+            self.book1.absolute_url: self.book1,
+            self.book2.absolute_url: self.book2,
+        }
+        owner = self.user2.identity
+        kept = ShelfLogEntry.objects.create(
+            owner=owner,
+            item=self.book1,
+            shelf_type=ShelfType.COMPLETE,
+            timestamp=self.dt,
+            metadata={"comment_text": "kept"},
+        )
+        overwritten = ShelfLogEntry.objects.create(
+            owner=owner,
+            item=self.book1,
+            shelf_type=ShelfType.COMPLETE,
+            timestamp=self.dt2,
+            metadata={"comment_text": "stale"},
+        )
+        records = [
+            {
+                "item": self.book1.absolute_url,
+                "status": ShelfType.COMPLETE,
+                "timestamp": "2021-01-01T00:00:00Z",
+            },
+            {
+                "item": self.book1.absolute_url,
+                "status": ShelfType.COMPLETE,
+                "timestamp": "2021-02-01T00:00:00Z",
+                "metadata": {"comment_text": "fresh"},
+            },
+            {
+                "item": self.book2.absolute_url,
+                "status": ShelfType.PROGRESS,
+                "timestamp": "2021-03-01T00:00:00Z",
+                "metadata": {"rating_grade": 8},
+            },
+            # a duplicate without metadata doesn't undo the one before
+            {
+                "item": self.book2.absolute_url,
+                "status": ShelfType.PROGRESS,
+                "timestamp": "2021-03-01T00:00:00Z",
+            },
+            # removals can't be upserted and go one by one
+            {
+                "item": self.book2.absolute_url,
+                "status": None,
+                "timestamp": "2021-03-02T00:00:00Z",
+            },
+            {"item": "https://example.org/unknown", "status": "wishlist"},
+        ]
+        results = importer.import_shelf_logs(records)
+        assert results == ["imported"] * 5 + ["failed"]
+        kept.refresh_from_db()
+        overwritten.refresh_from_db()
+        assert kept.comment_text == "kept"
+        assert overwritten.comment_text == "fresh"
+        logs = ShelfLogEntry.objects.filter(owner=owner, item=self.book2)
+        assert [
+            (log.shelf_type, log.rating_grade) for log in logs.order_by("timestamp")
+        ] == [
+            (ShelfType.PROGRESS, 8),
+            (None, None),
+        ]
+
+    def test_ndjson_journal_in_chunks(self, tmp_path):
+        """Records are imported by type, in dependency order, across chunks."""
+        content = {"published": "2021-01-01T00:00:00Z"}
+        records = [
+            {
+                "type": "ShelfMember",
+                "content": {
+                    **content,
+                    "withRegardTo": item.absolute_url,
+                    "status": ShelfType.COMPLETE,
+                },
+            }
+            for item in (self.book1, self.book2, self.movie1)
+        ] + [
+            {
+                "type": "Rating",
+                "content": {**content, "withRegardTo": item.absolute_url, "value": 7},
+            }
+            for item in (self.book1, self.book2, self.movie1)
+        ]
+        path = tmp_path / "journal.ndjson"
+        path.write_text(
+            "\n".join(json.dumps(r) for r in [{"server": "x"}, *records]) + "\n"
+        )
+        importer = NdjsonImporter.create(user=self.user2, file="x.zip", visibility=0)
+        importer.items = {
+            i.absolute_url: i for i in (self.book1, self.book2, self.movie1)
+        }
+        importer.PRELOAD_CHUNK_SIZE = 2
+        importer.process_journal(str(path))
+        importer.refresh_from_db()
+        assert importer.metadata["total"] == 6
+        assert importer.metadata["processed"] == 6
+        assert importer.metadata["imported"] == 6
+        for item in (self.book1, self.book2, self.movie1):
+            mark = Mark(self.user2.identity, item)
+            assert mark.shelf_type == ShelfType.COMPLETE
+            assert mark.rating_grade == 7
+
+    def test_ndjson_delta_export_applies_on_base(self):
+        """An export since the base one carries only the changes, and
+        deletions as tombstones, which the importer applies on top."""
+        owner = self.user1.identity
+        Mark(owner, self.book1).update(
+            ShelfType.COMPLETE, "good", 8, ["sf"], 0, created_time=self.dt
+        )
+        Mark(owner, self.book2).update(ShelfType.WISHLIST, created_time=self.dt)
+        note = Note.objects.create(
+            item=self.book1, owner=owner, content="first", visibility=0
+        )
+        base = NdjsonExporter.create(user=self.user1)
+        base.run()
+        NdjsonImporter.create(
+            user=self.user2, file=base.metadata["file"], visibility=0
+        ).run()
+        imported_note = Note.objects.get(owner=self.user2.identity, item=self.book1)
+
+        since = timezone.now()
+        Mark(owner, self.book1).update(ShelfType.COMPLETE, "good", 6, ["sf"], 0)
+        Mark(owner, self.book2).delete()
+        Mark(owner, self.movie1).update(ShelfType.PROGRESS, created_time=self.dt2)
+        note.content = "edited"
+        note.save()
+        delta = NdjsonExporter.create(user=self.user1, since=since.isoformat())
+        delta.run()
+        with zipfile.ZipFile(delta.metadata["file"]) as zf:
+            lines = zf.read("journal.ndjson").decode().splitlines()
+        assert json.loads(lines[0])["since"] == since.isoformat()
+        records = [json.loads(line) for line in lines[1:]]
+        assert not [r for r in records if r["type"] in ("Comment", "Tag")]
+        assert [
+            (r["formerType"], r["item"]) for r in records if r["type"] == "Tombstone"
+        ] == [("ShelfMember", self.book2.absolute_url)]
+
+        importer = NdjsonImporter.create(
+            user=self.user2, file=delta.metadata["file"], visibility=0
+        )
+        importer.run()
+        assert importer.metadata["failed"] == 0
+        target = self.user2.identity
+        assert Mark(target, self.book1).rating_grade == 6
+        assert Mark(target, self.book1).comment_text == "good"
+        assert Mark(target, self.book2).shelf_type is None
+        assert Mark(target, self.movie1).shelf_type == ShelfType.PROGRESS
+        notes = Note.objects.filter(owner=target, item=self.book1)
+        assert [n.content for n in notes] == ["edited"]
+        # updated in place, not replaced
+        assert notes[0].uuid == imported_note.uuid
+
+    def test_cleared_rating_leaves_tombstone(self):
+        owner = self.user1.identity
+        Mark(owner, self.book1).update(ShelfType.COMPLETE, "good", 8)
+        Mark(owner, self.book1).update(ShelfType.COMPLETE, "good", 0)
+        assert Mark(owner, self.book1).rating_grade is None
+        tombstones = Tombstone.objects.filter(owner=owner, item=self.book1)
+        assert [t.type for t in tombstones] == ["Rating"]
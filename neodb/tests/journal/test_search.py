@@ -124,7 +124,7 @@ class TestRemotePieceIndex:
     under a new pk, the piece doc must be relinked to it so item post
     search returns the post again. A doc whose post is pruned and never
     refetched keeps claiming the dead post; that drift is accepted (see
-    sync_identity_index docstring)."""
+    JournalIndexReconciler.sync_identity docstring)."""
 
     @pytest.fixture(autouse=True)
     def setup_data(self):
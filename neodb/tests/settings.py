@@ -7,6 +7,9 @@ environ["NEODB_SITE_DOMAIN"] = "example.org"
 environ["SPOTIFY_API_KEY"] = "test"
 environ["STEAM_API_KEY"] = ""
 environ["NEODB_PREFERRED_LANGUAGES"] = "en"
+# search tests mock the index per test, keep the result cache off unless a
+# test enables it
+environ["NEODB_SEARCH_CACHE_TIMEOUT"] = "0"
 
 # When running under pytest-xdist, give each worker its own Typesense
 # collections and Redis database so parallel workers don't clobber each
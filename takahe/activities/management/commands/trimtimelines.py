@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from activities.models import TimelineEvent
+from users.models import Identity
+
+
+class Command(BaseCommand):
+    help = "Trims the home timelines of local identities to their newest events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            "-k",
+            type=int,
+            default=800,
+            help="The number of events to keep on each home timeline",
+        )
+
+    def handle(self, keep: int, *args, **options):
+        total = 0
+        for identity_id in Identity.objects.filter(local=True).values_list(
+            "id", flat=True
+        ):
+            deleted = TimelineEvent.trim_home(identity_id, keep)
+            if deleted:
+                self.stdout.write(f"  {identity_id}: {deleted}")
+                total += deleted
+        self.stdout.write(f"Deleted {total} home timeline events")
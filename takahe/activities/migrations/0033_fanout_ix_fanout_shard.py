@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+import stator.models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("activities", "0032_fanout_subject_document_alter_fanout_type"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="fanout",
+            index=models.Index(
+                models.F("state"),
+                stator.models.StatorShard("id"),
+                models.F("state_next_attempt"),
+                name="ix_fanout_shard",
+            ),
+        ),
+    ]
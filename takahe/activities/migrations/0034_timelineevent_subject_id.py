@@ -0,0 +1,77 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Kept by the database rather than the model, so events NeoDB inserts through
+# its own model get it too. A stored generated column would do the same but
+# adding one rewrites the whole table under an exclusive lock.
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION activities_timelineevent_subject_id() RETURNS trigger AS $$
+BEGIN
+    NEW.subject_id := CASE
+        WHEN NEW.type = 'post' THEN NEW.subject_post_id
+        ELSE NEW.subject_post_interaction_id
+    END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER activities_timelineevent_subject_id
+BEFORE INSERT OR UPDATE ON activities_timelineevent
+FOR EACH ROW EXECUTE FUNCTION activities_timelineevent_subject_id();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS activities_timelineevent_subject_id ON activities_timelineevent;
+DROP FUNCTION IF EXISTS activities_timelineevent_subject_id();
+"""
+
+BACKFILL_BATCH = 10000
+
+
+def backfill_subject_id(apps, schema_editor):
+    """
+    Sets subject_id on existing events, a range of ids per statement so that
+    no statement locks many rows for long.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(id), MAX(id) FROM activities_timelineevent")
+        first, last = cursor.fetchone()
+        if first is None:
+            return
+        for start in range(first, last + 1, BACKFILL_BATCH):
+            cursor.execute(
+                """
+                UPDATE activities_timelineevent
+                SET subject_id = CASE
+                    WHEN type = 'post' THEN subject_post_id
+                    ELSE subject_post_interaction_id
+                END
+                WHERE id >= %s AND id < %s AND subject_id IS NULL
+                """,
+                [start, start + BACKFILL_BATCH],
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("activities", "0033_fanout_ix_fanout_shard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timelineevent",
+            name="subject_id",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunPython(backfill_subject_id, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="timelineevent",
+            index=models.Index(
+                fields=["identity", "-subject_id"],
+                condition=models.Q(type__in=["post", "boost"]),
+                name="te_identity_home",
+            ),
+        ),
+    ]
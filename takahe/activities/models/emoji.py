@@ -260,6 +260,51 @@ class Emoji(StatorModel):
             .filter(shortcode__in=emojis)
         )
 
+    @classmethod
+    def emojis_from_contents(
+        cls, contents: list[tuple[str, Domain | None]]
+    ) -> list[list["Emoji"]]:
+        """
+        Like emojis_from_content() for many (content, domain) pairs at once,
+        with a single query.
+        """
+        shortcodes = [
+            set(
+                FediverseHtmlParser(
+                    content, find_emojis=True, emoji_domain=domain
+                ).emojis
+            )
+            for content, domain in contents
+        ]
+        all_shortcodes = set().union(*shortcodes)
+        if not all_shortcodes:
+            return [[] for _ in contents]
+        remote_domains = {
+            domain.pk for _, domain in contents if domain and not domain.local
+        }
+        found = list(
+            cls.objects.usable()
+            .filter(shortcode__in=all_shortcodes)
+            .filter(
+                models.Q(local=True)
+                | models.Q(local=False, domain_id__in=remote_domains)
+            )
+            .order_by("shortcode", "pk")
+        )
+        results = []
+        for (_, domain), wanted in zip(contents, shortcodes):
+            local = domain is None or domain.local
+            results.append(
+                [
+                    emoji
+                    for emoji in found
+                    if emoji.shortcode in wanted
+                    and emoji.local == local
+                    and (local or emoji.domain_id == domain.pk)
+                ]
+            )
+        return results
+
     def to_ap_tag(self):
         """
         Return this Emoji as an ActivityPub Tag
@@ -1,8 +1,13 @@
+from dataclasses import dataclass
+
 import httpx
-from django.db import models
+from django.db import connections, models, router
 
 from activities.models.timeline_event import TimelineEvent
+from core.exceptions import ActivityPubDeliveryError
 from core.ld import canonicalise
+from core.signatures import PreparedBody
+from stator.exceptions import TryAgainLater
 from stator.models import State, StateField, StateGraph, StatorModel
 from users.models import Block, FollowStates, Identity
 from users.models.system_actor import SystemActor
@@ -77,6 +82,9 @@ class FanOutStates(StateGraph):
         if not (instance.identity.local or instance.identity.inbox_uri):
             return
 
+        if not instance.identity.local:
+            return cls.handle_remote(instance)
+
         match (instance.type, instance.identity.local):
             # Handle creating/updating local posts
             case ((FanOut.Types.post | FanOut.Types.post_edited), True):
@@ -141,38 +149,6 @@ class FanOutStates(StateGraph):
                 if instance.identity.is_group:
                     cls._handle_group_actor_auto_boost(instance.identity, post)
 
-            # Handle sending remote posts create
-            case (FanOut.Types.post, False):
-                post = instance.subject_post
-                # Sign it (HTTP and, for public posts, LD) and send it
-                try:
-                    post.author.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=post.to_fan_out_ap(instance.type),
-                    )
-                except httpx.RequestError:
-                    return
-
-            # Handle sending remote posts update
-            case (FanOut.Types.post_edited, False):
-                post = instance.subject_post
-                # Sign it (HTTP and, for public posts, LD) and send it
-                try:
-                    post.author.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=post.to_fan_out_ap(instance.type),
-                    )
-                except httpx.RequestError:
-                    return
-
             # Handle deleting local posts
             case (FanOut.Types.post_deleted, True):
                 if instance.identity.is_group:
@@ -180,24 +156,6 @@ class FanOutStates(StateGraph):
                         instance.identity, instance.subject_post
                     )
 
-            # Handle sending remote post deletes
-            case (FanOut.Types.post_deleted, False):
-                post = instance.subject_post
-                # Send it to the remote inbox
-                try:
-                    post.author.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=post.to_fan_out_ap(instance.type),
-                    )
-                except ValueError:
-                    pass  # ignore 401 when identity deletion is processed by remote earlier
-                except httpx.RequestError:
-                    return
-
             # Handle local boosts/likes
             case (FanOut.Types.interaction, True):
                 interaction = instance.subject_post_interaction
@@ -238,28 +196,6 @@ class FanOutStates(StateGraph):
                         instance.identity, interaction.post
                     )
 
-            # Handle sending remote boosts/likes/votes/pins
-            case (FanOut.Types.interaction, False):
-                interaction = instance.subject_post_interaction
-                # Send it to the remote inbox
-                try:
-                    if interaction.type == interaction.Types.vote:
-                        body = interaction.to_create_ap()
-                    elif interaction.type == interaction.Types.pin:
-                        body = interaction.to_add_ap()
-                    else:
-                        body = interaction.to_ap()
-                    interaction.identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(body),
-                    )
-                except httpx.RequestError:
-                    return
-
             # Handle undoing local boosts/likes
             case (FanOut.Types.undo_interaction, True):  # noqa:F841
                 interaction = instance.subject_post_interaction
@@ -288,58 +224,6 @@ class FanOutStates(StateGraph):
                         instance.identity, interaction.post
                     )
 
-            # Handle sending remote undoing boosts/likes/pins
-            case (FanOut.Types.undo_interaction, False):  # noqa:F841
-                interaction = instance.subject_post_interaction
-                # Send an undo to the remote inbox
-                try:
-                    if interaction.type == interaction.Types.pin:
-                        body = interaction.to_remove_ap()
-                    else:
-                        body = interaction.to_undo_ap()
-                    interaction.identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(body),
-                    )
-                except httpx.RequestError:
-                    return
-
-            # Handle sending identity edited to remote
-            case (FanOut.Types.identity_edited, False):
-                identity = instance.subject_identity
-                try:
-                    identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(instance.subject_identity.to_update_ap()),
-                    )
-                except httpx.RequestError:
-                    return
-
-            # Handle sending identity deleted to remote
-            case (FanOut.Types.identity_deleted, False):
-                identity = instance.subject_identity
-                try:
-                    identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(instance.subject_identity.to_delete_ap()),
-                    )
-                except httpx.RequestError:
-                    return
-                except ValueError:
-                    pass  # do not retry if 4xx
-
             # Handle move for local follower
             case (FanOut.Types.identity_moved, True):
                 from users.services import IdentityService
@@ -351,22 +235,6 @@ class FanOutStates(StateGraph):
                     follower.unfollow(identity)
                     follower.follow(new_identity)
 
-            # Handle sending identity moved to remote
-            case (FanOut.Types.identity_moved, False):
-                identity = instance.subject_identity
-                if identity.has_moved() and identity.aliases:
-                    try:
-                        identity.signed_request(
-                            method="post",
-                            uri=(
-                                instance.identity.shared_inbox_uri
-                                or instance.identity.inbox_uri
-                            ),
-                            body=canonicalise(identity.to_move_ap()),
-                        )
-                    except httpx.RequestError:
-                        return
-
             # Sending identity edited/deleted to local is a no-op
             case (FanOut.Types.identity_edited, True):
                 pass
@@ -383,72 +251,161 @@ class FanOutStates(StateGraph):
             case (FanOut.Types.tag_featured, True):
                 pass
 
-            case (FanOut.Types.tag_featured, False):
-                identity = instance.subject_identity
-                try:
-                    identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(instance.subject_hashtag.to_add_ap(identity)),
-                    )
-                except httpx.RequestError:
-                    return
-
             case (FanOut.Types.tag_unfeatured, True):
                 pass
 
-            case (FanOut.Types.tag_unfeatured, False):
+            # Forwards are only ever created for remote followers
+            case (FanOut.Types.forward, True):
+                return cls.skipped
+
+            case _:
+                raise ValueError(
+                    f"Cannot fan out with type {instance.type} local={instance.identity.local}"
+                )
+
+        return cls.sent
+
+    @classmethod
+    def remote_delivery(cls, instance: "FanOut") -> "Delivery | State | None":
+        """
+        Works out what a fan-out to a remote identity sends to its inbox, or
+        the state to move to when there is nothing to send.
+        """
+        inbox = instance.identity.shared_inbox_uri or instance.identity.inbox_uri
+        match instance.type:
+            # Sign posts (HTTP and, for public posts, LD) and send them
+            case FanOut.Types.post | FanOut.Types.post_edited:
+                post = instance.subject_post
+                return Delivery(post.author, inbox, post.fan_out_body(instance.type))
+
+            case FanOut.Types.post_deleted:
+                post = instance.subject_post
+                # ignore 401 when identity deletion is processed by remote earlier
+                return Delivery(
+                    post.author,
+                    inbox,
+                    post.fan_out_body(instance.type),
+                    refusal_ok=True,
+                )
+
+            # Boosts/likes/votes/pins
+            case FanOut.Types.interaction:
+                interaction = instance.subject_post_interaction
+                if interaction.type == interaction.Types.vote:
+                    body = interaction.to_create_ap()
+                elif interaction.type == interaction.Types.pin:
+                    body = interaction.to_add_ap()
+                else:
+                    body = interaction.to_ap()
+                return Delivery(interaction.identity, inbox, canonicalise(body))
+
+            # Undoing boosts/likes/pins
+            case FanOut.Types.undo_interaction:
+                interaction = instance.subject_post_interaction
+                if interaction.type == interaction.Types.pin:
+                    body = interaction.to_remove_ap()
+                else:
+                    body = interaction.to_undo_ap()
+                return Delivery(interaction.identity, inbox, canonicalise(body))
+
+            case FanOut.Types.identity_edited:
                 identity = instance.subject_identity
-                try:
-                    identity.signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=canonicalise(
-                            instance.subject_hashtag.to_remove_ap(identity)
-                        ),
-                    )
-                except httpx.RequestError:
-                    return
+                return Delivery(identity, inbox, canonicalise(identity.to_update_ap()))
+
+            case FanOut.Types.identity_deleted:
+                identity = instance.subject_identity
+                # do not retry if 4xx
+                return Delivery(
+                    identity,
+                    inbox,
+                    canonicalise(identity.to_delete_ap()),
+                    refusal_ok=True,
+                )
+
+            case FanOut.Types.identity_moved:
+                identity = instance.subject_identity
+                if not (identity.has_moved() and identity.aliases):
+                    return cls.sent
+                return Delivery(identity, inbox, canonicalise(identity.to_move_ap()))
+
+            case FanOut.Types.tag_featured:
+                identity = instance.subject_identity
+                return Delivery(
+                    identity,
+                    inbox,
+                    canonicalise(instance.subject_hashtag.to_add_ap(identity)),
+                )
+
+            case FanOut.Types.tag_unfeatured:
+                identity = instance.subject_identity
+                return Delivery(
+                    identity,
+                    inbox,
+                    canonicalise(instance.subject_hashtag.to_remove_ap(identity)),
+                )
 
             # Forward a third-party LD-signed activity concerning a local
             # thread (AP 7.1.2). The document is re-sent exactly as
             # received - its LD signature authenticates the true author -
             # while the system actor provides the delivery HTTP signature.
-            case (FanOut.Types.forward, False):
+            case FanOut.Types.forward:
                 if not instance.subject_document:
                     return cls.skipped
-                try:
-                    SystemActor().signed_request(
-                        method="post",
-                        uri=(
-                            instance.identity.shared_inbox_uri
-                            or instance.identity.inbox_uri
-                        ),
-                        body=instance.subject_document,
-                    )
-                except ValueError:
-                    pass  # remote refused the forward; it's best-effort
-                except httpx.RequestError:
-                    return
-
-            # Forwards are only ever created for remote followers
-            case (FanOut.Types.forward, True):
-                return cls.skipped
+                # the remote refusing a forward is fine; it's best-effort
+                return Delivery(
+                    SystemActor(), inbox, instance.subject_document, refusal_ok=True
+                )
 
             case _:
                 raise ValueError(
                     f"Cannot fan out with type {instance.type} local={instance.identity.local}"
                 )
 
+    @classmethod
+    def handle_remote(cls, instance: "FanOut"):
+        """
+        Sends the fan-out to a remote inbox.
+        """
+        # Hold back deliveries to servers that have stopped answering
+        domain = instance.identity.domain
+        if domain and not domain.delivery_allowed():
+            raise TryAgainLater(domain.delivery_paused_until)
+        delivery = cls.remote_delivery(instance)
+        if not isinstance(delivery, Delivery):
+            return delivery
+        try:
+            delivery.signer.signed_request(
+                method="post", uri=delivery.inbox, body=delivery.body
+            )
+        except ValueError as e:
+            # A refusal still means the server is up
+            if domain and isinstance(e, ActivityPubDeliveryError):
+                domain.delivery_succeeded()
+            if not delivery.refusal_ok:
+                raise
+        except httpx.RequestError as e:
+            if domain and isinstance(e, httpx.TransportError):
+                domain.delivery_failed()
+            return
+        else:
+            if domain:
+                domain.delivery_succeeded()
         return cls.sent
 
 
+@dataclass
+class Delivery:
+    """
+    A signed POST of an activity to a remote inbox.
+    """
+
+    signer: "Identity | SystemActor"
+    inbox: str
+    body: dict | PreparedBody | None
+    # Whether a 4xx refusal still counts as delivered
+    refusal_ok: bool = False
+
+
 class FanOut(StatorModel):
     """
     An activity that needs to get to an inbox somewhere.
@@ -470,6 +427,8 @@ class FanOut(StatorModel):
 
     state = StateField(FanOutStates)
 
+    shard_index = True
+
     # The user this event is targeted at
     # We always need this, but if there is a shared inbox URL on the user
     # we'll deliver to that and won't have fanouts for anyone else with the
@@ -520,3 +479,39 @@ class FanOut(StatorModel):
 
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def create_for_identities(cls, identity_ids: tuple[str, tuple], **kwargs) -> int:
+        """
+        Creates a FanOut(identity=..., **kwargs) for each identity id selected
+        by the given SQL and params, in a single INSERT ... SELECT. Fields get
+        the same defaults as with create(). Returns how many were created.
+        """
+        template = cls(**kwargs)
+        connection = connections[router.db_for_write(cls)]
+        columns = [connection.ops.quote_name(cls._meta.get_field("identity").column)]
+        values = ["targets.id"]
+        params: list = []
+        for field in cls._meta.concrete_fields:
+            if field.primary_key or field.name == "identity":
+                continue
+            columns.append(connection.ops.quote_name(field.column))
+            values.append(f"CAST(%s AS {field.cast_db_type(connection)})")
+            params.append(
+                field.get_db_prep_save(field.pre_save(template, add=True), connection)
+            )
+        select_sql, select_params = identity_ids
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(cls._meta.db_table)} "
+                f"({', '.join(columns)}) SELECT {', '.join(values)} "
+                f"FROM ({select_sql}) AS targets(id)",
+                [*params, *select_params],
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def transition_batch(cls, number, lock_expiry, shard=None) -> int:
+        from activities.services.fan_out_delivery import FanOutDeliveryService
+
+        return FanOutDeliveryService().run(number, lock_expiry, shard)
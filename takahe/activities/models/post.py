@@ -5,12 +5,15 @@ import logging
 import mimetypes
 import re
 import ssl
-from collections.abc import Iterable
+import threading
+from functools import cached_property
 from typing import Optional
 from urllib.parse import urlparse
 
 import httpx
 import urlman
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 from core.exceptions import ActivityPubFormatError, ActorMismatchError
 from core.html import ContentRenderer, FediverseHtmlParser
 from core.json import json_from_response
@@ -24,13 +27,15 @@ from core.ld import (
     get_value_or_map,
     parse_ld_date,
 )
-from core.signatures import LDSignature
+from core.signatures import HttpSignature, LDSignature, PreparedBody
 from core.snowflake import Snowflake
 from deepmerge import always_merger
 from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVector
 from django.db import models, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
 from django.db.models.signals import post_delete, post_save
 from django.db.utils import IntegrityError
 from django.template import loader
@@ -41,7 +46,7 @@ from pyld.jsonld import JsonLdError
 from stator.exceptions import TryAgainLater
 from stator.models import State, StateField, StateGraph, StatorModel
 from users.models.block import Block
-from users.models.follow import FollowStates
+from users.models.follow import Follow, FollowStates
 from users.models.hashtags import HashtagFollow
 from users.models.identity import Identity, IdentityStates
 from users.models.inbox_message import InboxMessage
@@ -231,15 +236,9 @@ class PostStates(StateGraph):
 
     @classmethod
     def targets_fan_out(cls, post: "Post", type_: str) -> None:
-        # Fan out to each target in bulk to avoid one INSERT round-trip per
-        # follower (state/created defaults are applied the same as create()).
-        FanOut.objects.bulk_create(
-            (
-                FanOut(identity=follow, type=type_, subject_post=post)
-                for follow in post.get_targets()
-            ),
-            batch_size=500,
-        )
+        # Fan out to every target in one INSERT ... SELECT, so even a huge
+        # audience never has its Identity rows loaded into Python
+        FanOut.create_for_identities(post.targets_sql(), type=type_, subject_post=post)
         cls.fan_out_to_relay(post, type_)
 
     @classmethod
@@ -252,7 +251,7 @@ class PostStates(StateGraph):
         # to_fan_out_ap attaches the LD signature relay recipients need to
         # verify the original author independently of the relay's HTTP
         # signature.
-        obj = post.to_fan_out_ap(type_)
+        obj = post.fan_out_body(type_)
         if not obj:
             return
         for uri in relay_uris:
@@ -1435,86 +1434,111 @@ class Post(StatorModel):
             )
         return document
 
-    def get_targets(self) -> Iterable[Identity]:
+    @cached(
+        cache=TTLCache(maxsize=256, ttl=3600),
+        key=lambda self, type_: hashkey(self.pk, type_, self.updated),
+        lock=threading.Lock(),
+    )
+    def fan_out_body(self, type_: str) -> PreparedBody | None:
         """
-        Returns a list of Identities that need to see posts and their changes
+        Returns to_fan_out_ap() serialized for delivery, rendered and LD-signed
+        once for all the FanOuts of this post and type handled by this
+        process rather than once per inbox.
         """
-        targets = set()
-        for mention in self.mentions.all():
-            targets.add(mention)
+        document = self.to_fan_out_ap(type_)
+        return HttpSignature.prepare_body(document) if document else None
+
+    def target_identities(self) -> models.QuerySet[Identity]:
+        """
+        Returns a queryset of the Identities that need to see posts and their
+        changes, before shared inboxes are collapsed (see targets_sql). It
+        is evaluated as one statement: the ids from each source are combined
+        with UNION ALL into a single subquery, so the planner can use their
+        indexes rather than scanning identities against each of them.
+        """
+        followers = Follow.objects.filter(state__in=FollowStates.group_active())
+        sources: list[models.QuerySet] = [self.mentions.values("pk")]
         if self.visibility in [Post.Visibilities.public, Post.Visibilities.unlisted]:
             # deliver edit to all previously interacted to this post
-            for interaction in self.interactions.all():
-                targets.add(interaction.identity)
+            sources.append(self.interactions.values("identity_id"))
             # deliver to all hashtag followers
             if self.hashtags:
-                for follow in HashtagFollow.objects.by_hashtags(
-                    self.hashtags
-                ).prefetch_related("identity"):
-                    targets.add(follow.identity)
+                sources.append(
+                    HashtagFollow.objects.by_hashtags(self.hashtags).values(
+                        "identity_id"
+                    )
+                )
         # Then, if it's not mentions only, also deliver to followers
         if self.visibility != Post.Visibilities.mentioned:
-            for follower in (
-                self.author.inbound_follows.filter(
-                    state__in=FollowStates.group_active()
-                )
+            sources.append(
+                followers.filter(target_id=self.author_id)
                 .exclude(source__state=IdentityStates.connection_issue)
-                .select_related("source")
-            ):
-                targets.add(follower.source)
-
+                .values("source_id")
+            )
         # If it quotes a post, include the quoted post's author
         if self.quote_url:
-            quoted_post = (
+            sources.append(
                 Post.objects.filter(object_uri=self.quote_url)
-                .select_related("author")
-                .first()
+                .order_by("pk")
+                .values("author_id")[:1]
             )
-            if quoted_post:
-                targets.add(quoted_post.author)
         # If it's a reply, always include the original author if we know them
         reply_post = self.in_reply_to_post()
         if reply_post:
-            targets.add(reply_post.author)
+            sources.append(
+                Identity.objects.filter(pk=reply_post.author_id).values("pk")
+            )
             # And if it's a reply to one of our own, we have to re-fan-out to
             # the original author's followers
             if reply_post.author.local:
-                for follower in reply_post.author.inbound_follows.filter(
-                    state__in=FollowStates.group_active()
-                ).select_related("source"):
-                    targets.add(follower.source)
-        # If this is a remote post or local-only, filter to only include
-        # local identities
-        if not self.local or self.visibility == Post.Visibilities.local_only:
-            targets = {target for target in targets if target.local}
+                sources.append(
+                    followers.filter(target_id=reply_post.author_id).values("source_id")
+                )
         # If it's a local post, include the author
         if self.local:
-            targets.add(self.author)
-        # Fetch the author's full blocks and remove them as targets
-        blocks = (
-            self.author.outbound_blocks.active()
-            .filter(mute=False)
-            .select_related("target")
+            sources.append(Identity.objects.filter(pk=self.author_id).values("pk"))
+        targets = Identity.objects.filter(
+            pk__in=sources[0].union(*sources[1:], all=True)
+        )
+        # If this is a remote post or local-only, filter to only include
+        # local identities (a local author is local anyway)
+        if not self.local or self.visibility == Post.Visibilities.local_only:
+            targets = targets.filter(local=True)
+        # Leave out anyone the author fully blocks
+        return targets.exclude(
+            pk__in=Block.objects.active()
+            .filter(source_id=self.author_id, mute=False)
+            .values("target_id")
+        )
+
+    def targets_sql(self) -> tuple[str, tuple]:
+        """
+        Returns SQL (and its params) selecting the id of each target, keeping
+        only one remote identity per shared inbox as we deliver to the inbox
+        once for all of them.
+        """
+        query = self.target_identities().values(
+            target_id=models.F("pk"),
+            inbox=models.Case(
+                models.When(
+                    models.Q(local=False, shared_inbox_uri__gt=""),
+                    then=models.F("shared_inbox_uri"),
+                ),
+                default=Cast("pk", models.TextField()),
+            ),
+        )
+        sql, params = query.query.sql_with_params()
+        return (
+            f"SELECT DISTINCT ON (targets.inbox) targets.target_id FROM ({sql}) "
+            "AS targets ORDER BY targets.inbox, targets.target_id",
+            params,
         )
-        for block in blocks:
-            try:
-                targets.remove(block.target)
-            except KeyError:
-                pass
-        # Now dedupe the targets based on shared inboxes (we only keep one per
-        # shared inbox)
-        deduped_targets = set()
-        shared_inboxes = set()
-        for target in targets:
-            if target.local or not target.shared_inbox_uri:
-                deduped_targets.add(target)
-            elif target.shared_inbox_uri not in shared_inboxes:
-                shared_inboxes.add(target.shared_inbox_uri)
-                deduped_targets.add(target)
-            else:
-                # Their shared inbox is already being sent to
-                pass
-        return deduped_targets
+
+    def get_targets(self) -> set[Identity]:
+        """
+        Returns a set of Identities that need to see posts and their changes
+        """
+        return set(Identity.objects.filter(pk__in=RawSQL(*self.targets_sql())))
 
     ### ActivityPub (inbound) ###
 
@@ -2467,6 +2491,33 @@ class Post(StatorModel):
 
     ### Mastodon API ###
 
+    @cached_property
+    def reply_parent(self) -> Optional["Post"]:
+        """
+        The post this replies to, with only its PK and author ID loaded, for
+        the API (see PostService.prefetch_for_api)
+        """
+        if not self.in_reply_to:
+            return None
+        return (
+            Post.objects.filter(object_uri=self.in_reply_to)
+            .only("pk", "author_id")
+            .first()
+        )
+
+    @cached_property
+    def quoted_post(self) -> Optional["Post"]:
+        """
+        The post this quotes, if we have it (see PostService.prefetch_for_api)
+        """
+        if not self.quote_url:
+            return None
+        return (
+            Post.objects.filter(object_uri=self.quote_url)
+            .select_related("author")
+            .first()
+        )
+
     def to_mastodon_json(
         self,
         interactions=None,
@@ -2474,15 +2525,8 @@ class Post(StatorModel):
         identity=None,
         include_quoted_status: bool = True,
     ):
-        reply_parent = None
+        reply_parent = self.reply_parent
         domain = identity.domain.uri_domain if identity else settings.MAIN_DOMAIN
-        if self.in_reply_to:
-            # Load the PK and author.id explicitly to prevent a SELECT on the entire author Identity
-            reply_parent = (
-                Post.objects.filter(object_uri=self.in_reply_to)
-                .only("pk", "author_id")
-                .first()
-            )
         visibility_mapping = {
             self.Visibilities.public: "public",
             self.Visibilities.unlisted: "unlisted",
@@ -2552,11 +2596,7 @@ class Post(StatorModel):
             else None,
         }
         if self.quote_url and include_quoted_status:
-            quoted_post = (
-                Post.objects.filter(object_uri=self.quote_url)
-                .select_related("author")
-                .first()
-            )
+            quoted_post = self.quoted_post
             if quoted_post:
                 value["quote"] = {
                     "state": "accepted",
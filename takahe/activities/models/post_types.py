@@ -140,11 +140,14 @@ class QuestionData(BasePostDataType):
             option_map[vote_value(option.name)] = index
 
         if identity:
-            votes = post.interactions.filter(
-                identity=identity,
-                type=PostInteraction.Types.vote,
-            )
-            value["voted"] = post.author == identity or votes.exists()
+            # PostService.prefetch_for_api may have loaded the votes already
+            votes = getattr(post, "viewer_votes", None)
+            if votes is None:
+                votes = post.interactions.filter(
+                    identity=identity,
+                    type=PostInteraction.Types.vote,
+                )
+            value["voted"] = post.author == identity or bool(votes)
             value["own_votes"] = [
                 option_map[vote.value] for vote in votes if vote.value in option_map
             ]
@@ -77,6 +77,15 @@ class TimelineEvent(models.Model):
 
     created = models.DateTimeField(auto_now_add=True)
 
+    # What home timelines are ordered and paginated by, as Mastodon clients
+    # expect: the post's ID for posts, the interaction's for boosts. A
+    # trigger sets it on every write (see migration 0034), so events written
+    # by NeoDB have it too; it is not read back into saved instances.
+    subject_id = models.BigIntegerField(blank=True, null=True, editable=False)
+
+    # The types of events shown on home timelines
+    HOME_TYPES = [Types.post, Types.boost]
+
     class Meta:
         indexes = [
             # This relies on a DB that can use left subsets of indexes
@@ -92,6 +101,12 @@ class TimelineEvent(models.Model):
                 condition=models.Q(dismissed=False),
                 name="te_identity_idneg_undismissed",
             ),
+            # Home timelines, so a page is an index range scan
+            models.Index(
+                fields=["identity", "-subject_id"],
+                condition=models.Q(type__in=["post", "boost"]),
+                name="te_identity_home",
+            ),
         ]
 
     ### Alternate constructors ###
@@ -292,6 +307,23 @@ class TimelineEvent(models.Model):
             subject_identity=source,
         ).delete()
 
+    @classmethod
+    def trim_home(cls, identity_id: int, keep: int) -> int:
+        """
+        Deletes all but the newest `keep` events of an identity's home
+        timeline, returning how many were deleted.
+        """
+        home = cls.objects.filter(identity_id=identity_id, type__in=cls.HOME_TYPES)
+        cutoff = list(
+            home.order_by("-subject_id").values_list("subject_id", flat=True)[
+                keep : keep + 1
+            ]
+        )
+        if not cutoff:
+            return 0
+        deleted, _ = home.filter(subject_id__lte=cutoff[0]).delete()
+        return deleted
+
     ### Background tasks ###
 
     @classmethod
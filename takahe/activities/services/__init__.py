@@ -1,3 +1,4 @@
+from .fan_out_delivery import FanOutDeliveryService  # noqa
 from .post import PostService  # noqa
 from .search import SearchService  # noqa
 from .timeline import TimelineService  # noqa
@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+from django.utils import timezone
+
+from activities.models.fan_out import Delivery, FanOut, FanOutStates
+from core import sentry
+from core.exceptions import ActivityPubDeliveryError
+from core.files import check_url_safety_async
+from core.signatures import HttpSignature
+from users.models import Domain
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutDeliveryService:
+    """
+    Delivers a batch of FanOuts to remote inboxes from one event loop.
+
+    Activities are worked out synchronously (they need the database), then
+    sent together with an ``httpx.AsyncClient``: up to ``concurrency``
+    requests are in flight at once, and no more than ``per_host`` of them to
+    the same host. Deliveries that fail are retried with a backoff that
+    doubles with the age of the FanOut, until it times out as usual.
+    Domains whose delivery circuit breaker is open are skipped, and failures
+    to connect are counted towards opening it (see Domain.delivery_failed).
+    FanOuts to local identities are handled one by one as before.
+
+    A batch has to be done before the rows' lock expires, or another runner
+    would claim and deliver them again: no more are claimed than could be
+    sent in half the lock's time, and requests still going when it is about
+    to expire are cancelled and retried later.
+    """
+
+    # Bounds of the delay before retrying a failed delivery, in seconds
+    min_retry = 60
+    max_retry = 3600
+    # Seconds before the lock expires by which deliveries must be done
+    lock_margin = 30
+
+    def __init__(self, concurrency: int | None = None, per_host: int | None = None):
+        self.concurrency = concurrency or settings.STATOR_DELIVERY_CONCURRENCY
+        self.per_host = per_host or settings.STATOR_DELIVERY_PER_HOST
+
+    def run(
+        self,
+        number: int,
+        lock_expiry: datetime.datetime,
+        shard: tuple[int, int] | None = None,
+    ) -> int:
+        """
+        Claims up to `number` ready FanOuts (from `shard`, if given) and
+        handles them. Returns how many were handled.
+        """
+        lock_time = (lock_expiry - timezone.now()).total_seconds()
+        number = min(number, self.claim_limit(lock_time))
+        locked = FanOut.transition_get_with_lock(number, lock_expiry, shard)
+        if not locked:
+            return 0
+        started = time.monotonic()
+        deadline = started + lock_time - self.lock_margin
+        fan_outs = FanOut.objects.filter(pk__in=[f.pk for f in locked]).select_related(
+            "identity__domain",
+            "subject_post__author",
+            "subject_post_interaction__identity",
+            "subject_identity",
+            "subject_hashtag",
+        )
+        deliveries: list[tuple[FanOut, Delivery]] = []
+        domains: dict[str, Domain] = {}
+        for fan_out in fan_outs:
+            if fan_out.identity.local or not fan_out.identity.inbox_uri:
+                fan_out.transition_attempt()
+                continue
+            domain = fan_out.identity.domain
+            if domain:
+                if domain.pk not in domains:
+                    domains[domain.pk] = domain
+                    allowed = domain.delivery_allowed()
+                else:
+                    domain = domains[domain.pk]
+                    # a half-open domain only gets its one probe
+                    allowed = not domain.delivery_paused_until
+                if not allowed:
+                    self.retry(fan_out, domain.delivery_paused_until)
+                    continue
+            try:
+                delivery = FanOutStates.remote_delivery(fan_out)
+            except Exception as e:
+                logger.exception(e)
+                self.retry(fan_out)
+                continue
+            if isinstance(delivery, Delivery):
+                deliveries.append((fan_out, delivery))
+            else:
+                fan_out.transition_perform(delivery or FanOutStates.sent)
+        if deliveries:
+            errors = asyncio.run(
+                self.deliver(
+                    [d for _, d in deliveries], max(deadline - time.monotonic(), 0)
+                )
+            )
+            sent = []
+            reached: set[str] = set()
+            unreachable: dict[str, int] = defaultdict(int)
+            for (fan_out, delivery), error in zip(deliveries, errors):
+                domain_id = fan_out.identity.domain_id
+                if isinstance(error, httpx.TransportError):
+                    unreachable[domain_id] += 1
+                elif error is None or isinstance(error, ActivityPubDeliveryError):
+                    reached.add(domain_id)
+                if error is None or (
+                    isinstance(error, ValueError) and delivery.refusal_ok
+                ):
+                    sent.append(fan_out.pk)
+                else:
+                    if not isinstance(error, (httpx.RequestError, TimeoutError)):
+                        logger.warning(f"Error delivering {fan_out.pk}: {error}")
+                    self.retry(fan_out)
+            for domain_id in reached:
+                if domain_id in domains:
+                    domains[domain_id].delivery_succeeded()
+            for domain_id, count in unreachable.items():
+                if domain_id in domains and domain_id not in reached:
+                    domains[domain_id].delivery_failed(count)
+            FanOut.transition_perform_queryset(
+                FanOut.objects.filter(pk__in=sent), FanOutStates.sent
+            )
+            sentry.count(
+                "stator.delivery",
+                len(sent),
+                attributes={"result": "sent"},
+            )
+            sentry.count(
+                "stator.delivery",
+                len(deliveries) - len(sent),
+                attributes={"result": "retry"},
+            )
+            logger.info(
+                f"activities.fanout: {len(sent)}/{len(deliveries)} delivered "
+                f"({time.monotonic() - started:.2f}s)"
+            )
+        return len(locked)
+
+    def claim_limit(self, lock_time: float) -> int:
+        """
+        How many FanOuts can be claimed for a lock of `lock_time` seconds:
+        as many as `concurrency` requests timing out one after the other
+        would take half of it to get through.
+        """
+        timeout = settings.SETUP.REMOTE_TIMEOUT
+        if isinstance(timeout, tuple):
+            timeout = sum(timeout)
+        return max(int(self.concurrency * lock_time / 2 / timeout), 1)
+
+    async def deliver(
+        self, deliveries: list[Delivery], time_limit: float | None = None
+    ) -> list[BaseException | None]:
+        """
+        Sends deliveries concurrently, returning the error of each, if any.
+        Those not done within `time_limit` seconds are cancelled, with a
+        TimeoutError as their error.
+        """
+        if not deliveries:
+            return []
+        limit = asyncio.Semaphore(self.concurrency)
+        hosts: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host)
+        )
+        async with httpx.AsyncClient(
+            timeout=settings.SETUP.REMOTE_TIMEOUT,
+            event_hooks={"request": [check_url_safety_async]},
+            limits=httpx.Limits(max_connections=self.concurrency),
+        ) as client:
+
+            async def send(delivery: Delivery) -> None:
+                async with limit, hosts[urlparse(delivery.inbox).netloc]:
+                    await HttpSignature.signed_request_async(
+                        client,
+                        uri=delivery.inbox,
+                        body=delivery.body,
+                        private_key=delivery.signer.private_key,
+                        key_id=delivery.signer.public_key_id,
+                    )
+
+            tasks = [asyncio.create_task(send(d)) for d in deliveries]
+            done, pending = await asyncio.wait(tasks, timeout=time_limit)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(
+                    f"activities.fanout: {len(pending)} deliveries cancelled "
+                    "as their lock is about to expire"
+                )
+                await asyncio.wait(pending)
+        return [task.exception() if task in done else TimeoutError() for task in tasks]
+
+    def retry(self, fan_out: FanOut, at: datetime.datetime | None = None) -> None:
+        """
+        Schedules another attempt at a FanOut, by default with a backoff, or
+        fails it once it timed out.
+        """
+        state = FanOutStates.new
+        if state.timeout_value and fan_out.state_age >= state.timeout_value:
+            fan_out.transition_perform(state.timeout_state)  # type: ignore
+            return
+        if at is None:
+            delay = min(max(fan_out.state_age, self.min_retry), self.max_retry)
+            at = timezone.now() + datetime.timedelta(seconds=delay)
+        FanOut.objects.filter(pk=fan_out.pk).update(
+            state_next_attempt=at,
+            state_locked_until=None,
+        )
@@ -46,7 +46,7 @@ class TimelineService:
             self.event_queryset()
             .filter(
                 identity=self.identity,
-                type__in=[TimelineEvent.Types.post, TimelineEvent.Types.boost],
+                type__in=TimelineEvent.HOME_TYPES,
             )
             .exclude(
                 models.Q(
@@ -4,11 +4,11 @@ from collections.abc import Callable
 from typing import Any, Generic, Protocol, TypeVar
 
 from django.db import models
-from django.db.models.expressions import Case, F, When
 from django.http import HttpRequest
 from hatchway.http import ApiResponse
 
-from activities.models import PostInteraction, TimelineEvent
+from activities.models import PostInteraction
+from activities.services import PostService
 
 T = TypeVar("T")
 
@@ -152,6 +152,7 @@ class PaginationResult(Generic[T]):
         """
         Predefined way of JSON-ifying Post objects
         """
+        PostService.prefetch_for_api(self.results, identity)
         interactions = PostInteraction.get_post_interactions(self.results, identity)
         self.jsonify_results(
             lambda post: post.to_mastodon_json(
@@ -163,6 +164,7 @@ class PaginationResult(Generic[T]):
         """
         Predefined way of JSON-ifying TimelineEvent objects representing statuses
         """
+        PostService.prefetch_for_events(self.results, identity)
         interactions = PostInteraction.get_event_interactions(self.results, identity)
         self.jsonify_results(
             lambda event: event.to_mastodon_status_json(
@@ -223,15 +225,9 @@ class MastodonPaginator:
         id_field = "id"
         reverse = False
         if home:
-            # The home timeline interleaves Post IDs and PostInteraction IDs in an
-            # annotated field called "subject_id".
+            # The home timeline interleaves Post IDs and PostInteraction IDs in
+            # TimelineEvent.subject_id, which is indexed for it.
             id_field = "subject_id"
-            queryset = queryset.annotate(
-                subject_id=Case(
-                    When(type=TimelineEvent.Types.post, then=F("subject_post_id")),
-                    default=F("subject_post_interaction"),
-                )
-            )
 
         # These "does not start with interaction" checks can be removed after a
         # couple months, when clients have flushed them out.
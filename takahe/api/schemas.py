@@ -1,6 +1,7 @@
 from typing import Literal, Optional, Union
 
 from activities import models as activities_models
+from activities.services import PostService
 from core.html import FediverseHtmlParser
 from hatchway import Field, Schema
 from users.services import IdentityService
@@ -239,6 +240,7 @@ class Status(Schema):
         posts: list[activities_models.Post],
         identity: users_models.Identity,
     ) -> list["Status"]:
+        PostService.prefetch_for_api(posts, identity)
         interactions = activities_models.PostInteraction.get_post_interactions(
             posts, identity
         )
@@ -273,6 +275,7 @@ class Status(Schema):
         events: list[activities_models.TimelineEvent],
         identity: users_models.Identity,
     ) -> list["Status"]:
+        PostService.prefetch_for_events(events, identity)
         interactions = activities_models.PostInteraction.get_event_interactions(
             events, identity
         )
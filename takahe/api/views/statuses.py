@@ -325,6 +325,7 @@ def status_context(request, id: str) -> schemas.Context:
     post = post_for_id(request, id)
     service = PostService(post)
     ancestors, descendants = service.context(request.identity)
+    PostService.prefetch_for_api(ancestors + descendants, request.identity)
     interactions = PostInteraction.get_post_interactions(
         ancestors + descendants, request.identity
     )
@@ -570,6 +571,7 @@ def status_quotes(
         since_id=since_id,
         limit=limit,
     )
+    PostService.prefetch_for_api(pager.results, request.identity)
     interactions = PostInteraction.get_post_interactions(
         pager.results, request.identity
     )
@@ -1,3 +1,4 @@
+import asyncio
 import io
 import ipaddress
 import socket
@@ -47,6 +48,14 @@ def check_url_safety(request: httpx.Request) -> None:
             )
 
 
+async def check_url_safety_async(request: httpx.Request) -> None:
+    """
+    check_url_safety() for an ``httpx.AsyncClient``, resolving the host in a
+    thread so the event loop is not blocked.
+    """
+    await asyncio.to_thread(check_url_safety, request)
+
+
 def make_safe_client(**kwargs) -> httpx.Client:
     """
     Return an ``httpx.Client`` with SSRF protection, sensible timeouts, and
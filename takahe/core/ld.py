@@ -1,4 +1,6 @@
 import datetime
+import functools
+import json
 import logging
 import os
 import re
@@ -683,6 +685,239 @@ def builtin_document_loader(url: str, options={}):
             return schemas["unknown"]
 
 
+class CompiledContext:
+    """
+    A JSON-LD context processed once, for compacting documents that already
+    use it without a full expand/compact round-trip.
+
+    Most documents we see are already compact: every key is a term of their
+    own context, with a value of the kind that term compacts to. For those,
+    compact(expand(doc)) only rewrites IRIs (e.g. the public collection to
+    as:Public), and drops null values. compact() does just that, and returns
+    None for anything else so the caller takes the full route.
+
+    What a term does to a kind of value (keeps it, or unwraps it from a
+    one-item list) is learnt from pyld itself, by compacting a probe
+    document the first time each (term, kind) is seen.
+    """
+
+    PROBE_ID = "https://probe.invalid/"
+    PROBE_STRINGS = ["https://probe.invalid/a", "https://probe.invalid/b"]
+
+    def __init__(self, context: list):
+        self.context = context
+        self.processor = jsonld.JsonLdProcessor()
+        self.active = self.processor.process_context(
+            self.processor._get_initial_context({}), context, {}
+        )
+        self.mappings = self.active["mappings"]
+        # The @context pyld puts on compacted documents
+        output = [c for c in context if not isinstance(c, dict) or c]
+        self.output_context = output[0] if len(output) == 1 else output
+        self.probes: dict[tuple[str, str], str | None] = {}
+        self.types: dict[str, str | None] = {}
+        self.usable = (
+            self.mappings.get("id", {}).get("@id") == "@id"
+            and self.mappings.get("type", {}).get("@id") == "@type"
+            and "@language" not in self.active
+            and "@direction" not in self.active
+        )
+
+    def compact(self, document: dict) -> dict | None:
+        """
+        Returns the document as compact(expand(document)) would, or None if
+        it isn't in a shape we can do that for.
+        """
+        if not self.usable or not (document.keys() - {"@context", "id"}):
+            return None
+        try:
+            node = self.node(document, top=True)
+        except jsonld.JsonLdError, KeyError, TypeError, ValueError:
+            return None
+        if node is None:
+            return None
+        if self.output_context:
+            return {"@context": self.output_context, **node}
+        return node
+
+    def node(self, node: dict, top: bool = False) -> dict | None:
+        result = {}
+        for key, value in node.items():
+            if key == "@context" and top:
+                continue
+            if key == "id":
+                if not isinstance(value, str):
+                    return None
+                result[key] = self.iri(value, vocab=False)
+            elif key == "type":
+                types = value if isinstance(value, list) else [value]
+                # pyld unwraps single types, and keeps empty ones as lists
+                if isinstance(value, list) and len(value) < 2:
+                    return None
+                compacted = []
+                for type_ in types:
+                    if not isinstance(type_, str):
+                        return None
+                    compacted_type = self.type(type_)
+                    if compacted_type is None:
+                        return None
+                    compacted.append(compacted_type)
+                result[key] = compacted if isinstance(value, list) else compacted[0]
+            elif value is None:
+                # Expansion drops null values
+                continue
+            else:
+                # Keys that aren't terms are plain properties (e.g. under
+                # the @vocab of the ActivityStreams context)
+                mapping = self.mappings.get(key, {})
+                if key.startswith("@") or (
+                    mapping
+                    and (
+                        mapping["reverse"]
+                        or not mapping.get("@id")
+                        or mapping["@id"].startswith("@")
+                        or "@context" in mapping
+                        or "@nest" in mapping
+                        or "@language" in mapping
+                    )
+                ):
+                    return None
+                kind = self.kind(value, mapping)
+                shape = self.probe(key, kind) if kind else None
+                if shape is None:
+                    return None
+                compacted_value = self.value(value, mapping)
+                if compacted_value is None:
+                    return None
+                result[key] = (
+                    compacted_value[0] if shape == "unwrap" else compacted_value
+                )
+        return result
+
+    def value(self, value, mapping: dict):
+        if isinstance(value, list):
+            values = [self.value(v, mapping) for v in value]
+            return None if any(v is None for v in values) else values
+        if isinstance(value, str):
+            if mapping.get("@type") == "@id":
+                return self.iri(value, vocab=False)
+            if mapping.get("@type") == "@vocab":
+                return self.iri(value, vocab=True)
+            return value
+        if isinstance(value, dict):
+            if "@language" in mapping.get("@container", []):
+                return dict(value)
+            return self.node(value)
+        return value
+
+    def kind(self, value, mapping: dict) -> str | None:
+        """
+        Classifies a value by how pyld would treat it under a term.
+        """
+        container = mapping.get("@container", [])
+        if any(c not in ("@set", "@list", "@language") for c in container):
+            return None
+        if isinstance(value, list):
+            kinds = {self.kind(v, mapping) for v in value}
+            if None in kinds or len(kinds) > 1 or any(":" in k for k in kinds):
+                return None
+            return f"{min(len(value), 2)}:{kinds.pop() if kinds else ''}"
+        if "@language" in container:
+            if isinstance(value, dict) and all(
+                isinstance(v, str) for v in value.values()
+            ):
+                return "language"
+            return None
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, float):
+            return "float"
+        if isinstance(value, str):
+            return "str"
+        if isinstance(value, dict):
+            if not value:
+                return None
+            return "node" if value.keys() - {"id"} else "reference"
+        return None
+
+    def sample(self, kind: str, n: int = 0):
+        if ":" in kind:
+            length, item = kind.split(":")
+            return [self.sample(item, i) for i in range(int(length))]
+        return {
+            "bool": True,
+            "int": 1,
+            "float": 1.5,
+            "str": self.PROBE_STRINGS[n],
+            "language": {"en": self.PROBE_STRINGS[n]},
+            "node": {"id": self.PROBE_STRINGS[n], "@type": self.PROBE_ID + "T"},
+            "reference": {"id": self.PROBE_STRINGS[n]},
+        }[kind]
+
+    def probe(self, key: str, kind: str) -> str | None:
+        """
+        Returns how `key` treats values of this kind through compaction:
+        "keep" them as they are, "unwrap" a single value out of its list, or
+        None if it does anything else.
+        """
+        if (key, kind) not in self.probes:
+            sample = self.sample(kind)
+            try:
+                compacted = jsonld.compact(
+                    jsonld.expand(
+                        {"@context": self.context, "id": self.PROBE_ID, key: sample}
+                    ),
+                    self.context,
+                )
+            except jsonld.JsonLdError:
+                compacted = {}
+            shape = None
+            if self.same_shape(compacted.get(key), sample):
+                shape = "keep"
+            elif kind.startswith("1:") and self.same_shape(
+                compacted.get(key), sample[0]
+            ):
+                shape = "unwrap"
+            self.probes[key, kind] = shape
+        return self.probes[key, kind]
+
+    def same_shape(self, compacted, sample) -> bool:
+        if isinstance(sample, list):
+            return (
+                isinstance(compacted, list)
+                and len(compacted) == len(sample)
+                and all(self.same_shape(c, s) for c, s in zip(compacted, sample))
+            )
+        if isinstance(sample, dict) and "id" in sample:
+            return isinstance(compacted, dict) and compacted.get("id") == sample["id"]
+        return type(compacted) is type(sample) and compacted == sample
+
+    def iri(self, value: str, vocab: bool) -> str:
+        expanded = self.processor._expand_iri(self.active, value, base="", vocab=vocab)
+        return self.processor._compact_iri(
+            self.active, expanded, vocab=vocab, base=None if vocab else ""
+        )
+
+    def type(self, value: str) -> str | None:
+        """
+        Returns how a type compacts, or None if it brings a scoped context.
+        """
+        if value not in self.types:
+            compacted = self.iri(value, vocab=True)
+            mapping = self.mappings.get(compacted)
+            if mapping and "@context" in mapping:
+                compacted = None
+            self.types[value] = compacted
+        return self.types[value]
+
+
+@functools.lru_cache(maxsize=128)
+def _compiled_context(context: str) -> CompiledContext:
+    return CompiledContext(json.loads(context))
+
+
 def canonicalise(
     json_data: dict, include_security: bool = False, outbound: bool = True
 ) -> dict:
@@ -724,7 +959,15 @@ def canonicalise(
 
     json_data["@context"] = context
 
-    j = jsonld.compact(jsonld.expand(json_data), context)
+    j = None
+    try:
+        compiled = _compiled_context(json.dumps(context))
+    except jsonld.JsonLdError:
+        pass
+    else:
+        j = compiled.compact(json_data)
+    if j is None:
+        j = jsonld.compact(jsonld.expand(json_data), context)
     if not outbound:
         return j
 
@@ -131,6 +131,24 @@ class Config(models.Model):
             {"identity": identity, "user__isnull": True, "domain__isnull": True},
         )
 
+    @classmethod
+    def load_identities(cls, identities) -> dict:
+        """
+        Loads the config options objects of many identities in one query,
+        returning them by identity ID
+        """
+        values: dict = {identity.pk: {} for identity in identities}
+        for config in cls.objects.filter(
+            identity__in=values.keys(), user__isnull=True, domain__isnull=True
+        ):
+            value = config.image.url if config.image else config.json
+            if value is not None:
+                values[config.identity_id][config.key] = value
+        return {
+            pk: cls.IdentityOptions(**options, version=__version__)
+            for pk, options in values.items()
+        }
+
     @classmethod
     def load_domain(cls, domain):
         """
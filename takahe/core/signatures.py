@@ -1,12 +1,16 @@
 import base64
 import binascii
+import hashlib
 import json
 import logging
+import threading
+from functools import lru_cache
 from ssl import SSLCertVerificationError, SSLError
-from typing import Literal, NotRequired, TypedDict, cast
+from typing import Literal, NamedTuple, NotRequired, TypedDict, cast
 from urllib.parse import urlparse
 
 import httpx
+from cachetools import LRUCache, cached
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
@@ -43,6 +47,21 @@ class VerificationFormatError(VerificationError):
 
 
 class RsaKeys:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def load_private_key(private_key: str) -> rsa.RSAPrivateKey:
+        """
+        Parses a PEM private key, keeping recently used ones loaded as
+        parsing is far slower than signing with them.
+        """
+        return cast(
+            rsa.RSAPrivateKey,
+            serialization.load_pem_private_key(
+                private_key.encode("ascii"),
+                password=None,
+            ),
+        )
+
     @classmethod
     def generate_keypair(cls) -> tuple[str, str]:
         """
@@ -68,11 +87,100 @@ class RsaKeys:
         return private_key_serialized, public_key_serialized
 
 
+class PublicKeyCache:
+    """
+    Parsed public keys of remote actors, keyed by key id, so verifying a
+    signature from a busy actor doesn't parse their PEM every time.
+
+    Each entry remembers the PEM it was parsed from and is only used for that
+    same PEM, so a rotated key is parsed afresh the first time it's seen even
+    if nobody invalidated the old one.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.keys: LRUCache = LRUCache(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key_id: str | None, public_key: str) -> rsa.RSAPublicKey:
+        """
+        Returns the parsed key, from the cache if we have it
+        """
+        cache_key = key_id or public_key
+        with self.lock:
+            entry = self.keys.get(cache_key)
+            hit = entry is not None and entry[0] == public_key
+            if hit:
+                self.hits += 1
+        sentry.count(
+            "ap.public_key_cache", attributes={"result": "hit" if hit else "miss"}
+        )
+        if hit:
+            return entry[1]
+        public_key_instance = cast(
+            rsa.RSAPublicKey,
+            serialization.load_pem_public_key(public_key.encode("ascii")),
+        )
+        with self.lock:
+            self.keys[cache_key] = (public_key, public_key_instance)
+            self.misses += 1
+        return public_key_instance
+
+    def invalidate(self, key_id: str | None):
+        if key_id:
+            with self.lock:
+                self.keys.pop(key_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.keys.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+public_keys = PublicKeyCache()
+
+
+class PreparedBody(NamedTuple):
+    """
+    A serialized request body and its Digest header, so a document delivered
+    to many inboxes is only rendered once.
+    """
+
+    content: bytes
+    digest: str
+
+
+@lru_cache(maxsize=512)
+def _pooled_client(scheme: str, netloc: str) -> httpx.Client:
+    """
+    Returns the shared client for an origin, so repeated deliveries to it
+    reuse open connections. Clients pushed out of the cache are not closed
+    as another thread may still be using them; their connections go when
+    they are collected.
+    """
+    return httpx.Client(
+        timeout=settings.SETUP.REMOTE_TIMEOUT,
+        event_hooks={"request": [check_url_safety]},
+    )
+
+
 class HttpSignature:
     """
     Allows for calculation and verification of HTTP signatures
     """
 
+    @classmethod
+    def prepare_body(cls, body: dict) -> PreparedBody:
+        content = json.dumps(body).encode("utf8")
+        return PreparedBody(content, cls.calculate_digest(content))
+
     @classmethod
     def calculate_digest(cls, data, algorithm="sha-256") -> str:
         """
@@ -178,11 +286,9 @@ class HttpSignature:
         signature: bytes,
         cleartext: str,
         public_key: str,
+        key_id: str | None = None,
     ):
-        public_key_instance: rsa.RSAPublicKey = cast(
-            rsa.RSAPublicKey,
-            serialization.load_pem_public_key(public_key.encode("ascii")),
-        )
+        public_key_instance = public_keys.get(key_id, public_key)
         try:
             public_key_instance.verify(
                 signature,
@@ -211,7 +317,7 @@ class HttpSignature:
             raise VerificationFormatError(f"{label} is too far away")
 
     @classmethod
-    def verify_request(cls, request, public_key, skip_date=False):
+    def verify_request(cls, request, public_key, skip_date=False, key_id=None):
         """
         Verifies that the request has a valid signature for its body
         """
@@ -260,24 +366,22 @@ class HttpSignature:
             signature_details["signature"],
             headers_string,
             public_key,
+            key_id,
         )
 
     @classmethod
-    def signed_request(
+    def signed_headers(
         cls,
         uri: str,
-        body: dict | None,
+        body: dict | PreparedBody | None,
         private_key: str,
         key_id: str,
         content_type: str = "application/activity+json",
         method: Literal["get", "post"] = "post",
-        timeout: TimeoutTypes = settings.SETUP.REMOTE_TIMEOUT,
-    ):
-        if settings.SETUP.NO_FEDERATION:
-            return httpx.Response(200, json={})
+    ) -> tuple[dict[str, str], bytes]:
         """
-        Performs an async request to the given path, with a document, signed
-        as an identity.
+        Returns the signed headers and the content of a request to the given
+        path, with a document, signed as an identity.
         """
         if "://" not in uri:
             raise ValueError("URI does not contain a scheme")
@@ -291,8 +395,10 @@ class HttpSignature:
         }
         # If we have a body, add a digest and content type
         if body is not None:
-            body_bytes = json.dumps(body).encode("utf8")
-            headers["Digest"] = cls.calculate_digest(body_bytes)
+            if not isinstance(body, PreparedBody):
+                body = cls.prepare_body(body)
+            body_bytes = body.content
+            headers["Digest"] = body.digest
             headers["Content-Type"] = content_type
         else:
             body_bytes = b""
@@ -303,13 +409,7 @@ class HttpSignature:
         signed_string = "\n".join(
             f"{name.lower()}: {value}" for name, value in headers.items()
         )
-        private_key_instance: rsa.RSAPrivateKey = cast(
-            rsa.RSAPrivateKey,
-            serialization.load_pem_private_key(
-                private_key.encode("ascii"),
-                password=None,
-            ),
-        )
+        private_key_instance = RsaKeys.load_private_key(private_key)
         signature = private_key_instance.sign(
             signed_string.encode("utf8"),
             padding.PKCS1v15(),
@@ -329,40 +429,104 @@ class HttpSignature:
 
         # Send the request with all those headers except the pseudo one
         del headers["(request-target)"]
-        with httpx.Client(
-            timeout=timeout,
-            event_hooks={"request": [check_url_safety]},
-        ) as client:
-            try:
-                response = client.request(
-                    method,
-                    uri,
-                    headers=headers,
-                    content=body_bytes,
-                    follow_redirects=method == "get",
-                )
-            except SSLError as invalid_cert:
-                # Not our problem if the other end doesn't have proper SSL
-                logger.info("Invalid cert on %s %s", uri, invalid_cert)
-                raise SSLCertVerificationError(invalid_cert) from invalid_cert
-            except InvalidCodepoint as ex:
-                # Convert to a more generic error we handle
-                raise httpx.HTTPError(f"InvalidCodepoint: {str(ex)}") from None
-            except SSRFAttemptError:
-                logger.warning("SSRF blocked on %s %s", method, uri)
-                raise
-
-            sentry.count("ap.message.sent", attributes={"method": method})
-            if (
-                method == "post"
-                and response.status_code >= 400
-                and response.status_code < 500
-                and response.status_code not in [404, 410]
-            ):
-                raise ActivityPubDeliveryError(
-                    uri, response.status_code, response.content
-                )
-            return response
+        return headers, body_bytes
+
+    @classmethod
+    def check_response(
+        cls, uri: str, method: str, response: httpx.Response
+    ) -> httpx.Response:
+        sentry.count("ap.message.sent", attributes={"method": method})
+        if (
+            method == "post"
+            and response.status_code >= 400
+            and response.status_code < 500
+            and response.status_code not in [404, 410]
+        ):
+            raise ActivityPubDeliveryError(uri, response.status_code, response.content)
+        return response
+
+    @classmethod
+    def signed_request(
+        cls,
+        uri: str,
+        body: dict | PreparedBody | None,
+        private_key: str,
+        key_id: str,
+        content_type: str = "application/activity+json",
+        method: Literal["get", "post"] = "post",
+        timeout: TimeoutTypes = settings.SETUP.REMOTE_TIMEOUT,
+    ):
+        if settings.SETUP.NO_FEDERATION:
+            return httpx.Response(200, json={})
+        """
+        Performs a request to the given path, with a document, signed
+        as an identity.
+        """
+        headers, body_bytes = cls.signed_headers(
+            uri, body, private_key, key_id, content_type, method
+        )
+        uri_parts = urlparse(uri)
+        client = _pooled_client(uri_parts.scheme, uri_parts.netloc)
+        try:
+            response = client.request(
+                method,
+                uri,
+                headers=headers,
+                content=body_bytes,
+                follow_redirects=method == "get",
+                timeout=timeout,
+            )
+        except SSLError as invalid_cert:
+            # Not our problem if the other end doesn't have proper SSL
+            logger.info("Invalid cert on %s %s", uri, invalid_cert)
+            raise SSLCertVerificationError(invalid_cert) from invalid_cert
+        except InvalidCodepoint as ex:
+            # Convert to a more generic error we handle
+            raise httpx.HTTPError(f"InvalidCodepoint: {str(ex)}") from None
+        except SSRFAttemptError:
+            logger.warning("SSRF blocked on %s %s", method, uri)
+            raise
+        return cls.check_response(uri, method, response)
+
+    @classmethod
+    async def signed_request_async(
+        cls,
+        client: httpx.AsyncClient,
+        uri: str,
+        body: dict | PreparedBody | None,
+        private_key: str,
+        key_id: str,
+        content_type: str = "application/activity+json",
+        method: Literal["get", "post"] = "post",
+        timeout: TimeoutTypes = settings.SETUP.REMOTE_TIMEOUT,
+    ):
+        """
+        signed_request() on an async client, which should have the
+        check_url_safety_async request hook.
+        """
+        if settings.SETUP.NO_FEDERATION:
+            return httpx.Response(200, json={})
+        headers, body_bytes = cls.signed_headers(
+            uri, body, private_key, key_id, content_type, method
+        )
+        try:
+            response = await client.request(
+                method,
+                uri,
+                headers=headers,
+                content=body_bytes,
+                follow_redirects=method == "get",
+                timeout=timeout,
+            )
+        except SSLError as invalid_cert:
+            logger.info("Invalid cert on %s %s", uri, invalid_cert)
+            raise SSLCertVerificationError(invalid_cert) from invalid_cert
+        except InvalidCodepoint as ex:
+            raise httpx.HTTPError(f"InvalidCodepoint: {str(ex)}") from None
+        except SSRFAttemptError:
+            logger.warning("SSRF blocked on %s %s", method, uri)
+            raise
+        return cls.check_response(uri, method, response)
 
 
 class HttpSignatureDetails(TypedDict):
@@ -380,7 +544,9 @@ class LDSignature:
     """
 
     @classmethod
-    def verify_signature(cls, document: dict, public_key: str) -> None:
+    def verify_signature(
+        cls, document: dict, public_key: str, key_id: str | None = None
+    ) -> None:
         """
         Verifies a document
         """
@@ -400,12 +566,11 @@ class LDSignature:
         if signature["type"].lower() != "rsasignature2017":
             raise VerificationFormatError("Unknown signature type")
         # Get the normalised hash of each document
-        final_hash = cls.normalized_hash(options) + cls.normalized_hash(document)
-        # Verify the signature
-        public_key_instance: rsa.RSAPublicKey = cast(
-            rsa.RSAPublicKey,
-            serialization.load_pem_public_key(public_key.encode("ascii")),
+        final_hash = cls.normalized_hash(options) + cls.normalized_hash(
+            document, cache=True
         )
+        # Verify the signature
+        public_key_instance = public_keys.get(key_id, public_key)
         try:
             public_key_instance.verify(
                 base64.b64decode(signature["signatureValue"]),
@@ -432,15 +597,11 @@ class LDSignature:
             "created": format_ld_date(timezone.now()),
         }
         # Get the normalised hash of each document
-        final_hash = cls.normalized_hash(options) + cls.normalized_hash(document)
-        # Create the signature
-        private_key_instance: rsa.RSAPrivateKey = cast(
-            rsa.RSAPrivateKey,
-            serialization.load_pem_private_key(
-                private_key.encode("ascii"),
-                password=None,
-            ),
+        final_hash = cls.normalized_hash(options) + cls.normalized_hash(
+            document, cache=True
         )
+        # Create the signature
+        private_key_instance = RsaKeys.load_private_key(private_key)
         signature = base64.b64encode(
             private_key_instance.sign(
                 final_hash,
@@ -454,13 +615,20 @@ class LDSignature:
         return options
 
     @classmethod
-    def normalized_hash(cls, document) -> bytes:
+    def normalized_hash(cls, document, cache: bool = False) -> bytes:
         """
         Takes a JSON-LD document and create a hash of its URDNA2015 form,
         in the same way that Mastodon does internally.
 
+        With `cache`, recently hashed documents are remembered by a digest of
+        their body: the same activity is often verified or signed many times
+        (relayed copies, retried deliveries), and normalising is slow. The
+        signature options carry a timestamp, so aren't worth caching.
+
         Reference: https://socialhub.activitypub.rocks/t/making-sense-of-rsasignature2017/347
         """
+        if cache:
+            return _cached_normalized_hash(document)
         norm_form = jsonld.normalize(
             document,
             {"algorithm": "URDNA2015", "format": "application/n-quads"},
@@ -468,3 +636,14 @@ class LDSignature:
         digest = hashes.Hash(hashes.SHA256())
         digest.update(norm_form.encode("utf8"))
         return digest.finalize().hex().encode("ascii")
+
+
+@cached(
+    cache=LRUCache(maxsize=1024),
+    key=lambda document: hashlib.sha256(
+        json.dumps(document, sort_keys=True).encode("utf8")
+    ).digest(),
+    lock=threading.Lock(),
+)
+def _cached_normalized_hash(document) -> bytes:
+    return LDSignature.normalized_hash(document)
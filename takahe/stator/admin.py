@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from stator.models import Stats
+from stator.models import RunnerHeartbeat, Stats
 
 
 @admin.register(Stats)
@@ -13,3 +13,17 @@ class DomainAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request, obj=None):
         return False
+
+
+@admin.register(RunnerHeartbeat)
+class RunnerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = [
+        "runner_id",
+        "model_labels",
+        "heartbeat",
+        "created",
+    ]
+    ordering = ["runner_id"]
+
+    def has_add_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class StatorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "stator"
+
+    def install_triggers(self, using, **kwargs):
+        """
+        Runs after migrations or flushes to (re)create the NOTIFY triggers,
+        so they follow any new models or changed state graphs.
+        """
+        from stator.notify import install_triggers
+
+        install_triggers(using)
+
+    def ready(self) -> None:
+        post_migrate.connect(self.install_triggers, sender=self)
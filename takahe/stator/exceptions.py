@@ -1,5 +1,12 @@
+import datetime
+
+
 class TryAgainLater(BaseException):
     """
     Special exception that Stator will catch without error,
-    leaving a state to have another attempt soon.
+    leaving a state to have another attempt soon, or at `until` if given.
     """
+
+    def __init__(self, until: datetime.datetime | None = None):
+        super().__init__()
+        self.until = until
@@ -2,7 +2,8 @@ import logging
 from typing import cast
 
 from django.apps import apps
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
 from core.models import Config
 from stator.models import StatorModel
@@ -49,6 +50,19 @@ class Command(BaseCommand):
             action="append",
             help="Model labels that should not be processed",
         )
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=str,
+            action="append",
+            help="Model labels that should be processed in batches (e.g. activities.fanout)",
+        )
+        parser.add_argument(
+            "--sharded",
+            action="store_true",
+            default=settings.STATOR_SHARDED,
+            help="Split rows with the other sharded runners instead of competing for them",
+        )
         parser.add_argument("model_labels", nargs="*", type=str)
 
     def handle(
@@ -59,6 +73,8 @@ class Command(BaseCommand):
         schedule_interval: int,
         run_for: int,
         exclude: list[str],
+        batch: list[str],
+        sharded: bool,
         *args,
         **options,
     ):
@@ -82,17 +98,29 @@ class Command(BaseCommand):
         if not models:
             models = StatorModel.subclasses
         models = [model for model in models if model not in excluded]
+        batch_models = cast(
+            list[type[StatorModel]],
+            [
+                apps.get_model(label)
+                for label in (batch or settings.STATOR_BATCH_MODELS)
+            ],
+        )
         logger.info(
             "Running for models: " + " ".join(m._meta.label_lower for m in models)
         )
         # Run a runner
-        runner = StatorRunner(
-            models,
-            concurrency=concurrency,
-            liveness_file=liveness_file,
-            schedule_interval=schedule_interval,
-            run_for=run_for,
-        )
+        try:
+            runner = StatorRunner(
+                models,
+                concurrency=concurrency,
+                liveness_file=liveness_file,
+                schedule_interval=schedule_interval,
+                run_for=run_for,
+                batch_models=batch_models,
+                sharded=sharded,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
         try:
             runner.run()
         except KeyboardInterrupt:
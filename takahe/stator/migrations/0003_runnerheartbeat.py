@@ -0,0 +1,24 @@
+# Generated by Django 5.2.17 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stator", "0002_stats_delete_statorerror"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunnerHeartbeat",
+            fields=[
+                (
+                    "runner_id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("model_labels", models.JSONField()),
+                ("heartbeat", models.DateTimeField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,9 +1,11 @@
 import datetime
 import logging
+from collections import defaultdict
 from typing import ClassVar
 
 from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.db import models, transaction
+from django.db.models.functions import Cast
 from django.db.models.signals import class_prepared
 from django.utils import timezone
 from django.utils.functional import classproperty
@@ -39,6 +41,23 @@ class StateField(models.CharField):
         return value
 
 
+# How many buckets sharded runners split each model's rows into
+SHARD_BUCKETS = 1024
+
+
+class StatorShard(models.Func):
+    """
+    The shard bucket of a row: its primary key hashed into one of
+    SHARD_BUCKETS buckets. Sharded runners each claim a range of them.
+    """
+
+    template = f"(hashtext(%(expressions)s) & {SHARD_BUCKETS - 1})"
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(Cast(expression, models.TextField()), **extra)
+
+
 def add_stator_indexes(sender, **kwargs):
     """
     Inject Indexes used by StatorModel in to any subclasses. This sidesteps the
@@ -52,6 +71,15 @@ def add_stator_indexes(sender, **kwargs):
                 name=f"ix_{sender.__name__.lower()[:11]}_state_next",
             ),
         ]
+        if sender.shard_index:
+            indexes.append(
+                models.Index(
+                    models.F("state"),
+                    StatorShard(sender._meta.pk.name),
+                    models.F("state_next_attempt"),
+                    name=f"ix_{sender.__name__.lower()[:11]}_shard",
+                )
+            )
 
         if not sender._meta.indexes:
             # Meta.indexes needs to not be None to trigger Django behaviors
@@ -96,6 +124,10 @@ class StatorModel(models.Model):
     # Collection of subclasses of us
     subclasses: ClassVar[list[type["StatorModel"]]] = []
 
+    # If ready rows should also be indexed by shard, for busy models that
+    # sharded runners claim from
+    shard_index: ClassVar[bool] = False
+
     class Meta:
         abstract = True
 
@@ -111,9 +143,25 @@ class StatorModel(models.Model):
     def state_age(self) -> float:
         return (timezone.now() - self.state_changed).total_seconds()
 
+    @classmethod
+    def transition_in_shard(
+        cls, queryset: models.QuerySet, shard: tuple[int, int] | None
+    ) -> models.QuerySet:
+        """
+        Restricts the queryset to a range of shard buckets, if given one.
+        """
+        if shard is None:
+            return queryset
+        return queryset.alias(stator_shard=StatorShard("pk")).filter(
+            stator_shard__range=shard
+        )
+
     @classmethod
     def transition_get_with_lock(
-        cls, number: int, lock_expiry: datetime.datetime
+        cls,
+        number: int,
+        lock_expiry: datetime.datetime,
+        shard: tuple[int, int] | None = None,
     ) -> list["StatorModel"]:
         """
         Returns up to `number` tasks for execution, having locked them.
@@ -122,14 +170,18 @@ class StatorModel(models.Model):
             # Query for `number` rows that:
             #  - Have a next_attempt that's either null or in the past
             #  - Have one of the states we care about
+            #  - Are in our shard, if we have one
             # Then, sort them by next_attempt NULLS FIRST, so that we handle the
             # rows in a roughly FIFO order.
             selected = list(
-                cls.objects.filter(
-                    models.Q(state_next_attempt__isnull=True)
-                    | models.Q(state_next_attempt__lte=timezone.now()),
-                    state__in=cls.state_graph.automatic_states,
-                    state_locked_until__isnull=True,
+                cls.transition_in_shard(
+                    cls.objects.filter(
+                        models.Q(state_next_attempt__isnull=True)
+                        | models.Q(state_next_attempt__lte=timezone.now()),
+                        state__in=cls.state_graph.automatic_states,
+                        state_locked_until__isnull=True,
+                    ),
+                    shard,
                 )[:number].select_for_update(skip_locked=True)
             )
             cls.objects.filter(pk__in=[i.pk for i in selected]).update(
@@ -137,6 +189,28 @@ class StatorModel(models.Model):
             )
         return selected
 
+    @classmethod
+    def transition_batch(
+        cls,
+        number: int,
+        lock_expiry: datetime.datetime,
+        shard: tuple[int, int] | None = None,
+    ) -> int:
+        """
+        Locks and handles up to `number` tasks together rather than in a
+        thread each, for runners given this model as a batch model. Returns
+        how many were handled.
+        """
+        raise NotImplementedError(f"{cls._meta.label_lower} has no batch handling")
+
+    @classmethod
+    def transition_batch_supported(cls) -> bool:
+        """
+        Returns if this model implements transition_batch().
+        """
+        base = StatorModel.transition_batch.__func__  # type: ignore
+        return cls.transition_batch.__func__ is not base  # type: ignore
+
     @classmethod
     def transition_delete_due(cls) -> int | None:
         """
@@ -161,15 +235,18 @@ class StatorModel(models.Model):
         return None
 
     @classmethod
-    def transition_ready_count(cls) -> int:
+    def transition_ready_count(cls, shard: tuple[int, int] | None = None) -> int:
         """
         Returns how many instances are "queued"
         """
-        return cls.objects.filter(
-            models.Q(state_next_attempt__isnull=True)
-            | models.Q(state_next_attempt__lte=timezone.now()),
-            state_locked_until__isnull=True,
-            state__in=cls.state_graph.automatic_states,
+        return cls.transition_in_shard(
+            cls.objects.filter(
+                models.Q(state_next_attempt__isnull=True)
+                | models.Q(state_next_attempt__lte=timezone.now()),
+                state_locked_until__isnull=True,
+                state__in=cls.state_graph.automatic_states,
+            ),
+            shard,
         ).count()
 
     @classmethod
@@ -197,13 +274,14 @@ class StatorModel(models.Model):
             return None
 
         # Try running its handler function
+        try_again_at = None
         try:
             if iscoroutinefunction(current_state.handler):
                 next_state = async_to_sync(current_state.handler)(self)
             else:
                 next_state = current_state.handler(self)
-        except TryAgainLater:
-            pass
+        except TryAgainLater as e:
+            try_again_at = e.until
         except BaseException as e:
             logger.exception(e)
         else:
@@ -231,7 +309,9 @@ class StatorModel(models.Model):
         # Nothing happened, set next execution and unlock it
         self.__class__.objects.filter(pk=self.pk).update(
             state_next_attempt=(
-                timezone.now() + datetime.timedelta(seconds=current_state.try_interval)  # type: ignore
+                try_again_at
+                or timezone.now()
+                + datetime.timedelta(seconds=current_state.try_interval)  # type: ignore
             ),
             state_locked_until=None,
         )
@@ -296,8 +376,11 @@ class Stats(models.Model):
         verbose_name_plural = "Stats"
 
     @classmethod
-    def get_for_model(cls, model: type[StatorModel]) -> "Stats":
-        instance = cls.objects.filter(model_label=model._meta.label_lower).first()
+    def get_for_model(cls, model: type[StatorModel], lock=False) -> "Stats":
+        queryset = cls.objects.filter(model_label=model._meta.label_lower)
+        if lock:
+            queryset = queryset.select_for_update()
+        instance = queryset.first()
         if instance is None:
             instance = cls(model_label=model._meta.label_lower)
         if not instance.statistics:
@@ -340,6 +423,50 @@ class Stats(models.Model):
             self.statistics["monthly"].get(month_timestamp, 0) + number
         )
 
+    def set_shard(
+        self,
+        runner_id: str,
+        shard: tuple[int, int],
+        handled: int,
+        queued: int,
+    ):
+        """
+        Records what a sharded runner handled from its shard since its
+        last report, and how much is queued in it.
+        """
+        shards = self.statistics.setdefault("shards", {})
+        now = int(timezone.now().timestamp())
+        previous = shards.get(runner_id, {})
+        shards[runner_id] = {
+            "range": list(shard),
+            "handled": handled,
+            "seconds": now - previous.get("updated", now),
+            "queued": queued,
+            "updated": now,
+        }
+
+    def recent_shards(self) -> list[dict]:
+        """
+        Returns the shards of runners that reported in the last ten minutes,
+        in bucket order, with their throughput per second.
+        """
+        horizon = int((timezone.now() - datetime.timedelta(minutes=10)).timestamp())
+        shards = []
+        for runner_id, shard in self.statistics.get("shards", {}).items():
+            if shard["updated"] >= horizon:
+                shards.append(
+                    {
+                        **shard,
+                        "runner_id": runner_id,
+                        "rate": (
+                            shard["handled"] / shard["seconds"]
+                            if shard["seconds"]
+                            else None
+                        ),
+                    }
+                )
+        return sorted(shards, key=lambda shard: shard["range"])
+
     def trim_data(self):
         """
         Removes excessively old data from the field
@@ -372,6 +499,12 @@ class Stats(models.Model):
             for ts, v in self.statistics["monthly"].items()
             if int(ts) >= monthly_horizon
         }
+        if "shards" in self.statistics:
+            self.statistics["shards"] = {
+                runner_id: shard
+                for runner_id, shard in self.statistics["shards"].items()
+                if shard["updated"] >= queued_horizon
+            }
 
     def most_recent_queued(self) -> int:
         """
@@ -398,3 +531,65 @@ class Stats(models.Model):
             self.statistics["daily"].get(day_timestamp, 0),
             self.statistics["monthly"].get(month_timestamp, 0),
         )
+
+
+class RunnerHeartbeat(models.Model):
+    """
+    A live sharded runner, and the models it handles.
+
+    Each model's shard buckets are split evenly between the runners handling
+    it, in order of their IDs, so when runners come and go the ranges
+    rebalance on the next heartbeats.
+    """
+
+    runner_id = models.CharField(max_length=32, primary_key=True)
+
+    # Labels of the models the runner handles
+    model_labels = models.JSONField()
+
+    heartbeat = models.DateTimeField()
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    # Seconds without a heartbeat after which a runner is considered gone
+    TIMEOUT = 60
+
+    @classmethod
+    def beat(cls, runner_id: str, labels: list[str]):
+        """
+        Records that the runner is alive, and forgets long gone ones.
+        """
+        now = timezone.now()
+        cls.objects.update_or_create(
+            runner_id=runner_id,
+            defaults={"model_labels": labels, "heartbeat": now},
+        )
+        cls.objects.filter(
+            heartbeat__lt=now - datetime.timedelta(seconds=cls.TIMEOUT * 10)
+        ).delete()
+
+    @classmethod
+    def leave(cls, runner_id: str):
+        cls.objects.filter(runner_id=runner_id).delete()
+
+    @classmethod
+    def shards(cls, runner_id: str, labels: list[str]) -> dict[str, tuple[int, int]]:
+        """
+        Returns the range of shard buckets the runner owns for each of its
+        models, as inclusive (first, last) bounds.
+        """
+        members: defaultdict[str, set[str]] = defaultdict(set)
+        for runner in cls.objects.filter(
+            heartbeat__gte=timezone.now() - datetime.timedelta(seconds=cls.TIMEOUT)
+        ):
+            for label in runner.model_labels:
+                members[label].add(runner.runner_id)
+        shards = {}
+        for label in labels:
+            runner_ids = sorted(members[label] | {runner_id})
+            index, count = runner_ids.index(runner_id), len(runner_ids)
+            shards[label] = (
+                index * SHARD_BUCKETS // count,
+                (index + 1) * SHARD_BUCKETS // count - 1,
+            )
+        return shards
@@ -0,0 +1,135 @@
+import logging
+import time
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from stator.models import StatorModel
+
+logger = logging.getLogger(__name__)
+
+
+def channel_name(model: type[StatorModel]) -> str:
+    """
+    Returns the Postgres NOTIFY channel for a model's ready rows
+    """
+    return "stator_" + model._meta.label_lower.replace(".", "_")
+
+
+def _literal(value: str) -> str:
+    # Trigger definitions can't take query parameters
+    return "'" + value.replace("'", "''") + "'"
+
+
+def install_triggers(using: str = DEFAULT_DB_ALIAS):
+    """
+    (Re)creates the triggers that NOTIFY a model's channel whenever one of
+    its rows enters an automatic state ready to be attempted right away.
+    They live in the database, so rows written in bulk, by queryset updates
+    or from outside Takahe (NeoDB) wake the runners just the same.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION stator_notify() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(TG_ARGV[0], '');
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        tables = set(connection.introspection.table_names(cursor))
+        for model in StatorModel.subclasses:
+            if model._meta.db_table not in tables:
+                continue
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f"DROP TRIGGER IF EXISTS stator_notify ON {table}")
+            if not model.state_graph.automatic_states:
+                continue
+            states = ", ".join(
+                _literal(state.name)
+                for state in sorted(
+                    model.state_graph.automatic_states, key=lambda s: s.name
+                )
+            )
+            cursor.execute(
+                f"""
+                CREATE TRIGGER stator_notify
+                AFTER INSERT OR UPDATE OF state, state_next_attempt, state_locked_until
+                ON {table}
+                FOR EACH ROW
+                WHEN (
+                    NEW.state_next_attempt IS NULL
+                    AND NEW.state_locked_until IS NULL
+                    AND NEW.state IN ({states})
+                )
+                EXECUTE FUNCTION stator_notify({_literal(channel_name(model))})
+                """
+            )
+
+
+class StatorListener:
+    """
+    LISTENs on the channels of some models, on a connection of its own, so a
+    runner can sleep until rows are ready rather than polling for them.
+    """
+
+    def __init__(self, models: list[type[StatorModel]], using: str = DEFAULT_DB_ALIAS):
+        self.channels = {channel_name(model): model for model in models}
+        self.using = using
+        self.connection = None
+
+    @classmethod
+    def create(
+        cls, models: list[type[StatorModel]], using: str = DEFAULT_DB_ALIAS
+    ) -> "StatorListener | None":
+        """
+        Returns a listener for the models, or None if the database can't
+        notify us.
+        """
+        if connections[using].vendor != "postgresql":
+            return None
+        return cls(models, using)
+
+    def connect(self):
+        self.connection = connections.create_connection(self.using)
+        self.connection.ensure_connection()
+        with self.connection.cursor() as cursor:
+            for channel in self.channels:
+                cursor.execute(f"LISTEN {self.connection.ops.quote_name(channel)}")
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except DatabaseError:
+                pass
+            self.connection = None
+
+    def wait(self, timeout: float) -> set[type[StatorModel]]:
+        """
+        Waits up to `timeout` seconds for notifications, and returns the
+        models that had any. If the connection is lost, every model is
+        returned so the runner polls them all while it reconnects.
+        """
+        notified: set[type[StatorModel]] = set()
+        try:
+            if self.connection is None:
+                self.connect()
+            with self.connection.wrap_database_errors:  # type: ignore
+                raw = self.connection.connection  # type: ignore
+                # Block until the first one, then gather what arrived with it
+                for notify in raw.notifies(timeout=timeout, stop_after=1):
+                    notified.add(self.channels[notify.channel])
+                if notified:
+                    for notify in raw.notifies(timeout=0):
+                        notified.add(self.channels[notify.channel])
+        except DatabaseError as e:
+            logger.warning(f"Lost notification connection: {e}")
+            self.close()
+            time.sleep(timeout)
+            return set(self.channels.values())
+        return notified
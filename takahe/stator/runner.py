@@ -9,10 +9,11 @@ from concurrent.futures import Future, ThreadPoolExecutor
 from core import sentry
 from core.models import Config
 from django.conf import settings
-from django.db import close_old_connections
+from django.db import close_old_connections, transaction
 from django.utils import timezone
 
-from stator.models import StatorModel, Stats
+from stator.models import RunnerHeartbeat, StatorModel, Stats
+from stator.notify import StatorListener
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,11 @@ class StatorRunner:
         concurrency_per_model: int = getattr(
             settings, "STATOR_CONCURRENCY_PER_MODEL", 15
         ),
+        batch_models: list[type[StatorModel]] | None = None,
+        batch_size: int = getattr(settings, "STATOR_BATCH_SIZE", 500),
+        poll_interval: int = getattr(settings, "STATOR_POLL_INTERVAL", 30),
+        sharded: bool = getattr(settings, "STATOR_SHARDED", False),
+        heartbeat_interval: int = 15,
         liveness_file: str | None = None,
         schedule_interval: int = 60,
         delete_interval: int = 30,
@@ -66,6 +72,27 @@ class StatorRunner:
         self.runner_id = uuid.uuid4().hex
         self.concurrency = concurrency
         self.concurrency_per_model = concurrency_per_model
+        # Models whose tasks are handled together by transition_batch(), in
+        # one thread per model, instead of in a thread each
+        self.batch_models = batch_models or []
+        unsupported = [
+            m._meta.label_lower
+            for m in self.batch_models
+            if not m.transition_batch_supported()
+        ]
+        if unsupported:
+            raise ValueError(f"Models without batch handling: {', '.join(unsupported)}")
+        self.batch_size = batch_size
+        # When we can LISTEN for ready rows, models are only polled when
+        # notified, while they have more work, and every poll_interval
+        self.poll_interval = poll_interval
+        self.listener: StatorListener | None = None
+        self.pending: set[type[StatorModel]] = set()
+        # Sharded runners split each model's rows with the other runners
+        # handling it (see RunnerHeartbeat), and only claim from their range
+        self.sharded = sharded
+        self.heartbeat_interval = heartbeat_interval
+        self.shards: dict[str, tuple[int, int]] = {}
         self.liveness_file = liveness_file
         self.schedule_interval = schedule_interval
         self.delete_interval = delete_interval
@@ -85,11 +112,18 @@ class StatorRunner:
         self.loop_delay = self.minimum_loop_delay
         self.scheduling_timer = LoopingTimer(self.schedule_interval)
         self.deletion_timer = LoopingTimer(self.delete_interval)
+        self.polling_timer = LoopingTimer(self.poll_interval)
+        self.heartbeat_timer = LoopingTimer(self.heartbeat_interval)
+        self.listener = StatorListener.create(self.models)
         # For the first time period, launch tasks
         logger.info("Running main task loop")
         try:
             with sentry.configure_scope() as scope:
                 while True:
+                    # Keep our shards in step with the other runners
+                    if self.sharded and self.heartbeat_timer.check():
+                        self.update_shards()
+
                     # See if we need to run cleaning
                     if self.scheduling_timer.check():
                         # Set up the watchdog timer (each time we do this the previous one is cancelled)
@@ -113,6 +147,8 @@ class StatorRunner:
                         self.add_deletion_tasks()
 
                     # Fetch and run any new handlers we can fit
+                    if self.listener is None or self.polling_timer.check():
+                        self.pending.update(self.models)
                     self.add_transition_tasks()
 
                     # Are we in limited run mode?
@@ -131,7 +167,11 @@ class StatorRunner:
                             self.loop_delay * 1.5,
                             self.maximum_loop_delay,
                         )
-                    time.sleep(self.loop_delay)
+                    if self.listener is None:
+                        time.sleep(self.loop_delay)
+                    else:
+                        # Sleep, but wake up as soon as rows are ready
+                        self.pending.update(self.listener.wait(self.loop_delay))
 
                     # Clear the Sentry breadcrumbs and extra for next loop
                     sentry.scope_clear(scope)
@@ -141,6 +181,10 @@ class StatorRunner:
         # Wait for tasks to finish
         logger.info("Waiting for tasks to complete")
         self.executor.shutdown()
+        if self.listener:
+            self.listener.close()
+        if self.sharded:
+            RunnerHeartbeat.leave(self.runner_id)
 
         # We're done
         logger.info("Complete")
@@ -174,17 +218,44 @@ class StatorRunner:
                     self.submit_stats(model)
                     model.transition_clean_locks()
 
+    def update_shards(self):
+        """
+        Sends our heartbeat and works out our shards from the live runners.
+        """
+        labels = [model._meta.label_lower for model in self.models]
+        RunnerHeartbeat.beat(self.runner_id, labels)
+        shards = RunnerHeartbeat.shards(self.runner_id, labels)
+        if shards != self.shards:
+            logger.info(
+                "Shards: "
+                + " ".join(f"{label}[{a}-{b}]" for label, (a, b) in shards.items())
+            )
+            self.shards = shards
+            # Rows that became ours were notified to someone else
+            self.pending.update(self.models)
+
     def submit_stats(self, model: type[StatorModel]):
         """
         Pop some statistics into the database from our local info for the given model
         """
-        stats_instance = Stats.get_for_model(model)
-        if stats_instance.model_label in self.handled:
-            stats_instance.add_handled(self.handled[stats_instance.model_label])
-            del self.handled[stats_instance.model_label]
-        stats_instance.set_queued(model.transition_ready_count())
-        stats_instance.trim_data()
-        stats_instance.save()
+        label = model._meta.label_lower
+        handled = self.handled.pop(label, None)
+        queued = model.transition_ready_count()
+        shard = self.shards.get(label)
+        if shard:
+            shard_queued = model.transition_ready_count(shard)
+        # Other runners update the same stats, so don't lose their changes
+        with transaction.atomic():
+            stats_instance = Stats.get_for_model(model, lock=True)
+            if handled is not None:
+                stats_instance.add_handled(handled)
+            stats_instance.set_queued(queued)
+            if shard:
+                stats_instance.set_shard(
+                    self.runner_id, shard, handled or 0, shard_queued
+                )
+            stats_instance.trim_data()
+            stats_instance.save()
 
     def add_transition_tasks(self, call_inline=False):
         """
@@ -195,13 +266,38 @@ class StatorRunner:
         space_remaining = self.concurrency - len(self.tasks)
         # Fetch new tasks
         for model in self.models:
+            if self.listener and model not in self.pending:
+                continue
+            if model in self.batch_models:
+                key = (model._meta.label_lower, "__batch__")
+                lock_expiry = timezone.now() + datetime.timedelta(
+                    seconds=self.lock_expiry
+                )
+                shard = self.shards.get(model._meta.label_lower)
+                if call_inline:
+                    self.add_handled(
+                        model,
+                        task_batch(model, self.batch_size, lock_expiry, shard, False),
+                    )
+                elif key not in self.tasks:
+                    self.tasks[key] = self.executor.submit(
+                        task_batch, model, self.batch_size, lock_expiry, shard
+                    )
+                    self.pending.discard(model)
+                    space_remaining -= 1
+                continue
             if space_remaining > 0:
-                for instance in model.transition_get_with_lock(
+                instances = model.transition_get_with_lock(
                     number=min(space_remaining, self.concurrency_per_model),
                     lock_expiry=(
                         timezone.now() + datetime.timedelta(seconds=self.lock_expiry)
                     ),
-                ):
+                    shard=self.shards.get(model._meta.label_lower),
+                )
+                # Keep polling the model until it runs out of ready rows
+                if not instances:
+                    self.pending.discard(model)
+                for instance in instances:
                     key = (model._meta.label_lower, instance.pk)
                     # Don't run two threads for the same thing
                     if key in self.tasks:
@@ -212,11 +308,14 @@ class StatorRunner:
                         self.tasks[key] = self.executor.submit(
                             task_transition, instance
                         )
-                    self.handled[model._meta.label_lower] = (
-                        self.handled.get(model._meta.label_lower, 0) + 1
-                    )
+                    self.add_handled(model, 1)
                     space_remaining -= 1
 
+    def add_handled(self, model: type[StatorModel], number: int):
+        self.handled[model._meta.label_lower] = (
+            self.handled.get(model._meta.label_lower, 0) + number
+        )
+
     def add_deletion_tasks(self, call_inline=False):
         """
         Adds a deletion thread for each model
@@ -240,9 +339,18 @@ class StatorRunner:
             if task.done():
                 del self.tasks[key]
                 try:
-                    task.result()
+                    result = task.result()
                 except BaseException as e:
                     logger.exception(e)
+                else:
+                    if key[1] == "__batch__":
+                        self.handled[key[0]] = self.handled.get(key[0], 0) + result
+                        if result:
+                            self.pending.update(
+                                m
+                                for m in self.batch_models
+                                if m._meta.label_lower == key[0]
+                            )
 
     def run_single_cycle(self):
         """
@@ -293,6 +401,25 @@ def task_transition(instance: StatorModel, in_thread: bool = True):
         close_old_connections()
 
 
+def task_batch(
+    model: type[StatorModel],
+    batch_size: int,
+    lock_expiry: datetime.datetime,
+    shard: tuple[int, int] | None = None,
+    in_thread: bool = True,
+) -> int:
+    """
+    Runs one batch of a model's transitions.
+    """
+    with sentry.start_transaction(
+        op="task", name=f"stator.task_batch:{model._meta.label_lower}"
+    ):
+        handled = model.transition_batch(batch_size, lock_expiry, shard)
+    if in_thread:
+        close_old_connections()
+    return handled
+
+
 def task_deletion(model: type[StatorModel], in_thread: bool = True):
     """
     Runs one model deletion set.
@@ -189,6 +189,15 @@ class Settings(BaseSettings):
     # Stator tuning
     STATOR_CONCURRENCY: int = 20
     STATOR_CONCURRENCY_PER_MODEL: int = 4
+    # Models handled in batches (e.g. activities.fanout, delivered with asyncio)
+    STATOR_BATCH_MODELS: list[str] = Field(default_factory=list)
+    STATOR_BATCH_SIZE: int = 500
+    STATOR_DELIVERY_CONCURRENCY: int = 200
+    STATOR_DELIVERY_PER_HOST: int = 8
+    # Seconds between polls for ready rows when runners are woken by NOTIFY
+    STATOR_POLL_INTERVAL: int = 30
+    # Split rows between runners by primary key hash rather than competing
+    STATOR_SHARDED: bool = False
 
     # Web Push keys
     # Generate via https://web-push-codelab.glitch.me/
@@ -352,6 +361,12 @@ AUTO_ADMIN_EMAIL = SETUP.AUTO_ADMIN_EMAIL
 STATOR_TOKEN = SETUP.STATOR_TOKEN
 STATOR_CONCURRENCY = SETUP.STATOR_CONCURRENCY
 STATOR_CONCURRENCY_PER_MODEL = SETUP.STATOR_CONCURRENCY_PER_MODEL
+STATOR_BATCH_MODELS = SETUP.STATOR_BATCH_MODELS
+STATOR_BATCH_SIZE = SETUP.STATOR_BATCH_SIZE
+STATOR_DELIVERY_CONCURRENCY = SETUP.STATOR_DELIVERY_CONCURRENCY
+STATOR_DELIVERY_PER_HOST = SETUP.STATOR_DELIVERY_PER_HOST
+STATOR_POLL_INTERVAL = SETUP.STATOR_POLL_INTERVAL
+STATOR_SHARDED = SETUP.STATOR_SHARDED
 
 ROBOTS_TXT_DISALLOWED_USER_AGENTS = SETUP.ROBOTS_TXT_DISALLOWED_USER_AGENTS
 
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from activities.models import FanOut, Post
@@ -72,3 +74,19 @@ def test_private_post_fan_out_is_not_ld_signed(identity, config_system, visibili
 def test_unknown_fan_out_type_returns_none(identity, config_system):
     post = _create_local_post(identity, "<p>Hello</p>")
     assert post.to_fan_out_ap(FanOut.Types.interaction) is None
+
+
+@pytest.mark.django_db
+def test_fan_out_body_rendered_once(identity, keypair, config_system):
+    """
+    FanOuts of the same post share one rendered and LD-signed body, which
+    is rendered again once the post changes.
+    """
+    post = _create_local_post(identity, "<p>Hello</p>")
+    body = post.fan_out_body(FanOut.Types.post)
+    assert Post.objects.get(pk=post.pk).fan_out_body(FanOut.Types.post) is body
+    LDSignature.verify_signature(json.loads(body.content), keypair["public_key"])
+    post.content = "<p>Hello again</p>"
+    post.save()
+    assert post.fan_out_body(FanOut.Types.post) is not body
+    assert post.fan_out_body(FanOut.Types.interaction) is None
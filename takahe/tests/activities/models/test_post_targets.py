@@ -1,6 +1,6 @@
 import pytest
 
-from activities.models import Post
+from activities.models import FanOut, Post, PostStates
 from users.models import Block, Domain, Follow, Identity
 
 
@@ -179,3 +179,27 @@ def test_post_blocked(identity, other_identity, remote_identity):
     # The muted block should be in targets, the full block should not
     targets = post.get_targets()
     assert targets == {identity, other_identity}
+
+
+@pytest.mark.django_db
+def test_post_fan_out_insert(identity, other_identity, remote_identity):
+    """
+    Fanning out inserts one FanOut per target straight from the database.
+    """
+    Follow.objects.create(source=other_identity, target=identity)
+    Follow.objects.create(source=remote_identity, target=identity)
+    post = Post.objects.create(
+        content="<p>Hello</p>",
+        author=identity,
+        local=True,
+        visibility=Post.Visibilities.public,
+    )
+    PostStates.targets_fan_out(post, FanOut.Types.post)
+
+    fan_outs = FanOut.objects.filter(subject_post=post)
+    assert {f.identity for f in fan_outs} == post.get_targets()
+    for fan_out in fan_outs:
+        assert fan_out.type == FanOut.Types.post
+        assert fan_out.state == "new"
+        assert fan_out.state_changed is not None
+        assert fan_out.created is not None
@@ -11,6 +11,7 @@ from activities.models import (
     TimelineEvent,
 )
 from activities.services import PostService, TimelineService
+from api.pagination import MastodonPaginator
 from core.ld import format_ld_date
 from stator.exceptions import TryAgainLater
 from users.models import Block, Follow, Identity, InboxMessage
@@ -439,3 +440,37 @@ def test_handle_clear_timeline_translates_deadlock_to_tryagainlater(
     with patch.object(TimelineEvent, "objects", _OtherErrorQuerySet()):
         with pytest.raises(OperationalError):
             TimelineEvent.handle_clear_timeline(message)
+
+
+@pytest.mark.django_db
+def test_home_subject_id(identity: Identity, other_identity: Identity, config_system):
+    """
+    Home timeline events are ordered by the post ID for posts, and by the
+    interaction ID for boosts, and can be trimmed to the newest ones.
+    """
+    posts = [
+        Post.create_local(author=other_identity, content=f"<p>Hello {i}</p>")
+        for i in range(3)
+    ]
+    for post in posts:
+        TimelineEvent.add_post(identity=identity, post=post)
+    boost = PostInteraction.objects.create(
+        identity=other_identity,
+        post=posts[0],
+        type=PostInteraction.Types.boost,
+    )
+    TimelineEvent.add_post_interaction(identity=identity, interaction=boost)
+
+    home = TimelineService(identity).home()
+    assert {e.subject_id for e in home} == {p.pk for p in posts} | {boost.pk}
+    page = MastodonPaginator().paginate(
+        home, min_id=None, max_id=str(posts[2].pk), since_id=None, limit=1, home=True
+    )
+    assert [e.subject_post_id for e in page.results] == [posts[1].pk]
+
+    assert TimelineEvent.trim_home(identity.pk, keep=2) == 2
+    assert (
+        sorted(e.subject_id for e in home.all())
+        == sorted([p.pk for p in posts] + [boost.pk])[2:]
+    )
+    assert TimelineEvent.trim_home(identity.pk, keep=2) == 0
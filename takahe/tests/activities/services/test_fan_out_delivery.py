@@ -0,0 +1,116 @@
+import datetime
+import json
+
+import pytest
+from django.utils import timezone
+from pytest_httpx import HTTPXMock
+
+from activities.models import FanOut, FanOutStates, Post
+from activities.services import FanOutDeliveryService
+from stator.runner import StatorRunner
+from users.models import Domain, Identity
+
+
+def _remote(domain: str) -> Identity:
+    return Identity.objects.create(
+        actor_uri=f"https://{domain}/test-actor/",
+        inbox_uri=f"https://{domain}/inbox/",
+        username="test",
+        domain=Domain.objects.create(domain=domain, local=False, state="updated"),
+        local=False,
+        state="updated",
+    )
+
+
+def _lock_expiry():
+    return timezone.now() + datetime.timedelta(seconds=300)
+
+
+@pytest.mark.django_db
+def test_delivers_batch(httpx_mock: HTTPXMock, identity, keypair, config_system):
+    """
+    Remote FanOuts are sent together; refused ones are retried later.
+    """
+    post = Post.create_local(author=identity, content="<p>Hello</p>")
+    post = Post.objects.get(pk=post.pk)
+    ok = FanOut.objects.create(
+        identity=_remote("remote1.test"), type=FanOut.Types.post, subject_post=post
+    )
+    busy = FanOut.objects.create(
+        identity=_remote("remote2.test"), type=FanOut.Types.post, subject_post=post
+    )
+    httpx_mock.add_response(url="https://remote1.test/inbox/", status_code=202)
+    httpx_mock.add_response(url="https://remote2.test/inbox/", status_code=429)
+
+    assert FanOutDeliveryService().run(10, _lock_expiry()) == 2
+
+    ok.refresh_from_db()
+    busy.refresh_from_db()
+    assert ok.state == FanOutStates.sent.name
+    assert busy.state == FanOutStates.new.name
+    assert busy.state_locked_until is None
+    assert busy.state_next_attempt > timezone.now() + datetime.timedelta(seconds=30)
+    requests = httpx_mock.get_requests()
+    assert len(requests) == 2
+    # both carry the same rendered body
+    assert requests[0].content == requests[1].content
+    assert json.loads(requests[0].content)["type"] == "Create"
+    assert "Signature" in requests[0].headers
+
+
+@pytest.mark.django_db
+def test_refusal_ok(httpx_mock: HTTPXMock, identity, config_system):
+    post = Post.create_local(author=identity, content="<p>Hello</p>")
+    post = Post.objects.get(pk=post.pk)
+    fan_out = FanOut.objects.create(
+        identity=_remote("remote1.test"),
+        type=FanOut.Types.post_deleted,
+        subject_post=post,
+    )
+    httpx_mock.add_response(url="https://remote1.test/inbox/", status_code=401)
+    FanOutDeliveryService().run(10, _lock_expiry())
+    fan_out.refresh_from_db()
+    assert fan_out.state == FanOutStates.sent.name
+
+
+@pytest.mark.django_db
+def test_runner_batch(httpx_mock: HTTPXMock, identity, config_system):
+    post = Post.create_local(author=identity, content="<p>Hello</p>")
+    post = Post.objects.get(pk=post.pk)
+    fan_out = FanOut.objects.create(
+        identity=_remote("remote1.test"), type=FanOut.Types.post, subject_post=post
+    )
+    httpx_mock.add_response(url="https://remote1.test/inbox/", status_code=202)
+    StatorRunner([FanOut], batch_models=[FanOut]).run_single_cycle()
+    fan_out.refresh_from_db()
+    assert fan_out.state == FanOutStates.sent.name
+
+
+@pytest.mark.django_db
+def test_cancelled_before_lock_expires(httpx_mock: HTTPXMock, identity, config_system):
+    """
+    Deliveries still going when the lock is about to expire are retried later.
+    """
+    post = Post.create_local(author=identity, content="<p>Hello</p>")
+    post = Post.objects.get(pk=post.pk)
+    fan_out = FanOut.objects.create(
+        identity=_remote("remote1.test"), type=FanOut.Types.post, subject_post=post
+    )
+    lock_expiry = timezone.now() + datetime.timedelta(seconds=10)
+    assert FanOutDeliveryService().run(10, lock_expiry) == 1
+    fan_out.refresh_from_db()
+    assert fan_out.state == FanOutStates.new.name
+    assert fan_out.state_locked_until is None
+    assert not httpx_mock.get_requests()
+
+
+def test_claim_limit(settings, monkeypatch):
+    monkeypatch.setattr(settings.SETUP, "REMOTE_TIMEOUT", 5.0)
+    service = FanOutDeliveryService(concurrency=10)
+    assert service.claim_limit(300) == 300
+    assert service.claim_limit(0) == 1
+
+
+def test_runner_rejects_unbatched_models():
+    with pytest.raises(ValueError, match="activities.post"):
+        StatorRunner([Post], batch_models=[Post])
@@ -0,0 +1,109 @@
+"""Regression tests for N+1 queries when rendering statuses."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from activities.models import (
+    Post,
+    PostAttachment,
+    PostAttachmentStates,
+    PostInteraction,
+    TimelineEvent,
+)
+from activities.services import PostService
+from api import schemas
+from users.models import Domain, Identity
+
+
+def _add_posts(identity: Identity, count: int, start: int):
+    """
+    Puts `count` posts by new remote authors on identity's home timeline,
+    each with an attachment and a mention, replying to and quoting an
+    earlier post, plus a boost of each by another new author.
+    """
+    domain = Domain.objects.get_or_create(
+        domain="remote.test", defaults={"local": False, "state": "updated"}
+    )[0]
+    first = Post.create_local(author=identity, content="<p>First</p>")
+    for i in range(start, start + count):
+        author, booster = [
+            Identity.objects.create(
+                actor_uri=f"https://remote.test/{name}{i}/",
+                profile_uri=f"https://remote.test/@{name}{i}/",
+                username=f"{name}{i}",
+                domain=domain,
+                name=f"{name} {i}",
+                local=False,
+                state="updated",
+            )
+            for name in ["author", "booster"]
+        ]
+        post = Post.objects.create(
+            author=author,
+            local=False,
+            content=f"<p>Post {i}</p>",
+            object_uri=f"https://remote.test/posts/{i}/",
+            in_reply_to=first.object_uri,
+            quote_url=first.object_uri,
+        )
+        post.mentions.add(identity)
+        PostAttachment.objects.create(
+            post=post,
+            author=author,
+            mimetype="image/png",
+            remote_url=f"https://remote.test/{i}.png",
+            state=PostAttachmentStates.fetched,
+        )
+        TimelineEvent.add_post(identity, post)
+        boost = PostInteraction.objects.create(
+            identity=booster, post=post, type=PostInteraction.Types.boost
+        )
+        TimelineEvent.add_post_interaction(identity, boost)
+
+
+def _count_queries(api_client, url: str) -> tuple[int, list]:
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries), response.json()
+
+
+@pytest.mark.django_db
+def test_home_timeline_query_count(api_client, identity):
+    """
+    Rendering a home timeline page takes the same number of queries whatever
+    the number of posts, authors and boosts on it.
+    """
+    _add_posts(identity, 2, 0)
+    few, statuses = _count_queries(api_client, "/api/v1/timelines/home?limit=40")
+    assert len(statuses) == 4
+    _add_posts(identity, 8, 2)
+    many, statuses = _count_queries(api_client, "/api/v1/timelines/home?limit=40")
+    assert len(statuses) == 20
+    assert many == few
+    post = next(s for s in statuses if s["reblog"] is None)
+    assert post["quote"]["quoted_status"]["content"] == "<p>First</p>"
+    assert post["in_reply_to_account_id"] == str(identity.pk)
+    assert post["mentions"][0]["id"] == str(identity.pk)
+    assert len(post["media_attachments"]) == 1
+
+
+@pytest.mark.django_db
+def test_map_from_post_query_count(identity):
+    """
+    Same for a plain list of posts.
+    """
+
+    def render() -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            posts = list(
+                PostService.queryset().filter(author__local=False).order_by("-id")
+            )
+            schemas.Status.map_from_post(posts, identity)
+        return len(ctx.captured_queries)
+
+    _add_posts(identity, 2, 0)
+    few = render()
+    _add_posts(identity, 8, 2)
+    assert render() == few
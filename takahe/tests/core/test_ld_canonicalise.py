@@ -0,0 +1,540 @@
+import copy
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from core.ld import CompiledContext, canonicalise
+from core.signatures import LDSignature
+
+MASTODON_CONTEXT = [
+    "https://www.w3.org/ns/activitystreams",
+    {
+        "ostatus": "http://ostatus.org#",
+        "atomUri": "ostatus:atomUri",
+        "inReplyToAtomUri": "ostatus:inReplyToAtomUri",
+        "conversation": "ostatus:conversation",
+        "sensitive": "as:sensitive",
+        "toot": "http://joinmastodon.org/ns#",
+        "votersCount": "toot:votersCount",
+        "blurhash": "toot:blurhash",
+        "focalPoint": {"@container": "@list", "@id": "toot:focalPoint"},
+        "Hashtag": "as:Hashtag",
+        "Emoji": "toot:Emoji",
+    },
+]
+
+MASTODON_ACTOR_CONTEXT = [
+    "https://www.w3.org/ns/activitystreams",
+    "https://w3id.org/security/v1",
+    {
+        "manuallyApprovesFollowers": "as:manuallyApprovesFollowers",
+        "toot": "http://joinmastodon.org/ns#",
+        "featured": {"@id": "toot:featured", "@type": "@id"},
+        "featuredTags": {"@id": "toot:featuredTags", "@type": "@id"},
+        "alsoKnownAs": {"@id": "as:alsoKnownAs", "@type": "@id"},
+        "movedTo": {"@id": "as:movedTo", "@type": "@id"},
+        "schema": "http://schema.org#",
+        "PropertyValue": "schema:PropertyValue",
+        "value": "schema:value",
+        "discoverable": "toot:discoverable",
+        "Device": "toot:Device",
+        "Ed25519Signature": "toot:Ed25519Signature",
+        "Ed25519Key": "toot:Ed25519Key",
+        "Curve25519Key": "toot:Curve25519Key",
+        "EncryptedMessage": "toot:EncryptedMessage",
+        "publicKeyBase64": "toot:publicKeyBase64",
+        "deviceId": "toot:deviceId",
+        "claim": {"@type": "@id", "@id": "toot:claim"},
+        "fingerprintKey": {"@type": "@id", "@id": "toot:fingerprintKey"},
+        "identityKey": {"@type": "@id", "@id": "toot:identityKey"},
+        "devices": {"@type": "@id", "@id": "toot:devices"},
+        "messageFranking": "toot:messageFranking",
+        "messageType": "toot:messageType",
+        "cipherText": "toot:cipherText",
+        "suspended": "toot:suspended",
+        "memorial": "toot:memorial",
+        "indexable": "toot:indexable",
+        "focalPoint": {"@container": "@list", "@id": "toot:focalPoint"},
+    },
+]
+
+PUBLIC = "https://www.w3.org/ns/activitystreams#Public"
+
+# Activities as captured from the wire (trimmed of signatures), covering the
+# servers and shapes we see most
+ACTIVITIES = {
+    "mastodon_create_note": {
+        "@context": MASTODON_CONTEXT,
+        "id": "https://mastodon.example/users/alice/statuses/1/activity",
+        "type": "Create",
+        "actor": "https://mastodon.example/users/alice",
+        "published": "2024-05-01T12:00:00Z",
+        "to": [PUBLIC],
+        "cc": [
+            "https://mastodon.example/users/alice/followers",
+            "https://neodb.example/@bob",
+        ],
+        "object": {
+            "id": "https://mastodon.example/users/alice/statuses/1",
+            "type": "Note",
+            "summary": None,
+            "inReplyTo": "https://neodb.example/@bob/posts/9/",
+            "published": "2024-05-01T12:00:00Z",
+            "url": "https://mastodon.example/@alice/1",
+            "attributedTo": "https://mastodon.example/users/alice",
+            "to": [PUBLIC],
+            "cc": [
+                "https://mastodon.example/users/alice/followers",
+                "https://neodb.example/@bob",
+            ],
+            "sensitive": False,
+            "atomUri": "https://mastodon.example/users/alice/statuses/1",
+            "inReplyToAtomUri": "https://neodb.example/@bob/posts/9/",
+            "conversation": "tag:mastodon.example,2024-05-01:objectId=1:objectType=Conversation",
+            "content": '<p><span class="h-card"><a href="https://neodb.example/@bob">@bob</a></span> hello <a href="https://mastodon.example/tags/books">#books</a> :blobcat:</p>',
+            "contentMap": {
+                "en": '<p><span class="h-card"><a href="https://neodb.example/@bob">@bob</a></span> hello <a href="https://mastodon.example/tags/books">#books</a> :blobcat:</p>'
+            },
+            "attachment": [
+                {
+                    "type": "Document",
+                    "mediaType": "image/jpeg",
+                    "url": "https://files.mastodon.example/media/1.jpg",
+                    "name": "A cover",
+                    "blurhash": "UBL_:rOpGG-oBUNG,qRj2so|=eE1w^n4S5NH",
+                    "focalPoint": [0.0, 0.5],
+                    "width": 1200,
+                    "height": 800,
+                },
+                {
+                    "type": "Document",
+                    "mediaType": "image/png",
+                    "url": "https://files.mastodon.example/media/2.png",
+                    "name": None,
+                    "blurhash": "U00000fQfQfQfQfQfQfQfQfQfQfQfQfQfQfQ",
+                    "focalPoint": [0.0, 0.0],
+                    "width": 64,
+                    "height": 64,
+                },
+            ],
+            "tag": [
+                {
+                    "type": "Mention",
+                    "href": "https://neodb.example/@bob",
+                    "name": "@bob@neodb.example",
+                },
+                {
+                    "type": "Hashtag",
+                    "href": "https://mastodon.example/tags/books",
+                    "name": "#books",
+                },
+                {
+                    "id": "https://mastodon.example/emojis/1",
+                    "type": "Emoji",
+                    "name": ":blobcat:",
+                    "updated": "2023-01-01T00:00:00Z",
+                    "icon": {
+                        "type": "Image",
+                        "mediaType": "image/png",
+                        "url": "https://files.mastodon.example/emoji/blobcat.png",
+                    },
+                },
+            ],
+            "replies": {
+                "id": "https://mastodon.example/users/alice/statuses/1/replies",
+                "type": "Collection",
+                "first": {
+                    "type": "CollectionPage",
+                    "next": "https://mastodon.example/users/alice/statuses/1/replies?only_other_accounts=true&page=true",
+                    "partOf": "https://mastodon.example/users/alice/statuses/1/replies",
+                    "items": [],
+                },
+            },
+        },
+    },
+    "mastodon_person": {
+        "@context": MASTODON_ACTOR_CONTEXT,
+        "id": "https://mastodon.example/users/alice",
+        "type": "Person",
+        "following": "https://mastodon.example/users/alice/following",
+        "followers": "https://mastodon.example/users/alice/followers",
+        "inbox": "https://mastodon.example/users/alice/inbox",
+        "outbox": "https://mastodon.example/users/alice/outbox",
+        "featured": "https://mastodon.example/users/alice/collections/featured",
+        "featuredTags": "https://mastodon.example/users/alice/collections/tags",
+        "preferredUsername": "alice",
+        "name": "Alice",
+        "summary": "<p>Reads a lot.</p>",
+        "url": "https://mastodon.example/@alice",
+        "manuallyApprovesFollowers": False,
+        "discoverable": True,
+        "indexable": True,
+        "published": "2022-11-01T00:00:00Z",
+        "memorial": False,
+        "devices": "https://mastodon.example/users/alice/collections/devices",
+        "alsoKnownAs": [
+            "https://old.example/users/alice",
+            "https://older.example/users/alice",
+        ],
+        "publicKey": {
+            "id": "https://mastodon.example/users/alice#main-key",
+            "owner": "https://mastodon.example/users/alice",
+            "publicKeyPem": "-----BEGIN PUBLIC KEY-----\nMIIBIjANBgkq\n-----END PUBLIC KEY-----\n",
+        },
+        "tag": [],
+        "attachment": [
+            {
+                "type": "PropertyValue",
+                "name": "Website",
+                "value": '<a href="https://alice.example">alice.example</a>',
+            },
+            {"type": "PropertyValue", "name": "Pronouns", "value": "she/her"},
+        ],
+        "endpoints": {"sharedInbox": "https://mastodon.example/inbox"},
+        "icon": {
+            "type": "Image",
+            "mediaType": "image/png",
+            "url": "https://files.mastodon.example/avatars/alice.png",
+        },
+        "image": {
+            "type": "Image",
+            "mediaType": "image/jpeg",
+            "url": "https://files.mastodon.example/headers/alice.jpg",
+        },
+    },
+    "mastodon_follow": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://mastodon.example/2b0cd2a4-c0b3-4a6a-8b0e-2c6a1b7c9f1e",
+        "type": "Follow",
+        "actor": "https://mastodon.example/users/alice",
+        "object": "https://neodb.example/@bob/",
+    },
+    "mastodon_accept": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://mastodon.example/users/alice#accepts/follows/42",
+        "type": "Accept",
+        "actor": "https://mastodon.example/users/alice",
+        "object": {
+            "id": "https://neodb.example/@bob/follow/7/",
+            "type": "Follow",
+            "actor": "https://neodb.example/@bob/",
+            "object": "https://mastodon.example/users/alice",
+        },
+    },
+    "mastodon_like": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://mastodon.example/users/alice#likes/99",
+        "type": "Like",
+        "actor": "https://mastodon.example/users/alice",
+        "object": "https://neodb.example/@bob/posts/9/",
+    },
+    "mastodon_undo_announce": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://mastodon.example/users/alice/statuses/5/activity#undo",
+        "type": "Undo",
+        "actor": "https://mastodon.example/users/alice",
+        "to": [PUBLIC],
+        "object": {
+            "id": "https://mastodon.example/users/alice/statuses/5/activity",
+            "type": "Announce",
+            "actor": "https://mastodon.example/users/alice",
+            "published": "2024-05-01T12:00:00Z",
+            "to": [PUBLIC],
+            "cc": [
+                "https://neodb.example/@bob/",
+                "https://mastodon.example/users/alice/followers",
+            ],
+            "object": "https://neodb.example/@bob/posts/9/",
+        },
+    },
+    "mastodon_delete": {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            {"ostatus": "http://ostatus.org#", "atomUri": "ostatus:atomUri"},
+        ],
+        "id": "https://mastodon.example/users/alice/statuses/1#delete",
+        "type": "Delete",
+        "actor": "https://mastodon.example/users/alice",
+        "to": [PUBLIC],
+        "object": {
+            "id": "https://mastodon.example/users/alice/statuses/1",
+            "type": "Tombstone",
+            "atomUri": "https://mastodon.example/users/alice/statuses/1",
+        },
+    },
+    "mastodon_question": {
+        "@context": MASTODON_CONTEXT,
+        "id": "https://mastodon.example/users/alice/statuses/3",
+        "type": "Question",
+        "attributedTo": "https://mastodon.example/users/alice",
+        "published": "2024-05-02T10:00:00Z",
+        "endTime": "2024-05-03T10:00:00Z",
+        "to": [PUBLIC],
+        "cc": ["https://mastodon.example/users/alice/followers"],
+        "content": "<p>Paper or ebook?</p>",
+        "votersCount": 12,
+        "oneOf": [
+            {
+                "type": "Note",
+                "name": "Paper",
+                "replies": {"type": "Collection", "totalItems": 8},
+            },
+            {
+                "type": "Note",
+                "name": "Ebook",
+                "replies": {"type": "Collection", "totalItems": 4},
+            },
+        ],
+    },
+    "misskey_note": {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            "https://w3id.org/security/v1",
+            {
+                "Key": "sec:Key",
+                "manuallyApprovesFollowers": "as:manuallyApprovesFollowers",
+                "sensitive": "as:sensitive",
+                "Hashtag": "as:Hashtag",
+                "quoteUrl": "as:quoteUrl",
+                "toot": "http://joinmastodon.org/ns#",
+                "Emoji": "toot:Emoji",
+                "featured": "toot:featured",
+                "discoverable": "toot:discoverable",
+                "schema": "http://schema.org#",
+                "PropertyValue": "schema:PropertyValue",
+                "value": "schema:value",
+                "misskey": "https://misskey-hub.net/ns#",
+                "_misskey_content": "misskey:_misskey_content",
+                "_misskey_quote": "misskey:_misskey_quote",
+                "_misskey_reaction": "misskey:_misskey_reaction",
+                "_misskey_votes": "misskey:_misskey_votes",
+                "isCat": "misskey:isCat",
+                "vcard": "http://www.w3.org/2006/vcard/ns#",
+            },
+        ],
+        "id": "https://misskey.example/notes/9abc",
+        "type": "Note",
+        "attributedTo": "https://misskey.example/users/9xyz",
+        "content": "<p>nya</p>",
+        "_misskey_content": "nya",
+        "source": {"content": "nya", "mediaType": "text/x.misskeymarkdown"},
+        "quoteUrl": "https://neodb.example/@bob/posts/9/",
+        "_misskey_quote": "https://neodb.example/@bob/posts/9/",
+        "published": "2024-05-01T12:00:00.000Z",
+        "to": [PUBLIC],
+        "cc": ["https://misskey.example/users/9xyz/followers"],
+        "inReplyTo": None,
+        "attachment": [],
+        "sensitive": False,
+        "tag": [],
+    },
+    "pleroma_note": {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            "https://pleroma.example/schemas/litepub-0.1.jsonld",
+            {"@language": "und"},
+        ],
+        "id": "https://pleroma.example/objects/4f2c",
+        "type": "Note",
+        "actor": "https://pleroma.example/users/carol",
+        "attributedTo": "https://pleroma.example/users/carol",
+        "content": "hi from pleroma",
+        "context": "https://pleroma.example/contexts/8e1a",
+        "conversation": "https://pleroma.example/contexts/8e1a",
+        "published": "2024-05-01T12:00:00.123456Z",
+        "sensitive": None,
+        "summary": "",
+        "tag": [],
+        "to": [PUBLIC],
+        "cc": ["https://pleroma.example/users/carol/followers"],
+    },
+    "neodb_review": {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            {
+                "blurhash": "toot:blurhash",
+                "Emoji": "toot:Emoji",
+                "focalPoint": {"@container": "@list", "@id": "toot:focalPoint"},
+                "Hashtag": "as:Hashtag",
+                "manuallyApprovesFollowers": "as:manuallyApprovesFollowers",
+                "sensitive": "as:sensitive",
+                "toot": "http://joinmastodon.org/ns#",
+                "votersCount": "toot:votersCount",
+                "featured": {"@id": "toot:featured", "@type": "@id"},
+            },
+        ],
+        "id": "https://neodb.example/@bob/posts/9/#create",
+        "type": "Create",
+        "actor": "https://neodb.example/@bob/",
+        "to": ["as:Public"],
+        "cc": ["https://neodb.example/@bob/followers/"],
+        "object": {
+            "id": "https://neodb.example/@bob/posts/9/",
+            "type": "Note",
+            "to": ["as:Public"],
+            "cc": ["https://neodb.example/@bob/followers/"],
+            "published": "2024-05-01T12:00:00.000Z",
+            "attributedTo": "https://neodb.example/@bob/",
+            "content": "<p>reviewed <a href='https://neodb.example/book/1'>Dune</a></p>",
+            "contentMap": {"en": "<p>reviewed Dune</p>"},
+            "sensitive": False,
+            "url": "https://neodb.example/@bob/posts/9/",
+            "interactionPolicy": {"canQuote": {"automaticApproval": ["as:Public"]}},
+            "tag": [
+                {
+                    "href": "https://neodb.example/tags/books/",
+                    "name": "#books",
+                    "type": "Hashtag",
+                }
+            ],
+            "relatedWith": [
+                {
+                    "id": "https://neodb.example/review/2",
+                    "type": "Review",
+                    "withRegardTo": "https://neodb.example/book/1",
+                    "attributedTo": "https://neodb.example/@bob/",
+                    "name": "Great",
+                    "content": "A classic",
+                    "mediaType": "text/markdown",
+                    "published": "2024-05-01T12:00:00.000Z",
+                    "updated": "2024-05-01T12:00:00.000Z",
+                    "href": "https://neodb.example/review/2",
+                },
+                {
+                    "id": "https://neodb.example/mark/3",
+                    "type": "Status",
+                    "status": "complete",
+                    "withRegardTo": "https://neodb.example/book/1",
+                    "attributedTo": "https://neodb.example/@bob/",
+                    "published": "2024-05-01T12:00:00.000Z",
+                    "updated": "2024-05-01T12:00:00.000Z",
+                    "href": "https://neodb.example/mark/3",
+                },
+            ],
+            "replies": {
+                "id": "https://neodb.example/@bob/posts/9/replies/",
+                "type": "Collection",
+                "totalItems": 1,
+                "first": {
+                    "type": "CollectionPage",
+                    "partOf": "https://neodb.example/@bob/posts/9/replies/",
+                    "items": ["https://mastodon.example/users/alice/statuses/1"],
+                },
+            },
+        },
+    },
+    "outbound_without_context": {
+        "id": "https://neodb.example/@bob/posts/10/",
+        "type": "Note",
+        "to": ["as:Public"],
+        "published": "2024-05-01T12:00:00.000Z",
+        "attributedTo": "https://neodb.example/@bob/",
+        "content": "<p>short</p>",
+        "sensitive": False,
+        "url": "https://neodb.example/@bob/posts/10/",
+        "quote": "https://mastodon.example/users/alice/statuses/1",
+        "quoteUrl": "https://mastodon.example/users/alice/statuses/1",
+        "_misskey_quote": "https://mastodon.example/users/alice/statuses/1",
+        "toot:votersCount": 3,
+    },
+    "collection_page": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://mastodon.example/users/alice/outbox?page=true",
+        "type": "OrderedCollectionPage",
+        "partOf": "https://mastodon.example/users/alice/outbox",
+        "orderedItems": [
+            "https://mastodon.example/users/alice/statuses/1",
+            "https://mastodon.example/users/alice/statuses/2",
+        ],
+    },
+    "single_values_in_lists": {
+        "@context": "https://www.w3.org/ns/activitystreams",
+        "id": "https://gts.example/users/dave/statuses/1",
+        "type": ["Note"],
+        "to": PUBLIC,
+        "attachment": [
+            {
+                "type": "http://schema.org#PropertyValue",
+                "name": "Location",
+                "http://schema.org#value": "Test Location",
+            }
+        ],
+    },
+}
+
+
+def slow_canonicalise(document, **kwargs):
+    with mock.patch.object(CompiledContext, "compact", return_value=None):
+        return canonicalise(document, **kwargs)
+
+
+@pytest.mark.parametrize("outbound", [True, False])
+@pytest.mark.parametrize("include_security", [False, True])
+@pytest.mark.parametrize("name", ACTIVITIES.keys())
+def test_equivalent(name, include_security, outbound):
+    """
+    Tests that canonicalising takes the same document to the same result with
+    or without the fast path
+    """
+    document = ACTIVITIES[name]
+    assert canonicalise(
+        copy.deepcopy(document), include_security=include_security, outbound=outbound
+    ) == slow_canonicalise(
+        copy.deepcopy(document), include_security=include_security, outbound=outbound
+    )
+
+
+def test_fast_path_taken():
+    """
+    Tests that compact documents skip the expand/compact round-trip, and
+    others don't
+    """
+    results = []
+    compact = CompiledContext.compact
+
+    def spy(self, document):
+        results.append(compact(self, document) is not None)
+        return results[-1]
+
+    with mock.patch.object(CompiledContext, "compact", spy):
+        for name in ["mastodon_create_note", "mastodon_person", "neodb_review"]:
+            canonicalise(copy.deepcopy(ACTIVITIES[name]), include_security=True)
+        # Both of these change shape (a language default, a one-item type)
+        canonicalise(copy.deepcopy(ACTIVITIES["pleroma_note"]))
+        canonicalise(copy.deepcopy(ACTIVITIES["single_values_in_lists"]))
+    assert results == [True, True, True, False, False]
+
+
+def test_normalized_hash_cached():
+    """
+    Tests that documents seen before are not normalised again
+    """
+    document = ACTIVITIES["mastodon_follow"]
+    first = LDSignature.normalized_hash(document, cache=True)
+    with mock.patch("core.signatures.jsonld.normalize") as normalize:
+        assert LDSignature.normalized_hash(copy.deepcopy(document), cache=True) == first
+    normalize.assert_not_called()
+    assert LDSignature.normalized_hash(document) == first
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TAKAHE_BENCHMARK"), reason="set TAKAHE_BENCHMARK to run"
+)
+def test_benchmark():
+    """
+    Times both paths over the captured activities; the fast one must win
+    """
+    rounds = 20
+    timings = {}
+    for label, function in [("full", slow_canonicalise), ("fast", canonicalise)]:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for document in ACTIVITIES.values():
+                function(copy.deepcopy(document), include_security=True)
+        timings[label] = time.perf_counter() - started
+    assert timings["fast"] < timings["full"], (
+        f"canonicalise x{rounds * len(ACTIVITIES)}: "
+        f"full {timings['full']:.3f}s, fast {timings['fast']:.3f}s"
+    )
@@ -8,6 +8,8 @@ from pytest_httpx import HTTPXMock
 from core.signatures import (
     HttpSignature,
     LDSignature,
+    PublicKeyCache,
+    RsaKeys,
     VerificationError,
     VerificationFormatError,
 )
@@ -107,6 +109,42 @@ def test_sign_http(httpx_mock: HTTPXMock, keypair):
     HttpSignature.verify_request(fake_request, keypair["public_key"])
 
 
+def test_sign_http_prepared_body(httpx_mock: HTTPXMock, keypair):
+    """
+    Tests that a body prepared once can be sent to several inboxes, each
+    request getting its own signature over the shared digest.
+    """
+    body = HttpSignature.prepare_body({"id": "https://example.com/test-create"})
+    httpx_mock.add_response()
+    httpx_mock.add_response()
+    for path in ["/inbox-a", "/inbox-b"]:
+        HttpSignature.signed_request(
+            uri=f"https://example.com{path}",
+            body=body,
+            private_key=keypair["private_key"],
+            key_id=keypair["public_key_id"],
+        )
+    for path, outbound_request in zip(
+        ["/inbox-a", "/inbox-b"], httpx_mock.get_requests()
+    ):
+        assert outbound_request.content == body.content
+        assert outbound_request.headers["digest"] == body.digest
+        fake_request = RequestFactory().post(
+            path=path,
+            data=outbound_request.content,
+            content_type=outbound_request.headers["content-type"],
+            HTTP_HOST="example.com",
+            HTTP_DATE=outbound_request.headers["date"],
+            HTTP_SIGNATURE=outbound_request.headers["signature"],
+            HTTP_DIGEST=outbound_request.headers["digest"],
+        )
+        HttpSignature.verify_request(fake_request, keypair["public_key"])
+    # the private key was parsed once
+    assert RsaKeys.load_private_key(keypair["private_key"]) is (
+        RsaKeys.load_private_key(keypair["private_key"])
+    )
+
+
 def test_verify_http(keypair):
     """
     Tests verifying HTTP requests against a known good example
@@ -146,6 +184,25 @@ def test_verify_http_bad_signature(keypair):
         )
 
 
+def test_public_key_cache(keypair):
+    """
+    Tests parsed public keys are reused until the key id changes hands
+    """
+    cache = PublicKeyCache(maxsize=2)
+    key_id = "https://example.com/test-actor#main-key"
+    parsed = cache.get(key_id, keypair["public_key"])
+    assert cache.get(key_id, keypair["public_key"]) is parsed
+    assert (cache.hits, cache.misses) == (1, 1)
+    # a rotated key is never served from the old entry
+    _, rotated = RsaKeys.generate_keypair()
+    assert cache.get(key_id, rotated) is not parsed
+    assert cache.misses == 2
+    cache.invalidate(key_id)
+    cache.get(key_id, rotated)
+    assert cache.misses == 3
+    assert cache.hit_rate == 0.25
+
+
 def test_headers_from_request_missing_header_raises_format_error():
     """
     A header listed in the signature but absent from the request must raise
@@ -0,0 +1,42 @@
+import pytest
+
+from activities.models import FanOut, FanOutStates, Post
+from stator.notify import StatorListener
+from stator.runner import StatorRunner
+
+
+@pytest.mark.django_db(transaction=True)
+def test_notify_ready(identity, remote_identity, config_system):
+    """
+    Tests that rows becoming ready wake a listener, and others don't
+    """
+    post = Post.objects.create(author=identity, content="<p>Hello</p>")
+    listener = StatorListener([FanOut])
+    try:
+        # Connect, and skip anything from the setup
+        listener.wait(0)
+        fan_out = FanOut.objects.create(
+            identity=remote_identity, type=FanOut.Types.post, subject_post=post
+        )
+        assert listener.wait(5) == {FanOut}
+        # Moving to a terminal state, or retrying later, is not a wakeup
+        fan_out.transition_perform(FanOutStates.sent)
+        assert listener.wait(0.1) == set()
+    finally:
+        listener.close()
+
+
+@pytest.mark.django_db
+def test_runner_polls_pending():
+    """
+    Tests that a listening runner only claims rows for notified models
+    """
+    runner = StatorRunner([FanOut])
+    runner.listener = StatorListener([FanOut])
+    runner.handled = {}
+    runner.add_transition_tasks(call_inline=True)
+    assert runner.pending == set()
+    runner.pending.add(FanOut)
+    runner.add_transition_tasks(call_inline=True)
+    # Nothing was ready, so it's no longer pending
+    assert runner.pending == set()
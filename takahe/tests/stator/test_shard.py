@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from activities.models import FanOut, Post
+from stator.models import SHARD_BUCKETS, RunnerHeartbeat, Stats
+
+
+@pytest.mark.django_db
+def test_shards_rebalance():
+    """
+    Tests that live runners split a model's buckets, and gone ones don't count
+    """
+    RunnerHeartbeat.beat("a", ["activities.fanout", "users.inboxmessage"])
+    assert RunnerHeartbeat.shards("a", ["activities.fanout"]) == {
+        "activities.fanout": (0, SHARD_BUCKETS - 1)
+    }
+    RunnerHeartbeat.beat("b", ["activities.fanout"])
+    assert RunnerHeartbeat.shards("a", ["activities.fanout", "users.inboxmessage"]) == {
+        "activities.fanout": (0, SHARD_BUCKETS // 2 - 1),
+        "users.inboxmessage": (0, SHARD_BUCKETS - 1),
+    }
+    assert RunnerHeartbeat.shards("b", ["activities.fanout"]) == {
+        "activities.fanout": (SHARD_BUCKETS // 2, SHARD_BUCKETS - 1)
+    }
+    RunnerHeartbeat.objects.filter(runner_id="b").update(
+        heartbeat=timezone.now() - datetime.timedelta(minutes=5)
+    )
+    assert RunnerHeartbeat.shards("a", ["activities.fanout"]) == {
+        "activities.fanout": (0, SHARD_BUCKETS - 1)
+    }
+
+
+@pytest.mark.django_db
+def test_shards_partition_rows(identity, remote_identity, config_system):
+    """
+    Tests that runners with complementary shards claim every row exactly once
+    """
+    post = Post.objects.create(author=identity, content="<p>Hello</p>")
+    fan_outs = {
+        FanOut.objects.create(
+            identity=remote_identity, type=FanOut.Types.post, subject_post=post
+        ).pk
+        for _ in range(20)
+    }
+    lock_expiry = timezone.now() + datetime.timedelta(minutes=5)
+    first = (0, SHARD_BUCKETS // 2 - 1)
+    second = (SHARD_BUCKETS // 2, SHARD_BUCKETS - 1)
+    assert FanOut.transition_ready_count(first) + FanOut.transition_ready_count(
+        second
+    ) == len(fan_outs)
+    claimed_first = {
+        f.pk for f in FanOut.transition_get_with_lock(50, lock_expiry, first)
+    }
+    claimed_second = {
+        f.pk for f in FanOut.transition_get_with_lock(50, lock_expiry, second)
+    }
+    assert not claimed_first & claimed_second
+    assert claimed_first | claimed_second == fan_outs
+
+
+@pytest.mark.django_db
+def test_shard_stats():
+    stats = Stats.get_for_model(FanOut)
+    stats.set_shard("a", (0, 511), 0, 3)
+    stats.statistics["shards"]["a"]["updated"] -= 60
+    stats.set_shard("a", (0, 511), 120, 5)
+    stats.set_shard("b", (512, 1023), 0, 1)
+    stats.trim_data()
+    shards = stats.recent_shards()
+    assert [s["runner_id"] for s in shards] == ["a", "b"]
+    assert shards[0]["queued"] == 5
+    assert shards[0]["rate"] == 2.0
+    assert shards[1]["rate"] is None
@@ -1,4 +1,7 @@
+import datetime
+
 import pytest
+from django.utils import timezone
 
 from users.models import Domain
 
@@ -51,3 +54,75 @@ def test_recursive_block():
 
     # An unrelated domain should not be blocked
     assert not Domain.get_remote_domain("example.com").recursively_blocked()
+
+
+@pytest.mark.django_db
+def test_delivery_circuit(identity, config_system):
+    """
+    Tests that the delivery circuit breaker opens after repeated connection
+    failures, holds back pending FanOuts, and closes after a successful probe
+    """
+    from activities.models import FanOut, Post
+    from users.models import Identity
+
+    domain = Domain.objects.create(domain="remote.test", local=False, state="updated")
+    remote = Identity.objects.create(
+        actor_uri="https://remote.test/test-actor/",
+        inbox_uri="https://remote.test/inbox/",
+        username="test",
+        domain=domain,
+        local=False,
+        state="updated",
+    )
+    post = Post.create_local(author=identity, content="<p>Hello</p>")
+    fan_out = FanOut.objects.create(
+        identity=remote, type=FanOut.Types.post, subject_post=post
+    )
+
+    domain.delivery_failed(Domain.CIRCUIT_FAILURES - 1)
+    assert domain.delivery_circuit == "closed"
+    assert domain.delivery_allowed()
+
+    domain.delivery_failed()
+    assert domain.delivery_circuit == "open"
+    assert not domain.delivery_allowed()
+    assert domain.delivery_backlog() == 1
+    fan_out.refresh_from_db()
+    assert fan_out.state_next_attempt == domain.delivery_paused_until
+
+    # Failures of deliveries already under way don't extend the pause
+    paused_until = domain.delivery_paused_until
+    domain.delivery_failed(20)
+    domain.refresh_from_db()
+    assert domain.delivery_paused_until == paused_until
+    assert domain.delivery_probes_failed == 0
+
+    # A failed probe doubles it
+    Domain.objects.filter(pk=domain.pk).update(
+        delivery_paused_until=timezone.now() - datetime.timedelta(seconds=1)
+    )
+    domain.refresh_from_db()
+    assert domain.delivery_allowed()
+    domain.delivery_failed()
+    assert domain.delivery_probes_failed == 1
+    assert domain.delivery_paused_until > timezone.now() + datetime.timedelta(
+        seconds=Domain.CIRCUIT_OPEN_MIN * 2 - 10
+    )
+    fan_out.refresh_from_db()
+    assert fan_out.state_next_attempt == domain.delivery_paused_until
+
+    # Once the pause is over, only one probe goes out
+    Domain.objects.filter(pk=domain.pk).update(
+        delivery_paused_until=timezone.now() - datetime.timedelta(seconds=1)
+    )
+    domain.refresh_from_db()
+    assert domain.delivery_circuit == "half-open"
+    other = Domain.objects.get(pk=domain.pk)
+    assert domain.delivery_allowed()
+    assert not other.delivery_allowed()
+
+    domain.delivery_succeeded()
+    domain.refresh_from_db()
+    assert domain.delivery_circuit == "closed"
+    assert domain.delivery_failures == 0
+    assert domain.delivery_probes_failed == 0
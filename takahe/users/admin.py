@@ -23,6 +23,26 @@ from users.models import (
 )
 
 
+class DeliveryCircuitFilter(admin.SimpleListFilter):
+    title = _("Delivery Circuit")
+    parameter_name = "circuit"
+
+    def lookups(self, request, model_admin):
+        return (
+            ("paused", _("Open or half-open")),
+            ("failing", _("Failing")),
+        )
+
+    def queryset(self, request, queryset):
+        match self.value():
+            case "paused":
+                return queryset.filter(delivery_paused_until__isnull=False)
+            case "failing":
+                return queryset.filter(delivery_failures__gt=0)
+            case _:
+                return queryset
+
+
 @admin.register(Domain)
 class DomainAdmin(admin.ModelAdmin):
     list_display = [
@@ -33,15 +53,19 @@ class DomainAdmin(admin.ModelAdmin):
         "software",
         "user_count",
         "public",
+        "delivery_circuit",
+        "delivery_failures",
     ]
-    list_filter = ("local", "blocked")
+    list_filter = ("local", "blocked", DeliveryCircuitFilter)
     search_fields = ("domain", "service_domain")
     autocomplete_fields = ("users",)
+    readonly_fields = ("delivery_circuit", "delivery_backlog")
     actions = [
         "force_outdated",
         "force_updated",
         "force_connection_issue",
         "fetch_nodeinfo",
+        "reset_delivery_circuit",
     ]
 
     @admin.action(description="Force State: outdated")
@@ -67,6 +91,20 @@ class DomainAdmin(admin.ModelAdmin):
                 instance.nodeinfo = info.model_dump()
                 instance.save()
 
+    @admin.action(description="Reset delivery circuit breaker")
+    def reset_delivery_circuit(self, request, queryset):
+        queryset.update(
+            delivery_failures=0, delivery_paused_until=None, delivery_probes_failed=0
+        )
+
+    @admin.display(description="Delivery circuit")
+    def delivery_circuit(self, instance):
+        return instance.delivery_circuit
+
+    @admin.display(description="Pending deliveries")
+    def delivery_backlog(self, instance):
+        return instance.delivery_backlog()
+
     @admin.display(description="Software")
     def software(self, instance):
         if instance.nodeinfo:
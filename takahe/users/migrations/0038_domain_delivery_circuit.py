@@ -0,0 +1,27 @@
+# Generated by Django 5.2.17 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0037_featureauthorization"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_failures",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_paused_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="delivery_probes_failed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
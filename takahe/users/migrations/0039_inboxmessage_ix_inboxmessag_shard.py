@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+import stator.models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0038_domain_delivery_circuit"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="inboxmessage",
+            index=models.Index(
+                models.F("state"),
+                stator.models.StatorShard("id"),
+                models.F("state_next_attempt"),
+                name="ix_inboxmessag_shard",
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import datetime
 import json
 import logging
 import re
@@ -10,7 +11,8 @@ import pydantic
 import urlman
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from core.models import Config
 from stator.models import State, StateField, StateGraph, StatorModel
@@ -117,6 +119,13 @@ class Domain(StatorModel):
     # Free-form notes field for admins
     notes = models.TextField(blank=True, null=True)
 
+    # Delivery circuit breaker: consecutive deliveries that could not connect,
+    # until when deliveries are held back once there were too many, and how
+    # many probes have failed since
+    delivery_failures = models.PositiveIntegerField(default=0)
+    delivery_paused_until = models.DateTimeField(blank=True, null=True)
+    delivery_probes_failed = models.PositiveIntegerField(default=0)
+
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
@@ -131,6 +140,17 @@ class Domain(StatorModel):
     class Meta:
         indexes: list = []
 
+    # Consecutive connection failures that open the delivery circuit breaker
+    CIRCUIT_FAILURES = 5
+    # How long it stays open, doubling with each failed probe up to the max
+    CIRCUIT_OPEN_MIN = 60 * 5
+    CIRCUIT_OPEN_MAX = 60 * 60 * 6
+    # How long a half-open probe has before another one may go out
+    CIRCUIT_PROBE_TIMEOUT = 60 * 2
+
+    # Set on the instance that claimed the half-open probe
+    delivery_probing = False
+
     @classmethod
     def is_valid_domain(cls, domain: str) -> bool:
         """
@@ -190,6 +210,111 @@ class Domain(StatorModel):
                 )
         super().save(*args, **kwargs)
 
+    ### Delivery circuit breaker ###
+
+    @property
+    def delivery_circuit(self) -> str:
+        if not self.delivery_paused_until:
+            return "closed"
+        if self.delivery_paused_until > timezone.now():
+            return "open"
+        return "half-open"
+
+    def delivery_allowed(self) -> bool:
+        """
+        Returns if a delivery to this domain may be attempted now. Once the
+        breaker has been open long enough, one delivery at a time is let
+        through as a probe.
+        """
+        if not self.delivery_paused_until:
+            return True
+        now = timezone.now()
+        if self.delivery_paused_until > now:
+            return False
+        # Half-open: claim the probe, unless another runner just did
+        probe_until = now + datetime.timedelta(seconds=self.CIRCUIT_PROBE_TIMEOUT)
+        if Domain.objects.filter(pk=self.pk, delivery_paused_until__lte=now).update(
+            delivery_paused_until=probe_until
+        ):
+            self.delivery_paused_until = probe_until
+            self.delivery_probing = True
+            return True
+        self.refresh_from_db(fields=["delivery_paused_until"])
+        return False
+
+    def delivery_succeeded(self) -> None:
+        """
+        Closes the breaker after a delivery reached the domain.
+        """
+        self.delivery_probing = False
+        if self.delivery_failures or self.delivery_paused_until:
+            Domain.objects.filter(pk=self.pk).update(
+                delivery_failures=0,
+                delivery_paused_until=None,
+                delivery_probes_failed=0,
+            )
+            self.delivery_failures = 0
+            self.delivery_paused_until = None
+            self.delivery_probes_failed = 0
+
+    def delivery_failed(self, count: int = 1) -> None:
+        """
+        Records deliveries that could not connect to the domain. The breaker
+        opens after enough of them in a row, and stays open for twice as
+        long each time the probe let through afterwards fails; either way,
+        the pending FanOuts to the domain are pushed back until it is probed
+        again. Failures of other deliveries while it is open change nothing.
+        """
+        from activities.models import FanOut, FanOutStates
+
+        probing, self.delivery_probing = self.delivery_probing, False
+        with transaction.atomic():
+            domain = Domain.objects.select_for_update().get(pk=self.pk)
+            if probing:
+                domain.delivery_probes_failed += 1
+                opened = True
+            elif domain.delivery_paused_until:
+                # Already open, or being probed by another delivery
+                self.delivery_paused_until = domain.delivery_paused_until
+                return
+            else:
+                domain.delivery_failures += count
+                opened = domain.delivery_failures >= self.CIRCUIT_FAILURES
+            if opened:
+                open_for = min(
+                    self.CIRCUIT_OPEN_MIN * 2 ** min(domain.delivery_probes_failed, 16),
+                    self.CIRCUIT_OPEN_MAX,
+                )
+                domain.delivery_paused_until = timezone.now() + datetime.timedelta(
+                    seconds=open_for
+                )
+            Domain.objects.filter(pk=self.pk).update(
+                delivery_failures=domain.delivery_failures,
+                delivery_paused_until=domain.delivery_paused_until,
+                delivery_probes_failed=domain.delivery_probes_failed,
+            )
+        self.delivery_failures = domain.delivery_failures
+        self.delivery_paused_until = domain.delivery_paused_until
+        self.delivery_probes_failed = domain.delivery_probes_failed
+        if not opened:
+            return
+        logger.warning(
+            f"Pausing deliveries to {self.domain} until {self.delivery_paused_until}"
+        )
+        FanOut.objects.filter(
+            models.Q(state_next_attempt__isnull=True)
+            | models.Q(state_next_attempt__lt=self.delivery_paused_until),
+            identity__domain=self,
+            state=FanOutStates.new,
+        ).update(state_next_attempt=self.delivery_paused_until)
+
+    def delivery_backlog(self) -> int:
+        from activities.models import FanOut, FanOutStates
+
+        return FanOut.objects.filter(
+            identity__domain=self, state=FanOutStates.new
+        ).count()
+
     def fetch_nodeinfo(self) -> NodeInfo | None:
         """
         Fetch the /NodeInfo/2.0 for the domain
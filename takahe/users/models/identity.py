@@ -1,7 +1,7 @@
 import logging
 import ssl
 from functools import cached_property, partial
-from typing import Literal, Optional
+from typing import TYPE_CHECKING, Literal, Optional
 from urllib.parse import urlparse
 
 import httpx
@@ -21,7 +21,7 @@ from core.ld import (
     media_type_from_filename,
 )
 from core.models import Config
-from core.signatures import HttpSignature, RsaKeys
+from core.signatures import HttpSignature, PreparedBody, RsaKeys, public_keys
 from core.snowflake import Snowflake
 from core.uploads import upload_namer
 from core.uris import (
@@ -46,6 +46,9 @@ from users.models.domain import Domain
 from users.models.inbox_message import InboxMessage
 from users.models.system_actor import SystemActor
 
+if TYPE_CHECKING:
+    from activities.models import Emoji
+
 logger = logging.getLogger(__name__)
 
 
@@ -1214,11 +1217,15 @@ class Identity(StatorModel):
         if self.username:
             self.username = self.username
         self.manually_approves_followers = document.get("manuallyApprovesFollowers")
+        old_public_key_id = self.public_key_id
         self.public_key = document.get("publicKey", {}).get("publicKeyPem")
         self.public_key_id = document.get("publicKey", {}).get("id")
         # Sometimes the public key PEM is in a language construct?
         if isinstance(self.public_key, dict):
             self.public_key = self.public_key["@value"]
+        # Drop any parsed copy of the key we had, in case it rotated
+        public_keys.invalidate(old_public_key_id)
+        public_keys.invalidate(self.public_key_id)
         self.icon_uri = get_first_image_url(document.get("icon", None))
         self.image_uri = get_first_image_url(document.get("image", None))
         self.discoverable = document.get("toot:discoverable", True)
@@ -1326,18 +1333,27 @@ class Identity(StatorModel):
             "acct": self.handle or "",
         }
 
+    def profile_emoji_content(self) -> str:
+        """
+        Returns the profile text that custom emoji are used from
+        """
+        metadata_value_text = (
+            " ".join([m["value"] for m in self.metadata]) if self.metadata else ""
+        )
+        return f"{self.name} {self.summary} {metadata_value_text}"
+
+    @cached_property
+    def profile_emojis(self) -> list["Emoji"]:
+        from activities.models import Emoji
+
+        return Emoji.emojis_from_content(self.profile_emoji_content(), self.domain)
+
     def to_mastodon_json(self, source=False):
-        from activities.models import Emoji, Post
+        from activities.models import Post
 
         header_image = self.local_image_url()
         missing = StaticAbsoluteUrl("img/missing.png").absolute
-
-        metadata_value_text = (
-            " ".join([m["value"] for m in self.metadata]) if self.metadata else ""
-        )
-        emojis = Emoji.emojis_from_content(
-            f"{self.name} {self.summary} {metadata_value_text}", self.domain
-        )
+        emojis = self.profile_emojis
         renderer = ContentRenderer(local=False)
         stats = self.stats or {}
         result = {
@@ -1418,7 +1434,7 @@ class Identity(StatorModel):
         self,
         method: Literal["get", "post"],
         uri: str,
-        body: dict | None = None,
+        body: dict | PreparedBody | None = None,
     ):
         """
         Performs a signed request on behalf of the System Actor.
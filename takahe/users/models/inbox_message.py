@@ -101,12 +101,15 @@ class InboxMessageStates(StateGraph):
                     # Prefer raw_document if stored; fall back to canonicalized
                     # instance.message for older deferred entries.
                     ld_doc = sig_data.get("raw_document") or instance.message
-                    LDSignature.verify_signature(ld_doc, identity.public_key)
+                    LDSignature.verify_signature(
+                        ld_doc, identity.public_key, identity.public_key_id
+                    )
                 else:
                     HttpSignature.verify_signature(
                         base64.b64decode(sig_data["signature"]),
                         sig_data["headers_string"],
                         identity.public_key,
+                        identity.public_key_id,
                     )
                 logger.debug(
                     "Inbox: Deferred %s verification succeeded for %s",
@@ -393,6 +396,8 @@ class InboxMessage(StatorModel):
 
     state = StateField(InboxMessageStates)
 
+    shard_index = True
+
     @classmethod
     def create_internal(cls, payload):
         """
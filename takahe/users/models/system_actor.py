@@ -3,7 +3,7 @@ from typing import Literal
 from django.conf import settings
 
 from core.models import Config
-from core.signatures import HttpSignature, RsaKeys
+from core.signatures import HttpSignature, PreparedBody, RsaKeys
 
 
 class SystemActor:
@@ -83,7 +83,7 @@ class SystemActor:
         self,
         method: Literal["get", "post"],
         uri: str,
-        body: dict | None = None,
+        body: dict | PreparedBody | None = None,
     ):
         """
         Performs a signed request on behalf of the System Actor.
@@ -352,7 +352,11 @@ class Inbox(FederatedView):
 
             try:
                 if signer_identity.public_key:
-                    HttpSignature.verify_request(request, signer_identity.public_key)
+                    HttpSignature.verify_request(
+                        request,
+                        signer_identity.public_key,
+                        key_id=signer_identity.public_key_id,
+                    )
                     if relay_mode:
                         relay_http_verified = True
                         logger.debug(
@@ -440,7 +444,9 @@ class Inbox(FederatedView):
                     # Verify against raw_document (original structure as signed),
                     # not the canonicalized form which may differ in N-Quads output.
                     LDSignature.verify_signature(
-                        raw_document, creator_identity.public_key
+                        raw_document,
+                        creator_identity.public_key,
+                        creator_identity.public_key_id,
                     )
                     ld_sig_verified = True
                     # For relay: only mark fully verified when relay HTTP was also
@@ -519,7 +525,9 @@ class Inbox(FederatedView):
                 try:
                     creator = urldefrag(document["signature"]["creator"]).url
                     if creator == document["actor"] and identity.public_key:
-                        LDSignature.verify_signature(raw_document, identity.public_key)
+                        LDSignature.verify_signature(
+                            raw_document, identity.public_key, identity.public_key_id
+                        )
                         ld_sig_verified = True
                 except KeyError, TypeError, VerificationError, VerificationFormatError:
                     logger.info(